@@ -1,6 +1,7 @@
 # API module initialization
 
 from . import cache
+from . import campaigns
 from . import circuit_breaker
 from . import config
 from . import customers
@@ -11,6 +12,7 @@ from . import search
 
 __all__ = [
     "cache",
+    "campaigns",
     "circuit_breaker", 
     "config",
     "customers",
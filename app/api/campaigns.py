@@ -0,0 +1,105 @@
+"""
+Campaign job API endpoints
+Score every customer in an export (no bulk cap), with resumable background jobs
+"""
+from fastapi import APIRouter, Query
+from pathlib import Path
+import logging
+
+from app.constants import (
+    CAMPAIGN_CHUNK_SIZE, CAMPAIGN_PROCESSES,
+    OFFER_MATRIX_MEMORY_BUDGET_MB, OFFER_MATRIX_TOP_K
+)
+from app.models import CampaignRequest, OfferMatrixRequest
+from app.services.campaign_runner import campaign_runner
+from app.utils.error_handling import handle_api_errors
+
+logger = logging.getLogger(__name__)
+router = APIRouter(prefix="/api/campaigns", tags=["campaigns"])
+
+# Campaign inputs are restricted to files in the data folder
+CAMPAIGN_INPUT_DIR = Path("data")
+
+
+@router.post("")
+@handle_api_errors("start campaign job")
+async def start_campaign(request: CampaignRequest):
+    """
+    Start a campaign scoring job in the background.
+    
+    Customers are streamed from the export in chunks and scored across worker
+    processes; results are written incrementally to the job folder. Poll
+    `/api/campaigns/{job_id}` for progress and the summary stats.
+    """
+    input_path = CAMPAIGN_INPUT_DIR / request.input_file
+    if Path(request.input_file).name != request.input_file or not input_path.is_file():
+        raise ValueError(f"Input file {request.input_file} not found in {CAMPAIGN_INPUT_DIR}/")
+    
+    job_id = campaign_runner.create_job(
+        str(input_path),
+        output_format=request.output_format,
+        chunk_size=request.chunk_size or CAMPAIGN_CHUNK_SIZE
+    )
+    return campaign_runner.start_job(job_id, processes=request.processes or CAMPAIGN_PROCESSES)
+
+
+@router.post("/offer-matrix")
+@handle_api_errors("start offer matrix build")
+async def start_offer_matrix(request: OfferMatrixRequest):
+    """
+    Start precomputing the offer matrix of every customer in an export against the whole inventory.
+    
+    Returns the `matrix_id` right away; the build keeps the top K offers per
+    customer and tier, per customer offer counts and per car demand, written
+    as Parquet files under the campaigns folder. Poll
+    `/api/campaigns/offer-matrix/{matrix_id}` for the status, output files
+    and summary.
+    """
+    input_path = CAMPAIGN_INPUT_DIR / request.input_file
+    if Path(request.input_file).name != request.input_file or not input_path.is_file():
+        raise ValueError(f"Input file {request.input_file} not found in {CAMPAIGN_INPUT_DIR}/")
+    
+    matrix_id = campaign_runner.create_offer_matrix(
+        str(input_path),
+        top_k=request.top_k or OFFER_MATRIX_TOP_K,
+        memory_budget_mb=request.memory_budget_mb or OFFER_MATRIX_MEMORY_BUDGET_MB
+    )
+    return campaign_runner.start_offer_matrix(matrix_id)
+
+
+@router.get("/offer-matrix")
+@handle_api_errors("list offer matrices")
+async def list_offer_matrices():
+    """List offer matrix builds, newest first"""
+    return {"matrices": campaign_runner.list_offer_matrices()}
+
+
+@router.get("/offer-matrix/{matrix_id}")
+@handle_api_errors("get offer matrix")
+async def get_offer_matrix(matrix_id: str):
+    """Get the status (and output files and summary once completed) of an offer matrix build"""
+    return campaign_runner.get_offer_matrix_status(matrix_id)
+
+
+@router.get("")
+@handle_api_errors("list campaign jobs")
+async def list_campaigns():
+    """List campaign jobs, newest first"""
+    return {"jobs": campaign_runner.list_jobs()}
+
+
+@router.get("/{job_id}")
+@handle_api_errors("get campaign job")
+async def get_campaign(job_id: str):
+    """Get progress (and summary stats once completed) of a campaign job"""
+    return campaign_runner.get_job_status(job_id)
+
+
+@router.post("/{job_id}/resume")
+@handle_api_errors("resume campaign job")
+async def resume_campaign(
+    job_id: str,
+    processes: int = Query(CAMPAIGN_PROCESSES, ge=0, le=64, description="Worker processes (0 runs in-process)")
+):
+    """Resume an interrupted or failed job from its last checkpoint"""
+    return campaign_runner.start_job(job_id, processes=processes)
@@ -33,7 +33,7 @@ async def get_customers(
     )
     
     # All business logic delegated to service layer
-    return customer_service.search_customers(
+    return await customer_service.search_customers_async(
         search_term=validated.get('search'),
         risk_filter=validated.get('risk'),
         sort_by=validated.get('sort'),
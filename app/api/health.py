@@ -1,9 +1,10 @@
 """
 Health check and metrics API endpoints
 """
-from fastapi import APIRouter
+from fastapi import APIRouter, Query
 from fastapi.responses import JSONResponse
 from datetime import datetime
+import asyncio
 import logging
 from app.utils.error_handling import handle_api_errors
 
@@ -14,83 +15,97 @@ router = APIRouter(prefix="/api", tags=["health"])
 @router.get("/health")
 @handle_api_errors("health check")
 async def health_check():
-    """Health check API endpoint with dependency checks"""
+    """
+    Health summary from in-memory state (see /health/ready).
+    
+    Never loads data; counts come from the loaded snapshots and dependency
+    results from the last deep check, if one has run.
+    """
     from app.utils.helpers import get_data_context
-    from data import database
-    from data.connection_pool import get_connection_pool
-    from data.circuit_breaker import get_redshift_breaker
+    from app.services.health_service import health_service
     from data.cache_manager import cache_manager
     
     data_ctx = get_data_context()
-    health_status = "healthy"
-    issues = []
-    
-    # Check database connections
-    db_status = database.test_database_connection()
-    
-    # Check customer data (critical)
-    if not db_status["customers"]["connected"]:
-        health_status = "unhealthy"
-        issues.append("Customer data unavailable")
-    
-    # Check Redshift (degraded if down)
-    if not db_status["inventory"]["connected"]:
-        if health_status == "healthy":
-            health_status = "degraded"
-        issues.append("Redshift connection failed")
-    
-    # Check connection pool
-    try:
-        pool = get_connection_pool()
-        pool_stats = pool.get_stats()
-        if pool_stats["available_connections"] == 0 and pool_stats["total_connections"] >= pool_stats["max_connections"]:
-            if health_status == "healthy":
-                health_status = "degraded"
-            issues.append("Connection pool exhausted")
-    except Exception as e:
-        logger.error(f"Failed to check connection pool: {e}")
-        issues.append("Connection pool check failed")
-    
-    # Check circuit breaker
-    breaker = get_redshift_breaker()
-    breaker_status = breaker.get_status()
-    if breaker_status["state"] == "open":
-        if health_status == "healthy":
-            health_status = "degraded"
-        issues.append(f"Redshift circuit breaker open (failures: {breaker_status['failure_count']})")
-    
-    # Check cache
+    readiness = health_service.readiness()
+    checks = readiness["checks"]
+    deep = health_service.last_deep_check()
+    
+    def dependency(name: str) -> str:
+        if deep is None:
+            return "unknown"
+        return "ok" if deep["dependencies"][name]["connected"] else "failed"
+    
     cache_status = cache_manager.get_status()
     
     response = {
-        "status": health_status,
+        "status": readiness["status"],
         "timestamp": datetime.now().isoformat(),
         "version": "2.0.0",
         "engine": "simple_v2",
         "mode": data_ctx["data_source"],
         "data": {
-            "customers": db_status["customers"]["count"],
-            "inventory": db_status["inventory"]["count"],
+            "customers": checks["customers"]["count"] or 0,
+            "inventory": checks["inventory"]["rows"],
+            "inventory_snapshot_version": checks["inventory"]["version"],
+            "inventory_age_seconds": checks["inventory"]["age_seconds"],
             "source": data_ctx["data_source"]
         },
         "dependencies": {
-            "customer_data": "ok" if db_status["customers"]["connected"] else "failed",
-            "redshift": "ok" if db_status["inventory"]["connected"] else "failed",
-            "connection_pool": pool_stats if 'pool_stats' in locals() else "unknown",
-            "circuit_breaker": breaker_status["state"],
+            "customer_data": dependency("customers"),
+            "redshift": dependency("inventory"),
+            "connection_pool": checks["connection_pool"],
+            "circuit_breaker": checks["circuit_breaker"],
             "cache": "enabled" if cache_status["enabled"] else "disabled"
         }
     }
     
-    if issues:
-        response["issues"] = issues
+    if readiness["issues"]:
+        response["issues"] = readiness["issues"]
     
     # Return appropriate status code
-    status_code = 200 if health_status == "healthy" else 503 if health_status == "unhealthy" else 200
+    status_code = 503 if readiness["status"] == "unhealthy" else 200
     
     return JSONResponse(response, status_code=status_code)
 
 
+@router.get("/health/live")
+async def liveness_probe():
+    """Liveness probe: constant time, no dependency checks"""
+    from app.services.health_service import health_service
+    
+    return health_service.liveness()
+
+
+@router.get("/health/ready")
+async def readiness_probe():
+    """
+    Readiness probe from in-memory state: data loaded, inventory snapshot age,
+    connection pool and circuit breaker. 503 when the instance should not
+    receive traffic.
+    """
+    from app.services.health_service import health_service
+    
+    readiness = health_service.readiness()
+    return JSONResponse(readiness, status_code=200 if readiness["ready"] else 503)
+
+
+@router.get("/health/deep")
+@router.get("/health/detailed")
+@handle_api_errors("deep health check")
+async def deep_health_check(refresh: bool = Query(False, description="Run now instead of reusing a recent result")):
+    """
+    Deep check: real connection tests against the customer data and Redshift.
+    
+    The result is cached for a few minutes (HEALTH_DEEP_CHECK_TTL_SECONDS), so
+    polling this endpoint does not load data on every call.
+    """
+    from app.services.health_service import health_service
+    
+    loop = asyncio.get_running_loop()
+    result = await loop.run_in_executor(None, health_service.deep_check, refresh)
+    return JSONResponse(result, status_code=503 if result["status"] == "unhealthy" else 200)
+
+
 @router.get("/metrics")
 @handle_api_errors("get metrics")
 async def get_metrics():
@@ -1,8 +1,10 @@
 """
 Offer generation API endpoints
 """
-from fastapi import APIRouter, HTTPException, Body
-from typing import Dict, List
+from fastapi import APIRouter, HTTPException, Body, Request, Query
+from fastapi.responses import StreamingResponse
+from sse_starlette.sse import EventSourceResponse
+from typing import Dict, List, Optional
 import asyncio
 import time
 import logging
@@ -11,15 +13,24 @@ from concurrent.futures import ThreadPoolExecutor
 from app.models import OfferRequest, BulkOfferRequest
 from app.middleware.sanitization import sanitize_customer_id, InputSanitizer
 from app.utils.error_handling import handle_api_errors
+from app.utils.serialization import (
+    FastJSONResponse, dumps, round_floats, shape_amortization, shape_offer_response
+)
 from app.utils.validation import UnifiedValidator as Validators, ValidationError
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api", tags=["offers"])
 
+# Response shaping options shared by the offer / amortization / bulk endpoints
+ROUND_DIGITS_QUERY = Query(None, ge=0, le=6, description="Round currency amounts to N decimals")
+COMPACT_QUERY = Query(False, description="Omit redundant fields (duplicates and legacy keys)")
+
 
 @router.post("/generate-offers-basic")
 @handle_api_errors("generate basic offers")
-async def generate_offers_basic(request: OfferRequest):
+async def generate_offers_basic(request: OfferRequest,
+                                round_digits: Optional[int] = ROUND_DIGITS_QUERY,
+                                compact: bool = COMPACT_QUERY):
     """
     Generate trade-up offers for a customer with standard fees.
     
@@ -40,6 +51,10 @@ async def generate_offers_basic(request: OfferRequest):
     - Financial terms (monthly payment, NPV, interest rate)
     - Payment comparison with current loan
     
+    ## Query Parameters
+    - **round_digits**: Round currency amounts (payment delta and rate keep 6 decimals)
+    - **compact**: Drop per-offer duplicates (`customer_id`, `new_monthly_payment`, GPS fee breakdown)
+    
     ## Example
     ```json
     {
@@ -57,12 +72,56 @@ async def generate_offers_basic(request: OfferRequest):
     clean_customer_id = sanitize_customer_id(request.customer_id)
     
     # All business logic delegated to service layer
-    return offer_service.generate_offers_for_customer(clean_customer_id)
+    result = await offer_service.generate_offers_for_customer_async(clean_customer_id)
+    return FastJSONResponse(shape_offer_response(result, round_digits, compact))
+
+
+@router.get("/offers/stream/{customer_id}")
+@handle_api_errors("stream offers")
+async def stream_offers(
+    customer_id: str,
+    format: str = Query("ndjson", pattern="^(ndjson|sse)$", description="ndjson or sse")
+):
+    """
+    Generate trade-up offers for a customer with standard fees, streamed as
+    each batch of cars/terms is computed instead of after the whole inventory.
+    
+    ## Formats
+    - **ndjson** (default): one JSON event per line (`application/x-ndjson`)
+    - **sse**: Server-Sent Events, usable with `EventSource`
+    
+    ## Events
+    - **start**: customer and number of cars to test
+    - **offers**: offers of one computed batch by tier, with progress
+    - **summary**: tier counts and the final NPV ordering of each tier as
+      `"<car_id>:<term>"` keys, total offers, cars tested, processing time
+    - **error**: generation failed part-way
+    
+    ## Errors
+    - 404: Customer not found (before streaming starts)
+    """
+    from app.services.offer_service import offer_service
+    
+    clean_customer_id = sanitize_customer_id(customer_id)
+    events = await offer_service.stream_offers_for_customer(clean_customer_id)
+    
+    if format == "sse":
+        async def sse_events():
+            async for event in events:
+                yield {"event": event["event"], "data": dumps(event).decode("utf-8")}
+        
+        return EventSourceResponse(sse_events())
+    
+    async def ndjson_lines():
+        async for event in events:
+            yield dumps(event) + b"\n"
+    
+    return StreamingResponse(ndjson_lines(), media_type="application/x-ndjson")
 
 
 @router.post("/generate-offers-bulk")
 @handle_api_errors("generate bulk offers")
-async def generate_offers_bulk(request: BulkOfferRequest):
+async def generate_offers_bulk(request: BulkOfferRequest, http_request: Request):
     """
     Generate offers for multiple customers in parallel.
     
@@ -72,6 +131,10 @@ async def generate_offers_bulk(request: BulkOfferRequest):
     ## Request Body
     - **customer_ids**: List of customer IDs (max 100)
     - **max_offers_per_customer**: Optional limit on offers per customer (default: 50)
+    - **priority**: `interactive` (up to 10 customers, separate capacity) or `bulk` (default)
+    
+    Requests are shared fairly between callers (`X-Tenant-ID` header, or the
+    client address) and can be cancelled via `/offers/bulk-cancel/{request_id}`.
     
     ## Response
     Returns request status with:
@@ -103,16 +166,24 @@ async def generate_offers_bulk(request: BulkOfferRequest):
     except ValidationError as e:
         raise HTTPException(status_code=400, detail=str(e))
     
+    tenant = http_request.headers.get("X-Tenant-ID") or (
+        http_request.client.host if http_request.client else "default"
+    )
+    
     # All orchestration logic delegated to service layer
     return await offer_service.generate_for_multiple_customers(
         customer_ids=validated_ids,
-        max_offers_per_customer=max_offers
+        max_offers_per_customer=max_offers,
+        tenant=InputSanitizer.sanitize_identifier(tenant, max_length=64) or "default",
+        priority=request.priority
     )
 
 
 @router.post("/generate-offers-custom")
 @handle_api_errors("generate custom offers")
-async def generate_offers_custom(request: Dict):
+async def generate_offers_custom(request: Dict,
+                                 round_digits: Optional[int] = ROUND_DIGITS_QUERY,
+                                 compact: bool = COMPACT_QUERY):
     """Generate offers with custom configuration per customer"""
     from app.services.offer_service import offer_service
     
@@ -130,48 +201,127 @@ async def generate_offers_custom(request: Dict):
     custom_config = offer_service.process_custom_config(validated_request)
     
     # Generate offers with custom config - all business logic in service
-    result = offer_service.generate_offers_for_customer(validated_request['customer_id'], custom_config)
+    result = await offer_service.generate_offers_for_customer_async(
+        validated_request['customer_id'], custom_config
+    )
     
     # Add configuration to response
     result['configuration'] = custom_config
     
-    return result
+    return FastJSONResponse(shape_offer_response(result, round_digits, compact))
+
+
+@router.get("/offers/car/{car_id}/customers")
+@handle_api_errors("match customers for car")
+async def customers_for_car(
+    car_id: str,
+    tier: Optional[List[str]] = Query(None, description="refresh, upgrade and/or max_upgrade (all if omitted)"),
+    limit: int = Query(100, ge=1, le=10000)
+):
+    """
+    Reverse matching: customers a car could be offered to with standard fees.
+    
+    Every customer the car is a logical trade-up for (newer or same year,
+    more expensive, fewer km) is matched against it in one vectorized pass
+    over precomputed features (equity, payment, rates, price windows per term).
+    
+    ## Response
+    - **customers**: ranked by lowest payment delta, each with its offers (term, tier, payment)
+    - **tier_counts**: customers with at least one offer per tier
+    - **total_customers** / **customers_evaluated**
+    
+    ## Errors
+    - 400: Unknown tier
+    - 404: Car not found
+    """
+    from app.services.offer_service import offer_service
+    
+    # Feature build and car lookup (possibly Redshift) are blocking
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, offer_service.customers_for_car, car_id, tier, limit)
 
 
 @router.post("/amortization")
 @handle_api_errors("generate amortization")
-async def amortization_api(offer: Dict = Body(...)):
+async def amortization_api(offer: Dict = Body(...),
+                           round_digits: Optional[int] = ROUND_DIGITS_QUERY,
+                           compact: bool = COMPACT_QUERY):
     """Return amortization schedule for a given offer.
 
     The *offer* param is exactly one of the objects returned by the matcher,
     containing at minimum:
       loan_amount, term, interest_rate, service_fee_amount, kavak_total_amount,
       insurance_amount, gps_monthly_fee.
+    
+    With *compact* only `table` is returned (not its `schedule` alias) and rows
+    drop the legacy English keys that duplicate the Spanish columns.
     """
     from app.services.offer_service import offer_service
     
     # All formatting logic delegated to service layer
-    return offer_service.format_amortization_for_frontend(offer)
+    data = offer_service.format_amortization_for_frontend(offer)
+    return FastJSONResponse(shape_amortization(data, round_digits, compact))
 
 
 @router.post("/amortization-table")
-async def amortization_table_api(offer: Dict = Body(...)):
+async def amortization_table_api(offer: Dict = Body(...),
+                                 round_digits: Optional[int] = ROUND_DIGITS_QUERY,
+                                 compact: bool = COMPACT_QUERY):
     """Alias for amortization API - frontend calls this endpoint"""
-    return await amortization_api(offer)
+    return await amortization_api(offer, round_digits=round_digits, compact=compact)
 
 
 @router.get("/offers/bulk-status/{request_id}")
 @handle_api_errors("get bulk status")
-async def get_bulk_status(request_id: str):
-    """Get status of a bulk offer generation request"""
+async def get_bulk_status(
+    request_id: str,
+    offset: int = Query(0, ge=0, description="First per-customer result to return"),
+    limit: Optional[int] = Query(None, ge=1, le=1000, description="Per-customer results to return"),
+    round_digits: Optional[int] = ROUND_DIGITS_QUERY
+):
+    """
+    Get status and live progress of a bulk offer generation request.
+    
+    Finished results may have been moved to disk; they are loaded transparently.
+    Use offset/limit to page through the per-customer results of large requests.
+    """
     from app.services.offer_service import offer_service
     
     # Sanitize request ID (UUIDs)
     clean_request_id = sanitize_customer_id(request_id)
     
-    status = offer_service.get_bulk_request_status(clean_request_id)
+    # Spilled results are read back (gzip + JSON decode) off the event loop
+    loop = asyncio.get_running_loop()
+    status = await loop.run_in_executor(
+        None, lambda: offer_service.get_bulk_request_status(clean_request_id, offset=offset, limit=limit)
+    )
     if not status:
         raise ValueError("Request not found")
     
-    return status
+    if round_digits is not None:
+        status = round_floats(status, round_digits)
+    return FastJSONResponse(status)
 
+
+@router.post("/offers/bulk-cancel/{request_id}")
+@handle_api_errors("cancel bulk request")
+async def cancel_bulk_request(request_id: str):
+    """Cancel a queued or running bulk offer generation request"""
+    from app.services.offer_service import offer_service
+    
+    clean_request_id = sanitize_customer_id(request_id)
+    
+    cancelled = offer_service.cancel_bulk_request(clean_request_id)
+    if cancelled is None:
+        raise ValueError("Request not found")
+    
+    return {"request_id": clean_request_id, "cancelled": cancelled}
+
+
+@router.get("/offers/bulk-queue")
+@handle_api_errors("get bulk queue stats")
+async def get_bulk_queue_stats():
+    """Queue depth, running requests and capacity per priority lane"""
+    from app.services.offer_service import offer_service
+    
+    return offer_service.get_bulk_queue_stats()
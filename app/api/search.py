@@ -1,8 +1,8 @@
 """
 Search-related API endpoints
 """
-from fastapi import APIRouter, HTTPException, Body
-from typing import Dict
+from fastapi import APIRouter, HTTPException, Body, Query
+from typing import Dict, List, Optional
 import time
 import logging
 import asyncio
@@ -20,16 +20,13 @@ router = APIRouter(prefix="/api", tags=["search"])
 async def search_everything(request: SearchRequest):
     """Universal search across customers, inventory, and offers"""
     # All search logic delegated to service layer
-    return search_service.universal_search(request.query, request.limit)
+    return search_service.universal_search(request.query, request.limit, request.offset)
 
 
 @router.post("/smart-search")
 @handle_api_errors("smart search")
 async def smart_search_api(request: Dict = Body(...)):
     """Smart search that finds minimum subsidy needed for viable offers"""
-    import multiprocessing
-    from concurrent.futures import ThreadPoolExecutor
-    
     start_time = time.time()
     
     # Get customer ID
@@ -37,15 +34,10 @@ async def smart_search_api(request: Dict = Body(...)):
     if not customer_id:
         raise HTTPException(status_code=400, detail="customer_id required")
     
-    # Create executor for this request
-    cpu_count = multiprocessing.cpu_count()
-    executor = ThreadPoolExecutor(max_workers=cpu_count)
-    
-    # All smart search logic delegated to service layer
+    # All smart search logic delegated to service layer (runs on its shared pool)
     result = await search_service.smart_search_minimum_subsidy(
         customer_id=customer_id,
-        search_params=request,
-        executor=executor
+        search_params=request
     )
     
     result['processing_time'] = round(time.time() - start_time, 2)
@@ -57,4 +49,26 @@ async def smart_search_api(request: Dict = Body(...)):
 async def get_inventory_filters():
     """Get available filter options from inventory data"""
     # All filter logic delegated to service layer
-    return search_service.get_inventory_filters()
\ No newline at end of file
+    return search_service.get_inventory_filters()
+
+
+@router.get("/inventory/facets")
+@handle_api_errors("get inventory facets")
+async def get_inventory_facets(
+    brand: Optional[List[str]] = Query(None),
+    region: Optional[List[str]] = Query(None),
+    color: Optional[List[str]] = Query(None),
+    vehicle_class: Optional[List[str]] = Query(None),
+    year_min: Optional[int] = None,
+    year_max: Optional[int] = None,
+    price_min: Optional[float] = None,
+    price_max: Optional[float] = None,
+    km_max: Optional[float] = None,
+    has_promotion: Optional[bool] = None
+):
+    """Cars matching the filters, with counts per brand, year, region, color and vehicle class"""
+    return search_service.get_inventory_facets(
+        brands=brand, regions=region, colors=color, vehicle_classes=vehicle_class,
+        year_min=year_min, year_max=year_max, price_min=price_min, price_max=price_max,
+        km_max=km_max, has_promotion=has_promotion
+    )
@@ -69,6 +69,23 @@ MAX_CUSTOMER_ID_LENGTH = 50      # Maximum length for customer IDs
 DEFAULT_RISK_PROFILE_INDEX = 25  # Fallback index for unmapped risk profiles
 MAX_RISK_PROFILE_INDEX = 25      # Maximum risk profile index
 
+# Customer list risk buckets: highest risk_profile_index in each bucket (matches the UI badges)
+CUSTOMER_RISK_BUCKETS = {"low": 5, "medium": 15, "high": float("inf")}
+
+# Customer list sort options: option -> (column, descending)
+CUSTOMER_SORT_OPTIONS = {
+    "payment-high": ("current_monthly_payment", True),
+    "payment-low": ("current_monthly_payment", False),
+    "equity-high": ("vehicle_equity", True),
+    "equity-low": ("vehicle_equity", False),
+    "balance-high": ("outstanding_balance", True),
+    "balance-low": ("outstanding_balance", False),
+    "payment": ("current_monthly_payment", True),
+    "equity": ("vehicle_equity", True),
+    "name": ("full_name", False),
+    "id": ("customer_id", False),
+}
+
 # Data Quality Constants
 MIN_VALID_CAR_PRICE = 50000      # Minimum valid car price (50k MXN)
 MAX_VALID_CAR_PRICE = 2_000_000  # Maximum valid car price (2M MXN)
@@ -79,6 +96,14 @@ MAX_VALID_MONTHLY_PAYMENT = 50000 # Maximum valid monthly payment
 VALID_LOAN_TERMS = [12, 24, 36, 48, 60, 72]  # Valid loan term options in months
 DEFAULT_LOAN_TERM = 48                        # Default loan term
 
+# Streaming offer generation: offers are flushed every N completed car/term evaluations
+OFFER_STREAM_BATCH_SIZE = int(get('offers.stream.batch_size', 60))
+
+# Smart search: cars priced per vectorized subsidy-grid batch, and the shared
+# thread pool that runs searches off the event loop
+SMART_SEARCH_BATCH_SIZE = int(get('smart_search.batch_size', 32))
+SMART_SEARCH_MAX_WORKERS = int(get('smart_search.max_workers', 2))
+
 # =============================================================================
 # SYSTEM CONSTANTS
 # =============================================================================
@@ -168,6 +193,43 @@ MAX_CONNECTIONS = int(get('database.pool.max_connections', 10))
 CONNECTION_TIMEOUT = int(get('database.pool.connection_timeout', 30))
 DATABASE_QUERY_TIMEOUT = int(get('database.pool.query_timeout', 60))
 POOL_RECYCLE_TIME = int(get('database.pool.recycle_time', 3600))
+POOL_VALIDATION_IDLE_SECONDS = int(get('database.pool.validation_idle_seconds', 30))
+POOL_KEEPALIVE_INTERVAL = int(get('database.pool.keepalive_interval', 60))
+
+# Dedicated executor for awaitable data access (sized to the pool by default)
+DB_EXECUTOR_MAX_WORKERS = int(get('database.executor.max_workers', MAX_CONNECTIONS))
+DB_EXECUTOR_MAX_QUEUE = int(get('database.executor.max_queue', 50))
+
+# Worker threads for per-customer matching in bulk offer requests
+BULK_MAX_WORKERS = int(get('system.thread_pool.size', 4))
+
+# Interactive lane of the bulk queue: small requests get separate slots and workers
+BULK_INTERACTIVE_MAX_REQUESTS = int(get('system.bulk_queue.interactive_max_requests', 2))
+BULK_INTERACTIVE_MAX_CUSTOMERS = int(get('system.bulk_queue.interactive_max_customers', 10))
+BULK_INTERACTIVE_WORKERS = int(get('system.bulk_queue.interactive_workers', 2))
+
+# Finished bulk results: in-memory budget, disk spill and retention
+BULK_RESULT_MEMORY_BUDGET_MB = int(get('system.bulk_results.memory_budget_mb', 32))
+BULK_RESULT_INLINE_MAX_KB = int(get('system.bulk_results.inline_max_kb', 256))
+BULK_RESULT_SPILL_DIR = str(get('system.bulk_results.spill_dir', 'data/bulk_results'))
+BULK_RESULT_MAX_AGE_HOURS = float(get('system.bulk_results.max_age_hours', 24))
+BULK_RESULT_MAX_DISK_MB = int(get('system.bulk_results.max_disk_mb', 512))
+BULK_RESULT_EVICT_INTERVAL = int(get('system.bulk_results.evict_interval_seconds', 300))
+
+# Health probes: readiness fails on a snapshot older than this once Redshift is
+# also unhealthy; the deep check result is reused for the TTL
+HEALTH_MAX_SNAPSHOT_AGE_SECONDS = int(get('health.max_snapshot_age_seconds', 8 * 3600))
+HEALTH_DEEP_CHECK_TTL_SECONDS = int(get('health.deep_check_ttl_seconds', 300))
+
+# Campaign jobs (score a whole customer export; see app/services/campaign_runner.py)
+CAMPAIGN_OUTPUT_DIR = str(get('campaigns.output_dir', 'data/campaigns'))
+CAMPAIGN_CHUNK_SIZE = int(get('campaigns.chunk_size', 5000))
+CAMPAIGN_PROCESSES = int(get('campaigns.processes', 4))
+
+# Offer matrix precompute (every customer x every car; see engine/offer_matrix.py):
+# tiles are sized to the memory budget, results keep the top K offers per tier
+OFFER_MATRIX_MEMORY_BUDGET_MB = int(get('campaigns.offer_matrix.memory_budget_mb', 64))
+OFFER_MATRIX_TOP_K = int(get('campaigns.offer_matrix.top_k', 5))
 
 # =============================================================================
 # CACHE MANAGEMENT CONSTANTS
@@ -178,6 +240,10 @@ DEFAULT_CACHE_TTL_HOURS = float(get('cache.default_ttl_hours', 4.0))
 INVENTORY_CACHE_TTL_HOURS = float(get('cache.inventory_ttl_hours', 4.0))
 CUSTOMER_CACHE_TTL_HOURS = float(get('cache.customer_ttl_hours', 0.5))
 
+# Incremental inventory refresh: deltas between full reloads
+INVENTORY_INCREMENTAL_REFRESH = bool(get('cache.inventory_incremental_refresh', True))
+INVENTORY_FULL_REFRESH_HOURS = float(get('cache.inventory_full_refresh_hours', 24.0))
+
 # =============================================================================
 # REQUEST TIMEOUT CONSTANTS
 # =============================================================================
@@ -2,7 +2,6 @@
 Application startup events
 """
 import logging
-from data import database
 from data.cache_manager import cache_manager
 
 logger = logging.getLogger(__name__)
@@ -27,8 +26,10 @@ async def startup_event():
     if errors:
         logger.warning(f"⚠️ Configuration validation warnings: {errors}")
     
-    # Test database connections
-    db_status = database.test_database_connection()
+    # Test database connections (also loads the inventory snapshot and
+    # becomes the first cached deep health check)
+    from app.services.health_service import health_service
+    db_status = health_service.deep_check(force=True)["dependencies"]
     
     # Check customer data
     if not db_status["customers"]["connected"]:
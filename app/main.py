@@ -11,7 +11,7 @@ from fastapi.templating import Jinja2Templates
 from app.utils.logging import setup_logging
 
 # Import routers
-from .api import cache, circuit_breaker, config, customers, health, metrics, offers, search
+from .api import cache, campaigns, circuit_breaker, config, customers, health, metrics, offers, search
 from .core.error_handlers import internal_error_handler, not_found_handler
 from .core.startup import startup_event
 from .middleware.request_id import RequestIDMiddleware
@@ -108,6 +108,7 @@ app.include_router(health.router, prefix="/v1")
 app.include_router(search.router, prefix="/v1")
 app.include_router(config.router, prefix="/v1")
 app.include_router(cache.router, prefix="/v1")
+app.include_router(campaigns.router, prefix="/v1")
 app.include_router(metrics.router, prefix="/v1")
 app.include_router(circuit_breaker.router, prefix="/v1")
 
@@ -118,6 +119,7 @@ app.include_router(health.router)
 app.include_router(search.router)
 app.include_router(config.router)
 app.include_router(cache.router)
+app.include_router(campaigns.router)
 app.include_router(metrics.router)
 app.include_router(circuit_breaker.router)
 
@@ -144,6 +146,20 @@ async def on_shutdown():
         logger.error(f"Error stopping bulk queue: {e}")
         # Don't re-raise during shutdown to allow graceful exit
     
+    # Stop the smart search executor
+    from app.services.search_service import SearchService
+    try:
+        SearchService.shutdown()
+    except Exception as e:
+        logger.error(f"Error stopping smart search executor: {e}")
+    
+    # Stop the database executor before closing the pool it uses
+    from data.async_database import async_database
+    try:
+        async_database.shutdown()
+    except Exception as e:
+        logger.error(f"Error stopping database executor: {e}")
+    
     # Close connection pool
     from data.connection_pool import close_connection_pool
     try:
@@ -39,6 +39,11 @@ class BulkOfferRequest(BaseModel):
         description="Maximum offers to generate per customer",
         example=5
     )
+    priority: str = Field(
+        default="bulk",
+        description="Queue lane: 'interactive' (small, latency-sensitive) or 'bulk'",
+        example="bulk"
+    )
 
 
 class SearchRequest(BaseModel):
@@ -54,8 +59,65 @@ class SearchRequest(BaseModel):
         description="Maximum number of results to return",
         example=20
     )
+    offset: int = Field(
+        default=0,
+        ge=0,
+        description="Number of results to skip (pagination)",
+        example=0
+    )
     filters: Optional[Dict] = Field(
         default=None,
         description="Additional filters to apply",
         example={"risk_profile": "A1", "min_equity": 50000}
     )
+
+
+class CampaignRequest(BaseModel):
+    """Request model for a campaign scoring job over a whole customer export"""
+    input_file: str = Field(
+        default="customers_data_tradeup.csv",
+        description="Customer export file name inside the data/ folder",
+        example="customers_data_tradeup.csv"
+    )
+    output_format: str = Field(
+        default="parquet",
+        description="Output part format: parquet or csv",
+        example="parquet"
+    )
+    processes: Optional[int] = Field(
+        default=None,
+        ge=1,
+        le=64,
+        description="Worker processes (default from config)",
+        example=4
+    )
+    chunk_size: Optional[int] = Field(
+        default=None,
+        ge=100,
+        le=100_000,
+        description="Customers per chunk / checkpoint (default from config)",
+        example=5000
+    )
+
+
+class OfferMatrixRequest(BaseModel):
+    """Request model for precomputing the customer x inventory offer matrix of an export"""
+    input_file: str = Field(
+        default="customers_data_tradeup.csv",
+        description="Customer export file name inside the data/ folder",
+        example="customers_data_tradeup.csv"
+    )
+    top_k: Optional[int] = Field(
+        default=None,
+        ge=1,
+        le=100,
+        description="Best offers kept per customer and tier (default from config)",
+        example=5
+    )
+    memory_budget_mb: Optional[int] = Field(
+        default=None,
+        ge=1,
+        le=4096,
+        description="Memory budget of one evaluation tile in MB (default from config)",
+        example=64
+    )
\ No newline at end of file
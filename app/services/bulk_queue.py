@@ -1,18 +1,39 @@
 """
 Bulk Request Queue Manager
 Handles queueing and rate limiting for bulk offer generation
+- Priority lanes: small interactive requests get their own slots and workers
+- Round-robin across tenants within a lane (one caller cannot starve others)
+- Event-driven dispatch (no polling), cancellation of queued/running requests
+- Finished results kept in a bounded store (memory budget + disk spill)
 """
 import asyncio
 import time
 import logging
-from typing import Dict, List, Any, Optional
-from dataclasses import dataclass
+from collections import OrderedDict, deque
+from typing import Deque, Dict, List, Any, Optional
+from dataclasses import dataclass, field
 from datetime import datetime
 from uuid import uuid4
 import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from app.constants import (
+    BULK_MAX_WORKERS,
+    BULK_INTERACTIVE_MAX_REQUESTS,
+    BULK_INTERACTIVE_MAX_CUSTOMERS,
+    BULK_INTERACTIVE_WORKERS,
+    BULK_RESULT_EVICT_INTERVAL
+)
+from app.services.result_store import BulkResultStore
+from app.utils.metrics import metrics_collector
 
 logger = logging.getLogger(__name__)
 
+LANE_INTERACTIVE = "interactive"
+LANE_BULK = "bulk"
+# Dispatch order: interactive work is always considered first
+PRIORITY_LANES = (LANE_INTERACTIVE, LANE_BULK)
+
 
 @dataclass
 class BulkRequest:
@@ -21,74 +42,143 @@ class BulkRequest:
     customer_ids: List[str]
     max_offers_per_customer: Optional[int]
     timestamp: datetime
-    status: str = "queued"  # queued, processing, completed, failed
+    status: str = "queued"  # queued, processing, completed, failed, cancelled
     result: Optional[Dict] = None
     error: Optional[str] = None
+    tenant: str = "default"
+    lane: str = LANE_BULK
+    queued_at: float = field(default_factory=time.monotonic)
+    started_at: Optional[float] = None
+    result_stored: bool = False  # final result moved to the result store
 
 
 class BulkRequestQueue:
     """
     Manages bulk offer generation requests with:
-    - Request queueing
-    - Concurrent request limiting
+    - Request queueing in priority lanes (interactive, bulk)
+    - Per-lane concurrent request limits and worker pools
+    - Round-robin fairness across tenants within a lane
+    - Cancellation of queued and running requests
     - Memory usage protection
     - Status tracking
+    - Per-customer fan-out on a bounded worker pool, with live progress
     """
     
     def __init__(self, 
                  max_concurrent_requests: int = 3,
                  max_customers_per_request: int = 50,
-                 request_timeout: int = 300):  # 5 minutes
+                 request_timeout: int = 300,  # 5 minutes
+                 max_workers: int = BULK_MAX_WORKERS,
+                 max_interactive_requests: int = BULK_INTERACTIVE_MAX_REQUESTS,
+                 interactive_workers: int = BULK_INTERACTIVE_WORKERS,
+                 max_interactive_customers: int = BULK_INTERACTIVE_MAX_CUSTOMERS,
+                 result_store: Optional[BulkResultStore] = None,
+                 evict_interval: float = BULK_RESULT_EVICT_INTERVAL):
         """
         Initialize the bulk request queue
         
         Args:
-            max_concurrent_requests: Maximum concurrent bulk requests
+            max_concurrent_requests: Maximum concurrent requests in the bulk lane
             max_customers_per_request: Maximum customers per request
             request_timeout: Timeout for each request in seconds
+            max_workers: Worker threads for per-customer matching in the bulk lane
+            max_interactive_requests: Maximum concurrent requests in the interactive lane
+            interactive_workers: Worker threads for the interactive lane
+            max_interactive_customers: Larger "interactive" requests are queued as bulk
+            result_store: Where finished results are kept (default: a new BulkResultStore)
+            evict_interval: Seconds between old-request cleanup / result eviction runs
         """
         self.max_concurrent_requests = max_concurrent_requests
         self.max_customers_per_request = max_customers_per_request
         self.request_timeout = request_timeout
+        self.max_workers = max_workers
+        self.max_interactive_customers = max_interactive_customers
+        
+        self._capacity = {LANE_INTERACTIVE: max_interactive_requests, LANE_BULK: max_concurrent_requests}
+        self._workers = {LANE_INTERACTIVE: interactive_workers, LANE_BULK: max_workers}
         
         # Request tracking
         self._requests: Dict[str, BulkRequest] = {}
-        self._request_queue = asyncio.Queue()
-        self._active_requests = 0
+        # lane -> tenant -> queued requests; tenants rotate to the back after each dispatch
+        self._lanes: Dict[str, "OrderedDict[str, Deque[BulkRequest]]"] = {
+            lane: OrderedDict() for lane in PRIORITY_LANES
+        }
+        self._active = {lane: 0 for lane in PRIORITY_LANES}
+        self._tasks: Dict[str, asyncio.Task] = {}
         self._lock = threading.Lock()
+        self._executors: Dict[str, ThreadPoolExecutor] = {}
+        self._results = result_store or BulkResultStore()
+        self.evict_interval = evict_interval
         
         # Start background processor
         self._processor_task = None
+        self._maintenance_task = None
+        self._wakeup: Optional[asyncio.Event] = None
         self._shutdown = False
     
+    @property
+    def _active_requests(self) -> int:
+        return sum(self._active.values())
+    
     async def start(self):
         """Start the background request processor"""
         if not self._processor_task:
+            self._wakeup = asyncio.Event()
             self._processor_task = asyncio.create_task(self._process_requests())
+            self._maintenance_task = asyncio.create_task(self._maintenance_loop())
             logger.info("Bulk request processor started")
     
     async def stop(self):
         """Stop the background processor"""
         self._shutdown = True
+        self._notify()
+        if self._maintenance_task:
+            self._maintenance_task.cancel()
         if self._processor_task:
             await self._processor_task
             logger.info("Bulk request processor stopped")
+        with self._lock:
+            executors, self._executors = self._executors, {}
+        for executor in executors.values():
+            executor.shutdown(wait=False)
+    
+    def _notify(self):
+        """Wake the dispatcher (new work, a freed slot, or shutdown)"""
+        if self._wakeup is not None:
+            self._wakeup.set()
+    
+    def _get_executor(self, lane: str = LANE_BULK) -> ThreadPoolExecutor:
+        executor = self._executors.get(lane)
+        if executor is None:
+            with self._lock:
+                executor = self._executors.get(lane)
+                if executor is None:
+                    executor = ThreadPoolExecutor(
+                        max_workers=self._workers[lane],
+                        thread_name_prefix=f"bulk-offers-{lane}"
+                    )
+                    self._executors[lane] = executor
+        return executor
     
     async def submit_request(self, 
                            customer_ids: List[str], 
-                           max_offers_per_customer: Optional[int] = None) -> str:
+                           max_offers_per_customer: Optional[int] = None,
+                           tenant: str = "default",
+                           priority: str = LANE_BULK) -> str:
         """
         Submit a bulk offer generation request
         
         Args:
             customer_ids: List of customer IDs
             max_offers_per_customer: Optional offer limit
+            tenant: Caller identity used for round-robin fairness
+            priority: "interactive" or "bulk" lane
             
         Returns:
             Request ID for tracking
             
         Raises:
-            ValueError: If request exceeds limits
+            ValueError: If request exceeds limits or the priority is unknown
         """
         # Validate request
         if len(customer_ids) > self.max_customers_per_request:
@@ -97,208 +187,375 @@ class BulkRequestQueue:
         if not customer_ids:
             raise ValueError("No customer IDs provided")
         
+        if priority not in PRIORITY_LANES:
+            raise ValueError(f"Unknown priority '{priority}', expected one of {PRIORITY_LANES}")
+        
+        lane = priority
+        if lane == LANE_INTERACTIVE and len(customer_ids) > self.max_interactive_customers:
+            logger.info(
+                f"Bulk request with {len(customer_ids)} customers exceeds the interactive "
+                f"limit of {self.max_interactive_customers}, queueing as bulk"
+            )
+            lane = LANE_BULK
+        
         # Create request
         request_id = str(uuid4())
         request = BulkRequest(
             request_id=request_id,
             customer_ids=customer_ids[:self.max_customers_per_request],
             max_offers_per_customer=max_offers_per_customer,
-            timestamp=datetime.now()
+            timestamp=datetime.now(),
+            tenant=tenant or "default",
+            lane=lane
         )
         
         # Store and queue request
         with self._lock:
             self._requests[request_id] = request
+            self._lanes[lane].setdefault(request.tenant, deque()).append(request)
+            depth = self._queued(lane)
         
-        await self._request_queue.put(request)
-        logger.info(f"Queued bulk request {request_id} for {len(customer_ids)} customers")
+        metrics_collector.track_bulk_submitted(lane)
+        metrics_collector.track_bulk_queue_depth(lane, depth)
+        self._notify()
+        logger.info(f"Queued bulk request {request_id} for {len(customer_ids)} customers "
+                    f"({lane} lane, tenant {request.tenant})")
         
         return request_id
     
-    def get_request_status(self, request_id: str) -> Optional[Dict]:
+    def cancel_request(self, request_id: str) -> Optional[bool]:
+        """
+        Cancel a queued or running request
+        
+        Returns:
+            True if cancelled, False if it had already finished, None if unknown
+        """
+        with self._lock:
+            request = self._requests.get(request_id)
+            if request is None:
+                return None
+            if request.status == "queued":
+                tenants = self._lanes[request.lane]
+                tenants[request.tenant].remove(request)
+                if not tenants[request.tenant]:
+                    del tenants[request.tenant]
+                depth = self._queued(request.lane)
+                task = None
+            elif request.status == "processing":
+                depth = None
+                task = self._tasks.get(request_id)
+            else:
+                return False
+            request.status = "cancelled"
+            request.error = "Cancelled by caller"
+        
+        # A running request stops at its next await; customers not yet
+        # started are dropped (see _generate_offers_safely)
+        if task is not None:
+            task.cancel()
+        if depth is not None:
+            metrics_collector.track_bulk_queue_depth(request.lane, depth)
+        metrics_collector.track_bulk_cancelled()
+        logger.info(f"Cancelled bulk request {request_id}")
+        return True
+    
+    def get_request_status(self, request_id: str, offset: int = 0,
+                           limit: Optional[int] = None) -> Optional[Dict]:
         """
         Get status of a bulk request
         
+        Blocking: a finished result may be read back from its spill file, so
+        async callers run this on an executor.
+        
         Args:
             request_id: Request ID to check
+            offset: First per-customer result to return
+            limit: Maximum per-customer results to return (None = all)
             
         Returns:
             Status dict or None if not found
         """
         with self._lock:
             request = self._requests.get(request_id)
+            if not request:
+                return None
             
-        if not request:
-            return None
+            # Results stream in while processing; hand out a consistent copy
+            result = request.result
+            if result is not None:
+                result = {**result, "results": list(result["results"]), "errors": list(result["errors"])}
+            stored = request.result_stored
+            status = request.status
+            error = request.error
+            queued_ahead = None
+            if status == "queued":
+                queued_ahead = sum(
+                    1 for queued in self._iter_queued(request.lane)
+                    if queued.queued_at < request.queued_at
+                )
+        
+        if result is None and stored:
+            # Finished: served from memory or its spill file
+            result = self._results.get(request_id)
         
+        total_results = 0
+        if result is not None:
+            total_results = len(result["results"])
+            end = offset + limit if limit is not None else None
+            result = {**result, "results": result["results"][offset:end]}
+        
+        total = len(request.customer_ids)
+        processed = result["processed"] if result else 0
+        waited = (request.started_at or time.monotonic()) - request.queued_at
         return {
             "request_id": request.request_id,
-            "status": request.status,
-            "customer_count": len(request.customer_ids),
+            "status": status,
+            "priority": request.lane,
+            "tenant": request.tenant,
+            "customer_count": total,
             "timestamp": request.timestamp.isoformat(),
-            "result": request.result,
-            "error": request.error
+            "queued_ahead": queued_ahead,
+            "wait_seconds": round(waited, 3),
+            "progress": {
+                "processed": processed,
+                "successful": result["successful"] if result else 0,
+                "failed": result["failed"] if result else 0,
+                "percent": round(100 * processed / total, 1) if total else 100.0
+            },
+            "result": result,
+            "result_expired": stored and result is None,
+            "pagination": {"offset": offset, "limit": limit, "total_results": total_results},
+            "error": error
         }
     
+    def get_queue_stats(self) -> Dict[str, Any]:
+        """Per-lane queue depth, running requests and capacity, plus result storage"""
+        with self._lock:
+            stats = {
+                lane: {
+                    "queued": self._queued(lane),
+                    "active": self._active[lane],
+                    "capacity": self._capacity[lane],
+                    "workers": self._workers[lane],
+                    "tenants_waiting": len(self._lanes[lane])
+                }
+                for lane in PRIORITY_LANES
+            }
+        stats["results"] = self._results.get_stats()
+        return stats
+    
+    def _iter_queued(self, lane: str):
+        for tenant_queue in self._lanes[lane].values():
+            yield from tenant_queue
+    
+    def _queued(self, lane: str) -> int:
+        return sum(len(tenant_queue) for tenant_queue in self._lanes[lane].values())
+    
+    def _next_request(self, lane: str) -> Optional[BulkRequest]:
+        """Pop the next request of a lane, round-robin across tenants (lock held)"""
+        tenants = self._lanes[lane]
+        if not tenants:
+            return None
+        tenant, tenant_queue = next(iter(tenants.items()))
+        request = tenant_queue.popleft()
+        if tenant_queue:
+            tenants.move_to_end(tenant)
+        else:
+            del tenants[tenant]
+        return request
+    
+    def _dispatch_ready(self):
+        """Start queued requests while their lane has free capacity"""
+        for lane in PRIORITY_LANES:
+            while True:
+                with self._lock:
+                    if self._active[lane] >= self._capacity[lane]:
+                        break
+                    request = self._next_request(lane)
+                    if request is None:
+                        break
+                    self._active[lane] += 1
+                    request.status = "processing"
+                    request.started_at = time.monotonic()
+                    depth = self._queued(lane)
+                    task = asyncio.create_task(self._process_single_request(request))
+                    self._tasks[request.request_id] = task
+                
+                metrics_collector.track_bulk_queue_wait(lane, request.started_at - request.queued_at)
+                metrics_collector.track_bulk_queue_depth(lane, depth)
+    
     async def _process_requests(self):
-        """Background task to process queued requests"""
+        """Background task: dispatch whenever work arrives or a slot frees up"""
         while not self._shutdown:
+            self._wakeup.clear()
             try:
-                # Wait for request with timeout
-                request = await asyncio.wait_for(
-                    self._request_queue.get(), 
-                    timeout=1.0
-                )
-                
-                # Check concurrent limit
-                while self._active_requests >= self.max_concurrent_requests:
-                    await asyncio.sleep(0.1)
-                
-                # Process request
-                asyncio.create_task(self._process_single_request(request))
-                
-            except asyncio.TimeoutError:
-                continue
+                self._dispatch_ready()
             except Exception as e:
                 logger.error(f"Error in request processor: {e}")
+            await self._wakeup.wait()
     
     async def _process_single_request(self, request: BulkRequest):
         """Process a single bulk request"""
-        with self._lock:
-            self._active_requests += 1
-            request.status = "processing"
-        
         try:
-            # Import here to avoid circular dependencies
-            from app.services.offer_service import offer_service
-            
             # Process with timeout
             result = await asyncio.wait_for(
                 self._generate_offers_safely(request),
                 timeout=self.request_timeout
             )
             
-            # Update request
+            # Update request (unless it was cancelled while finishing)
             with self._lock:
-                request.status = "completed"
-                request.result = result
+                if request.status == "processing":
+                    request.status = "completed"
+                    request.result = result
             
             logger.info(f"Completed bulk request {request.request_id}")
             
+        except asyncio.CancelledError:
+            logger.info(f"Bulk request {request.request_id} stopped after cancellation")
+            
         except asyncio.TimeoutError:
             with self._lock:
-                request.status = "failed"
-                request.error = f"Request timed out after {self.request_timeout} seconds"
+                if request.status == "processing":
+                    request.status = "failed"
+                    request.error = f"Request timed out after {self.request_timeout} seconds"
             logger.error(f"Bulk request {request.request_id} timed out")
             
         except Exception as e:
             with self._lock:
-                request.status = "failed"
-                request.error = str(e)
+                if request.status == "processing":
+                    request.status = "failed"
+                    request.error = str(e)
             logger.error(f"Bulk request {request.request_id} failed: {e}")
             
         finally:
             with self._lock:
-                self._active_requests -= 1
+                self._active[request.lane] -= 1
+                self._tasks.pop(request.request_id, None)
+                result = request.result
+            self._notify()
+            if result is not None:
+                # JSON encoding and a possible gzip spill are blocking; the result
+                # stays readable on the request until the store holds it
+                loop = asyncio.get_running_loop()
+                await loop.run_in_executor(None, self._results.put, request.request_id, result)
+                with self._lock:
+                    request.result = None
+                    request.result_stored = True
     
     async def _generate_offers_safely(self, request: BulkRequest) -> Dict:
         """
-        Generate offers with memory protection
+        Generate offers for every customer in the request
         
-        Instead of loading entire inventory into memory,
-        we'll process in smaller batches
+        The customer table and the inventory snapshot are loaded once for the
+        whole request; customers are then pre-filtered and matched in parallel
+        on the bounded worker pool, and each outcome is recorded on the request
+        as soon as it finishes so the status endpoint shows live progress.
         """
-        from app.services.offer_service import offer_service
+        from data.async_database import async_database
+        
+        customers = await async_database.get_customers_by_ids(request.customer_ids)
+        inventory_df = await async_database.get_inventory_dataframe()
+        
+        with self._lock:
+            request.result = {"processed": 0, "successful": 0, "failed": 0, "results": [], "errors": []}
+        
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor(request.lane)
+        futures = {}
+        for customer_id in request.customer_ids:
+            customer = customers.get(customer_id)
+            if not customer:
+                self._record_outcome(request, customer_id, error="Customer not found")
+                continue
+            future = loop.run_in_executor(executor, self._process_customer, customer, inventory_df)
+            futures[future] = customer_id
+        
+        pending = set(futures)
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for future in done:
+                    try:
+                        self._record_outcome(request, futures[future], result=future.result())
+                    except Exception as e:
+                        self._record_outcome(request, futures[future], error=str(e))
+        finally:
+            # Timed out or cancelled: customers not yet started are dropped
+            for future in pending:
+                future.cancel()
+        
+        with self._lock:
+            return {
+                **request.result,
+                "processing_time": (datetime.now() - request.timestamp).total_seconds()
+            }
+    
+    @staticmethod
+    def _process_customer(customer: Dict, inventory_df) -> Dict:
+        """Stage 1 filter + matching for one customer (runs on a worker thread)"""
         from data import database
+        from engine.basic_matcher import basic_matcher
         
-        results = []
-        errors = []
+        customer_id = customer["customer_id"]
+        inventory = database.filter_tradeup_inventory(inventory_df, customer)
+        if not inventory:
+            return {"customer_id": customer_id, "offers_count": 0, "best_npv": 0}
         
-        # Process customers in smaller batches to limit memory usage
-        batch_size = 10
-        for i in range(0, len(request.customer_ids), batch_size):
-            batch_ids = request.customer_ids[i:i + batch_size]
-            
-            for customer_id in batch_ids:
-                try:
-                    # Get customer
-                    customer = database.get_customer_by_id(customer_id)
-                    if not customer:
-                        errors.append({
-                            "customer_id": customer_id,
-                            "error": "Customer not found"
-                        })
-                        continue
-                    
-                    # Get pre-filtered inventory for this specific customer
-                    inventory = database.get_tradeup_inventory_for_customer(customer)
-                    
-                    if not inventory:
-                        results.append({
-                            "customer_id": customer_id,
-                            "offers_count": 0,
-                            "best_npv": 0
-                        })
-                        continue
-                    
-                    # Generate offers
-                    from engine.basic_matcher import basic_matcher
-                    offer_result = await asyncio.to_thread(
-                        basic_matcher.find_all_viable,
-                        customer,
-                        inventory
-                    )
-                    
-                    # Summarize results
-                    total_offers = sum(
-                        len(offers) for offers in offer_result["offers"].values()
-                    )
-                    
-                    best_npv = max(
-                        (offer.get("npv", 0) for tier_offers in offer_result["offers"].values() 
-                         for offer in tier_offers),
-                        default=0
-                    )
-                    
-                    results.append({
-                        "customer_id": customer_id,
-                        "offers_count": total_offers,
-                        "best_npv": best_npv
-                    })
-                    
-                except Exception as e:
-                    errors.append({
-                        "customer_id": customer_id,
-                        "error": str(e)
-                    })
-            
-            # Small delay between batches to prevent overload
-            await asyncio.sleep(0.1)
+        offer_result = basic_matcher.find_all_viable(customer, inventory)
         
-        return {
-            "processed": len(request.customer_ids),
-            "successful": len(results),
-            "failed": len(errors),
-            "results": results,
-            "errors": errors,
-            "processing_time": (datetime.now() - request.timestamp).total_seconds()
-        }
+        # Summarize results
+        total_offers = sum(
+            len(offers) for offers in offer_result["offers"].values()
+        )
+        best_npv = max(
+            (offer.get("npv", 0) for tier_offers in offer_result["offers"].values()
+             for offer in tier_offers),
+            default=0
+        )
+        return {"customer_id": customer_id, "offers_count": total_offers, "best_npv": best_npv}
+    
+    def _record_outcome(self, request: BulkRequest, customer_id: str,
+                        result: Optional[Dict] = None, error: Optional[str] = None):
+        """Add one customer's outcome to the request's running result"""
+        with self._lock:
+            progress = request.result
+            progress["processed"] += 1
+            if error is None:
+                progress["successful"] += 1
+                progress["results"].append(result)
+            else:
+                progress["failed"] += 1
+                progress["errors"].append({"customer_id": customer_id, "error": error})
     
-    def cleanup_old_requests(self, max_age_hours: int = 24):
-        """Remove old completed requests"""
+    def cleanup_old_requests(self, max_age_hours: float = 24):
+        """Remove old finished requests and their stored results"""
         cutoff = datetime.now().timestamp() - (max_age_hours * 3600)
         
         with self._lock:
             to_remove = []
             for request_id, request in self._requests.items():
-                if request.timestamp.timestamp() < cutoff and request.status in ["completed", "failed"]:
+                if request.timestamp.timestamp() < cutoff and request.status in ["completed", "failed", "cancelled"]:
                     to_remove.append(request_id)
             
             for request_id in to_remove:
                 del self._requests[request_id]
         
+        for request_id in to_remove:
+            self._results.delete(request_id)
+        
         if to_remove:
             logger.info(f"Cleaned up {len(to_remove)} old requests")
+    
+    async def _maintenance_loop(self):
+        """Periodically drop old requests and evict stored results"""
+        while not self._shutdown:
+            await asyncio.sleep(self.evict_interval)
+            try:
+                self.cleanup_old_requests(max_age_hours=self._results.max_age_seconds / 3600)
+                self._results.evict()
+            except Exception as e:
+                logger.error(f"Error in bulk result maintenance: {e}")
 
 
 # Global queue instance
@@ -0,0 +1,562 @@
+"""
+Campaign Job Runner
+Scores every customer in a customer export against the current inventory
+- Streams the export in fixed-size chunks (memory bounded by chunk size)
+- Shards chunks across worker processes
+- Checkpoints finished chunks to disk so an interrupted job can resume
+- Writes one output part per chunk (Parquet or CSV) plus summary stats
+Also precomputes the customer x inventory offer matrix of an export
+(engine/offer_matrix.py) for campaign planning, as a background build
+"""
+import json
+import logging
+import multiprocessing
+import os
+import re
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+from uuid import uuid4
+
+import pandas as pd
+
+from app.constants import (
+    CAMPAIGN_CHUNK_SIZE, CAMPAIGN_OUTPUT_DIR, CAMPAIGN_PROCESSES,
+    OFFER_MATRIX_MEMORY_BUDGET_MB, OFFER_MATRIX_TOP_K
+)
+
+logger = logging.getLogger(__name__)
+
+OUTPUT_FORMATS = ("parquet", "csv")
+MANIFEST_FILE = "manifest.json"
+SUMMARY_FILE = "summary.json"
+INVENTORY_FILE = "inventory.parquet"
+OFFER_MATRIX_DIR = "offer_matrix"
+
+# Matcher tier names -> output column prefixes
+TIER_KEYS = {"Refresh": "refresh", "Upgrade": "upgrade", "Max Upgrade": "max_upgrade"}
+
+RESULT_COLUMNS = [
+    "customer_id", "cars_considered",
+    "refresh_offers", "upgrade_offers", "max_upgrade_offers", "total_offers",
+    "best_npv", "best_tier", "best_car_id", "error",
+]
+
+_JOB_ID_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+
+# Inventory loaded once per worker process by _init_worker
+_worker_inventory: Optional[pd.DataFrame] = None
+
+
+def score_customer(customer: Dict, inventory_df: pd.DataFrame) -> Dict[str, Any]:
+    """Stage 1 filter + matching for one customer, reduced to one output row"""
+    from data import database
+    from engine.basic_matcher import basic_matcher
+
+    inventory = database.filter_tradeup_inventory(inventory_df, customer)
+    row = {column: None for column in RESULT_COLUMNS}
+    row.update(customer_id=customer["customer_id"], cars_considered=len(inventory))
+    for tier in TIER_KEYS.values():
+        row[f"{tier}_offers"] = 0
+    row["total_offers"] = 0
+    if not inventory:
+        return row
+
+    result = basic_matcher.find_all_viable(customer, inventory)
+    for backend_tier, tier in TIER_KEYS.items():
+        offers = result.get("offers", {}).get(backend_tier, [])
+        row[f"{tier}_offers"] = len(offers)
+        row["total_offers"] += len(offers)
+        for offer in offers:
+            npv = offer.get("npv")
+            if npv is not None and (row["best_npv"] is None or float(npv) > row["best_npv"]):
+                row.update(best_npv=float(npv), best_tier=tier, best_car_id=str(offer.get("car_id")))
+    return row
+
+
+def _init_worker(inventory_path: str):
+    """Process pool initializer: load the job's inventory snapshot once"""
+    global _worker_inventory
+    _worker_inventory = pd.read_parquet(inventory_path)
+
+
+def _score_chunk(chunk_index: int, customers_df: pd.DataFrame, part_path: str,
+                 output_format: str, scorer: Callable,
+                 inventory_df: Optional[pd.DataFrame] = None):
+    """Score one chunk of customers, write its output part and return its stats"""
+    if inventory_df is None:
+        inventory_df = _worker_inventory
+
+    rows = []
+    for customer in customers_df.to_dict("records"):
+        try:
+            rows.append(scorer(customer, inventory_df))
+        except Exception as e:
+            rows.append({"customer_id": customer.get("customer_id"), "error": f"{type(e).__name__}: {e}"})
+
+    frame = pd.DataFrame(rows, columns=RESULT_COLUMNS)
+    _write_part(frame, part_path, output_format)
+    return chunk_index, _chunk_stats(frame)
+
+
+def _write_part(frame: pd.DataFrame, part_path: str, output_format: str):
+    """Write an output part atomically (a resumed job never sees half a file)"""
+    tmp_path = f"{part_path}.tmp"
+    if output_format == "parquet":
+        frame.to_parquet(tmp_path, index=False)
+    else:
+        frame.to_csv(tmp_path, index=False)
+    os.replace(tmp_path, part_path)
+
+
+def _chunk_stats(frame: pd.DataFrame) -> Dict[str, Any]:
+    """JSON-serializable per-chunk counters, merged into the job summary"""
+    failed = frame["error"].notna()
+    scored = frame[~failed]
+    best_npv = pd.to_numeric(scored["best_npv"], errors="coerce").dropna()
+    return {
+        "customers": int(len(frame)),
+        "failed": int(failed.sum()),
+        "with_offers": int((pd.to_numeric(scored["total_offers"]) > 0).sum()),
+        "offers": {
+            tier: int(pd.to_numeric(scored[f"{tier}_offers"]).sum())
+            for tier in TIER_KEYS.values()
+        },
+        "best_npv_max": float(best_npv.max()) if not best_npv.empty else None,
+        "best_npv_sum": float(best_npv.sum()),
+        "best_npv_count": int(len(best_npv)),
+    }
+
+
+def build_summary(chunk_stats: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Combine per-chunk stats into job-level summary stats"""
+    offers = {tier: 0 for tier in TIER_KEYS.values()}
+    customers = failed = with_offers = npv_count = 0
+    npv_sum = 0.0
+    npv_max = None
+    for stats in chunk_stats:
+        customers += stats["customers"]
+        failed += stats["failed"]
+        with_offers += stats["with_offers"]
+        for tier, count in stats["offers"].items():
+            offers[tier] += count
+        npv_sum += stats["best_npv_sum"]
+        npv_count += stats["best_npv_count"]
+        if stats["best_npv_max"] is not None:
+            npv_max = stats["best_npv_max"] if npv_max is None else max(npv_max, stats["best_npv_max"])
+
+    return {
+        "customers": customers,
+        "failed": failed,
+        "customers_with_offers": with_offers,
+        "offers_per_tier": offers,
+        "total_offers": sum(offers.values()),
+        "best_npv_max": npv_max,
+        "best_npv_mean": round(npv_sum / npv_count, 2) if npv_count else None,
+    }
+
+
+class CampaignRunner:
+    """
+    Runs campaign scoring jobs.
+
+    Each job lives in ``<output_root>/<job_id>/``: ``manifest.json`` (settings
+    and the checkpoint of finished chunks), ``inventory.parquet`` (the snapshot
+    the job scores against, reused on resume), ``part-NNNNN.<format>`` output
+    parts and, once done, ``summary.json``. The manifest on disk is the source
+    of truth, so status works across restarts and from the CLI.
+    """
+
+    def __init__(self, output_root: str = CAMPAIGN_OUTPUT_DIR):
+        self.output_root = Path(output_root)
+        self._lock = threading.Lock()
+        self._running: Dict[str, threading.Thread] = {}
+
+    # ------------------------------------------------------------------
+    # Job files
+    # ------------------------------------------------------------------
+
+    def _job_dir(self, job_id: str) -> Path:
+        job_dir = self.output_root / job_id
+        if not _JOB_ID_PATTERN.match(job_id) or not (job_dir / MANIFEST_FILE).exists():
+            raise ValueError(f"Campaign job {job_id} not found")
+        return job_dir
+
+    def _load_manifest(self, job_id: str) -> Dict[str, Any]:
+        with open(self._job_dir(job_id) / MANIFEST_FILE) as f:
+            return json.load(f)
+
+    def _save_manifest(self, manifest: Dict[str, Any], job_dir: Optional[Path] = None):
+        manifest["updated_at"] = datetime.now().isoformat()
+        path = (job_dir or self.output_root / manifest["job_id"]) / MANIFEST_FILE
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def _input_fingerprint(input_path: str) -> Dict[str, Any]:
+        stat = os.stat(input_path)
+        return {"input_size": stat.st_size, "input_mtime": stat.st_mtime}
+
+    # ------------------------------------------------------------------
+    # Jobs
+    # ------------------------------------------------------------------
+
+    def create_job(self, input_path: str, output_format: str = "parquet",
+                   chunk_size: int = CAMPAIGN_CHUNK_SIZE) -> str:
+        """
+        Register a new job
+
+        Raises:
+            ValueError: Unknown output format, bad chunk size or missing input file
+        """
+        if output_format not in OUTPUT_FORMATS:
+            raise ValueError(f"Output format must be one of {OUTPUT_FORMATS}")
+        if chunk_size <= 0:
+            raise ValueError("chunk_size must be positive")
+        if not os.path.isfile(input_path):
+            raise ValueError(f"Input file {input_path} not found")
+
+        job_id = uuid4().hex
+        (self.output_root / job_id).mkdir(parents=True)
+        manifest = {
+            "job_id": job_id,
+            "input_path": str(input_path),
+            **self._input_fingerprint(input_path),
+            "output_format": output_format,
+            "chunk_size": chunk_size,
+            "status": "created",
+            "created_at": datetime.now().isoformat(),
+            "total_chunks": None,
+            "completed_chunks": {},
+            "error": None,
+        }
+        self._save_manifest(manifest)
+        logger.info(f"📋 Created campaign job {job_id} for {input_path}")
+        return job_id
+
+    def run_job(self, job_id: str, processes: int = CAMPAIGN_PROCESSES,
+                scorer: Callable = score_customer,
+                inventory_df: Optional[pd.DataFrame] = None) -> Dict[str, Any]:
+        """
+        Run (or resume) a job to completion and return its summary
+
+        Chunks already checkpointed with an existing output part are skipped.
+        At most ``2 * processes`` chunks are in flight, so memory does not grow
+        with the size of the export.
+
+        Args:
+            job_id: Job to run
+            processes: Worker processes (0 runs in this process)
+            scorer: Per-customer scoring function (must be picklable)
+            inventory_df: Inventory to score against on a fresh job
+                (default: the current inventory snapshot)
+
+        Raises:
+            ValueError: Unknown job, or the input file changed since the job was created
+        """
+        from data.loader import data_loader
+
+        manifest = self._load_manifest(job_id)
+        job_dir = self.output_root / job_id
+        if self._input_fingerprint(manifest["input_path"]) != {
+                "input_size": manifest["input_size"], "input_mtime": manifest["input_mtime"]}:
+            raise ValueError("Input file changed since the job was created; start a new job")
+
+        output_format = manifest["output_format"]
+        completed = {
+            int(index): stats for index, stats in manifest["completed_chunks"].items()
+            if self._part_path(job_dir, int(index), output_format).exists()
+        }
+        manifest["completed_chunks"] = {str(index): stats for index, stats in completed.items()}
+        manifest.update(status="running", error=None)
+        self._save_manifest(manifest)
+
+        started = time.time()
+        try:
+            inventory_path = job_dir / INVENTORY_FILE
+            if not inventory_path.exists():
+                if inventory_df is None:
+                    from data import database
+                    inventory_df = database.get_inventory_dataframe()
+                if inventory_df is None or inventory_df.empty:
+                    raise RuntimeError("No inventory available to score against")
+                inventory_df.to_parquet(inventory_path, index=False)
+            else:
+                inventory_df = pd.read_parquet(inventory_path)
+            if completed:
+                logger.info(f"⏩ Resuming campaign job {job_id}: {len(completed)} chunk(s) already done")
+
+            chunks = data_loader.iter_customers_from_csv(
+                manifest["input_path"], chunk_size=manifest["chunk_size"], skip_chunks=set(completed)
+            )
+
+            def record(result):
+                chunk_index, stats = result
+                manifest["completed_chunks"][str(chunk_index)] = stats
+                self._save_manifest(manifest)
+                logger.info(
+                    f"📦 Campaign {job_id[:8]} chunk {chunk_index}: {stats['customers']} customers, "
+                    f"{len(manifest['completed_chunks'])} chunk(s) done"
+                )
+
+            total_chunks = len(completed)
+            if processes <= 0:
+                for chunk_index, customers_df in chunks:
+                    total_chunks += 1
+                    record(_score_chunk(
+                        chunk_index, customers_df, str(self._part_path(job_dir, chunk_index, output_format)),
+                        output_format, scorer, inventory_df
+                    ))
+            else:
+                del inventory_df  # workers load their own copy
+                with ProcessPoolExecutor(
+                    max_workers=processes,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                    initargs=(str(inventory_path),)
+                ) as pool:
+                    pending = set()
+                    for chunk_index, customers_df in chunks:
+                        total_chunks += 1
+                        pending.add(pool.submit(
+                            _score_chunk, chunk_index, customers_df,
+                            str(self._part_path(job_dir, chunk_index, output_format)),
+                            output_format, scorer
+                        ))
+                        if len(pending) >= 2 * processes:
+                            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                            for future in done:
+                                record(future.result())
+                    for future in pending:
+                        record(future.result())
+
+        except Exception as e:
+            manifest.update(status="failed", error=f"{type(e).__name__}: {e}")
+            self._save_manifest(manifest)
+            logger.error(f"❌ Campaign job {job_id} failed: {e}")
+            raise
+
+        summary = build_summary(list(manifest["completed_chunks"].values()))
+        summary["processing_time"] = round(time.time() - started, 2)
+        with open(job_dir / SUMMARY_FILE, "w") as f:
+            json.dump(summary, f, indent=2)
+
+        manifest.update(status="completed", total_chunks=total_chunks)
+        self._save_manifest(manifest)
+        logger.info(
+            f"✅ Campaign job {job_id} completed: {summary['customers']} customers, "
+            f"{summary['total_offers']} offers"
+        )
+        return summary
+
+    @staticmethod
+    def _part_path(job_dir: Path, chunk_index: int, output_format: str) -> Path:
+        return job_dir / f"part-{chunk_index:05d}.{output_format}"
+
+    def start_job(self, job_id: str, processes: int = CAMPAIGN_PROCESSES) -> Dict[str, Any]:
+        """
+        Run a job on a background thread (used by the API)
+
+        Raises:
+            ValueError: Unknown job, or the job is already running
+        """
+        self._job_dir(job_id)
+        with self._lock:
+            thread = self._running.get(job_id)
+            if thread is not None and thread.is_alive():
+                raise ValueError(f"Campaign job {job_id} is already running")
+
+            def run():
+                try:
+                    self.run_job(job_id, processes=processes)
+                except Exception:
+                    pass  # recorded in the manifest
+                finally:
+                    with self._lock:
+                        self._running.pop(job_id, None)
+
+            thread = threading.Thread(target=run, name=f"campaign-{job_id[:8]}", daemon=True)
+            self._running[job_id] = thread
+            thread.start()
+        return self.get_job_status(job_id)
+
+    def get_job_status(self, job_id: str) -> Dict[str, Any]:
+        """Job settings, progress and (when completed) summary"""
+        manifest = self._load_manifest(job_id)
+        chunk_stats = list(manifest.pop("completed_chunks").values())
+        manifest["progress"] = {
+            "chunks_done": len(chunk_stats),
+            "customers_processed": sum(stats["customers"] for stats in chunk_stats),
+        }
+        summary_path = self.output_root / job_id / SUMMARY_FILE
+        if manifest["status"] == "completed" and summary_path.exists():
+            with open(summary_path) as f:
+                manifest["summary"] = json.load(f)
+        return manifest
+
+    def list_jobs(self) -> List[Dict[str, Any]]:
+        """Status of every job under the output root, newest first"""
+        if not self.output_root.exists():
+            return []
+        jobs = []
+        for job_dir in self.output_root.iterdir():
+            if _JOB_ID_PATTERN.match(job_dir.name) and (job_dir / MANIFEST_FILE).exists():
+                jobs.append(self.get_job_status(job_dir.name))
+        return sorted(jobs, key=lambda job: job["created_at"], reverse=True)
+
+    # ------------------------------------------------------------------
+    # Offer matrix
+    # ------------------------------------------------------------------
+
+    def _matrix_dir(self, matrix_id: str) -> Path:
+        matrix_dir = self.output_root / OFFER_MATRIX_DIR / matrix_id
+        if not _JOB_ID_PATTERN.match(matrix_id) or not (matrix_dir / MANIFEST_FILE).exists():
+            raise ValueError(f"Offer matrix {matrix_id} not found")
+        return matrix_dir
+
+    def create_offer_matrix(self, input_path: str, top_k: int = OFFER_MATRIX_TOP_K,
+                            memory_budget_mb: float = OFFER_MATRIX_MEMORY_BUDGET_MB,
+                            chunk_size: int = CAMPAIGN_CHUNK_SIZE) -> str:
+        """
+        Register a new offer matrix build
+
+        Raises:
+            ValueError: Missing input file or invalid top_k / memory budget / chunk size
+        """
+        if top_k <= 0:
+            raise ValueError("top_k must be positive")
+        if memory_budget_mb <= 0:
+            raise ValueError("memory_budget_mb must be positive")
+        if chunk_size <= 0:
+            raise ValueError("chunk_size must be positive")
+        if not os.path.isfile(input_path):
+            raise ValueError(f"Input file {input_path} not found")
+
+        matrix_id = uuid4().hex
+        matrix_dir = self.output_root / OFFER_MATRIX_DIR / matrix_id
+        matrix_dir.mkdir(parents=True)
+        manifest = {
+            "matrix_id": matrix_id,
+            "input_path": str(input_path),
+            "top_k": top_k,
+            "memory_budget_mb": memory_budget_mb,
+            "chunk_size": chunk_size,
+            "status": "created",
+            "created_at": datetime.now().isoformat(),
+            "output_dir": str(matrix_dir),
+            "files": None,
+            "error": None,
+        }
+        self._save_manifest(manifest, matrix_dir)
+        logger.info(f"📋 Created offer matrix {matrix_id} for {input_path}")
+        return matrix_id
+
+    def run_offer_matrix(self, matrix_id: str,
+                         inventory_df: Optional[pd.DataFrame] = None) -> Dict[str, Any]:
+        """
+        Build an offer matrix to completion and return its summary
+
+        Customers are streamed in chunks and folded into one OfferMatrix, so
+        memory is one chunk plus the tile budget. Unlike scoring jobs there is
+        no Stage 1 trade-up filter: every car priced above the customer's
+        current car is considered. Results are written as Parquet files (plus
+        ``summary.json``) next to the manifest in
+        ``<output_root>/offer_matrix/<matrix_id>/``.
+
+        Raises:
+            ValueError: Unknown matrix
+        """
+        from data.loader import data_loader
+        from engine.offer_matrix import OfferMatrix
+
+        matrix_dir = self._matrix_dir(matrix_id)
+        with open(matrix_dir / MANIFEST_FILE) as f:
+            manifest = json.load(f)
+        manifest.update(status="running", error=None)
+        self._save_manifest(manifest, matrix_dir)
+
+        try:
+            if inventory_df is None:
+                from data import database
+                inventory_df = database.get_inventory_dataframe()
+            if inventory_df is None or inventory_df.empty:
+                raise RuntimeError("No inventory available to score against")
+
+            matrix = OfferMatrix(inventory_df, top_k=manifest["top_k"],
+                                 memory_budget_mb=manifest["memory_budget_mb"])
+            for _, customers_df in data_loader.iter_customers_from_csv(
+                    manifest["input_path"], chunk_size=manifest["chunk_size"]):
+                matrix.add_customers(customers_df)
+            files = matrix.write(str(matrix_dir))
+        except Exception as e:
+            manifest.update(status="failed", error=f"{type(e).__name__}: {e}")
+            self._save_manifest(manifest, matrix_dir)
+            logger.error(f"❌ Offer matrix {matrix_id} failed: {e}")
+            raise
+
+        summary = matrix.summary()
+        manifest.update(status="completed", files=files)
+        self._save_manifest(manifest, matrix_dir)
+        logger.info(
+            f"✅ Offer matrix {matrix_id} built: {summary['customers']} customers x {summary['cars']} cars, "
+            f"{summary['total_offers']} offers in {summary['processing_time']}s"
+        )
+        return summary
+
+    def start_offer_matrix(self, matrix_id: str) -> Dict[str, Any]:
+        """
+        Build an offer matrix on a background thread (used by the API)
+
+        Raises:
+            ValueError: Unknown matrix, or the build is already running
+        """
+        self._matrix_dir(matrix_id)
+        with self._lock:
+            thread = self._running.get(matrix_id)
+            if thread is not None and thread.is_alive():
+                raise ValueError(f"Offer matrix {matrix_id} is already running")
+
+            def run():
+                try:
+                    self.run_offer_matrix(matrix_id)
+                except Exception:
+                    pass  # recorded in the manifest
+                finally:
+                    with self._lock:
+                        self._running.pop(matrix_id, None)
+
+            thread = threading.Thread(target=run, name=f"offer-matrix-{matrix_id[:8]}", daemon=True)
+            self._running[matrix_id] = thread
+            thread.start()
+        return self.get_offer_matrix_status(matrix_id)
+
+    def get_offer_matrix_status(self, matrix_id: str) -> Dict[str, Any]:
+        """Offer matrix settings, status and (when completed) output files and summary"""
+        matrix_dir = self._matrix_dir(matrix_id)
+        with open(matrix_dir / MANIFEST_FILE) as f:
+            manifest = json.load(f)
+        summary_path = matrix_dir / SUMMARY_FILE
+        if manifest["status"] == "completed" and summary_path.exists():
+            with open(summary_path) as f:
+                manifest["summary"] = json.load(f)
+        return manifest
+
+    def list_offer_matrices(self) -> List[Dict[str, Any]]:
+        """Status of every offer matrix under the output root, newest first"""
+        matrices_root = self.output_root / OFFER_MATRIX_DIR
+        if not matrices_root.exists():
+            return []
+        matrices = []
+        for matrix_dir in matrices_root.iterdir():
+            if _JOB_ID_PATTERN.match(matrix_dir.name) and (matrix_dir / MANIFEST_FILE).exists():
+                matrices.append(self.get_offer_matrix_status(matrix_dir.name))
+        return sorted(matrices, key=lambda matrix: matrix["created_at"], reverse=True)
+
+
+# Global runner instance
+campaign_runner = CampaignRunner()
@@ -4,6 +4,7 @@ Customer Service - Centralized business logic for customer operations
 import logging
 from typing import Dict, List, Optional, Tuple, Any
 from data import database
+from data.async_database import async_database
 
 logger = logging.getLogger(__name__)
 
@@ -26,8 +27,8 @@ class CustomerService:
         
         Args:
             search_term: Search query
-            risk_filter: Risk level filter (low/medium/high)
-            sort_by: Sort criteria
+            risk_filter: Risk level filter (low/medium/high) or risk profile
+            sort_by: Sort criteria (applied to the whole result set before paging)
             page: Page number (1-based)
             limit: Results per page
             
@@ -37,23 +38,41 @@ class CustomerService:
         # Calculate offset
         offset = (page - 1) * limit
         
-        # Get customers from database with risk filtering at DB level
+        # Filter, sort and paginate at DB level
         customers, total = database.search_customers_with_filters(
             search_term=search_term,
             risk_filter=risk_filter,
             limit=limit,
-            offset=offset
+            offset=offset,
+            sort_by=sort_by
         )
         
-        # Apply sorting if specified
-        if sort_by and customers:
-            if sort_by == "payment-high":
-                customers.sort(key=lambda x: x.get("current_monthly_payment", 0), reverse=True)
-            elif sort_by == "payment-low":
-                customers.sort(key=lambda x: x.get("current_monthly_payment", 0))
-            elif sort_by == "equity-high":
-                customers.sort(key=lambda x: x.get("vehicle_equity", 0), reverse=True)
+        return CustomerService._build_search_page(customers, total, page, limit)
+    
+    @staticmethod
+    async def search_customers_async(
+        search_term: Optional[str] = None,
+        risk_filter: Optional[str] = None,
+        sort_by: Optional[str] = None,
+        page: int = 1,
+        limit: int = 20
+    ) -> Dict[str, Any]:
+        """Awaitable search_customers (data access on the database executor)."""
+        offset = (page - 1) * limit
         
+        customers, total = await async_database.search_customers_with_filters(
+            search_term=search_term,
+            risk_filter=risk_filter,
+            limit=limit,
+            offset=offset,
+            sort_by=sort_by
+        )
+        
+        return CustomerService._build_search_page(customers, total, page, limit)
+    
+    @staticmethod
+    def _build_search_page(customers: List[Dict], total: int, page: int, limit: int) -> Dict[str, Any]:
+        """Attach pagination info to one (already sorted) page of results."""
         # Calculate pagination
         total_pages = (total + limit - 1) // limit if limit > 0 else 1
         
@@ -87,8 +106,6 @@ class CustomerService:
         Returns:
             Dict with calculated statistics
         """
-        # Get database status
-        db_status = database.test_database_connection()
         inventory_stats = database.get_inventory_stats()
         
         # Calculate real customer statistics
@@ -97,11 +114,15 @@ class CustomerService:
         # Calculate offer generation stats (cached for performance)
         offer_stats = database.get_offer_generation_stats()
         
+        # Counts from the data already loaded above (no reload just to count rows)
+        data_status = database.get_data_status()
+        
         return {
-            "total_customers": db_status["customers"]["count"],
-            "total_inventory": db_status["inventory"]["count"],
+            "total_customers": data_status["customers"]["count"] or 0,
+            "total_inventory": data_status["inventory"]["rows"],
             "avg_payment": customer_stats.get("avg_payment", 0),
             "avg_equity": customer_stats.get("avg_equity", 0),
+            "active_customers": customer_stats.get("total_active", 0),
             "avg_price": inventory_stats["average_price"],
             "brands": inventory_stats["brands"],
             "conversion_rate": offer_stats.get("conversion_rate", 0),
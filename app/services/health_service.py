@@ -0,0 +1,148 @@
+"""
+Health Service - Tiered health checks
+- Liveness: constant time, no dependencies
+- Readiness: in-memory state only (snapshot age, connection pool, circuit breaker)
+- Deep check: real connection tests, run rarely and cached
+"""
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from app.constants import HEALTH_MAX_SNAPSHOT_AGE_SECONDS, HEALTH_DEEP_CHECK_TTL_SECONDS
+from data import database
+from data.circuit_breaker import get_redshift_breaker
+from data.connection_pool import peek_connection_pool
+
+logger = logging.getLogger(__name__)
+
+
+class HealthService:
+    """
+    Health checks for probes and the health endpoints.
+
+    Only the deep check touches the data sources; liveness and readiness are
+    cheap enough to be polled every few seconds.
+    """
+
+    def __init__(self,
+                 max_snapshot_age_seconds: float = HEALTH_MAX_SNAPSHOT_AGE_SECONDS,
+                 deep_check_ttl_seconds: float = HEALTH_DEEP_CHECK_TTL_SECONDS):
+        self.max_snapshot_age_seconds = max_snapshot_age_seconds
+        self.deep_check_ttl_seconds = deep_check_ttl_seconds
+        self.started_at = time.monotonic()
+        self._deep_lock = threading.Lock()
+        self._deep_result: Optional[Dict[str, Any]] = None
+        self._deep_checked_at: Optional[float] = None
+
+    def liveness(self) -> Dict[str, Any]:
+        """The process is up and serving requests"""
+        return {
+            "status": "alive",
+            "uptime_seconds": round(time.monotonic() - self.started_at, 1)
+        }
+
+    def readiness(self) -> Dict[str, Any]:
+        """
+        Whether this instance can serve traffic, from in-memory state only.
+
+        Not ready while customers or the inventory snapshot are not loaded, or
+        when the snapshot is stale and Redshift is failing (it cannot catch
+        up). A stale snapshot, open breaker or pool trouble alone only mark
+        the instance degraded.
+
+        Returns:
+            Dict with ready flag, status (healthy/degraded/unhealthy), issues and check details
+        """
+        issues: List[str] = []
+        degraded: List[str] = []
+
+        data_status = database.get_data_status()
+        inventory = data_status["inventory"]
+        customers = data_status["customers"]
+
+        if not customers["loaded"]:
+            issues.append("Customer data not loaded")
+        if not inventory["loaded"]:
+            issues.append("Inventory snapshot not loaded")
+
+        breaker_status = get_redshift_breaker().get_status()
+        redshift_failing = breaker_status["state"] == "open"
+        if breaker_status["state"] != "closed":
+            degraded.append(
+                f"Redshift circuit breaker {breaker_status['state']} (failures: {breaker_status['failure_count']})"
+            )
+
+        pool = peek_connection_pool()
+        pool_stats = pool.get_stats() if pool is not None else None
+        if pool_stats:
+            if pool_stats["in_backoff"]:
+                redshift_failing = True
+                degraded.append("Connection pool backing off after failures")
+            if pool_stats["available_connections"] == 0 and pool_stats["total_connections"] >= pool_stats["max_connections"]:
+                degraded.append("Connection pool exhausted")
+
+        age = inventory.get("age_seconds")
+        stale = age is not None and age > self.max_snapshot_age_seconds
+        if stale:
+            message = f"Inventory snapshot is {age / 3600:.1f}h old"
+            if redshift_failing:
+                issues.append(f"{message} and Redshift is failing")
+            else:
+                degraded.append(message)
+
+        ready = not issues
+        return {
+            "ready": ready,
+            "status": "unhealthy" if not ready else "degraded" if degraded else "healthy",
+            "issues": issues + degraded,
+            "checks": {
+                "customers": customers,
+                "inventory": inventory,
+                "circuit_breaker": breaker_status["state"],
+                "connection_pool": pool_stats if pool_stats is not None else "not initialized"
+            }
+        }
+
+    def deep_check(self, force: bool = False) -> Dict[str, Any]:
+        """
+        Full connection test (customer CSV, Redshift), reused for deep_check_ttl_seconds.
+
+        Concurrent callers wait for the check in progress instead of starting another.
+        Blocking: run it off the event loop.
+        """
+        with self._deep_lock:
+            fresh = (
+                self._deep_checked_at is not None
+                and time.monotonic() - self._deep_checked_at < self.deep_check_ttl_seconds
+            )
+            ran = force or not fresh
+            if ran:
+                start = time.perf_counter()
+                db_status = database.test_database_connection()
+                self._deep_result = {
+                    "status": (
+                        "unhealthy" if not db_status["customers"]["connected"]
+                        else "degraded" if not db_status["inventory"]["connected"]
+                        else "healthy"
+                    ),
+                    "checked_at": datetime.now().isoformat(),
+                    "duration_seconds": round(time.perf_counter() - start, 3),
+                    "dependencies": db_status
+                }
+                self._deep_checked_at = time.monotonic()
+                logger.info(f"🩺 Deep health check: {self._deep_result['status']}")
+            return {
+                **self._deep_result,
+                "cached": not ran,
+                "age_seconds": round(time.monotonic() - self._deep_checked_at, 1)
+            }
+
+    def last_deep_check(self) -> Optional[Dict[str, Any]]:
+        """Most recent deep check result, without running or waiting for one"""
+        return self._deep_result
+
+
+# Create singleton instance
+health_service = HealthService()
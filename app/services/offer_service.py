@@ -2,12 +2,17 @@
 Offer Service - Centralized business logic for offer generation and management
 This keeps routes clean and focused on HTTP/rendering concerns only.
 """
+import asyncio
 import logging
-from typing import Dict, List, Optional, Any
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional
 from engine.basic_matcher import basic_matcher
 from engine.calculator import generate_amortization_table
+from engine.reverse_matcher import normalize_tiers, reverse_matcher
 from data import database
+from data.async_database import async_database
 from app.utils.validation import UnifiedValidator as DataValidator, DataIntegrityError
+from app.utils.exceptions import InvalidOfferParametersError
 
 logger = logging.getLogger(__name__)
 
@@ -56,14 +61,65 @@ class OfferService:
         
         logger.info(f"✅ Stage 1 complete: {len(inventory_records)} potential trade-ups found")
         
-        # Stage 2: Apply financial matching and business rules
+        return OfferService._match_offers(customer, inventory_records, custom_config)
+    
+    @staticmethod
+    async def generate_offers_for_customer_async(customer_id: str, custom_config: Optional[Dict] = None) -> Dict[str, Any]:
+        """
+        Awaitable generate_offers_for_customer.
+        
+        Data access runs on the bounded database executor and matching on the
+        default executor, so the event loop stays free for other requests.
+        """
+        customer = await async_database.get_customer_by_id(customer_id)
+        if not customer:
+            raise ValueError(f"Customer {customer_id} not found")
+        
+        logger.info(f"🎯 Stage 1: Pre-filtering inventory for customer {customer_id}")
+        inventory_records = await async_database.get_tradeup_inventory_for_customer(customer)
+        
+        if not inventory_records:
+            logger.warning(f"⚠️ No logical trade-up candidates found for customer {customer_id}")
+            return {
+                "offers": {"refresh": [], "upgrade": [], "max_upgrade": []},
+                "customer": customer,
+                "stats": {"total_evaluated": 0, "total_viable": 0}
+            }
+        
+        logger.info(f"✅ Stage 1 complete: {len(inventory_records)} potential trade-ups found")
+        
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            None, OfferService._match_offers, customer, inventory_records, custom_config
+        )
+    
+    @staticmethod
+    def _match_offers(customer: Dict, inventory_records: List[Dict],
+                      custom_config: Optional[Dict] = None) -> Dict[str, Any]:
+        """Stage 2 of offer generation: financial matching and offer validation."""
+        customer_id = customer.get("customer_id")
         logger.info(f"🎯 Stage 2: Applying financial matching for {customer_id}")
         if custom_config:
             result = basic_matcher.find_all_viable(customer, inventory_records, custom_config)
         else:
             result = basic_matcher.find_all_viable(customer, inventory_records)
         
-        # Validate all offers in the result
+        validated_offers = OfferService._validate_tier_offers(result.get("offers", {}))
+        
+        # Return result with lowercase keys for frontend compatibility
+        return {
+            "offers": validated_offers,
+            "total_offers": result.get("total_offers", 0),
+            "cars_tested": result.get("cars_tested", 0),
+            "processing_time": result.get("processing_time", 0),
+            "fees_used": result.get("fees_used", {}),
+            "message": result.get("message", ""),
+            "customer": customer
+        }
+    
+    @staticmethod
+    def _validate_tier_offers(offers_by_tier: Dict[str, List[Dict]]) -> Dict[str, List[Dict]]:
+        """Validate matcher offers and map its tier names to the frontend keys."""
         # Map from basic_matcher keys to frontend keys
         tier_mapping = {
             "Refresh": "refresh",
@@ -73,7 +129,7 @@ class OfferService:
         
         validated_offers = {"refresh": [], "upgrade": [], "max_upgrade": []}
         for backend_tier, frontend_tier in tier_mapping.items():
-            for offer in result.get("offers", {}).get(backend_tier, []):
+            for offer in offers_by_tier.get(backend_tier, []):
                 try:
                     validated_offer = DataValidator.validate_offer(offer)
                     validated_offers[frontend_tier].append(validated_offer)
@@ -81,16 +137,92 @@ class OfferService:
                     logger.warning(f"Invalid offer skipped: {e}")
                     # Temporarily add the offer anyway to debug
                     validated_offers[frontend_tier].append(offer)
+        return validated_offers
+    
+    @staticmethod
+    async def stream_offers_for_customer(customer_id: str,
+                                         custom_config: Optional[Dict] = None) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Streaming generate_offers_for_customer.
         
-        # Return result with lowercase keys for frontend compatibility
-        return {
-            "offers": validated_offers,
-            "total_offers": result.get("total_offers", 0),
-            "cars_tested": result.get("cars_tested", 0),
-            "processing_time": result.get("processing_time", 0),
-            "fees_used": result.get("fees_used", {}),
-            "message": result.get("message", ""),
-            "customer": customer
+        Stage 1 runs before returning, so an unknown customer raises here
+        (and can still become a 404); Stage 2 is returned as an async iterator
+        of events:
+        
+        - ``start``: customer and number of candidate cars
+        - ``offers``: viable offers of one computed car/term batch, by tier
+          (each batch sorted by NPV), with progress counters
+        - ``summary``: tier counts and the final per-tier ordering as offer
+          keys (``"<car_id>:<term>"``), plus the usual result metadata
+        - ``error``: matching failed part-way; no summary follows
+        
+        Raises:
+            ValueError: If customer not found
+        """
+        customer = await async_database.get_customer_by_id(customer_id)
+        if not customer:
+            raise ValueError(f"Customer {customer_id} not found")
+        
+        logger.info(f"🎯 Stage 1: Pre-filtering inventory for customer {customer_id}")
+        inventory_records = await async_database.get_tradeup_inventory_for_customer(customer)
+        logger.info(f"✅ Stage 1 complete: {len(inventory_records)} potential trade-ups found")
+        
+        return OfferService._offer_events(customer, inventory_records, custom_config)
+    
+    @staticmethod
+    async def _offer_events(customer: Dict, inventory_records: List[Dict],
+                            custom_config: Optional[Dict] = None) -> AsyncIterator[Dict[str, Any]]:
+        """Stage 2 of streaming offer generation (see stream_offers_for_customer)."""
+        start_time = time.time()
+        logger.info(f"🎯 Stage 2: Streaming financial matching for {customer.get('customer_id')}")
+        cars = basic_matcher.eligible_cars(customer, inventory_records)
+        yield {"event": "start", "customer": customer, "cars_to_test": len(cars)}
+        
+        loop = asyncio.get_running_loop()
+        batches = basic_matcher.iter_offer_batches(customer, cars, custom_config)
+        all_offers = []
+        pending = None
+        try:
+            while True:
+                # Each batch is computed off the event loop; None marks the end
+                pending = loop.run_in_executor(None, next, batches, None)
+                item = await pending
+                if item is None:
+                    break
+                batch, completed, total = item
+                if not batch:
+                    continue
+                all_offers.extend(batch)
+                yield {
+                    "event": "offers",
+                    "offers": OfferService._validate_tier_offers(basic_matcher.organize_offers(batch)),
+                    "progress": {"completed": completed, "total": total}
+                }
+        except Exception as e:
+            logger.error(f"❌ Streaming offer generation failed for {customer.get('customer_id')}: {e}")
+            yield {"event": "error", "detail": str(e)}
+            return
+        finally:
+            # Client gone or error: stop the remaining evaluations (once the
+            # batch being computed, if any, has returned)
+            if pending is not None and not pending.done():
+                pending.add_done_callback(lambda _: batches.close())
+            else:
+                batches.close()
+        
+        organized = OfferService._validate_tier_offers(basic_matcher.organize_offers(all_offers))
+        yield {
+            "event": "summary",
+            "tier_counts": {tier: len(offers) for tier, offers in organized.items()},
+            "order": {
+                tier: [f"{offer.get('car_id')}:{offer.get('term')}" for offer in offers]
+                for tier, offers in organized.items()
+            },
+            "total_offers": sum(len(offers) for offers in organized.values()),
+            "cars_tested": len(cars),
+            "processing_time": round(time.time() - start_time, 2),
+            "fees_used": basic_matcher.resolve_fees(custom_config),
+            "message": f"Showing all viable offers with {'custom' if custom_config else 'standard'} fees"
         }
     
     @staticmethod
@@ -142,6 +274,37 @@ class OfferService:
         
         return None
     
+    @staticmethod
+    def customers_for_car(car_id: str, tiers: Optional[List[str]] = None,
+                          limit: Optional[int] = 100) -> Dict[str, Any]:
+        """
+        Customers a car could be offered to (standard fees), one vectorized
+        pass over features cached per version of the customer data.
+        
+        Args:
+            car_id: Car identifier
+            tiers: Tiers to match ("refresh", "upgrade", "max_upgrade"); all if None
+            limit: Maximum customers returned (ranked by lowest payment delta)
+            
+        Returns:
+            Dict with the car, matching customers and their offers, and counts per tier
+            
+        Raises:
+            InvalidOfferParametersError: If a tier name is unknown
+            ValueError: If the car is not found
+        """
+        try:
+            tiers = normalize_tiers(tiers)
+        except ValueError as e:
+            raise InvalidOfferParametersError("tiers", tiers, str(e))
+        
+        car = database.get_car_by_id(car_id)
+        if not car:
+            raise ValueError(f"Car {car_id} not found in inventory")
+        
+        index = database.get_customer_index()
+        return reverse_matcher.customers_for_car(car, index.frame, index.version, tiers, limit)
+    
     @staticmethod
     def generate_amortization_for_offer(customer_id: str, car_id: str) -> Dict[str, Any]:
         """
@@ -280,7 +443,9 @@ class OfferService:
     @staticmethod
     async def generate_for_multiple_customers(
         customer_ids: List[str], 
-        max_offers_per_customer: Optional[int] = None
+        max_offers_per_customer: Optional[int] = None,
+        tenant: str = "default",
+        priority: str = "bulk"
     ) -> Dict[str, Any]:
         """
         Generate offers for multiple customers using safe queued processing.
@@ -291,6 +456,8 @@ class OfferService:
         Args:
             customer_ids: List of customer identifiers (max 50)
             max_offers_per_customer: Optional limit per customer
+            tenant: Caller identity (fair share within the queue lane)
+            priority: "interactive" or "bulk" queue lane
             
         Returns:
             Dict with request_id for tracking
@@ -303,7 +470,9 @@ class OfferService:
         # Submit request
         request_id = await queue.submit_request(
             customer_ids=customer_ids,
-            max_offers_per_customer=max_offers_per_customer
+            max_offers_per_customer=max_offers_per_customer,
+            tenant=tenant,
+            priority=priority
         )
         
         return {
@@ -314,12 +483,15 @@ class OfferService:
         }
     
     @staticmethod
-    def get_bulk_request_status(request_id: str) -> Optional[Dict]:
+    def get_bulk_request_status(request_id: str, offset: int = 0,
+                                limit: Optional[int] = None) -> Optional[Dict]:
         """
         Get status of a bulk offer generation request
         
         Args:
             request_id: Request ID to check
+            offset: First per-customer result to return
+            limit: Maximum per-customer results to return (None = all)
             
         Returns:
             Status dict or None if not found
@@ -327,7 +499,26 @@ class OfferService:
         from .bulk_queue import get_bulk_queue
         
         queue = get_bulk_queue()
-        return queue.get_request_status(request_id)
+        return queue.get_request_status(request_id, offset=offset, limit=limit)
+    
+    @staticmethod
+    def cancel_bulk_request(request_id: str) -> Optional[bool]:
+        """
+        Cancel a queued or running bulk request
+        
+        Returns:
+            True if cancelled, False if already finished, None if not found
+        """
+        from .bulk_queue import get_bulk_queue
+        
+        return get_bulk_queue().cancel_request(request_id)
+    
+    @staticmethod
+    def get_bulk_queue_stats() -> Dict[str, Any]:
+        """Per-lane bulk queue depth and capacity"""
+        from .bulk_queue import get_bulk_queue
+        
+        return get_bulk_queue().get_queue_stats()
 
 
 # Create singleton instance
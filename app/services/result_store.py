@@ -0,0 +1,174 @@
+"""
+Bulk Result Store
+Bounded retention for finished bulk request results
+- Small recent results stay in memory under a byte budget (LRU)
+- Large results, and whatever overflows the budget, spill to gzip files on disk
+- Age- and size-based eviction, run on a schedule by the bulk queue
+"""
+import gzip
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from app.constants import (
+    BULK_RESULT_MEMORY_BUDGET_MB,
+    BULK_RESULT_INLINE_MAX_KB,
+    BULK_RESULT_SPILL_DIR,
+    BULK_RESULT_MAX_AGE_HOURS,
+    BULK_RESULT_MAX_DISK_MB
+)
+
+logger = logging.getLogger(__name__)
+
+_REQUEST_ID_PATTERN = re.compile(r"^[0-9a-zA-Z_-]{1,64}$")
+
+
+def _encode(result: Dict[str, Any]) -> bytes:
+    return json.dumps(result, default=str, separators=(",", ":")).encode("utf-8")
+
+
+class BulkResultStore:
+    """
+    Stores finished bulk results by request id.
+
+    Sizes are measured on the JSON encoding, which is also what gets written
+    (gzip-compressed) when a result spills, so the budget tracks what a result
+    actually costs to keep and to serve.
+    """
+
+    def __init__(self,
+                 memory_budget_bytes: int = BULK_RESULT_MEMORY_BUDGET_MB * 1024 * 1024,
+                 inline_max_bytes: int = BULK_RESULT_INLINE_MAX_KB * 1024,
+                 spill_dir: str = BULK_RESULT_SPILL_DIR,
+                 max_age_seconds: float = BULK_RESULT_MAX_AGE_HOURS * 3600,
+                 max_disk_bytes: int = BULK_RESULT_MAX_DISK_MB * 1024 * 1024):
+        self.memory_budget_bytes = memory_budget_bytes
+        self.inline_max_bytes = inline_max_bytes
+        self.spill_dir = Path(spill_dir)
+        self.max_age_seconds = max_age_seconds
+        self.max_disk_bytes = max_disk_bytes
+
+        self._lock = threading.RLock()
+        # request_id -> (result, encoded size, stored_at); least recently used first
+        self._memory: "OrderedDict[str, Tuple[Dict, int, float]]" = OrderedDict()
+        self._memory_bytes = 0
+        # request_id -> (compressed file size, stored_at)
+        self._disk: Dict[str, Tuple[int, float]] = {}
+        self._stats = {"spilled": 0, "evicted": 0, "disk_reads": 0}
+
+    def _path(self, request_id: str) -> Path:
+        if not _REQUEST_ID_PATTERN.match(request_id):
+            raise ValueError(f"Invalid request id: {request_id!r}")
+        return self.spill_dir / f"{request_id}.json.gz"
+
+    def put(self, request_id: str, result: Dict[str, Any]):
+        """Store a finished result (replaces any previous one for the id)"""
+        encoded = _encode(result)
+        with self._lock:
+            self.delete(request_id)
+            stored_at = time.time()
+            if len(encoded) > self.inline_max_bytes:
+                self._spill(request_id, encoded, stored_at)
+                return
+            self._memory[request_id] = (result, len(encoded), stored_at)
+            self._memory_bytes += len(encoded)
+            # Over budget: least recently used results go to disk
+            while self._memory_bytes > self.memory_budget_bytes and len(self._memory) > 1:
+                oldest_id, (oldest, size, oldest_at) = self._memory.popitem(last=False)
+                self._memory_bytes -= size
+                self._spill(oldest_id, _encode(oldest), oldest_at)
+
+    def _spill(self, request_id: str, encoded: bytes, stored_at: float):
+        path = self._path(request_id)
+        self.spill_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".tmp")
+        with gzip.open(tmp_path, "wb", compresslevel=6) as f:
+            f.write(encoded)
+        os.replace(tmp_path, path)
+        self._disk[request_id] = (path.stat().st_size, stored_at)
+        self._stats["spilled"] += 1
+        logger.debug(f"💾 Spilled bulk result {request_id} ({len(encoded)} bytes) to disk")
+
+    def get(self, request_id: str) -> Optional[Dict[str, Any]]:
+        """Stored result, from memory or disk (None if unknown or evicted)"""
+        with self._lock:
+            entry = self._memory.get(request_id)
+            if entry is not None:
+                self._memory.move_to_end(request_id)
+                return entry[0]
+            if request_id not in self._disk:
+                return None
+            path = self._path(request_id)
+            self._stats["disk_reads"] += 1
+        try:
+            with gzip.open(path, "rb") as f:
+                return json.loads(f.read().decode("utf-8"))
+        except FileNotFoundError:
+            with self._lock:
+                self._disk.pop(request_id, None)
+            return None
+
+    def __contains__(self, request_id: str) -> bool:
+        with self._lock:
+            return request_id in self._memory or request_id in self._disk
+
+    def delete(self, request_id: str):
+        """Forget a result wherever it is stored"""
+        with self._lock:
+            entry = self._memory.pop(request_id, None)
+            if entry is not None:
+                self._memory_bytes -= entry[1]
+            if self._disk.pop(request_id, None) is not None:
+                try:
+                    self._path(request_id).unlink()
+                except FileNotFoundError:
+                    pass
+
+    def evict(self, now: Optional[float] = None) -> int:
+        """
+        Drop results older than max_age_seconds, then the oldest spilled files
+        until disk usage is within max_disk_bytes.
+
+        Returns:
+            Number of results evicted
+        """
+        now = now or time.time()
+        cutoff = now - self.max_age_seconds
+        with self._lock:
+            expired = [rid for rid, entry in self._memory.items() if entry[2] < cutoff]
+            expired += [rid for rid, (_, stored_at) in self._disk.items() if stored_at < cutoff]
+            for request_id in expired:
+                self.delete(request_id)
+
+            disk_bytes = sum(size for size, _ in self._disk.values())
+            over_budget = []
+            for request_id, (size, _) in sorted(self._disk.items(), key=lambda item: item[1][1]):
+                if disk_bytes <= self.max_disk_bytes:
+                    break
+                over_budget.append(request_id)
+                disk_bytes -= size
+            for request_id in over_budget:
+                self.delete(request_id)
+
+            evicted = len(expired) + len(over_budget)
+            self._stats["evicted"] += evicted
+        if evicted:
+            logger.info(f"🧹 Evicted {evicted} bulk result(s)")
+        return evicted
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "memory_results": len(self._memory),
+                "memory_bytes": self._memory_bytes,
+                "memory_budget_bytes": self.memory_budget_bytes,
+                "disk_results": len(self._disk),
+                "disk_bytes": sum(size for size, _ in self._disk.values()),
+                **self._stats
+            }
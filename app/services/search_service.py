@@ -2,9 +2,13 @@
 Search Service - Centralized search and filtering logic
 """
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Any, Optional
 import asyncio
+from app.constants import SMART_SEARCH_MAX_WORKERS
 from data import database
+from data.inventory_query import InventoryFilter
 from engine.smart_search import smart_search_engine
 
 logger = logging.getLogger(__name__)
@@ -15,14 +19,40 @@ class SearchService:
     Service layer for all search-related business logic.
     """
     
+    # Shared, bounded pool running smart searches off the event loop
+    _smart_search_executor: Optional[ThreadPoolExecutor] = None
+    _smart_search_lock = threading.Lock()
+    
+    @classmethod
+    def get_smart_search_executor(cls) -> ThreadPoolExecutor:
+        """Lazily create the shared smart search pool (SMART_SEARCH_MAX_WORKERS threads)"""
+        if cls._smart_search_executor is None:
+            with cls._smart_search_lock:
+                if cls._smart_search_executor is None:
+                    cls._smart_search_executor = ThreadPoolExecutor(
+                        max_workers=SMART_SEARCH_MAX_WORKERS,
+                        thread_name_prefix="smart-search"
+                    )
+        return cls._smart_search_executor
+    
+    @classmethod
+    def shutdown(cls, wait: bool = False):
+        """Stop the shared smart search pool"""
+        with cls._smart_search_lock:
+            executor, cls._smart_search_executor = cls._smart_search_executor, None
+        if executor:
+            executor.shutdown(wait=wait)
+            logger.info("Smart search executor shut down")
+    
     @staticmethod
-    def universal_search(query: str, limit: int = 10) -> Dict[str, Any]:
+    def universal_search(query: str, limit: int = 10, offset: int = 0) -> Dict[str, Any]:
         """
-        Search across customers and inventory.
+        Search across customers and inventory (ranked, from the in-memory text indexes).
         
         Args:
-            query: Search query string
+            query: Search query string (prefix or infix of ids, names, emails, models, makes)
             limit: Maximum results per category
+            offset: Results to skip per category (pagination)
             
         Returns:
             Dict with search results by category
@@ -36,14 +66,15 @@ class SearchService:
         
         # Search customers using database method
         try:
-            customers, _ = database.search_customers(search_term=query, limit=limit, offset=0)
+            customers, customer_total = database.search_customers(search_term=query, limit=limit, offset=offset)
             results["customers"] = customers
+            results["customer_total"] = customer_total
         except Exception as e:
             logger.error(f"Error searching customers: {e}")
         
         # Search inventory using new efficient method
         try:
-            inventory_matches = database.search_inventory(query=query, limit=limit)
+            inventory_matches = database.search_inventory(query=query, limit=limit, offset=offset)
             results["inventory"] = inventory_matches
         except Exception as e:
             logger.error(f"Error searching inventory: {e}")
@@ -64,7 +95,7 @@ class SearchService:
         Args:
             customer_id: Customer identifier
             search_params: Search parameters including target delta, max subsidy, etc.
-            executor: Thread pool executor for async operation
+            executor: Thread pool to run the search on (the shared smart search pool by default)
             
         Returns:
             Dict with search results and minimum subsidy offers
@@ -74,6 +105,18 @@ class SearchService:
         if not customer:
             raise ValueError(f"Customer {customer_id} not found")
         
+        # Process search parameters with defaults
+        processed_params = {
+            'target_payment_delta': search_params.get('target_payment_delta', 0.05),
+            'max_subsidy': search_params.get('max_subsidy', 50000),
+            'subsidy_step': search_params.get('subsidy_step', 1000),
+            'service_fee_pct': search_params.get('service_fee_pct', 0.04),
+            'cxa_pct': search_params.get('cxa_pct', 0.04),
+            'kavak_total_amount': search_params.get('kavak_total_amount', 25000),
+            'term_preference': search_params.get('term_preference'),
+            'max_results': search_params.get('max_results', 20),
+        }
+        
         # Use two-stage filtering: Get pre-filtered inventory
         logger.info(f"🎯 Smart search Stage 1: Pre-filtering inventory for customer {customer_id}")
         inventory_records = database.get_tradeup_inventory_for_customer(customer)
@@ -86,36 +129,18 @@ class SearchService:
                 "search_params": processed_params
             }
         
-        # Process search parameters with defaults
-        processed_params = {
-            'target_payment_delta': search_params.get('target_payment_delta', 0.05),
-            'max_subsidy': search_params.get('max_subsidy', 50000),
-            'subsidy_step': search_params.get('subsidy_step', 1000),
-            'service_fee_pct': search_params.get('service_fee_pct', 0.04),
-            'cxa_pct': search_params.get('cxa_pct', 0.04),
-            'kavak_total_amount': search_params.get('kavak_total_amount', 25000),
-            'term_preference': search_params.get('term_preference'),
-        }
-        
         logger.info(f"✅ Stage 1 complete: {len(inventory_records)} candidates for smart search")
         
         # Stage 2: Run smart search with financial matching
         logger.info(f"🎯 Smart search Stage 2: Finding minimum subsidy offers")
-        if executor:
-            loop = asyncio.get_event_loop()
-            result = await loop.run_in_executor(
-                executor,
-                smart_search_engine.find_minimum_subsidy_offers,
-                customer,
-                inventory_records,
-                processed_params
-            )
-        else:
-            result = smart_search_engine.find_minimum_subsidy_offers(
-                customer,
-                inventory_records,
-                processed_params
-            )
+        loop = asyncio.get_event_loop()
+        result = await loop.run_in_executor(
+            executor or SearchService.get_smart_search_executor(),
+            smart_search_engine.find_minimum_subsidy_offers,
+            customer,
+            inventory_records,
+            processed_params
+        )
         
         logger.info(f"🎯 Smart search for {customer_id}: {result.get('offers_found', 0)} offers found")
         
@@ -127,11 +152,17 @@ class SearchService:
         Get available filter options from inventory data.
         
         Returns:
-            Dict with filter options (makes, years, price range)
+            Dict with filter options (makes, years, price range), facet counts
+            and price / kilometer distributions
         """
         try:
-            # Use efficient aggregate method instead of loading all inventory
-            return database.get_inventory_aggregates()
+            # Precomputed once per inventory snapshot version
+            summary = database.get_inventory_summary()
+            return {
+                **summary["aggregates"],
+                "facets": summary["facets"],
+                "distributions": summary["distributions"]
+            }
             
         except Exception as e:
             logger.error(f"Error getting inventory filters: {e}")
@@ -142,6 +173,21 @@ class SearchService:
                 "total_cars": 0
             }
 
+    
+    @staticmethod
+    def get_inventory_facets(**conditions) -> Dict[str, Any]:
+        """
+        Faceted counts of the cars matching the given conditions.
+        
+        Args:
+            conditions: InventoryFilter fields (brands, year_min, price_max, regions, ...)
+            
+        Returns:
+            Dict with total matching cars and counts per brand, year, region,
+            color, vehicle class and promotion flag
+        """
+        return database.get_inventory_facets(InventoryFilter(**conditions))
+
 
 # Create singleton instance
 search_service = SearchService()
\ No newline at end of file
@@ -13,6 +13,7 @@ from app.utils.exceptions import (
     DatabaseConnectionError,
     CircuitBreakerOpenError,
     RequestTimeoutError,
+    ConcurrentRequestLimitError,
     ValidationError as CustomValidationError,
     InvalidOfferParametersError
 )
@@ -57,6 +58,10 @@ def handle_api_errors(operation_name: str = "operation", include_customer_id: bo
                 logger.error(f"Timeout in {operation_name} (request: {request_id}): {e}")
                 raise HTTPException(status_code=504, detail=e.to_dict())
                 
+            except ConcurrentRequestLimitError as e:
+                logger.warning(f"Overloaded in {operation_name} (request: {request_id}): {e}")
+                raise HTTPException(status_code=503, detail=e.to_dict())
+                
             except (CustomValidationError, InvalidOfferParametersError) as e:
                 logger.warning(f"Validation error in {operation_name} (request: {request_id}): {e}")
                 raise HTTPException(status_code=400, detail=e.to_dict())
@@ -33,8 +33,18 @@ class MetricsCollector:
                 "queries": 0,
                 "connection_pool_hits": 0,
                 "connection_pool_misses": 0,
+                "connection_validations": 0,
+                "connection_validation_failures": 0,
+                "connection_recycles": 0,
+                "pool_wait_times": [],
                 "query_times": []
             },
+            "bulk_queue": {
+                "submitted": {},
+                "cancelled": 0,
+                "queue_depth": {},
+                "wait_times": {}
+            },
             "cache": {
                 "hits": 0,
                 "misses": 0,
@@ -123,6 +133,42 @@ class MetricsCollector:
         """Track connection pool miss"""
         self.metrics["database"]["connection_pool_misses"] += 1
     
+    def track_connection_pool_wait(self, duration: float):
+        """Track time spent waiting for a pooled connection"""
+        self.metrics["database"]["pool_wait_times"].append(duration)
+        if len(self.metrics["database"]["pool_wait_times"]) > 1000:
+            self.metrics["database"]["pool_wait_times"].pop(0)
+    
+    def track_connection_validation(self, success: bool = True):
+        """Track a connection liveness check"""
+        self.metrics["database"]["connection_validations"] += 1
+        if not success:
+            self.metrics["database"]["connection_validation_failures"] += 1
+    
+    def track_connection_recycle(self):
+        """Track a connection closed for exceeding its max age"""
+        self.metrics["database"]["connection_recycles"] += 1
+    
+    def track_bulk_submitted(self, lane: str):
+        """Track a bulk request entering a queue lane"""
+        submitted = self.metrics["bulk_queue"]["submitted"]
+        submitted[lane] = submitted.get(lane, 0) + 1
+    
+    def track_bulk_queue_depth(self, lane: str, depth: int):
+        """Track the current number of queued requests in a lane"""
+        self.metrics["bulk_queue"]["queue_depth"][lane] = depth
+    
+    def track_bulk_queue_wait(self, lane: str, duration: float):
+        """Track time a bulk request waited before it started"""
+        wait_times = self.metrics["bulk_queue"]["wait_times"].setdefault(lane, [])
+        wait_times.append(duration)
+        if len(wait_times) > 1000:
+            wait_times.pop(0)
+    
+    def track_bulk_cancelled(self):
+        """Track a cancelled bulk request"""
+        self.metrics["bulk_queue"]["cancelled"] += 1
+    
     def track_error(self, error_type: str, endpoint: Optional[str] = None):
         """Track error occurrence"""
         self.metrics["errors"]["total"] += 1
@@ -159,11 +205,24 @@ class MetricsCollector:
             "database": {
                 **self.metrics["database"],
                 "avg_query_time": self._calculate_avg(self.metrics["database"]["query_times"]),
+                "avg_pool_wait_time": self._calculate_avg(self.metrics["database"]["pool_wait_times"]),
+                "p95_pool_wait_time": self._calculate_percentile(self.metrics["database"]["pool_wait_times"], 95),
                 "connection_pool_hit_rate": self._calculate_hit_rate(
                     self.metrics["database"]["connection_pool_hits"],
                     self.metrics["database"]["connection_pool_misses"]
                 )
             },
+            "bulk_queue": {
+                **self.metrics["bulk_queue"],
+                "avg_wait_time": {
+                    lane: self._calculate_avg(times)
+                    for lane, times in self.metrics["bulk_queue"]["wait_times"].items()
+                },
+                "p95_wait_time": {
+                    lane: self._calculate_percentile(times, 95)
+                    for lane, times in self.metrics["bulk_queue"]["wait_times"].items()
+                }
+            },
             "cache": {
                 **self.metrics["cache"],
                 "hit_rate": self._calculate_hit_rate(
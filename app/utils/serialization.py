@@ -0,0 +1,159 @@
+"""
+Fast JSON serialization for large API responses
+- Encodes with orjson; the stdlib json fallback (orjson missing) emits the
+  same output, non-finite floats included (null, never bare NaN)
+- Pre-shapes offer / amortization payloads: optional float rounding and
+  omission of redundant fields, so responses skip jsonable_encoder entirely
+"""
+import json
+import math
+from decimal import Decimal
+from typing import Any, Dict, List, Optional
+
+from fastapi.responses import Response
+
+try:
+    import orjson
+except ImportError:  # listed in requirements.txt; fallback for bare environments
+    orjson = None
+
+# Offer fields that repeat another field or the enclosing response
+REDUNDANT_OFFER_FIELDS = frozenset({
+    "customer_id",            # the response already carries the customer
+    "new_monthly_payment",    # same as monthly_payment
+    "gps_monthly_fee_base",   # gps_monthly_fee is the amount actually charged
+    "gps_monthly_fee_iva",
+})
+
+# Legacy English amortization keys duplicating the Spanish columns
+# (beginning_balance == saldo_insoluto, payment == exigible, principal == capital,
+# ending_balance == balance == end_balance_total)
+REDUNDANT_AMORTIZATION_FIELDS = frozenset({
+    "beginning_balance",
+    "payment",
+    "principal",
+    "ending_balance",
+    "balance",
+})
+
+# Ratios keep more precision than currency amounts when rounding
+RATIO_FIELDS = frozenset({"payment_delta", "interest_rate"})
+RATIO_DIGITS = 6
+
+
+def _default(obj: Any) -> Any:
+    """Fallback for types neither encoder handles natively"""
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if hasattr(obj, "isoformat"):
+        return obj.isoformat()
+    if hasattr(obj, "item"):  # numpy scalars (stdlib json path)
+        return obj.item()
+    if hasattr(obj, "tolist"):
+        return obj.tolist()
+    return str(obj)
+
+
+def _finite(obj: Any) -> Any:
+    """Replace NaN / infinity floats in a nested structure with None (orjson encodes them as null)"""
+    if isinstance(obj, float):
+        return obj if math.isfinite(obj) else None
+    if isinstance(obj, dict):
+        return {key: _finite(value) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_finite(value) for value in obj]
+    return obj
+
+
+def dumps(content: Any) -> bytes:
+    """Encode content as compact UTF-8 JSON (non-finite floats become null)"""
+    if orjson is not None:
+        return orjson.dumps(
+            content,
+            default=_default,
+            option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        )
+    try:
+        encoded = json.dumps(content, default=_default, separators=(",", ":"), allow_nan=False)
+    except ValueError:
+        # Non-finite floats: rewrite them as None instead of emitting invalid JSON
+        encoded = json.dumps(_finite(content), default=lambda obj: _finite(_default(obj)),
+                             separators=(",", ":"), allow_nan=False)
+    return encoded.encode("utf-8")
+
+
+class FastJSONResponse(Response):
+    """JSON response encoded directly with dumps() (no jsonable_encoder pass)"""
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def round_floats(obj: Any, digits: int) -> Any:
+    """Round every float in a nested structure of dicts/lists"""
+    if isinstance(obj, float):
+        return round(obj, digits)
+    if isinstance(obj, dict):
+        return {key: round_floats(value, digits) for key, value in obj.items()}
+    if isinstance(obj, list):
+        return [round_floats(value, digits) for value in obj]
+    return obj
+
+
+def shape_offer(offer: Dict[str, Any], round_digits: Optional[int] = None,
+                compact: bool = False) -> Dict[str, Any]:
+    """
+    Copy of an offer ready for encoding.
+
+    Args:
+        offer: Offer dict from the matcher
+        round_digits: Round currency amounts to this many decimals (ratios keep RATIO_DIGITS)
+        compact: Drop REDUNDANT_OFFER_FIELDS
+    """
+    shaped = {}
+    for key, value in offer.items():
+        if compact and key in REDUNDANT_OFFER_FIELDS:
+            continue
+        if round_digits is not None and isinstance(value, float):
+            value = round(value, max(round_digits, RATIO_DIGITS) if key in RATIO_FIELDS else round_digits)
+        shaped[key] = value
+    return shaped
+
+
+def shape_offer_response(result: Dict[str, Any], round_digits: Optional[int] = None,
+                         compact: bool = False) -> Dict[str, Any]:
+    """Offer generation result with every tier's offers shaped (see shape_offer)"""
+    if round_digits is None and not compact:
+        return result
+    shaped = dict(result)
+    shaped["offers"] = {
+        tier: [shape_offer(offer, round_digits, compact) for offer in offers]
+        for tier, offers in result.get("offers", {}).items()
+    }
+    return shaped
+
+
+def shape_amortization(data: Dict[str, Any], round_digits: Optional[int] = None,
+                       compact: bool = False) -> Dict[str, Any]:
+    """
+    Amortization payload shaped for encoding.
+
+    compact keeps only "table" (not its "schedule" alias) and drops the
+    legacy duplicate keys of each row.
+    """
+    if round_digits is None and not compact:
+        return data
+    rows: List[Dict[str, Any]] = data.get("table") or data.get("schedule") or []
+    if compact:
+        rows = [{key: value for key, value in row.items() if key not in REDUNDANT_AMORTIZATION_FIELDS}
+                for row in rows]
+    shaped = {key: value for key, value in data.items() if key not in ("schedule", "table")}
+    if round_digits is not None:
+        rows = round_floats(rows, round_digits)
+        shaped = round_floats(shaped, round_digits)
+    shaped["table"] = rows
+    if not compact:
+        shaped["schedule"] = rows
+    return shaped
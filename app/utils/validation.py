@@ -21,7 +21,9 @@ from app.constants import (
     # Data validation
     MIN_VALID_MONTHLY_PAYMENT, MAX_VALID_MONTHLY_PAYMENT,
     MIN_VALID_CAR_PRICE, MAX_VALID_CAR_PRICE,
-    VALID_LOAN_TERMS
+    VALID_LOAN_TERMS,
+    # Customer list
+    CUSTOMER_RISK_BUCKETS, CUSTOMER_SORT_OPTIONS
 )
 
 logger = logging.getLogger(__name__)
@@ -400,10 +402,10 @@ def validate_customer_search(
     if search:
         validated['search'] = UnifiedValidator.validate_search_term(search)
     
-    if risk and risk in UnifiedValidator.VALID_RISK_PROFILES:
+    if risk and (risk in UnifiedValidator.VALID_RISK_PROFILES or risk in CUSTOMER_RISK_BUCKETS):
         validated['risk'] = risk
     
-    if sort and sort in ['name', 'id', 'payment', 'equity']:
+    if sort and sort in CUSTOMER_SORT_OPTIONS:
         validated['sort'] = sort
     
     return validated
\ No newline at end of file
@@ -0,0 +1,15 @@
+"""Offer engine benchmark suite (see scripts/run_benchmarks.py)"""
+
+from .harness import compare_results, load_results, write_results
+from .suite import BENCHMARKS, run_suite
+from .workloads import SCALES, build_workload
+
+__all__ = [
+    'BENCHMARKS',
+    'SCALES',
+    'build_workload',
+    'compare_results',
+    'load_results',
+    'run_suite',
+    'write_results'
+]
@@ -0,0 +1,190 @@
+"""
+Benchmark harness
+- Times an operation over a list of inputs: throughput and p50/p95/p99 latency
+- Peak RSS of the benchmark process (each case runs in a fresh process)
+- Machine-readable results documents, compared against a stored baseline
+"""
+import json
+import multiprocessing
+import os
+import platform
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import numpy as np
+
+try:
+    import resource
+except ImportError:  # Windows: no getrusage, peak RSS is not reported
+    resource = None
+
+RESULTS_VERSION = 1
+
+# Relative change beyond which a metric counts as a regression
+DEFAULT_REGRESSION_THRESHOLD = 0.2
+
+# Metrics compared against the baseline: +1 when higher is worse, -1 when lower is worse
+COMPARED_METRICS = {"p50_ms": 1, "p95_ms": 1, "p99_ms": 1, "throughput": -1, "peak_rss_mb": 1}
+
+
+@dataclass
+class BenchmarkResult:
+    """Timings of one benchmark at one scale"""
+    benchmark: str
+    scale: str
+    operations: int
+    total_seconds: float
+    throughput: float  # units per second
+    unit: str
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    mean_ms: float
+    max_ms: float
+    peak_rss_mb: Optional[float] = None
+    details: Dict[str, Any] = field(default_factory=dict)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(self.__dict__)
+
+
+def peak_rss_mb() -> Optional[float]:
+    """High-water resident set size of this process in MB (None where unsupported)"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return round(peak / (1024 ** 2 if sys.platform == "darwin" else 1024), 1)
+
+
+def summarize(benchmark: str, scale: str, latencies: List[float], unit: str,
+              units_per_operation: float = 1, details: Optional[Dict] = None) -> BenchmarkResult:
+    """Result from per-operation latencies in seconds"""
+    if not latencies:
+        raise ValueError(f"Benchmark {benchmark} ({scale}) measured no operations")
+    seconds = np.asarray(latencies, dtype=float)
+    total = float(seconds.sum())
+    p50, p95, p99 = np.percentile(seconds, [50, 95, 99]) * 1000
+    return BenchmarkResult(
+        benchmark=benchmark,
+        scale=scale,
+        operations=len(seconds),
+        total_seconds=round(total, 4),
+        throughput=round(len(seconds) * units_per_operation / total, 3) if total > 0 else float("inf"),
+        unit=unit,
+        p50_ms=round(float(p50), 3),
+        p95_ms=round(float(p95), 3),
+        p99_ms=round(float(p99), 3),
+        mean_ms=round(float(seconds.mean()) * 1000, 3),
+        max_ms=round(float(seconds.max()) * 1000, 3),
+        details=details or {},
+    )
+
+
+def measure(benchmark: str, scale: str, operation: Callable[[Any], Any], inputs: Iterable,
+            unit: str, units_per_operation: float = 1, warmup: int = 1,
+            details: Optional[Dict] = None) -> BenchmarkResult:
+    """
+    Time operation(input) for every input
+
+    The first ``warmup`` inputs are run once beforehand (imports, caches, thread
+    pools) and are not part of the timings.
+    """
+    inputs = list(inputs)
+    for item in inputs[:warmup]:
+        operation(item)
+    latencies = []
+    for item in inputs:
+        start = time.perf_counter()
+        operation(item)
+        latencies.append(time.perf_counter() - start)
+    return summarize(benchmark, scale, latencies, unit, units_per_operation, details)
+
+
+def run_isolated(function: Callable, *args) -> Any:
+    """Run function(*args) in a fresh process, so peak RSS and caches belong to this call only"""
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+        return pool.submit(function, *args).result()
+
+
+# ----------------------------------------------------------------------
+# Results documents
+# ----------------------------------------------------------------------
+
+def results_document(results: List[Dict[str, Any]], seed: int) -> Dict[str, Any]:
+    """Results of a run plus what is needed to tell runs apart"""
+    return {
+        "version": RESULTS_VERSION,
+        "created_at": datetime.now().isoformat(),
+        "seed": seed,
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "results": results,
+    }
+
+
+def write_results(document: Dict[str, Any], path: str) -> Path:
+    """Write a results document as JSON (atomically)"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(document, f, indent=2)
+    os.replace(tmp_path, path)
+    return path
+
+
+def load_results(path: str) -> Dict[str, Any]:
+    """
+    Read a results document
+
+    Raises:
+        ValueError: Missing file or unsupported results version
+    """
+    if not os.path.isfile(path):
+        raise ValueError(f"Benchmark results {path} not found")
+    with open(path) as f:
+        document = json.load(f)
+    if document.get("version") != RESULTS_VERSION:
+        raise ValueError(f"Unsupported benchmark results version {document.get('version')} in {path}")
+    return document
+
+
+def compare_results(current: Dict[str, Any], baseline: Dict[str, Any],
+                    threshold: float = DEFAULT_REGRESSION_THRESHOLD) -> List[Dict[str, Any]]:
+    """
+    Metric by metric comparison of the benchmarks present in both documents
+
+    Returns:
+        One row per (benchmark, scale, metric): baseline and current values,
+        relative change and whether it is a regression beyond threshold
+    """
+    baseline_results = {(row["benchmark"], row["scale"]): row for row in baseline["results"]}
+    comparison = []
+    for row in current["results"]:
+        base = baseline_results.get((row["benchmark"], row["scale"]))
+        if base is None:
+            continue
+        for metric, direction in COMPARED_METRICS.items():
+            old, new = base.get(metric), row.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            comparison.append({
+                "benchmark": row["benchmark"],
+                "scale": row["scale"],
+                "metric": metric,
+                "baseline": old,
+                "current": new,
+                "change": round(change, 4),
+                "regressed": change * direction > threshold,
+            })
+    return comparison
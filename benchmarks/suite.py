@@ -0,0 +1,188 @@
+"""
+Offer engine benchmarks
+
+Every benchmark takes a Workload and returns a BenchmarkResult:
+- offer_generation: find_all_viable per customer against the whole inventory
+- smart_search: batched smart search (search_smart_offers) per customer
+- minimum_subsidy: scalar solve_minimum_subsidy per customer / car pair
+- amortization: generate_amortization_table per offer
+- bulk_scoring: Stage 1 filter + matching per customer (the bulk / campaign kernel)
+- offer_matrix: customer x inventory offer matrix of the whole customer base
+"""
+import logging
+import time
+from typing import Callable, Dict, List, Optional, Sequence
+
+from .harness import BenchmarkResult, measure, peak_rss_mb, results_document, run_isolated, summarize
+from .workloads import DEFAULT_SEED, Workload, build_workload, get_scale
+
+logger = logging.getLogger(__name__)
+
+# The scalar subsidy search prices ~1000 fee combinations per car
+MINIMUM_SUBSIDY_MAX_SAMPLES = 10
+OFFER_MATRIX_REPEATS = 3
+# Amortization cost does not depend on the inventory: offers come from its first cars
+AMORTIZATION_SOURCE_CARS = 200
+
+
+def mean_of_timed(values: List[float], result: BenchmarkResult) -> float:
+    """Mean of per-operation values recorded by the timed runs (the warm-up runs come first)"""
+    timed = values[-result.operations:]
+    return round(sum(timed) / len(timed), 2)
+
+
+def bench_offer_generation(workload: Workload) -> BenchmarkResult:
+    from engine.basic_matcher import basic_matcher
+
+    inventory = workload.inventory()
+    offers = []
+    result = measure(
+        "offer_generation", workload.scale.name,
+        lambda customer: offers.append(basic_matcher.find_all_viable(customer, inventory)["total_offers"]),
+        workload.sample_customers(workload.scale.samples), unit="customers"
+    )
+    result.details = {"cars": len(inventory), "offers_per_customer": mean_of_timed(offers, result)}
+    return result
+
+
+def bench_smart_search(workload: Workload) -> BenchmarkResult:
+    from engine.smart_search import ConsiderationFilters, SubsidyConfig, smart_search_engine
+
+    found = []
+    result = measure(
+        "smart_search", workload.scale.name,
+        lambda customer: found.append(len(smart_search_engine.search_smart_offers(
+            customer, workload.inventory_df, ConsiderationFilters(), SubsidyConfig()
+        )["viable_offers"])),
+        workload.sample_customers(workload.scale.samples), unit="customers"
+    )
+    result.details = {"cars": len(workload.inventory_df), "viable_offers_per_customer": mean_of_timed(found, result)}
+    return result
+
+
+def bench_minimum_subsidy(workload: Workload) -> BenchmarkResult:
+    from engine.smart_search import SubsidyConfig, smart_search_engine
+
+    samples = min(workload.scale.samples, MINIMUM_SUBSIDY_MAX_SAMPLES)
+    inventory = workload.inventory()
+    pairs = [(customer, inventory[i % len(inventory)])
+             for i, customer in enumerate(workload.sample_customers(samples))]
+    config = SubsidyConfig()
+    return measure(
+        "minimum_subsidy", workload.scale.name,
+        lambda pair: smart_search_engine.solve_minimum_subsidy(pair[0], pair[1], config),
+        pairs, unit="cars"
+    )
+
+
+def bench_amortization(workload: Workload) -> BenchmarkResult:
+    from engine.basic_matcher import basic_matcher
+    from engine.calculator import generate_amortization_table
+
+    # Real offers of the sampled customers, one per tier and term where available
+    inventory = workload.inventory()[:AMORTIZATION_SOURCE_CARS]
+    offers: List[Dict] = []
+    for customer in workload.sample_customers(len(workload.customers_df)):
+        seen = set()
+        for tier, tier_offers in basic_matcher.find_all_viable(customer, inventory)["offers"].items():
+            for offer in tier_offers:
+                if (tier, offer["term"]) not in seen:
+                    seen.add((tier, offer["term"]))
+                    offers.append(offer)
+        if len(offers) >= workload.scale.samples:
+            break
+    offers = offers[:workload.scale.samples]
+    result = measure("amortization", workload.scale.name, generate_amortization_table, offers, unit="tables")
+    result.details = {"months_per_table": sum(offer["term"] for offer in offers) / len(offers)}
+    return result
+
+
+def bench_bulk_scoring(workload: Workload) -> BenchmarkResult:
+    from app.services.campaign_runner import score_customer
+
+    offers = []
+    result = measure(
+        "bulk_scoring", workload.scale.name,
+        lambda customer: offers.append(score_customer(customer, workload.inventory_df)["total_offers"]),
+        workload.sample_customers(workload.scale.samples), unit="customers"
+    )
+    result.details = {"cars": len(workload.inventory_df), "offers_per_customer": mean_of_timed(offers, result)}
+    return result
+
+
+def bench_offer_matrix(workload: Workload) -> BenchmarkResult:
+    from engine.offer_matrix import compute_offer_matrix
+
+    customers = len(workload.customers_df)
+    compute_offer_matrix(workload.customers_df.head(10), workload.inventory_df)  # warm up
+    latencies = []
+    for _ in range(OFFER_MATRIX_REPEATS):
+        start = time.perf_counter()
+        matrix = compute_offer_matrix(workload.customers_df, workload.inventory_df)
+        latencies.append(time.perf_counter() - start)
+    summary = matrix.summary()
+    return summarize("offer_matrix", workload.scale.name, latencies, unit="customers",
+                     units_per_operation=customers,
+                     details={"cells": summary["cells_evaluated"], "offers": summary["total_offers"]})
+
+
+BENCHMARKS: Dict[str, Callable[[Workload], BenchmarkResult]] = {
+    "offer_generation": bench_offer_generation,
+    "smart_search": bench_smart_search,
+    "minimum_subsidy": bench_minimum_subsidy,
+    "amortization": bench_amortization,
+    "bulk_scoring": bench_bulk_scoring,
+    "offer_matrix": bench_offer_matrix,
+}
+
+
+def run_case(benchmark: str, scale_name: str, seed: int = DEFAULT_SEED,
+             audit_logging: bool = False, log_level: str = "WARNING") -> Dict:
+    """
+    Build the workload and run one benchmark in this process
+
+    Audit logging is off unless requested, so timings measure the financial
+    math rather than audit log I/O.
+    """
+    logging.basicConfig(level=log_level)
+    logging.getLogger().setLevel(log_level)
+    if not audit_logging:
+        from config import set_config_value
+        set_config_value("features.enable_audit_logging", False, persist=False)
+
+    workload = build_workload(get_scale(scale_name), seed)
+    result = BENCHMARKS[benchmark](workload)
+    result.peak_rss_mb = peak_rss_mb()
+    return result.to_dict()
+
+
+def run_suite(benchmarks: Optional[Sequence[str]] = None, scales: Sequence[str] = ("small",),
+              seed: int = DEFAULT_SEED, isolate: bool = True, audit_logging: bool = False,
+              log_level: str = "WARNING") -> Dict:
+    """
+    Run benchmarks x scales and return the results document
+
+    Args:
+        benchmarks: Benchmark names (default: all)
+        scales: Scale names (see workloads.SCALES)
+        isolate: Run every case in a fresh process (accurate peak RSS, no warm caches)
+
+    Raises:
+        ValueError: Unknown benchmark or scale
+    """
+    benchmarks = list(benchmarks or BENCHMARKS)
+    unknown = [name for name in benchmarks if name not in BENCHMARKS]
+    if unknown:
+        raise ValueError(f"Unknown benchmarks {unknown}; expected {list(BENCHMARKS)}")
+    for scale in scales:
+        get_scale(scale)
+
+    results = []
+    for scale in scales:
+        for benchmark in benchmarks:
+            args = (benchmark, scale, seed, audit_logging, log_level)
+            result = run_isolated(run_case, *args) if isolate else run_case(*args)
+            logger.info(f"⏱️ {benchmark} [{scale}]: {result['throughput']} {result['unit']}/s, "
+                        f"p95 {result['p95_ms']}ms, peak RSS {result['peak_rss_mb']}MB")
+            results.append(result)
+    return results_document(results, seed)
@@ -0,0 +1,71 @@
+"""
+Reproducible synthetic workloads for the benchmark suite
+
+Customers and inventories come from data/mock_data_loader with a fixed seed,
+so every run (and every worker process) benchmarks the same data. The mock
+customers' equity (20% of their balance) is too low to qualify for almost
+any offer, which would leave offer generation with nothing to evaluate, so
+it is redrawn from the same seed over a range where most customers have
+offers in every tier.
+"""
+from dataclasses import dataclass
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+from data.mock_data_loader import generate_mock_customers, generate_mock_inventory
+
+DEFAULT_SEED = 20240601
+
+# Equity range of benchmark customers (MXN)
+EQUITY_RANGE = (40000, 300000)
+
+
+@dataclass(frozen=True)
+class Scale:
+    """Workload size: inventory cars, customer base, and timed operations per benchmark"""
+    name: str
+    cars: int
+    customers: int
+    samples: int
+
+
+SCALES: Dict[str, Scale] = {
+    "small": Scale("small", cars=100, customers=500, samples=100),
+    "medium": Scale("medium", cars=4000, customers=4800, samples=10),
+    "large": Scale("large", cars=50000, customers=4800, samples=3),
+}
+
+
+def get_scale(name: str) -> Scale:
+    """Scale by name; ValueError for unknown names"""
+    if name not in SCALES:
+        raise ValueError(f"Unknown scale {name}; expected one of {list(SCALES)}")
+    return SCALES[name]
+
+
+@dataclass
+class Workload:
+    """One scale's customers and inventory"""
+    scale: Scale
+    seed: int
+    customers_df: pd.DataFrame
+    inventory_df: pd.DataFrame
+
+    def sample_customers(self, count: int) -> List[Dict]:
+        """The first count customers as records (the same ones on every run)"""
+        return self.customers_df.head(count).to_dict("records")
+
+    def inventory(self) -> List[Dict]:
+        """Inventory as records, the way the matcher receives it"""
+        return self.inventory_df.to_dict("records")
+
+
+def build_workload(scale: Scale, seed: int = DEFAULT_SEED) -> Workload:
+    """Deterministic customers and inventory for a scale"""
+    inventory_df = generate_mock_inventory(scale.cars, seed=seed)
+    customers_df = generate_mock_customers(scale.customers, seed=seed + 1)
+    rng = np.random.RandomState(seed + 2)
+    customers_df["vehicle_equity"] = rng.uniform(*EQUITY_RANGE, len(customers_df)).round(2)
+    return Workload(scale=scale, seed=seed, customers_df=customers_df, inventory_df=inventory_df)
@@ -0,0 +1,183 @@
+"""
+Precomputed statistics for the in-memory data snapshots
+- One vectorized pass per snapshot version (counts, distributions, facets, histograms)
+- Stored per snapshot version so dashboard / filter reads never touch the data
+"""
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+HISTOGRAM_BINS = 20
+PERCENTILES = (0.25, 0.5, 0.75, 0.9)
+
+
+def _distribution(values: pd.Series) -> Dict[str, Any]:
+    """Count, min/max/mean, percentiles and a fixed-width histogram of a numeric column"""
+    values = pd.to_numeric(values, errors="coerce").dropna()
+    values = values[np.isfinite(values)]
+    if values.empty:
+        return {"count": 0, "min": 0, "max": 0, "mean": 0, "percentiles": {}, "histogram": []}
+
+    array = values.to_numpy(dtype=float)
+    quantiles = np.quantile(array, PERCENTILES)
+    counts, edges = np.histogram(array, bins=HISTOGRAM_BINS)
+    return {
+        "count": int(array.size),
+        "min": float(array.min()),
+        "max": float(array.max()),
+        "mean": float(array.mean()),
+        "percentiles": {f"p{int(q * 100)}": float(v) for q, v in zip(PERCENTILES, quantiles)},
+        "histogram": [
+            {"from": float(edges[i]), "to": float(edges[i + 1]), "count": int(counts[i])}
+            for i in range(len(counts))
+        ],
+    }
+
+
+def _facet(values: pd.Series) -> List[Dict[str, Any]]:
+    """Value counts of a column, most frequent first"""
+    counts = values.dropna().astype(str).value_counts()
+    return [{"value": value, "count": int(count)} for value, count in counts.items()]
+
+
+def compute_inventory_summary(inventory_df: Optional[pd.DataFrame]) -> Dict[str, Any]:
+    """
+    All inventory statistics in one pass over the snapshot frame.
+
+    Returns:
+        Dict with the legacy ``stats`` (get_inventory_stats) and ``aggregates``
+        (get_inventory_aggregates) shapes plus distributions and facets
+    """
+    if inventory_df is None or inventory_df.empty:
+        return {
+            "stats": {"total_cars": 0, "average_price": 0, "min_price": 0, "max_price": 0, "brands": 0},
+            "aggregates": {"makes": [], "years": [], "price_range": {"min": 0, "max": 0}, "total_cars": 0},
+            "distributions": {},
+            "facets": {},
+        }
+
+    price_col = "sales_price" if "sales_price" in inventory_df.columns else "car_price"
+    price = _distribution(inventory_df[price_col])
+    distributions = {"price": price}
+    if "kilometers" in inventory_df.columns:
+        distributions["kilometers"] = _distribution(inventory_df["kilometers"])
+
+    facets = {
+        column: _facet(inventory_df[column])
+        for column in ("car_brand", "make", "year", "region")
+        if column in inventory_df.columns
+    }
+
+    make_col = "make" if "make" in inventory_df.columns else "car_brand"
+    makes = sorted(inventory_df[make_col].dropna().astype(str).unique().tolist()) \
+        if make_col in inventory_df.columns else []
+    years = sorted(int(year) for year in inventory_df["year"].dropna().unique()) \
+        if "year" in inventory_df.columns else []
+    brands = int(inventory_df["car_brand"].nunique()) if "car_brand" in inventory_df.columns else 0
+
+    return {
+        "stats": {
+            "total_cars": len(inventory_df),
+            "average_price": price["mean"],
+            "min_price": price["min"],
+            "max_price": price["max"],
+            "brands": brands,
+        },
+        "aggregates": {
+            "makes": makes,
+            "years": years,
+            "price_range": {"min": price["min"], "max": price["max"]},
+            "total_cars": len(inventory_df),
+        },
+        "distributions": distributions,
+        "facets": facets,
+    }
+
+
+def compute_customer_summary(customers_df: Optional[pd.DataFrame]) -> Dict[str, Any]:
+    """
+    All customer statistics in one pass over the customer frame.
+
+    Returns:
+        Dict with the legacy ``stats`` (get_customer_statistics) shape plus
+        distributions and facets
+    """
+    if customers_df is None or customers_df.empty:
+        return {
+            "stats": {"avg_payment": 0, "avg_equity": 0, "avg_balance": 0, "total_active": 0},
+            "total_customers": 0,
+            "distributions": {},
+            "facets": {},
+        }
+
+    distributions = {
+        name: _distribution(customers_df[column])
+        for name, column in (("monthly_payment", "current_monthly_payment"),
+                             ("equity", "vehicle_equity"),
+                             ("balance", "outstanding_balance"),
+                             ("car_price", "current_car_price"))
+        if column in customers_df.columns
+    }
+    facets = {
+        column: _facet(customers_df[column])
+        for column in ("risk_profile_name", "current_car_brand", "current_car_year")
+        if column in customers_df.columns
+    }
+    balance = pd.to_numeric(customers_df.get("outstanding_balance"), errors="coerce")
+
+    def mean(name: str) -> float:
+        return round(distributions[name]["mean"], 2) if name in distributions else 0
+
+    return {
+        "stats": {
+            "avg_payment": mean("monthly_payment"),
+            "avg_equity": mean("equity"),
+            "avg_balance": mean("balance"),
+            "total_active": int((balance > 0).sum()) if balance is not None else 0,
+        },
+        "total_customers": len(customers_df),
+        "distributions": distributions,
+        "facets": facets,
+    }
+
+
+class SnapshotAggregates:
+    """
+    Summaries keyed by snapshot version.
+
+    ``get`` returns the summary built for the given version, building it (once)
+    if the snapshot moved on since the last build. Only the latest version of
+    each summary is kept.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._summaries: Dict[str, Tuple[Hashable, Dict[str, Any]]] = {}
+
+    def get(self, name: str, version: Hashable, build: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        with self._lock:
+            current = self._summaries.get(name)
+            if current is not None and current[0] == version:
+                return current[1]
+
+            start = time.perf_counter()
+            summary = build()
+            self._summaries[name] = (version, summary)
+        logger.info(f"📊 Materialized {name} statistics for version {version} "
+                    f"in {(time.perf_counter() - start) * 1000:.1f}ms")
+        return summary
+
+    def version_of(self, name: str) -> Optional[Hashable]:
+        with self._lock:
+            current = self._summaries.get(name)
+            return current[0] if current else None
+
+
+# Global instance
+snapshot_aggregates = SnapshotAggregates()
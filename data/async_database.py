@@ -0,0 +1,192 @@
+"""
+Async facade over the blocking data layer
+- Runs database/loader calls on a dedicated, bounded thread pool
+- Backpressure: rejects work once workers + queue are full
+- Per-call timeouts (a hung query does not hold the request forever)
+- Redshift-bound calls fail fast while the Redshift circuit breaker is open
+  (CSV customers and the in-memory snapshot keep working)
+"""
+import asyncio
+import functools
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from . import database
+from .loader import data_loader
+from .circuit_breaker import CircuitState
+from .circuit_breaker_factory import get_redshift_breaker
+from app.constants import (
+    DATABASE_QUERY_TIMEOUT,
+    DB_EXECUTOR_MAX_WORKERS,
+    DB_EXECUTOR_MAX_QUEUE
+)
+from app.utils.exceptions import (
+    CircuitBreakerOpenError,
+    ConcurrentRequestLimitError,
+    RequestTimeoutError
+)
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncDatabase:
+    """
+    Awaitable access to inventory/customer data without blocking the event loop.
+
+    Calls are submitted to a ThreadPoolExecutor sized to the connection pool,
+    so worker threads never queue on the pool itself. At most
+    ``max_workers + max_queue`` calls are admitted at once; beyond that callers
+    get ConcurrentRequestLimitError (503) immediately instead of piling up.
+    """
+
+    def __init__(self,
+                 max_workers: int = DB_EXECUTOR_MAX_WORKERS,
+                 max_queue: int = DB_EXECUTOR_MAX_QUEUE,
+                 default_timeout: float = DATABASE_QUERY_TIMEOUT):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.default_timeout = default_timeout
+
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._stats = {
+            "submitted": 0,
+            "completed": 0,
+            "failed": 0,
+            "rejected": 0,
+            "timeouts": 0,
+            "breaker_rejections": 0
+        }
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.max_workers,
+                        thread_name_prefix="db-io"
+                    )
+        return self._executor
+
+    def _release(self, future):
+        with self._lock:
+            self._in_flight -= 1
+            if future.cancelled():
+                return
+            if future.exception() is not None:
+                self._stats["failed"] += 1
+            else:
+                self._stats["completed"] += 1
+
+    async def run(self, func: Callable, *args, timeout: Optional[float] = None,
+                  redshift: bool = False, **kwargs) -> Any:
+        """
+        Run a blocking data-access call on the database executor
+
+        Args:
+            func: Blocking callable (a database.* function, loader method, ...)
+            timeout: Seconds to wait for the result (default DATABASE_QUERY_TIMEOUT)
+            redshift: The call queries Redshift: it is rejected while the Redshift
+                breaker is open and its timeouts count as breaker failures
+
+        Raises:
+            CircuitBreakerOpenError: Redshift breaker is open (redshift calls only)
+            ConcurrentRequestLimitError: Executor and its queue are full
+            RequestTimeoutError: The call did not finish within the timeout
+        """
+        operation = getattr(func, "__name__", "database call")
+        breaker = get_redshift_breaker() if redshift else None
+        if breaker is not None and breaker.state == CircuitState.OPEN:
+            with self._lock:
+                self._stats["breaker_rejections"] += 1
+            raise CircuitBreakerOpenError("redshift", breaker.recovery_timeout)
+
+        with self._lock:
+            if self._in_flight >= self.max_workers + self.max_queue:
+                self._stats["rejected"] += 1
+                logger.warning(f"⚠️ Database executor saturated, rejecting {operation}")
+                raise ConcurrentRequestLimitError(self.max_workers + self.max_queue)
+            self._in_flight += 1
+            self._stats["submitted"] += 1
+
+        # The slot is freed when the worker finishes, not when we stop waiting,
+        # so a timed-out query still counts against the bound while it runs
+        future = self._get_executor().submit(functools.partial(func, *args, **kwargs))
+        future.add_done_callback(self._release)
+
+        timeout = timeout or self.default_timeout
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+        except asyncio.TimeoutError:
+            with self._lock:
+                self._stats["timeouts"] += 1
+            if breaker is not None:
+                breaker.record_failure()
+            logger.error(f"⏱️ {operation} timed out after {timeout}s")
+            raise RequestTimeoutError(operation, timeout)
+
+    # ------------------------------------------------------------------
+    # Data access
+    # ------------------------------------------------------------------
+
+    async def get_customer_by_id(self, customer_id: str, **kwargs) -> Optional[Dict]:
+        return await self.run(database.get_customer_by_id, customer_id, **kwargs)
+
+    async def get_customers_by_ids(self, customer_ids: List[str], **kwargs) -> Dict[str, Dict]:
+        return await self.run(database.get_customers_by_ids, customer_ids, **kwargs)
+
+    async def get_all_inventory(self, **kwargs) -> List[Dict]:
+        return await self.run(database.get_all_inventory, **kwargs)
+
+    async def get_inventory_dataframe(self, **kwargs):
+        return await self.run(database.get_inventory_dataframe, **kwargs)
+
+    async def get_car_by_id(self, car_id: str, **kwargs) -> Optional[Dict]:
+        return await self.run(database.get_car_by_id, car_id, redshift=True, **kwargs)
+
+    async def get_cars_by_ids(self, car_ids: List[str], **kwargs) -> Dict[str, Dict]:
+        return await self.run(database.get_cars_by_ids, car_ids, redshift=True, **kwargs)
+
+    async def get_tradeup_inventory_for_customer(self, customer: Dict, **kwargs) -> List[Dict]:
+        return await self.run(database.get_tradeup_inventory_for_customer, customer, **kwargs)
+
+    async def search_customers_with_filters(self, search_term: Optional[str] = None,
+                                            risk_filter: Optional[str] = None,
+                                            limit: int = 20, offset: int = 0,
+                                            sort_by: Optional[str] = None) -> Tuple[List[Dict], int]:
+        return await self.run(
+            database.search_customers_with_filters,
+            search_term=search_term, risk_filter=risk_filter, limit=limit, offset=offset, sort_by=sort_by
+        )
+
+    async def load_filtered_inventory(self, year: int, price: float, kilometers: float, **kwargs):
+        return await self.run(
+            data_loader.load_filtered_inventory_from_redshift, year, price, kilometers,
+            redshift=True, **kwargs
+        )
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Executor load and outcome counters"""
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "in_flight": self._in_flight,
+                "queued": max(0, self._in_flight - self.max_workers),
+                **self._stats
+            }
+
+    def shutdown(self, wait: bool = False):
+        """Stop the executor"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor:
+            executor.shutdown(wait=wait)
+            logger.info("Database executor shut down")
+
+
+# Global async facade
+async_database = AsyncDatabase()
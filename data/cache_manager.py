@@ -7,7 +7,7 @@ Smart caching layer for Trade-Up Engine
 """
 import time
 import threading
-from typing import Optional, Dict, Any, Tuple, List
+from typing import Optional, Dict, Any, Tuple, List, Iterable
 from datetime import datetime, timedelta
 import logging
 from app.utils.metrics import metrics_collector
@@ -148,7 +148,6 @@ class CacheManager:
                             self._fetch_locks.pop(key, None)
                             self._fetch_results.pop(key, None)
                     
-                    import threading
                     cleanup_thread = threading.Thread(target=cleanup, daemon=True)
                     cleanup_thread.start()
             else:
@@ -239,6 +238,26 @@ class CacheManager:
             if entity_id:
                 self.invalidate(pattern=f"offers_{entity_id}_*")
     
+    def invalidate_cars(self, car_ids: Iterable[str]):
+        """
+        Invalidate the per-car entries (car_<id>) of specific cars
+        
+        Used by the incremental inventory refresh instead of
+        invalidate_related('inventory'), so entries for unchanged cars survive.
+        """
+        car_keys = {f"car_{car_id}" for car_id in car_ids}
+        if not car_keys:
+            return
+        
+        with self._lock:
+            keys_to_remove = [key for key in self._cache if key in car_keys]
+            for key in keys_to_remove:
+                del self._cache[key]
+        
+        logger.info(
+            f"🔄 Inventory delta: {len(car_keys)} cars changed - invalidated {len(keys_to_remove)} cache keys"
+        )
+    
     def get_status(self) -> Dict[str, Any]:
         """Get cache status and statistics"""
         with self._lock:
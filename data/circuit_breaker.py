@@ -122,6 +122,10 @@ class CircuitBreaker:
                 self._state = CircuitState.OPEN
                 self._circuit_opened_time = time.time()  # Track when circuit opened
     
+    def record_failure(self):
+        """Count a failure observed outside call() (e.g. a query timeout)"""
+        self._on_failure()
+    
     def reset(self):
         """Manually reset circuit breaker"""
         with self._lock:
@@ -0,0 +1,104 @@
+"""
+Preallocated columnar buffer for streaming query results
+"""
+
+import logging
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+
+class ColumnarBuffer:
+    """
+    Append DataFrame chunks into one numpy array per column.
+
+    Arrays are allocated once from a capacity hint (e.g. ``cursor.rowcount``)
+    and grown geometrically if the hint turns out short, so a streamed result
+    is assembled without keeping a list of chunk frames and concatenating
+    them at the end.
+
+    The first appended chunk fixes the column order. Numeric columns whose
+    dtype widens in a later chunk (int -> float when a NULL shows up) are
+    upcast in place; any other mismatch falls back to object.
+    """
+
+    def __init__(self, capacity: int = 0, growth_factor: float = 2.0):
+        self._capacity = max(int(capacity), 0)
+        self._growth_factor = max(growth_factor, 1.1)
+        self._columns: Optional[List[str]] = None
+        self._arrays: Dict[str, np.ndarray] = {}
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def capacity(self) -> int:
+        return self._capacity
+
+    @staticmethod
+    def _column_values(series: pd.Series) -> np.ndarray:
+        """Plain numpy values for a column (extension dtypes become object)"""
+        if isinstance(series.dtype, np.dtype):
+            return series.to_numpy()
+        return series.to_numpy(dtype=object)
+
+    @staticmethod
+    def _merge_dtype(current: np.dtype, incoming: np.dtype) -> np.dtype:
+        if current == incoming:
+            return current
+        if current.kind in "iuf" and incoming.kind in "iuf":
+            return np.result_type(current, incoming)
+        return np.dtype(object)
+
+    def _ensure_capacity(self, required: int):
+        if required <= self._capacity:
+            return
+        new_capacity = max(required, int(self._capacity * self._growth_factor) + 1)
+        logger.debug(f"📈 Growing columnar buffer {self._capacity} -> {new_capacity} rows")
+        for column, array in self._arrays.items():
+            grown = np.empty(new_capacity, dtype=array.dtype)
+            grown[:self._size] = array[:self._size]
+            self._arrays[column] = grown
+        self._capacity = new_capacity
+
+    def append(self, chunk: pd.DataFrame):
+        """Copy a chunk's rows into the buffer"""
+        if self._columns is None:
+            self._columns = list(chunk.columns)
+            self._arrays = {
+                column: np.empty(self._capacity, dtype=self._column_values(chunk[column]).dtype)
+                for column in self._columns
+            }
+        elif list(chunk.columns) != self._columns:
+            raise ValueError(
+                f"Chunk columns {list(chunk.columns)} do not match buffer columns {self._columns}"
+            )
+
+        rows = len(chunk)
+        if rows == 0:
+            return
+
+        self._ensure_capacity(self._size + rows)
+        end = self._size + rows
+        for column in self._columns:
+            values = self._column_values(chunk[column])
+            target = self._arrays[column]
+            dtype = self._merge_dtype(target.dtype, values.dtype)
+            if dtype != target.dtype:
+                target = target.astype(dtype)
+                self._arrays[column] = target
+            target[self._size:end] = values
+        self._size = end
+
+    def to_frame(self) -> pd.DataFrame:
+        """Build a DataFrame from the filled part of the buffer"""
+        if self._columns is None:
+            return pd.DataFrame()
+        return pd.DataFrame(
+            {column: self._arrays[column][:self._size] for column in self._columns},
+            columns=self._columns,
+        )
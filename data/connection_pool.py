@@ -7,34 +7,52 @@ import logging
 import threading
 import time
 import random
+from collections import deque
+from dataclasses import dataclass, field
 from queue import Queue, Empty
 from contextlib import contextmanager
 import redshift_connector
-from typing import Optional
+from typing import Dict, Optional
 from .circuit_breaker_factory import get_redshift_breaker, CircuitBreakerOpenError
 from .exceptions import (
     PoolExhaustedError,
-    ConnectionCreationError,
-    ConnectionValidationError
+    ConnectionCreationError
 )
 from app.utils.metrics import metrics_collector
 from app.constants import (
     MIN_CONNECTIONS,
     MAX_CONNECTIONS,
     CONNECTION_TIMEOUT,
-    DATABASE_QUERY_TIMEOUT
+    DATABASE_QUERY_TIMEOUT,
+    POOL_RECYCLE_TIME,
+    POOL_VALIDATION_IDLE_SECONDS,
+    POOL_KEEPALIVE_INTERVAL
 )
 
 logger = logging.getLogger(__name__)
 
 
+@dataclass
+class _ConnectionState:
+    """Bookkeeping for one pooled connection"""
+    created_at: float = field(default_factory=time.time)
+    last_used: float = field(default_factory=time.time)
+    last_validated: float = field(default_factory=time.time)
+
+    def idle_seconds(self, now: float) -> float:
+        return now - max(self.last_used, self.last_validated)
+
+
 class RedshiftConnectionPool:
     """Thread-safe connection pool for Redshift"""
     
     def __init__(self, 
                  min_connections: int = MIN_CONNECTIONS,
                  max_connections: int = MAX_CONNECTIONS,
-                 connection_timeout: int = CONNECTION_TIMEOUT):
+                 connection_timeout: int = CONNECTION_TIMEOUT,
+                 validation_idle_seconds: float = POOL_VALIDATION_IDLE_SECONDS,
+                 max_connection_age: float = POOL_RECYCLE_TIME,
+                 keepalive_interval: float = POOL_KEEPALIVE_INTERVAL):
         """
         Initialize connection pool
         
@@ -42,10 +60,18 @@ class RedshiftConnectionPool:
             min_connections: Minimum number of connections to maintain
             max_connections: Maximum number of connections allowed
             connection_timeout: Timeout for acquiring a connection from pool
+            validation_idle_seconds: Only connections idle longer than this are
+                checked with SELECT 1 before being handed out
+            max_connection_age: Connections older than this are closed and replaced
+            keepalive_interval: Seconds between background keepalive/reaper passes
+                (0 disables the thread)
         """
         self.min_connections = min_connections
         self.max_connections = max_connections
         self.connection_timeout = connection_timeout
+        self.validation_idle_seconds = validation_idle_seconds
+        self.max_connection_age = max_connection_age
+        self.keepalive_interval = keepalive_interval
         
         # Connection parameters
         self.host = os.getenv("REDSHIFT_HOST")
@@ -59,6 +85,13 @@ class RedshiftConnectionPool:
         self._all_connections = set()
         self._lock = threading.Lock()
         self._created_connections = 0
+        self._states: Dict[object, _ConnectionState] = {}
+        
+        # Health statistics
+        self._wait_times = deque(maxlen=1000)
+        self._validations = 0
+        self._validation_failures = 0
+        self._recycled = 0
         
         # SAFETY: Backoff strategy for connection failures
         self._consecutive_failures = 0
@@ -68,16 +101,43 @@ class RedshiftConnectionPool:
         
         # Initialize minimum connections
         self._initialize_pool()
+        
+        # Background keepalive/reaper
+        self._stop_event = threading.Event()
+        self._maintenance_thread = None
+        if self.keepalive_interval and self.keepalive_interval > 0:
+            self._maintenance_thread = threading.Thread(
+                target=self._maintenance_loop,
+                name="redshift-pool-keepalive",
+                daemon=True
+            )
+            self._maintenance_thread.start()
     
     def _initialize_pool(self):
         """Create initial connections for the pool"""
         for _ in range(self.min_connections):
             try:
-                conn = self._create_connection()
+                conn = self._create_reserved_connection()
+                if conn is None:
+                    break
                 self._pool.put(conn)
             except Exception as e:
                 logger.error(f"Failed to create initial connection: {e}")
     
+    def _create_reserved_connection(self):
+        """Reserve a slot under max_connections and create a connection in it (None if full)"""
+        with self._lock:
+            if self._created_connections >= self.max_connections:
+                return None
+            self._created_connections += 1
+        
+        try:
+            return self._create_connection()
+        except Exception:
+            with self._lock:
+                self._created_connections -= 1
+            raise
+    
     def _create_connection(self):
         """Create a new Redshift connection with circuit breaker and backoff"""
         if not all([self.host, self.port, self.database, self.user, self.password]):
@@ -122,7 +182,7 @@ class RedshiftConnectionPool:
         
         with self._lock:
             self._all_connections.add(conn)
-            self._created_connections += 1
+            self._states[conn] = _ConnectionState()
             
         logger.debug(f"Created new connection (total: {self._created_connections})")
         return conn
@@ -132,6 +192,10 @@ class RedshiftConnectionPool:
         """
         Get a connection from the pool
         
+        Connections used or validated within validation_idle_seconds are handed
+        out without a round-trip; older idle ones get a SELECT 1 first. Returned
+        connections are only re-checked if the caller's block raised.
+        
         Args:
             timeout: Override default timeout for this request
             
@@ -139,52 +203,146 @@ class RedshiftConnectionPool:
             Redshift connection object
         """
         timeout = timeout or self.connection_timeout
-        connection = None
         
+        start = time.monotonic()
+        connection = self._acquire(timeout)
+        wait_time = time.monotonic() - start
+        self._wait_times.append(wait_time)
+        metrics_collector.track_connection_pool_wait(wait_time)
+        
+        failed = False
         try:
-            # Try to get existing connection from pool
+            yield connection
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            self._release(connection, failed)
+    
+    def _acquire(self, timeout: float):
+        """Take a healthy connection from the pool, creating one if allowed"""
+        deadline = time.monotonic() + timeout
+        
+        while True:
             try:
-                connection = self._pool.get(timeout=timeout)
-                
-                # Test if connection is still alive
-                with connection.cursor() as cursor:
-                    cursor.execute("SELECT 1")
-                
-                # Track pool hit
-                metrics_collector.track_connection_pool_hit()
+                connection = self._pool.get_nowait()
             except Empty:
                 # Pool is empty, try to create new connection if under limit
-                with self._lock:
-                    if self._created_connections < self.max_connections:
-                        connection = self._create_connection()
-                        metrics_collector.track_connection_pool_miss()
-                    else:
-                        raise PoolExhaustedError(
-                            timeout=timeout,
-                            max_connections=self.max_connections
-                        )
+                connection = self._create_reserved_connection()
+                if connection is not None:
+                    metrics_collector.track_connection_pool_miss()
+                    return connection
+                
+                remaining = deadline - time.monotonic()
+                try:
+                    if remaining <= 0:
+                        raise Empty
+                    connection = self._pool.get(timeout=remaining)
+                except Empty:
+                    raise PoolExhaustedError(
+                        timeout=timeout,
+                        max_connections=self.max_connections
+                    )
             
-            except Exception as e:
-                # Connection is dead, remove it and create new one
-                logger.warning(f"Dead connection detected: {e}")
-                if connection:
-                    self._remove_connection(connection)
-                    raise ConnectionValidationError(connection_id=str(id(connection)))
-                connection = self._create_connection()
+            now = time.time()
+            state = self._state_for(connection)
+            if now - state.created_at > self.max_connection_age:
+                self._recycle(connection)
+                continue
+            if state.idle_seconds(now) > self.validation_idle_seconds and not self._validate(connection):
+                # Connection is dead, drop it and try the next one
+                continue
             
-            yield connection
+            # Track pool hit
+            metrics_collector.track_connection_pool_hit()
+            return connection
+    
+    def _release(self, connection, failed: bool):
+        """Return a connection to the pool (re-checked only after a failure)"""
+        if failed and not self._validate(connection):
+            return
+        
+        state = self._state_for(connection)
+        state.last_used = time.time()
+        if state.last_used - state.created_at > self.max_connection_age:
+            self._recycle(connection)
+            return
+        
+        self._pool.put(connection)
+    
+    def _state_for(self, connection) -> _ConnectionState:
+        with self._lock:
+            state = self._states.get(connection)
+            if state is None:
+                state = self._states[connection] = _ConnectionState()
+            return state
+    
+    def _validate(self, connection) -> bool:
+        """Run SELECT 1; dead connections are removed from the pool"""
+        with self._lock:
+            self._validations += 1
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+        except Exception as e:
+            logger.warning(f"Dead connection detected: {e}")
+            with self._lock:
+                self._validation_failures += 1
+            metrics_collector.track_connection_validation(success=False)
+            self._remove_connection(connection)
+            return False
+        
+        self._state_for(connection).last_validated = time.time()
+        metrics_collector.track_connection_validation(success=True)
+        return True
+    
+    def _recycle(self, connection):
+        """Close a connection that exceeded max_connection_age"""
+        with self._lock:
+            self._recycled += 1
+        metrics_collector.track_connection_recycle()
+        logger.debug("Recycling connection past max age")
+        self._remove_connection(connection)
+    
+    def run_maintenance(self):
+        """
+        One keepalive/reaper pass over idle pooled connections
+        
+        Recycles connections past max age, validates those idle past the
+        threshold (so request paths find them pre-validated) and tops the
+        pool back up to min_connections.
+        """
+        now = time.time()
+        for _ in range(self._pool.qsize()):
+            try:
+                connection = self._pool.get_nowait()
+            except Empty:
+                break
             
-        finally:
-            # Return connection to pool
-            if connection:
-                try:
-                    # Test if connection is still alive
-                    with connection.cursor() as cursor:
-                        cursor.execute("SELECT 1")
-                    self._pool.put(connection)
-                except:
-                    # Connection is dead
-                    self._remove_connection(connection)
+            state = self._state_for(connection)
+            if now - state.created_at > self.max_connection_age:
+                self._recycle(connection)
+                continue
+            if state.idle_seconds(now) > self.validation_idle_seconds and not self._validate(connection):
+                continue
+            self._pool.put(connection)
+        
+        while self._created_connections < self.min_connections and not self._should_backoff():
+            try:
+                connection = self._create_reserved_connection()
+            except Exception as e:
+                logger.warning(f"Keepalive could not refill pool: {e}")
+                break
+            if connection is None:
+                break
+            self._pool.put(connection)
+    
+    def _maintenance_loop(self):
+        while not self._stop_event.wait(self.keepalive_interval):
+            try:
+                self.run_maintenance()
+            except Exception as e:
+                logger.warning(f"Connection pool maintenance failed: {e}")
     
     def _remove_connection(self, connection):
         """Remove a connection from tracking"""
@@ -194,10 +352,15 @@ class RedshiftConnectionPool:
             pass
         
         with self._lock:
-            self._all_connections.discard(connection)
+            if connection in self._all_connections:
+                self._all_connections.discard(connection)
+                self._created_connections -= 1
+            self._states.pop(connection, None)
     
     def close_all(self):
         """Close all connections in the pool"""
+        self._stop_event.set()
+        
         with self._lock:
             for conn in self._all_connections:
                 try:
@@ -206,6 +369,7 @@ class RedshiftConnectionPool:
                     pass
             
             self._all_connections.clear()
+            self._states.clear()
             self._created_connections = 0
             
             # Clear the queue
@@ -219,13 +383,20 @@ class RedshiftConnectionPool:
     
     def get_stats(self):
         """Get pool statistics"""
+        wait_times = list(self._wait_times)
         return {
             "total_connections": self._created_connections,
             "available_connections": self._pool.qsize(),
             "in_use_connections": self._created_connections - self._pool.qsize(),
             "max_connections": self.max_connections,
             "consecutive_failures": self._consecutive_failures,
-            "in_backoff": self._should_backoff()
+            "in_backoff": self._should_backoff(),
+            "avg_wait_ms": round(sum(wait_times) / len(wait_times) * 1000, 2) if wait_times else 0.0,
+            "max_wait_ms": round(max(wait_times) * 1000, 2) if wait_times else 0.0,
+            "validations": self._validations,
+            "validation_failures": self._validation_failures,
+            "recycled_connections": self._recycled,
+            "keepalive_running": bool(self._maintenance_thread and self._maintenance_thread.is_alive())
         }
     
     def _should_backoff(self) -> bool:
@@ -294,6 +465,11 @@ def get_connection_pool() -> RedshiftConnectionPool:
     return _pool_instance
 
 
+def peek_connection_pool() -> Optional[RedshiftConnectionPool]:
+    """The global pool if it was already created (never creates one)"""
+    return _pool_instance
+
+
 def close_connection_pool():
     """Close the global connection pool"""
     global _pool_instance
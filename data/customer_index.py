@@ -0,0 +1,135 @@
+"""
+Customer list index built once per version of the customer data
+- Text index for id / name / email search
+- Risk bucket per row (low / medium / high)
+- Pre-sorted permutations for every sort option
+Filter, sort and paginate are then array operations; only the returned page
+is materialized.
+"""
+import logging
+import time
+from typing import Dict, Hashable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.constants import CUSTOMER_RISK_BUCKETS, CUSTOMER_SORT_OPTIONS, DEFAULT_RISK_PROFILE_INDEX
+from .text_index import TextIndex
+
+logger = logging.getLogger(__name__)
+
+# Fallback when the frame has no risk_profile_index column
+RISK_PROFILE_INDICES = {
+    "AAA": 1, "AA": 1, "A": 2, "A1": 3, "A2": 4,
+    "B": 5, "B1": 5, "B2": 6,
+    "C1": 6, "C2": 7, "C3": 8,
+}
+
+
+def _risk_indices(customers_df: pd.DataFrame) -> np.ndarray:
+    if "risk_profile_index" in customers_df.columns:
+        indices = pd.to_numeric(customers_df["risk_profile_index"], errors="coerce")
+    elif "risk_profile" in customers_df.columns:
+        indices = customers_df["risk_profile"].astype(str).map(RISK_PROFILE_INDICES)
+    else:
+        indices = pd.Series(np.nan, index=customers_df.index)
+    return indices.astype(float).fillna(DEFAULT_RISK_PROFILE_INDEX).to_numpy()
+
+
+def _permutation(values: pd.Series, descending: bool) -> np.ndarray:
+    """Row positions in sort order (stable, missing values last)"""
+    if pd.api.types.is_numeric_dtype(values):
+        keys = pd.to_numeric(values, errors="coerce").to_numpy(dtype=float)
+        missing = np.isnan(keys)
+        keys = np.where(missing, 0.0, -keys if descending else keys)
+        # lexsort sorts by the last key first
+        return np.lexsort((keys, missing))
+    keys = values.fillna("").astype(str).str.lower().to_numpy()
+    order = np.argsort(keys, kind="stable")
+    return order[::-1] if descending else order
+
+
+class CustomerIndex:
+    """
+    Search, risk and sort structures over one (shared, read-only) customer frame.
+
+    Row positions are the common currency: the text index is keyed by
+    position, ``risk_bucket`` and the sort permutations are position arrays.
+    """
+
+    BUCKET_NAMES = list(CUSTOMER_RISK_BUCKETS)
+
+    def __init__(self, customers_df: pd.DataFrame, version: Optional[Hashable],
+                 search_fields: Dict[str, float]):
+        start = time.perf_counter()
+        self.frame = customers_df
+        self.version = version
+
+        self.text_index = TextIndex(search_fields)
+        self.text_index.rebuild(
+            range(len(customers_df)),
+            {field: customers_df.get(field) for field in search_fields},
+            version
+        )
+
+        # Bucket code per row: position in CUSTOMER_RISK_BUCKETS of the first bound it fits under
+        bounds = np.array(list(CUSTOMER_RISK_BUCKETS.values()), dtype=float)
+        self.risk_bucket = np.searchsorted(bounds, _risk_indices(customers_df), side="left").astype(np.int8)
+
+        self._orders = {}
+        for option, (column, descending) in CUSTOMER_SORT_OPTIONS.items():
+            if column in customers_df.columns:
+                self._orders[option] = _permutation(customers_df[column], descending)
+
+        logger.info(f"👥 Customer index ({len(customers_df)} rows, {len(self._orders)} sort orders) "
+                    f"built in {(time.perf_counter() - start) * 1000:.0f}ms")
+
+    def __len__(self) -> int:
+        return len(self.frame)
+
+    def _filter_mask(self, risk_filter: Optional[str]) -> Optional[np.ndarray]:
+        if not risk_filter or risk_filter == "all":
+            return None
+        if risk_filter in CUSTOMER_RISK_BUCKETS:
+            return self.risk_bucket == self.BUCKET_NAMES.index(risk_filter)
+        # A single risk profile (A1, B2, ...)
+        if "risk_profile_name" in self.frame.columns:
+            return (self.frame["risk_profile_name"].astype(str) == risk_filter).to_numpy()
+        return None
+
+    def query(self, search_term: Optional[str] = None, risk_filter: Optional[str] = None,
+              sort_by: Optional[str] = None, offset: int = 0,
+              limit: int = 100) -> Tuple[np.ndarray, int]:
+        """
+        Row positions for one page of customers.
+
+        Search matches keep their relevance order unless sort_by names a
+        sort option; without a search or sort the frame order is kept.
+
+        Returns:
+            (positions of the page rows, total matching rows)
+        """
+        mask = self._filter_mask(risk_filter)
+
+        if search_term:
+            matches, _ = self.text_index.search(search_term, limit=len(self))
+            matches = np.asarray(matches, dtype=np.int64)
+            if mask is not None:
+                matches = matches[mask[matches]]
+            order = self._orders.get(sort_by) if sort_by else None
+            if order is not None:
+                # Global order restricted to the matches
+                selected = np.zeros(len(self), dtype=bool)
+                selected[matches] = True
+                matches = order[selected[order]]
+        else:
+            order = self._orders.get(sort_by) if sort_by else None
+            if order is None:
+                order = np.arange(len(self))
+            matches = order if mask is None else order[mask[order]]
+
+        return matches[offset:offset + limit], len(matches)
+
+    def rows(self, positions: np.ndarray) -> pd.DataFrame:
+        """Frame slice for the given positions (a copy)"""
+        return self.frame.iloc[positions].copy()
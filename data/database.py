@@ -6,9 +6,17 @@ With smart caching for performance.
 import pandas as pd
 import logging
 import os
-from typing import Optional, List, Dict
-from .loader import data_loader
+import threading
+import time
+from typing import Optional, List, Dict, Any, Tuple
+from .loader import data_loader, FILTERED_INVENTORY_ROW_LIMIT
 from .cache_manager import cache_manager
+from .snapshots import inventory_snapshot
+from .aggregates import snapshot_aggregates, compute_inventory_summary, compute_customer_summary
+from .text_index import TextIndex
+from .customer_index import CustomerIndex
+from .inventory_query import InventoryQuery, InventoryFilter
+from app.constants import INVENTORY_INCREMENTAL_REFRESH, INVENTORY_FULL_REFRESH_HOURS
 
 logger = logging.getLogger(__name__)
 
@@ -19,6 +27,15 @@ if USE_MOCK_DATA:
     from .mock_data_loader import generate_mock_customers, generate_mock_inventory
     logger.info("🎭 Running in MOCK DATA mode")
 
+# Universal search indexes (field -> ranking weight), rebuilt per data version
+CUSTOMER_SEARCH_FIELDS = {"customer_id": 3.0, "full_name": 2.0, "email": 1.0}
+INVENTORY_SEARCH_FIELDS = {"car_id": 3.0, "model": 2.0, "make": 2.0}
+
+inventory_text_index = TextIndex(INVENTORY_SEARCH_FIELDS)
+_search_index_lock = threading.Lock()
+_customer_index: Optional[CustomerIndex] = None
+_inventory_query: Optional[InventoryQuery] = None
+
 
 def get_customer_by_id(customer_id: str) -> Optional[Dict]:
     """Get a single customer by ID - fresh from database"""
@@ -42,337 +59,440 @@ def get_customer_by_id(customer_id: str) -> Optional[Dict]:
     return customers_df[mask].iloc[0].to_dict()
 
 
-def search_customers(
-    search_term: Optional[str] = None,
-    limit: int = 100,
-    offset: int = 0
-) -> tuple[List[Dict], int]:
-    """Search customers with filtering - returns (results, total_count)"""
-    logger.info(f"🔍 Searching customers: term='{search_term}', limit={limit}, offset={offset}")
+def get_customers_by_ids(customer_ids: List[str]) -> Dict[str, Dict]:
+    """
+    Get several customers with a single load of the customer table.
     
-    # Use mock data if enabled
+    Returns:
+        Dict of customer_id -> customer dict; ids that were not found are absent
+    """
     if USE_MOCK_DATA:
         customers_df = generate_mock_customers(50)
     else:
-        # Load fresh customer data
         customers_df = data_loader.load_customers_data()
     
     if customers_df.empty:
-        return [], 0
-    
-    # Apply search filter if provided
-    filtered_df = customers_df
-    if search_term:
-        search_term = search_term.upper()
-        mask = (
-            filtered_df["customer_id"].astype(str).str.contains(search_term, na=False) |
-            filtered_df.get("customer_name", pd.Series()).astype(str).str.upper().str.contains(search_term, na=False)
-        )
-        filtered_df = filtered_df[mask]
+        logger.error("❌ No customer data available")
+        return {}
     
-    total_count = len(filtered_df)
+    wanted = set(customer_ids)
+    matches = customers_df[customers_df["customer_id"].isin(wanted)]
+    matches = matches.drop_duplicates(subset="customer_id")
+    return {record["customer_id"]: record for record in matches.to_dict("records")}
+
+
+def get_customer_index() -> CustomerIndex:
+    """
+    Search / risk / sort index over the current customer frame.
     
-    # Apply pagination
-    results = filtered_df.iloc[offset:offset + limit].to_dict("records")
+    Rebuilt only when the customer CSV changes; customers are loaded if no
+    frame is cached yet.
+    """
+    global _customer_index
     
-    return results, total_count
+    with _search_index_lock:
+        current = _customer_index
+        if USE_MOCK_DATA:
+            if current is not None and current.version == "mock":
+                return current
+            version, customers_df = "mock", generate_mock_customers(50)
+        else:
+            version, customers_df = data_loader.cached_customers()
+            if customers_df is None:
+                data_loader.load_customers_data()
+                version, customers_df = data_loader.cached_customers()
+            if customers_df is None:
+                customers_df = pd.DataFrame()
+            if current is not None and current.version == version and current.frame is customers_df:
+                return current
+        
+        _customer_index = CustomerIndex(customers_df, version, CUSTOMER_SEARCH_FIELDS)
+        return _customer_index
+
+
+def _customer_page(index: CustomerIndex, positions) -> List[Dict]:
+    page_df = index.rows(positions)
+    if not USE_MOCK_DATA and not page_df.empty:
+        # Date-relative fields still move with the clock
+        page_df = data_loader.refresh_derived_fields(page_df)
+    return page_df.to_dict("records")
+
+
+def search_customers(
+    search_term: Optional[str] = None,
+    limit: int = 100,
+    offset: int = 0
+) -> tuple[List[Dict], int]:
+    """
+    Search customers by id, name or email - returns (results, total_count).
+    
+    Matches come ranked from the customer text index (exact id first, then
+    prefix, word-prefix and infix matches).
+    """
+    logger.info(f"🔍 Searching customers: term='{search_term}', limit={limit}, offset={offset}")
+    
+    index = get_customer_index()
+    positions, total_count = index.query(search_term=search_term, offset=offset, limit=limit)
+    return _customer_page(index, positions), total_count
+
+
+def refresh_inventory(force_full: bool = False) -> Dict[str, Any]:
+    """
+    Refresh the in-memory inventory snapshot.
+    
+    After the first full load, refreshes only fetch cars with history rows
+    on or after the snapshot watermark date, diff them against the snapshot
+    and apply the cars that actually changed as upserts/deletes, invalidating
+    just the car_<id> cache entries of those cars. A full
+    reload still happens on demand, when the watermark is unknown, and every
+    INVENTORY_FULL_REFRESH_HOURS (to drop cars that aged out of the query window).
+    
+    Returns:
+        Dict with the refresh mode, snapshot version and number of changed cars
+    """
+    if USE_MOCK_DATA:
+        logger.info("🎭 Fetching mock inventory...")
+        inventory_df = generate_mock_inventory(100)
+        inventory_snapshot.replace(inventory_df)
+        _materialize_inventory_views()
+        logger.info(f"✅ Generated {len(inventory_df)} mock cars")
+        return {"mode": "full", "version": inventory_snapshot.version, "changed": len(inventory_df)}
+    
+    full_load_age = (
+        time.time() - inventory_snapshot.full_loaded_at
+        if inventory_snapshot.full_loaded_at else None
+    )
+    incremental = (
+        INVENTORY_INCREMENTAL_REFRESH
+        and not force_full
+        and inventory_snapshot.is_loaded
+        and inventory_snapshot.watermark is not None
+        and full_load_age is not None
+        and full_load_age < INVENTORY_FULL_REFRESH_HOURS * 3600
+    )
+    
+    if incremental:
+        upserts_df, deleted_ids, watermark = data_loader.load_inventory_delta_from_redshift(
+            inventory_snapshot.watermark
+        )
+        previous_version = inventory_snapshot.version
+        changed = inventory_snapshot.apply_delta(upserts_df, deleted_ids, watermark)
+        # Unlisted cars we never held may still be cached from single-car lookups
+        cache_manager.invalidate_cars(changed | set(deleted_ids))
+        if changed:
+            data_loader.invalidate_query_cache()
+            _materialize_inventory_views(previous_version, changed)
+        return {"mode": "incremental", "version": inventory_snapshot.version, "changed": len(changed)}
+    
+    logger.info("🔍 Fetching inventory from Redshift...")
+    watermark = None
+    if INVENTORY_INCREMENTAL_REFRESH:
+        try:
+            # Read before the full load so no change can fall between the two
+            watermark = data_loader.load_inventory_watermark()
+        except Exception as e:
+            logger.warning(f"⚠️ Could not read inventory watermark, next refresh will be full: {e}")
+    
+    inventory_df = data_loader.load_inventory()
+    if inventory_df.empty:
+        logger.error("❌ No inventory data from Redshift!")
+        return {"mode": "full", "version": inventory_snapshot.version, "changed": 0}
+    
+    inventory_snapshot.replace(inventory_df, watermark)
+    data_loader.invalidate_query_cache()
+    _materialize_inventory_views()
+    if full_load_age is not None:
+        # Everything may have changed
+        cache_manager.invalidate(pattern="car_*")
+        cache_manager.invalidate(pattern="offers_*")
+    logger.info(f"✅ Loaded {len(inventory_df)} cars from Redshift")
+    return {"mode": "full", "version": inventory_snapshot.version, "changed": len(inventory_df)}
 
 
 def get_all_inventory() -> List[Dict]:
     """Get entire inventory from Redshift - with smart caching"""
     
     def fetch_inventory():
-        if USE_MOCK_DATA:
-            logger.info("🎭 Fetching mock inventory...")
-            inventory_df = generate_mock_inventory(100)
-            if inventory_df.empty:
-                logger.error("❌ No mock inventory data!")
-                return []
-            logger.info(f"✅ Generated {len(inventory_df)} mock cars")
-            return inventory_df.to_dict("records")
-        else:
-            logger.info("🔍 Fetching inventory from Redshift...")
-            _, inventory_df = data_loader.load_all_data()
-            
-            if inventory_df.empty:
-                logger.error("❌ No inventory data from Redshift!")
-                return []
-            
-            logger.info(f"✅ Loaded {len(inventory_df)} cars from Redshift")
-            return inventory_df.to_dict("records")
+        # Refreshes after the first load are incremental deltas
+        refresh_inventory()
+        return inventory_snapshot.to_records()
     
     # Use cache with 4-hour TTL (configurable)
     data, from_cache = cache_manager.get("inventory_all", fetch_inventory)
     return data
 
 
-def get_inventory_stats() -> Dict:
-    """Get inventory statistics - with smart caching"""
-    
-    def calculate_stats():
-        if USE_MOCK_DATA:
-            logger.info("📊 Calculating mock inventory stats...")
-            inventory_df = generate_mock_inventory(100)
-        else:
-            logger.info("📊 Calculating inventory stats from Redshift...")
-            _, inventory_df = data_loader.load_all_data()
-        
-        if inventory_df.empty:
-            return {
-                "total_cars": 0,
-                "average_price": 0,
-                "min_price": 0,
-                "max_price": 0,
-                "brands": 0
-            }
-        
-        # Use car_price for mock data, sales_price for real data
-        price_col = "car_price" if USE_MOCK_DATA else "sales_price"
-        brand_col = "brand" if USE_MOCK_DATA else "car_brand"
-        
-        stats = {
-            "total_cars": len(inventory_df),
-            "average_price": float(inventory_df[price_col].mean()),
-            "min_price": float(inventory_df[price_col].min()),
-            "max_price": float(inventory_df[price_col].max()),
-            "brands": inventory_df[brand_col].nunique() if brand_col in inventory_df.columns else 0
-        }
-        logger.info(f"✅ Calculated stats for {stats['total_cars']} cars")
-        return stats
+def get_inventory_dataframe() -> Optional[pd.DataFrame]:
+    """Current inventory snapshot frame (shared, read-only), refreshed like get_all_inventory"""
+    get_all_inventory()
+    return inventory_snapshot.get_dataframe()
+
+
+def _inventory_summary() -> Dict[str, Any]:
+    """Statistics of the current snapshot, computed once per snapshot version"""
+    version, inventory_df = inventory_snapshot.get_versioned_dataframe()
+    return snapshot_aggregates.get("inventory", version, lambda: compute_inventory_summary(inventory_df))
+
+
+def get_inventory_summary() -> Dict[str, Any]:
+    """
+    Precomputed inventory statistics: legacy stats/aggregates plus price and
+    kilometer distributions (percentiles, histograms) and brand/year/region facets.
     
-    # Use same cache key as inventory to ensure consistency
-    data, from_cache = cache_manager.get("inventory_stats", calculate_stats)
-    return data
+    Materialized by refresh_inventory, so this is a pure read once the
+    snapshot is loaded.
+    """
+    if not inventory_snapshot.is_loaded:
+        get_all_inventory()
+    return _inventory_summary()
 
 
-def get_car_by_id(car_id: str) -> Optional[Dict]:
-    """Get a single car by ID - TRUE optimization with WHERE clause"""
-    logger.info(f"🔍 Fetching car {car_id}")
+def get_inventory_stats() -> Dict:
+    """Get inventory statistics (precomputed per snapshot version)"""
+    return get_inventory_summary()["stats"]
+
+
+def get_cars_by_ids(car_ids: List[str]) -> Dict[str, Dict]:
+    """
+    Get several cars by ID in one pass.
     
-    if USE_MOCK_DATA:
-        # In mock mode, directly search in mock inventory
-        logger.info("🎭 Using mock data for car lookup")
-        inventory_df = generate_mock_inventory(100)
-        
-        if inventory_df.empty:
-            logger.error("❌ No mock inventory data available")
-            return None
-        
-        # Ensure car_id is string for comparison
-        car_id_str = str(car_id)
-        mask = inventory_df["car_id"].astype(str) == car_id_str
-        
-        if not mask.any():
-            logger.warning(f"⚠️ Car {car_id} not found in mock data")
-            return None
-        
-        return inventory_df[mask].iloc[0].to_dict()
+    Cars are served from the in-memory inventory snapshot through its hash
+    index; only ids missing from the snapshot go to Redshift, as chunked
+    ``stock_id IN (...)`` queries. Does not trigger a full inventory load.
+    
+    Returns:
+        Dict of str(car_id) -> car dict; ids that were not found are absent
+    """
+    car_ids = [str(car_id) for car_id in car_ids]
+    if not car_ids:
+        return {}
     
-    # First try direct Redshift query with WHERE clause
-    car_data = data_loader.load_single_car_from_redshift(car_id)
+    if USE_MOCK_DATA and not inventory_snapshot.is_loaded:
+        # Mock inventory is cheap, and keeps ids stable across lookups
+        refresh_inventory()
     
-    if car_data:
-        return car_data
+    cars = inventory_snapshot.get_cars(car_ids)
+    missing = [car_id for car_id in dict.fromkeys(car_ids) if car_id not in cars]
     
-    # Fallback to cached inventory if Redshift fails
-    logger.info(f"⚠️ Falling back to cached inventory for car {car_id}")
+    if missing and not USE_MOCK_DATA:
+        try:
+            cars.update(data_loader.load_cars_from_redshift(missing))
+        except Exception as e:
+            logger.error(f"❌ Could not load {len(missing)} car(s) from Redshift: {e}")
     
-    def fetch_from_cache():
-        _, inventory_df = data_loader.load_all_data()
-        
-        if inventory_df.empty:
-            logger.error("❌ No inventory data available")
-            return None
-        
-        # Ensure car_id is string for comparison
-        car_id_str = str(car_id)
-        mask = inventory_df["car_id"].astype(str) == car_id_str
-        
-        if not mask.any():
-            logger.warning(f"⚠️ Car {car_id} not found in cache")
-            return None
+    not_found = len(set(car_ids) - set(cars))
+    if not_found:
+        logger.warning(f"⚠️ {not_found} of {len(set(car_ids))} car(s) not found")
+    return cars
+
+
+def get_car_by_id(car_id: str) -> Optional[Dict]:
+    """Get a single car by ID (snapshot index first, then Redshift)"""
+    logger.info(f"🔍 Fetching car {car_id}")
+    return get_cars_by_ids([car_id]).get(str(car_id))
+
+
+def _inventory_search_columns(records: List[Dict]) -> Dict[str, List[Any]]:
+    return {
+        field: [car.get(field, car.get("car_brand")) if field == "make" else car.get(field) for car in records]
+        for field in INVENTORY_SEARCH_FIELDS
+    }
+
+
+def _sync_inventory_search_index(since_version: Optional[int] = None,
+                                 changed_ids: Optional[set] = None) -> TextIndex:
+    """
+    Bring the inventory search index to the current snapshot version.
+    
+    With since_version/changed_ids (a delta) only those cars are re-indexed,
+    provided the index was at since_version; otherwise it is rebuilt.
+    """
+    with _search_index_lock:
+        version, inventory_df = inventory_snapshot.get_versioned_dataframe()
+        if inventory_text_index.version == version:
+            return inventory_text_index
         
-        return inventory_df[mask].iloc[0].to_dict()
+        if changed_ids is not None and inventory_text_index.version == since_version:
+            cars = inventory_snapshot.get_cars(changed_ids)
+            keys = list(cars)
+            removed = {str(car_id) for car_id in changed_ids} - set(keys)
+            inventory_text_index.update(keys, _inventory_search_columns([cars[key] for key in keys]),
+                                        removed, version)
+        elif inventory_df is None:
+            inventory_text_index.rebuild([], {}, version)
+        else:
+            columns = {field: inventory_df[field] for field in INVENTORY_SEARCH_FIELDS if field in inventory_df.columns}
+            if "make" not in columns and "car_brand" in inventory_df.columns:
+                columns["make"] = inventory_df["car_brand"]
+            inventory_text_index.rebuild(inventory_df["car_id"].astype(str), columns, version)
+        return inventory_text_index
+
+
+def _sync_inventory_query() -> InventoryQuery:
+    """Query engine for the current snapshot version, rebuilt when the version moves"""
+    global _inventory_query
+    
+    with _search_index_lock:
+        version, inventory_df = inventory_snapshot.get_versioned_dataframe()
+        current = _inventory_query
+        # Frame identity as well: a replaced snapshot object restarts its version numbers
+        if current is None or current.version != version or current.frame is not inventory_df:
+            _inventory_query = InventoryQuery(inventory_df if inventory_df is not None else pd.DataFrame(), version)
+        return _inventory_query
+
+
+def get_inventory_query() -> InventoryQuery:
+    """
+    Faceted query engine over the inventory snapshot (bitmaps per brand,
+    year, region, color, vehicle class; price/km/year range indexes).
     
-    # Try cache with short TTL
-    car_data, from_cache = cache_manager.get(f"car_{car_id}", fetch_from_cache, ttl_seconds=300)
-    return car_data
+    Built by refresh_inventory, so this is a pure read once the snapshot is loaded.
+    """
+    if not inventory_snapshot.is_loaded:
+        get_all_inventory()
+    return _sync_inventory_query()
+
+
+def _materialize_inventory_views(since_version: Optional[int] = None,
+                                 changed_ids: Optional[set] = None):
+    """Build everything derived from a new snapshot version (statistics, search and query indexes)"""
+    _inventory_summary()
+    _sync_inventory_search_index(since_version, changed_ids)
+    _sync_inventory_query()
 
 
 def search_inventory(
     query: Optional[str] = None,
     limit: int = 100,
+    offset: int = 0,
     make_filter: Optional[str] = None,
     year_min: Optional[int] = None,
     year_max: Optional[int] = None,
     price_min: Optional[float] = None,
     price_max: Optional[float] = None
 ) -> List[Dict]:
-    """Search inventory with filters - returns filtered results"""
-    logger.info(f"🔍 Searching inventory: query='{query}', limit={limit}")
+    """
+    Search the inventory snapshot with filters - returns filtered results.
     
-    # Get inventory data
-    if USE_MOCK_DATA:
-        inventory_df = generate_mock_inventory(100)
-    else:
-        _, inventory_df = data_loader.load_all_data()
+    Text matches (stock id, model, make) come ranked from the inventory text
+    index; the filters run on the inventory query engine, in rank order.
+    """
+    logger.info(f"🔍 Searching inventory: query='{query}', limit={limit}")
     
-    if inventory_df.empty:
+    engine = get_inventory_query()
+    if not engine.size:
         return []
     
-    # Apply filters
-    filtered_df = inventory_df
-    
-    # Text search
+    conditions = InventoryFilter(
+        brands=[make_filter] if make_filter else None,
+        year_min=year_min, year_max=year_max,
+        price_min=price_min, price_max=price_max
+    )
+    order = None
     if query:
-        query_lower = query.lower()
-        mask = (
-            filtered_df["model"].astype(str).str.lower().str.contains(query_lower, na=False) |
-            filtered_df.get("make", filtered_df.get("car_brand", pd.Series())).astype(str).str.lower().str.contains(query_lower, na=False) |
-            filtered_df["car_id"].astype(str).str.lower().str.contains(query_lower, na=False)
-        )
-        filtered_df = filtered_df[mask]
-    
-    # Make filter
-    if make_filter:
-        make_col = "make" if "make" in filtered_df.columns else "car_brand"
-        if make_col in filtered_df.columns:
-            filtered_df = filtered_df[filtered_df[make_col] == make_filter]
-    
-    # Year range
-    if year_min is not None:
-        filtered_df = filtered_df[filtered_df["year"] >= year_min]
-    if year_max is not None:
-        filtered_df = filtered_df[filtered_df["year"] <= year_max]
-    
-    # Price range
-    price_col = "car_price" if USE_MOCK_DATA else "sales_price"
-    if price_min is not None:
-        filtered_df = filtered_df[filtered_df[price_col] >= price_min]
-    if price_max is not None:
-        filtered_df = filtered_df[filtered_df[price_col] <= price_max]
-    
-    # Apply limit
-    results = filtered_df.head(limit).to_dict("records")
+        keys, _ = _sync_inventory_search_index().search(query, limit=engine.size)
+        order = engine.positions_of(keys)
+    
+    positions = engine.select(conditions, order=order, offset=offset, limit=limit)
+    results = engine.rows(positions).to_dict("records")
     
     logger.info(f"✅ Found {len(results)} cars matching filters")
     return results
 
 
+def get_inventory_facets(conditions: Optional[InventoryFilter] = None) -> Dict[str, Any]:
+    """Number of cars matching conditions and their per-value counts (brand, year, region, ...)"""
+    engine = get_inventory_query()
+    mask = engine.mask(conditions or InventoryFilter())
+    return {"total": int(mask.sum()), "facets": engine.facet_counts(mask)}
+
+
 def get_inventory_aggregates() -> Dict:
-    """Get inventory aggregate data for filters - cached for performance"""
-    
-    def calculate_aggregates():
-        logger.info("📊 Calculating inventory aggregates...")
-        if USE_MOCK_DATA:
-            inventory_df = generate_mock_inventory(100)
-        else:
-            _, inventory_df = data_loader.load_all_data()
-        
-        if inventory_df.empty:
-            return {
-                "makes": [],
-                "years": [],
-                "price_range": {"min": 0, "max": 0},
-                "total_cars": 0
-            }
-        
-        # Get unique makes
-        make_col = "brand" if USE_MOCK_DATA else ("make" if "make" in inventory_df.columns else "car_brand")
-        makes = sorted(inventory_df[make_col].dropna().unique().tolist()) if make_col in inventory_df.columns else []
-        
-        # Get year range
-        years = sorted(inventory_df["year"].dropna().unique().astype(int).tolist())
-        
-        # Get price range
-        price_col = "car_price" if USE_MOCK_DATA else "sales_price"
-        prices = inventory_df[price_col].dropna()
-        if len(prices) > 0:
-            price_range = {
-                "min": float(prices.min()),
-                "max": float(prices.max())
-            }
-        else:
-            price_range = {"min": 0, "max": 0}
-        
-        aggregates = {
-            "makes": makes,
-            "years": years,
-            "price_range": price_range,
-            "total_cars": len(inventory_df)
-        }
-        
-        logger.info(f"✅ Calculated aggregates: {len(makes)} makes, {len(years)} years")
-        return aggregates
-    
-    # Cache with same TTL as inventory
-    data, from_cache = cache_manager.get("inventory_aggregates", calculate_aggregates)
-    return data
+    """Get inventory aggregate data for filters (precomputed per snapshot version)"""
+    return get_inventory_summary()["aggregates"]
 
 
 def search_customers_with_filters(
     search_term: Optional[str] = None,
     risk_filter: Optional[str] = None,
     limit: int = 100,
-    offset: int = 0
+    offset: int = 0,
+    sort_by: Optional[str] = None
 ) -> tuple[List[Dict], int]:
-    """Search customers with risk filtering at database level"""
-    logger.info(f"🔍 Searching customers: term='{search_term}', risk='{risk_filter}', limit={limit}")
-    
-    # Load customer data
-    if USE_MOCK_DATA:
-        customers_df = generate_mock_customers(50)
-    else:
-        customers_df = data_loader.load_customers_data()
+    """
+    Search, risk-filter, sort and paginate customers - returns (page, total_count).
     
-    if customers_df.empty:
-        return [], 0
-    
-    # Apply search filter
-    filtered_df = customers_df
-    if search_term:
-        search_term = search_term.upper()
-        mask = (
-            filtered_df["customer_id"].astype(str).str.contains(search_term, na=False) |
-            filtered_df.get("customer_name", pd.Series()).astype(str).str.upper().str.contains(search_term, na=False)
-        )
-        filtered_df = filtered_df[mask]
-    
-    # Apply risk filter at database level
-    if risk_filter and risk_filter != "all":
-        # Map risk profiles to numeric indices
-        risk_indices = {
-            "A1": 1, "A2": 2, "A3": 3,
-            "B1": 4, "B2": 5, "B3": 6,
-            "C1": 7, "C2": 8, "C3": 9,
-            "D1": 10, "D2": 11, "D3": 12,
-            "E1": 13, "E2": 14, "E3": 15,
-            "F1": 16, "F2": 17, "F3": 18,
-            "G1": 19, "G2": 20, "G3": 21,
-            "H1": 22, "H2": 23, "H3": 24
-        }
-        
-        # Add risk index column
-        filtered_df["risk_index"] = filtered_df["risk_profile"].map(risk_indices).fillna(99)
-        
-        # Filter by risk level
-        if risk_filter == "low":
-            filtered_df = filtered_df[filtered_df["risk_index"] <= 5]
-        elif risk_filter == "medium":
-            filtered_df = filtered_df[(filtered_df["risk_index"] > 5) & (filtered_df["risk_index"] <= 15)]
-        elif risk_filter == "high":
-            filtered_df = filtered_df[filtered_df["risk_index"] > 15]
+    Sorting uses the index's pre-sorted permutations, so the order is global
+    (not per page) and only the returned page is materialized.
     
-    # Get total count AFTER filtering
-    total_count = len(filtered_df)
+    Args:
+        risk_filter: Risk bucket (low/medium/high) or a single risk profile name
+        sort_by: One of CUSTOMER_SORT_OPTIONS; search relevance / file order otherwise
+    """
+    logger.info(f"🔍 Searching customers: term='{search_term}', risk='{risk_filter}', "
+                f"sort='{sort_by}', limit={limit}")
     
-    # Apply pagination
-    results = filtered_df.iloc[offset:offset + limit].to_dict("records")
+    index = get_customer_index()
+    positions, total_count = index.query(
+        search_term=search_term, risk_filter=risk_filter, sort_by=sort_by, offset=offset, limit=limit
+    )
+    results = _customer_page(index, positions)
     
     logger.info(f"✅ Found {total_count} customers, returning {len(results)} for page")
     return results, total_count
 
 
+def _tradeup_criteria(customer_car_details: Dict) -> Optional[Tuple[int, float, float]]:
+    """Customer car (year, price, km) used by the Stage 1 trade-up filter, or None if unusable"""
+    # Extract customer car details with fallback field names
+    current_year = customer_car_details.get('current_car_year') or customer_car_details.get('ANO AUTO') or customer_car_details.get('year', 0)
+    current_price = customer_car_details.get('current_car_price') or customer_car_details.get('PRECIO AUTO', 0)
+    current_km = customer_car_details.get('current_car_km') or customer_car_details.get('KILOMETRAJE') or customer_car_details.get('kilometers', float('inf'))
+    
+    # Convert to appropriate types
+    try:
+        current_year = int(current_year) if current_year else 0
+        current_price = float(current_price) if current_price else 0
+        current_km = float(current_km) if current_km else float('inf')
+    except (ValueError, TypeError):
+        logger.error("❌ Invalid customer car details for pre-filtering")
+        return None
+    
+    logger.info(f"📊 Customer car: Year={current_year}, Price=${current_price:,.0f}, KM={current_km:,.0f}")
+    return current_year, current_price, current_km
+
+
+def filter_tradeup_inventory(inventory_df: pd.DataFrame, customer_car_details: Dict) -> List[Dict]:
+    """
+    Stage 1 pre-filter against an already loaded inventory frame.
+    
+    Same criteria, ordering and row limit as the filtered Redshift query, so
+    bulk processing can filter many customers against one inventory snapshot
+    instead of querying Redshift once per customer. Like the query, cars are
+    filtered on the final (promotional if lower) price but ordered by year and
+    regular price; frames without regular_price order by car_price.
+    """
+    criteria = _tradeup_criteria(customer_car_details)
+    if criteria is None or inventory_df is None or inventory_df.empty:
+        return []
+    current_year, current_price, current_km = criteria
+    
+    year = pd.to_numeric(inventory_df["year"], errors="coerce")
+    price = pd.to_numeric(inventory_df["car_price"], errors="coerce")
+    km = pd.to_numeric(inventory_df["kilometers"], errors="coerce").fillna(float('inf'))
+    mask = (year >= current_year) & (price > current_price) & (km < current_km)
+    order_price = (
+        pd.to_numeric(inventory_df["regular_price"], errors="coerce")
+        if "regular_price" in inventory_df.columns else price
+    )
+    
+    candidates = inventory_df[mask.to_numpy()]
+    candidates = candidates.assign(_year=year[mask], _price=order_price[mask]).sort_values(
+        ["_year", "_price"], ascending=False
+    ).head(FILTERED_INVENTORY_ROW_LIMIT).drop(columns=["_year", "_price"])
+    return candidates.to_dict("records")
+
+
 def get_tradeup_inventory_for_customer(customer_car_details: Dict) -> List[Dict]:
     """
     Stage 1 Pre-filtering: Get inventory that represents logical trade-ups for a customer.
@@ -393,21 +513,10 @@ def get_tradeup_inventory_for_customer(customer_car_details: Dict) -> List[Dict]
     """
     logger.info("🔍 Pre-filtering inventory for trade-up candidates")
     
-    # Extract customer car details with fallback field names
-    current_year = customer_car_details.get('current_car_year') or customer_car_details.get('ANO AUTO') or customer_car_details.get('year', 0)
-    current_price = customer_car_details.get('current_car_price') or customer_car_details.get('PRECIO AUTO', 0)
-    current_km = customer_car_details.get('current_car_km') or customer_car_details.get('KILOMETRAJE') or customer_car_details.get('kilometers', float('inf'))
-    
-    # Convert to appropriate types
-    try:
-        current_year = int(current_year) if current_year else 0
-        current_price = float(current_price) if current_price else 0
-        current_km = float(current_km) if current_km else float('inf')
-    except (ValueError, TypeError):
-        logger.error("❌ Invalid customer car details for pre-filtering")
+    criteria = _tradeup_criteria(customer_car_details)
+    if criteria is None:
         return []
-    
-    logger.info(f"📊 Customer car: Year={current_year}, Price=${current_price:,.0f}, KM={current_km:,.0f}")
+    current_year, current_price, current_km = criteria
     
     # If using mock data, skip Redshift query
     if USE_MOCK_DATA:
@@ -455,43 +564,29 @@ def get_tradeup_inventory_for_customer(customer_car_details: Dict) -> List[Dict]
     return filtered_inventory
 
 
-def get_customer_statistics() -> Dict:
-    """Get aggregated customer statistics - with caching"""
+def get_customer_summary() -> Dict[str, Any]:
+    """
+    Precomputed customer statistics: legacy averages plus payment, equity and
+    balance distributions and risk profile / brand / year facets.
     
-    def calculate_customer_stats():
-        logger.info("📊 Calculating customer statistics...")
-        if USE_MOCK_DATA:
-            customers_df = generate_mock_customers(50)
-        else:
-            customers_df = data_loader.load_customers_data()
-        
-        if customers_df.empty:
-            return {
-                "avg_payment": 0,
-                "avg_equity": 0,
-                "avg_balance": 0,
-                "total_active": 0
-            }
-        
-        # Calculate averages
-        avg_payment = float(customers_df["current_monthly_payment"].mean())
-        avg_equity = float(customers_df["vehicle_equity"].mean())
-        avg_balance = float(customers_df["outstanding_balance"].mean())
-        total_active = len(customers_df[customers_df["outstanding_balance"] > 0])
-        
-        stats = {
-            "avg_payment": round(avg_payment, 2),
-            "avg_equity": round(avg_equity, 2),
-            "avg_balance": round(avg_balance, 2),
-            "total_active": total_active
-        }
-        
-        logger.info(f"✅ Customer stats: Avg payment=${stats['avg_payment']:,.0f}")
-        return stats
+    Computed once per version of the customer source file; customers are
+    only loaded if no frame is cached yet.
+    """
+    if USE_MOCK_DATA:
+        return snapshot_aggregates.get(
+            "customers", "mock", lambda: compute_customer_summary(generate_mock_customers(50))
+        )
     
-    # Cache for 1 hour
-    data, from_cache = cache_manager.get("customer_stats", calculate_customer_stats, ttl_seconds=3600)
-    return data
+    source_hash, customers_df = data_loader.cached_customers()
+    if customers_df is None:
+        data_loader.load_customers_data()
+        source_hash, customers_df = data_loader.cached_customers()
+    return snapshot_aggregates.get("customers", source_hash, lambda: compute_customer_summary(customers_df))
+
+
+def get_customer_statistics() -> Dict:
+    """Get aggregated customer statistics (precomputed per customer file version)"""
+    return get_customer_summary()["stats"]
 
 
 def get_offer_generation_stats() -> Dict:
@@ -519,11 +614,19 @@ def get_offer_generation_stats() -> Dict:
 
 
 def test_database_connection() -> Dict:
-    """Test database connections and return status"""
+    """
+    Test database connections and return status.
+    
+    Used at startup and by the (cached, infrequent) deep health check. The
+    first call loads the inventory snapshot the app serves from; later calls
+    only run the small watermark query to prove Redshift is reachable.
+    """
     logger.info("🧪 Testing database connections")
     
     if USE_MOCK_DATA:
         logger.info("🎭 Running in MOCK DATA mode")
+        if not inventory_snapshot.is_loaded:
+            refresh_inventory()
         status = {
             "customers": {"connected": True, "count": 50, "source": "Mock Data"},
             "inventory": {"connected": True, "count": 100, "source": "Mock Data"}
@@ -536,7 +639,7 @@ def test_database_connection() -> Dict:
     }
     
     try:
-        # Test customer data (CSV)
+        # Test customer data (CSV) - reuses the cached frame while the file is unchanged
         customers_df = data_loader.load_customers_data()
         if not customers_df.empty:
             status["customers"]["connected"] = True
@@ -545,11 +648,16 @@ def test_database_connection() -> Dict:
         status["customers"]["error"] = str(e)
     
     try:
-        # Test inventory data (Redshift) - try a quick connection test
-        inventory_df = data_loader.load_inventory_from_redshift()
-        if inventory_df is not None and not inventory_df.empty:
+        if inventory_snapshot.is_loaded:
+            # Quick connection test instead of another full inventory scan
+            data_loader.load_inventory_watermark()
+        else:
+            refresh_inventory()
+        
+        rows = inventory_snapshot.get_status()["rows"]
+        if rows:
             status["inventory"]["connected"] = True
-            status["inventory"]["count"] = len(inventory_df)
+            status["inventory"]["count"] = rows
         else:
             # If Redshift fails, we still consider it "not critical" for startup
             status["inventory"]["connected"] = False
@@ -558,4 +666,23 @@ def test_database_connection() -> Dict:
         status["inventory"]["connected"] = False
         status["inventory"]["error"] = str(e)
     
-    return status
\ No newline at end of file
+    return status
+
+
+def get_data_status() -> Dict:
+    """
+    Row counts and freshness of the data already in memory.
+    
+    Never loads anything, so it is safe for frequent probes and dashboards;
+    counts are None until the data has been loaded once.
+    """
+    if USE_MOCK_DATA:
+        customers = {"loaded": True, "count": 50}
+    else:
+        count = data_loader.cached_customer_count()
+        customers = {"loaded": count is not None, "count": count}
+    
+    return {
+        "customers": customers,
+        "inventory": inventory_snapshot.get_status()
+    }
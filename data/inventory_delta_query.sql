@@ -0,0 +1,50 @@
+-- Incremental inventory refresh: latest history row for every stock_id with a
+-- row on or after the watermark date (%s). inventory_history is a daily
+-- snapshot, so the watermark date itself is re-read to catch same-day rewrites;
+-- rows equal to the in-memory snapshot are dropped by the diff in
+-- InventorySnapshot.apply_delta. is_listed mirrors the filters of
+-- inventory_query.sql; rows that are no longer listed are applied as deletes.
+SELECT DISTINCT
+    ranked.stock_id,
+    ranked.inventory_date,
+    CASE
+        WHEN ranked.inventory_status IN ('available', 'preloaded')
+         AND ranked.flag_published = TRUE
+         AND ranked.region_name IS NOT NULL
+         AND ranked.region_name != 'São Paulo'
+         AND dcs.bk_car_stock IS NOT NULL
+         AND pg.hub_name IS NOT NULL
+        THEN TRUE
+        ELSE FALSE
+    END AS is_listed,
+    ranked.kilometers,
+    ranked.regular_published_price_financing,
+    ranked.promotion_published_price_financing,
+    ranked.region_name,
+    dcs.car_brand,
+    dcs.model,
+    dcs.year,
+    dcs.version,
+    dcs.color,
+    pg.region_growth,
+    pg.hub_name,
+    CASE 
+        WHEN ranked.promotion_published_price_financing IS NOT NULL 
+         AND ranked.promotion_published_price_financing < ranked.regular_published_price_financing 
+        THEN TRUE 
+        ELSE FALSE 
+    END AS has_promotion_discount,
+    ABS(ranked.regular_published_price_financing - ranked.promotion_published_price_financing) AS price_difference_abs
+FROM (
+    SELECT *,
+           ROW_NUMBER() OVER (
+               PARTITION BY stock_id 
+               ORDER BY inventory_date DESC
+           ) as rn
+    FROM serving.inventory_history
+    WHERE country_iso = 'MX'
+      AND inventory_date >= %s
+) ranked
+LEFT JOIN dwh.dim_car_stock dcs ON ranked.stock_id = dcs.bk_car_stock
+LEFT JOIN playground.dl_region_growth_playground pg ON ranked.hub_name = pg.hub_name
+WHERE ranked.rn = 1;
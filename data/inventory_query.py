@@ -0,0 +1,212 @@
+"""
+Faceted query engine over the inventory snapshot
+- Derived brand / year / vehicle class columns computed once per snapshot version
+- Bitmap (boolean mask) per categorical value, sorted range indexes for price and km
+- Faceted counts over any filter result
+Shared by the inventory search and the smart search consideration set.
+"""
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Vehicle class by model keyword, first match wins
+VEHICLE_CLASS_KEYWORDS = {
+    "SUV": ["x3", "x5", "q5", "crv", "rav4", "tiguan"],
+    "Sedan": ["camry", "accord", "a4", "serie 3", "civic"],
+    "Truck": ["f150", "silverado", "ram"],
+    "Hatchback": ["golf", "mazda3", "swift"],
+}
+DEFAULT_VEHICLE_CLASS = "Other"
+
+FACET_FIELDS = ("brand", "year", "region", "color", "vehicle_class", "has_promotion")
+
+
+def classify_vehicles(models: pd.Series) -> np.ndarray:
+    """Vehicle class of every model string (vectorized VEHICLE_CLASS_KEYWORDS lookup)"""
+    lowered = models.fillna("").astype(str).str.lower()
+    conditions = [
+        lowered.str.contains("|".join(keywords), regex=True).to_numpy()
+        for keywords in VEHICLE_CLASS_KEYWORDS.values()
+    ]
+    return np.select(conditions, list(VEHICLE_CLASS_KEYWORDS), default=DEFAULT_VEHICLE_CLASS).astype(object)
+
+
+@dataclass
+class InventoryFilter:
+    """Conditions of one inventory query; None (or an empty list) means unconstrained"""
+    brands: Optional[Sequence[str]] = None
+    exclude_brands: Optional[Sequence[str]] = None
+    year_min: Optional[int] = None
+    year_max: Optional[int] = None
+    price_min: Optional[float] = None
+    price_max: Optional[float] = None
+    km_max: Optional[float] = None
+    regions: Optional[Sequence[str]] = None
+    colors: Optional[Sequence[str]] = None
+    vehicle_classes: Optional[Sequence[str]] = None
+    has_promotion: Optional[bool] = None
+
+
+class _RangeIndex:
+    """Positions sorted by a numeric column, for O(log n) range lookups"""
+
+    def __init__(self, values: np.ndarray):
+        valid = np.flatnonzero(~np.isnan(values))
+        order = valid[np.argsort(values[valid], kind="stable")]
+        self.positions = order
+        self.sorted_values = values[order]
+
+    def mask(self, size: int, low: Optional[float], high: Optional[float]) -> np.ndarray:
+        start = 0 if low is None else np.searchsorted(self.sorted_values, low, side="left")
+        stop = len(self.sorted_values) if high is None else np.searchsorted(self.sorted_values, high, side="right")
+        mask = np.zeros(size, dtype=bool)
+        mask[self.positions[start:stop]] = True
+        return mask
+
+
+class InventoryQuery:
+    """
+    Read-only query structures over one inventory frame.
+
+    Filtering ANDs precomputed masks, so a query costs a few vectorized
+    passes regardless of how many conditions it has; only the selected rows
+    are materialized.
+    """
+
+    def __init__(self, inventory_df: pd.DataFrame, version: Optional[Hashable] = None):
+        start = time.perf_counter()
+        self.frame = inventory_df
+        self.version = version
+        self.size = len(inventory_df)
+
+        models = inventory_df["model"] if "model" in inventory_df.columns else pd.Series([""] * self.size)
+        brand_source = next((inventory_df[column] for column in ("car_brand", "make", "brand")
+                             if column in inventory_df.columns),
+                            models.astype(str).str.split().str[0])
+        years = inventory_df["year"] if "year" in inventory_df.columns else models.astype(str).str.extract(r"(\d{4})")[0]
+        price_column = "sales_price" if "sales_price" in inventory_df.columns else "car_price"
+
+        self.columns: Dict[str, np.ndarray] = {
+            "brand": brand_source.astype(str).str.upper().to_numpy(dtype=object),
+            "year": pd.to_numeric(years, errors="coerce").to_numpy(dtype=float),
+            "vehicle_class": classify_vehicles(models),
+            "price": self._numeric(inventory_df, price_column),
+            "kilometers": self._numeric(inventory_df, "kilometers"),
+        }
+        for column in ("region", "color", "has_promotion"):
+            if column in inventory_df.columns:
+                self.columns[column] = inventory_df[column].to_numpy(dtype=object)
+
+        # Categorical field -> (values, code per row); bitmap per value
+        self._codes: Dict[str, tuple] = {}
+        self._bitmaps: Dict[str, Dict[Any, np.ndarray]] = {}
+        for field in FACET_FIELDS:
+            if field not in self.columns:
+                continue
+            codes, values = pd.factorize(pd.Series(self.columns[field]), sort=True)
+            self._codes[field] = (values, codes)
+            self._bitmaps[field] = {self._key(value): codes == code for code, value in enumerate(values)}
+
+        self._ranges = {field: _RangeIndex(self.columns[field]) for field in ("price", "kilometers", "year")}
+        self._positions = pd.Index(inventory_df["car_id"].astype(str)) if "car_id" in inventory_df.columns else None
+
+        logger.info(f"🧮 Inventory query engine v{version}: {self.size} cars in "
+                    f"{(time.perf_counter() - start) * 1000:.0f}ms")
+
+    @staticmethod
+    def _numeric(inventory_df: pd.DataFrame, column: str) -> np.ndarray:
+        if column not in inventory_df.columns:
+            return np.full(len(inventory_df), np.nan)
+        return pd.to_numeric(inventory_df[column], errors="coerce").to_numpy(dtype=float)
+
+    @staticmethod
+    def _key(value: Any) -> Any:
+        if isinstance(value, (float, np.floating)) and float(value).is_integer():
+            return int(value)
+        if isinstance(value, np.bool_):
+            return bool(value)
+        return value
+
+    def _any_of(self, field: str, values: Iterable[Any]) -> np.ndarray:
+        bitmaps = self._bitmaps.get(field, {})
+        mask = np.zeros(self.size, dtype=bool)
+        for value in values:
+            if field == "brand":
+                value = str(value).upper()
+            bitmap = bitmaps.get(self._key(value))
+            if bitmap is not None:
+                mask |= bitmap
+        return mask
+
+    def mask(self, conditions: InventoryFilter) -> np.ndarray:
+        """Boolean mask of the rows matching every condition"""
+        mask = np.ones(self.size, dtype=bool)
+        if conditions.brands:
+            mask &= self._any_of("brand", conditions.brands)
+        if conditions.exclude_brands:
+            mask &= ~self._any_of("brand", conditions.exclude_brands)
+        if conditions.regions:
+            mask &= self._any_of("region", conditions.regions)
+        if conditions.colors:
+            mask &= self._any_of("color", conditions.colors)
+        if conditions.vehicle_classes:
+            mask &= self._any_of("vehicle_class", conditions.vehicle_classes)
+        if conditions.has_promotion is not None:
+            mask &= self._any_of("has_promotion", [conditions.has_promotion])
+        for field, low, high in (("price", conditions.price_min, conditions.price_max),
+                                 ("kilometers", None, conditions.km_max),
+                                 ("year", conditions.year_min, conditions.year_max)):
+            if low is not None or high is not None:
+                mask &= self._ranges[field].mask(self.size, low, high)
+        return mask
+
+    def positions_of(self, car_ids: Sequence[Any]) -> np.ndarray:
+        """Row positions of the given car ids, in the given order (unknown ids dropped)"""
+        if self._positions is None or not len(car_ids):
+            return np.array([], dtype=np.int64)
+        positions = self._positions.get_indexer([str(car_id) for car_id in car_ids])
+        return positions[positions >= 0]
+
+    def select(self, conditions: InventoryFilter, order: Optional[np.ndarray] = None,
+               offset: int = 0, limit: Optional[int] = None) -> np.ndarray:
+        """
+        Positions of the matching rows.
+
+        Args:
+            order: Candidate positions in the desired order (e.g. search ranking); all rows otherwise
+        """
+        mask = self.mask(conditions)
+        positions = np.flatnonzero(mask) if order is None else order[mask[order]]
+        stop = None if limit is None else offset + limit
+        return positions[offset:stop]
+
+    def rows(self, positions: np.ndarray, with_derived: bool = False) -> pd.DataFrame:
+        """Frame rows at positions (a copy), optionally adding the derived brand/year/vehicle_class columns it lacks"""
+        rows = self.frame.iloc[positions].copy()
+        if with_derived:
+            for field in ("brand", "year", "vehicle_class"):
+                if field not in rows.columns:
+                    rows[field] = self.columns[field][positions]
+        return rows
+
+    def facet_counts(self, mask: Optional[np.ndarray] = None,
+                     fields: Sequence[str] = FACET_FIELDS) -> Dict[str, List[Dict[str, Any]]]:
+        """Count per categorical value within mask (all rows if None), most frequent first"""
+        facets = {}
+        for field in fields:
+            if field not in self._codes:
+                continue
+            values, codes = self._codes[field]
+            selected = codes if mask is None else codes[mask]
+            counts = np.bincount(selected[selected >= 0], minlength=len(values))
+            facets[field] = [
+                {"value": self._key(values[code]), "count": int(counts[code])}
+                for code in np.argsort(-counts, kind="stable") if counts[code]
+            ]
+        return facets
@@ -4,15 +4,21 @@ Handles loading data from Redshift and CSV files with proper transformations
 """
 
 import pandas as pd
+import numpy as np
 import os
+import hashlib
+import threading
 from dotenv import load_dotenv
 import redshift_connector
 import logging
+import math
 import random
 import time
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
 from tenacity import retry, wait_exponential, stop_after_attempt
 from app.utils.logging import setup_logging
 from .connection_pool import get_connection_pool
+from .columnar_buffer import ColumnarBuffer
 from app.utils.validation import UnifiedValidator as DataValidator, DataIntegrityError
 RISK_PROFILE_MAPPING = {
     'AAA': 0, 'AA': 1, 'A': 2, 'A1': 3, 'A2': 4,
@@ -23,6 +29,96 @@ RISK_PROFILE_MAPPING = {
     'B_SB': 21, 'C1_SB': 22, 'C2_SB': 23, 'E5_SB': 24, 'Z': 25
 }
 
+# Redundant suffixes stripped from inventory versions (applied in this order)
+VERSION_SUFFIXES_TO_STRIP = ['CVT', 'MT', 'AT', '| 2.0L', '| 1.6L', '| 1.8L', ', Sedán', ', SUV', ', Hatchback']
+
+# Low-cardinality inventory columns stored as pandas categoricals
+INVENTORY_CATEGORICAL_COLUMNS = ['car_brand', 'make', 'brand', 'region', 'color', 'hub_name']
+
+# Rows pulled per fetchmany() batch when streaming inventory from Redshift
+INVENTORY_FETCH_CHUNK_SIZE = int(os.getenv("INVENTORY_FETCH_CHUNK_SIZE", "5000"))
+
+# Short-lived cache for coalesced Redshift lookups (filtered inventory, single cars)
+QUERY_CACHE_TTL_SECONDS = float(os.getenv("QUERY_CACHE_TTL_SECONDS", "30"))
+
+# Filtered-inventory parameters are widened to these buckets so nearby
+# customers share one query; rows are then filtered exactly in memory
+FILTER_PRICE_BUCKET = float(os.getenv("FILTER_PRICE_BUCKET", "25000"))
+FILTER_KM_BUCKET = float(os.getenv("FILTER_KM_BUCKET", "10000"))
+
+# LIMIT in filtered_inventory_query.sql; a bucketed result this large may be
+# truncated, so the exact query is run instead
+FILTERED_INVENTORY_ROW_LIMIT = 1000
+
+# Max ids per "stock_id IN (...)" lookup, to keep statements a safe size
+CAR_LOOKUP_CHUNK_SIZE = int(os.getenv("CAR_LOOKUP_CHUNK_SIZE", "500"))
+
+# Delta refresh watermark: newest row in the inventory history table
+INVENTORY_WATERMARK_QUERY = """
+SELECT MAX(inventory_date)
+FROM serving.inventory_history
+WHERE country_iso = 'MX'
+"""
+
+# Spanish customer CSV headers mapped to their English equivalents
+CUSTOMER_COLUMN_MAPPING = {
+    # Contract and IDs
+    "CONTRATO": "contract_id",
+    "STOCK ID": "current_stock_id",
+
+    # Personal info
+    "NOMBRE": "first_name",
+    "APELLIDO": "last_name",
+    "MAIL": "email",
+
+    # Financial info
+    "MONTO DE LA MENSUALIDAD": "current_monthly_payment",
+    "SALDO INSOLUTO": "outstanding_balance",
+    "PRECIO AUTO": "current_car_price",
+    "TASA": "original_interest_rate",
+    "MONTO A FINANCIAR": "original_loan_amount",
+
+    # Contract details
+    "FECHA DE CONTRATO": "contract_date",
+    "PLAZO REMANENTE": "remaining_months",
+    "TIENE KT": "has_kavak_total",
+
+    # Car details
+    "MARCA": "current_car_brand",
+    "MODELO": "current_car_model_name",
+    "ANO AUTO": "current_car_year",
+    "KILOMETRAJE": "current_car_km",
+    "AGING": "aging",
+
+    # Risk profile
+    "risk_profile": "risk_profile_name"
+}
+
+# Only these CSV columns are parsed; anything else in the export is skipped
+CUSTOMER_CSV_COLUMNS = set(CUSTOMER_COLUMN_MAPPING) | {"vehicle_equity"}
+
+# Explicit read_csv dtypes (integer-like columns are left to inference and
+# coerced in the transform, since exports may contain blanks)
+CUSTOMER_CSV_DTYPES = {
+    "CONTRATO": str,
+    "NOMBRE": str,
+    "APELLIDO": str,
+    "MAIL": str,
+    "MODELO": str,
+    "MARCA": "category",
+    "risk_profile": "category",
+    "MONTO DE LA MENSUALIDAD": "float64",
+    "SALDO INSOLUTO": "float64",
+    "PRECIO AUTO": "float64",
+    "TASA": "float64",
+    "MONTO A FINANCIAR": "float64",
+}
+
+CUSTOMER_DATE_FORMAT = "%m/%d/%y"
+
+# Low-cardinality customer columns stored as pandas categoricals
+CUSTOMER_CATEGORICAL_COLUMNS = ['current_car_brand', 'risk_profile_name', 'risk_profile']
+
 # Load environment variables
 load_dotenv()
 
@@ -31,6 +127,92 @@ setup_logging(logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+def _copy_result(result):
+    """Give every caller its own copy of a shared query result"""
+    if isinstance(result, pd.DataFrame):
+        return result.copy()
+    if isinstance(result, dict):
+        return dict(result)
+    return result
+
+
+class QueryCoalescer:
+    """
+    Deduplicates identical Redshift queries.
+
+    The first caller for a key runs the query; concurrent callers with the same
+    key wait for it and share its result (or its exception). Successful results
+    are kept for ``ttl_seconds`` so bursts of identical lookups hit Redshift once.
+    Each caller receives its own copy of DataFrame/dict results.
+    """
+
+    def __init__(self, ttl_seconds: float = QUERY_CACHE_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._results: Dict[Hashable, Tuple[float, Any]] = {}
+        self._in_flight: Dict[Hashable, Dict[str, Any]] = {}
+        self._stats = {"hits": 0, "misses": 0, "coalesced": 0}
+
+    def run(self, key: Hashable, fetch_fn: Callable[[], Any],
+            cacheable: Optional[Callable[[Any], bool]] = None) -> Any:
+        """
+        Return the result for ``key``, running ``fetch_fn`` at most once at a time.
+
+        Args:
+            key: Normalized query identity
+            fetch_fn: Runs the query
+            cacheable: Predicate deciding whether a result may be cached
+                (waiters already in flight always share it)
+        """
+        with self._lock:
+            cached = self._results.get(key)
+            if cached is not None:
+                if cached[0] > time.monotonic():
+                    self._stats["hits"] += 1
+                    return _copy_result(cached[1])
+                del self._results[key]
+
+            call = self._in_flight.get(key)
+            leader = call is None
+            if leader:
+                call = {"done": threading.Event(), "result": None, "error": None}
+                self._in_flight[key] = call
+                self._stats["misses"] += 1
+            else:
+                self._stats["coalesced"] += 1
+
+        if not leader:
+            call["done"].wait()
+            if call["error"] is not None:
+                raise call["error"]
+            return _copy_result(call["result"])
+
+        try:
+            result = fetch_fn()
+        except BaseException as e:
+            call["error"] = e
+            raise
+        else:
+            call["result"] = result
+            if self.ttl_seconds > 0 and (cacheable is None or cacheable(result)):
+                with self._lock:
+                    self._results[key] = (time.monotonic() + self.ttl_seconds, result)
+            return _copy_result(result)
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+            call["done"].set()
+
+    def invalidate(self):
+        """Drop all cached results (in-flight queries are unaffected)"""
+        with self._lock:
+            self._results.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"cached": len(self._results), "in_flight": len(self._in_flight), **self._stats}
+
+
 class DataLoader:
     """
     Centralized data loading and transformation service for the Trade-Up Engine.
@@ -73,6 +255,13 @@ class DataLoader:
 
         # Use shared risk profile mapping for consistent customer categorization
         self.risk_profile_mapping = RISK_PROFILE_MAPPING
+
+        # Transformed customer frame keyed by source file hash
+        self._customer_cache = {}
+        self._customer_cache_lock = threading.Lock()
+
+        # Shared in-flight/short-TTL results for repeated Redshift lookups
+        self._query_coalescer = QueryCoalescer()
         
         logger.info(f"📊 DataLoader initialized with {len(self.risk_profile_mapping)} risk profiles")
 
@@ -115,9 +304,8 @@ class DataLoader:
                 logger.info("🔍 Executing Redshift query to load inventory...")
                 with conn.cursor() as cursor:
                     cursor.execute(query)
-                    df = cursor.fetch_dataframe()
+                    inventory_df = self.fetch_inventory_stream(cursor)
 
-                inventory_df = self.transform_inventory_data(df)
                 logger.info(f"✅ Loaded {len(inventory_df)} inventory items from Redshift.")
                 return inventory_df
 
@@ -178,6 +366,7 @@ class DataLoader:
                 - brand: Manufacturer name (standardized)
                 - year: Manufacturing year
                 - model_short: Short model name
+                - regular_price: Regular financing price (before promotions)
         
         Data Cleaning Operations:
             1. Clean model names by removing redundant brand information
@@ -193,58 +382,67 @@ class DataLoader:
             - Version information is cleaned and truncated for readability
             - All invalid or incomplete records are filtered out
             - Field aliases ensure compatibility with existing code
+            - Brand, region, color and hub columns are returned as categoricals
         """
 
-        # Clean up model names - remove redundant info
-        def clean_model_name(row):
-            brand = row['car_brand']
-            model = row['model']
-            year = row['year']
-            version = row.get('version', '')
-            
-            # Remove redundant info from model if it contains brand
-            if pd.notna(model) and brand.lower() in model.lower():
-                model = model.replace(brand, '').strip()
-            
-            # Build clean name
-            parts = [brand, model, str(year)]
-            
-            # Only add version if it's meaningful and not too long
-            if pd.notna(version) and version.strip():
-                version_clean = version.strip()
-                # Remove common redundant suffixes
-                for suffix in ['CVT', 'MT', 'AT', '| 2.0L', '| 1.6L', '| 1.8L', ', Sedán', ', SUV', ', Hatchback']:
-                    version_clean = version_clean.replace(suffix, '')
-                version_clean = version_clean.strip(' ,|')
-                
-                if version_clean and len(version_clean) < 20:
-                    parts.append(version_clean)
-            
-            return ' '.join(parts)
+        inventory_df = self._transform_inventory_chunk(raw_df)
+        return self._finalize_inventory(inventory_df)
+
+    def _transform_inventory_chunk(self, raw_df):
+        """Clean one batch of raw inventory rows (no categoricals, no validation)."""
+        # Build full model names with vectorized string ops (Brand Model Year Version)
+        brand = raw_df["car_brand"]
+        model = raw_df["model"]
+        
+        # Remove redundant brand info from model. Brands are low-cardinality, so
+        # one vectorized pass per distinct brand replaces the old per-row apply.
+        model_clean = model.copy()
+        for brand_value in brand.dropna().unique():
+            brand_rows = (brand == brand_value) & model.notna()
+            if not brand_rows.any():
+                continue
+            contains_brand = model[brand_rows].astype(str).str.lower().str.contains(
+                str(brand_value).lower(), regex=False
+            )
+            rows = contains_brand[contains_brand].index
+            if len(rows):
+                model_clean.loc[rows] = (
+                    model.loc[rows].str.replace(str(brand_value), "", regex=False).str.strip()
+                )
         
-        raw_df["full_model"] = raw_df.apply(clean_model_name, axis=1)
+        # Only add version if it's meaningful and not too long
+        if "version" in raw_df.columns:
+            version_clean = raw_df["version"].fillna("").astype(str).str.strip()
+            for suffix in VERSION_SUFFIXES_TO_STRIP:
+                version_clean = version_clean.str.replace(suffix, "", regex=False)
+            version_clean = version_clean.str.strip(" ,|")
+            keep_version = (version_clean != "") & (version_clean.str.len() < 20)
+            version_part = pd.Series(
+                np.where(keep_version, " " + version_clean, ""), index=raw_df.index
+            )
+        else:
+            version_part = ""
+        
+        full_model = brand + " " + model_clean + " " + raw_df["year"].astype(str) + version_part
+        # Rows without brand or model cannot be named and are dropped below
+        full_model = full_model.where(brand.notna() & model.notna())
 
         # Decide between regular and promotional price
         # Use promotional price if available and lower than regular price
-        raw_df["final_price"] = raw_df.apply(
-            lambda row: (
-                row["promotion_published_price_financing"]
-                if (
-                    pd.notna(row["promotion_published_price_financing"])
-                    and row["promotion_published_price_financing"]
-                    < row["regular_published_price_financing"]
-                )
-                else row["regular_published_price_financing"]
-            ),
-            axis=1,
+        promo_price = raw_df["promotion_published_price_financing"]
+        regular_price = raw_df["regular_published_price_financing"]
+        final_price = np.where(
+            promo_price.notna() & (promo_price < regular_price),
+            promo_price,
+            regular_price,
         )
 
         # Create the final inventory DataFrame
         inventory_df = pd.DataFrame(
             {
                 "car_id": raw_df["stock_id"],
-                "model": raw_df["full_model"],
-                "sales_price": raw_df["final_price"],
+                "model": full_model,
+                "sales_price": final_price,
                 "region": raw_df["region_name"],
                 "kilometers": raw_df["kilometers"],
                 "color": raw_df["color"],
@@ -255,7 +453,8 @@ class DataLoader:
                 "car_brand": raw_df["car_brand"],
                 "make": raw_df["car_brand"],  # Alias for compatibility
                 "year": raw_df["year"],
-            }
+            },
+            index=raw_df.index,
         )
 
         # Clean up and validate
@@ -280,6 +479,20 @@ class DataLoader:
         inventory_df["brand"] = inventory_df["car_brand"]
         inventory_df["model_short"] = inventory_df["model"]
         
+        # Regular (non-promotional) price: filtered_inventory_query.sql orders by it
+        inventory_df["regular_price"] = pd.to_numeric(
+            raw_df.loc[inventory_df.index, "regular_published_price_financing"], errors="coerce"
+        )
+
+        return inventory_df
+
+    def _finalize_inventory(self, inventory_df):
+        """Apply snapshot-level dtypes and validate the assembled inventory."""
+        # Low-cardinality text columns as categoricals to cut snapshot memory
+        for column in INVENTORY_CATEGORICAL_COLUMNS:
+            if column in inventory_df.columns:
+                inventory_df[column] = inventory_df[column].astype("category")
+        
         # Validate the dataframe
         try:
             inventory_df = DataValidator.validate_dataframe(inventory_df, 'inventory')
@@ -290,6 +503,45 @@ class DataLoader:
 
         return inventory_df
 
+    def fetch_inventory_stream(self, cursor, chunk_size=INVENTORY_FETCH_CHUNK_SIZE):
+        """
+        Fetch an executed inventory query in bounded batches.
+
+        Rows are pulled with ``cursor.fetchmany``, each batch is transformed on
+        its own and copied into a preallocated ColumnarBuffer, so peak memory
+        stays near one raw batch plus the final snapshot instead of a full raw
+        DataFrame plus its transformed copy.
+
+        Args:
+            cursor: DB-API cursor with the inventory query already executed
+            chunk_size: Rows fetched and transformed per batch
+
+        Returns:
+            pd.DataFrame: Validated inventory (same shape as transform_inventory_data),
+            or None when the query returned no rows
+        """
+        columns = [desc[0] for desc in cursor.description]
+        rowcount = getattr(cursor, "rowcount", -1) or -1
+        buffer = ColumnarBuffer(capacity=rowcount if rowcount > 0 else chunk_size)
+
+        raw_rows = 0
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            raw_rows += len(rows)
+            chunk_df = pd.DataFrame.from_records(rows, columns=columns)
+            buffer.append(self._transform_inventory_chunk(chunk_df))
+
+        if raw_rows == 0:
+            return None
+
+        logger.info(f"📦 Streamed {raw_rows} inventory rows in batches of {chunk_size}")
+        inventory_df = self._finalize_inventory(buffer.to_frame())
+        # Rows before the transform dropped any, to detect LIMIT truncation
+        inventory_df.attrs["raw_rows"] = raw_rows
+        return inventory_df
+
     def load_customers_from_csv(self, csv_path="data/customer_data.csv"):
         """Load and transform customer data from CSV"""
 
@@ -306,8 +558,16 @@ class DataLoader:
             else:
                 logger.info(f"📊 Loading customer data from {csv_path}...")
             
-            # Read with encoding to handle special characters
-            df = pd.read_csv(csv_path, encoding='utf-8-sig')
+            # Unchanged source file: reuse the transformed frame
+            source_hash = self._file_hash(csv_path)
+            with self._customer_cache_lock:
+                cached_df = self._customer_cache.get(source_hash)
+            if cached_df is not None:
+                logger.info(f"⚡ Customer CSV unchanged ({source_hash[:12]}), using cached frame")
+                # Date-relative fields still move with the clock
+                return self._clean_data_types(cached_df.copy())
+
+            df = self._read_customer_csv(csv_path)
 
             # Transform data to match expected structure
             customers_df = self.transform_customer_data(df)
@@ -320,8 +580,12 @@ class DataLoader:
                 logger.error(f"❌ Customer data validation failed: {e}")
                 raise
 
+            # Keep only the latest version of the file
+            with self._customer_cache_lock:
+                self._customer_cache = {source_hash: customers_df}
+
             logger.info(f"✅ Loaded {len(customers_df)} customers from CSV")
-            return customers_df
+            return customers_df.copy()
 
         except Exception as e:
             from app.utils.exceptions import DataLoadError
@@ -331,6 +595,71 @@ class DataLoader:
                 reason=str(e)
             )
 
+    @staticmethod
+    def _file_hash(path, chunk_size=1 << 20):
+        """Return the SHA-1 hex digest of a file's contents."""
+        digest = hashlib.sha1()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(chunk_size), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def _read_customer_csv(self, csv_path, chunksize=None):
+        """Read the customer CSV with typed columns and parsed contract dates."""
+        usecols = lambda col: col in CUSTOMER_CSV_COLUMNS
+        try:
+            # utf-8-sig strips the BOM the export tool prepends
+            return pd.read_csv(
+                csv_path,
+                encoding='utf-8-sig',
+                usecols=usecols,
+                dtype=CUSTOMER_CSV_DTYPES,
+                parse_dates=["FECHA DE CONTRATO"],
+                date_format=CUSTOMER_DATE_FORMAT,
+                chunksize=chunksize,
+            )
+        except (ValueError, TypeError) as e:
+            # Malformed values or a missing date column; the transform coerces
+            logger.warning(f"⚠️ Typed customer CSV read failed ({e}), falling back to inferred dtypes")
+            return pd.read_csv(csv_path, encoding='utf-8-sig', usecols=usecols, chunksize=chunksize)
+
+    def iter_customers_from_csv(self, csv_path, chunk_size=10000, skip_chunks=()):
+        """
+        Stream a customer CSV as transformed chunks of ``chunk_size`` raw rows.
+
+        Chunk boundaries depend only on the file and ``chunk_size``, so a
+        resuming consumer can pass the indexes it already has in
+        ``skip_chunks`` (they are not transformed). Memory stays at one chunk
+        regardless of file size (no hash cache, no whole-file validation).
+
+        Yields:
+            Tuple[int, pd.DataFrame]: (chunk index, transformed customers)
+        """
+        chunk_index = 0
+        typed = True
+        while True:
+            try:
+                if typed:
+                    reader = self._read_customer_csv(csv_path, chunksize=chunk_size)
+                else:
+                    reader = pd.read_csv(
+                        csv_path, encoding='utf-8-sig', chunksize=chunk_size,
+                        usecols=lambda col: col in CUSTOMER_CSV_COLUMNS
+                    )
+                for position, raw_chunk in enumerate(reader):
+                    if position < chunk_index or position in skip_chunks:
+                        continue
+                    chunk_index = position + 1
+                    yield position, self.transform_customer_data(raw_chunk)
+                return
+            except (ValueError, TypeError) as e:
+                if not typed:
+                    raise
+                # A later chunk did not match the typed schema: restart
+                # untyped and skip the chunks already yielded
+                logger.warning(f"⚠️ Typed customer CSV chunk failed ({e}), continuing with inferred dtypes")
+                typed = False
+
     # ------------------------------------------------------------------
     # Public helper methods
     # ------------------------------------------------------------------
@@ -352,52 +681,14 @@ class DataLoader:
 
     def _map_column_names(self, raw_df):
         """Map Spanish column names to English equivalents."""
-        column_mapping = {
-            # Contract and IDs
-            "CONTRATO": "contract_id",
-            "STOCK ID": "current_stock_id",
-            
-            # Personal info
-            "NOMBRE": "first_name",
-            "APELLIDO": "last_name", 
-            "MAIL": "email",
-            
-            # Financial info
-            "MONTO DE LA MENSUALIDAD": "current_monthly_payment",
-            "SALDO INSOLUTO": "outstanding_balance",
-            "PRECIO AUTO": "current_car_price",
-            "TASA": "original_interest_rate",
-            "MONTO A FINANCIAR": "original_loan_amount",
-            
-            # Contract details
-            "FECHA DE CONTRATO": "contract_date",
-            "PLAZO REMANENTE": "remaining_months",
-            "TIENE KT": "has_kavak_total",
-            
-            # Car details
-            "MARCA": "current_car_brand",
-            "MODELO": "current_car_model_name",
-            "ANO AUTO": "current_car_year",
-            "KILOMETRAJE": "current_car_km",
-            "AGING": "aging",
-            
-            # Risk profile
-            "risk_profile": "risk_profile_name"
-        }
-        
-        # Rename columns using the mapping
-        for old_col, new_col in column_mapping.items():
-            if old_col in raw_df.columns:
-                raw_df[new_col] = raw_df[old_col]
-        
-        return raw_df
+        return raw_df.rename(columns=CUSTOMER_COLUMN_MAPPING)
 
     def _process_risk_profiles(self, raw_df):
         """Map risk profile names to indices and handle unmapped profiles."""
         # Map risk profile names to indices
         raw_df["risk_profile_index"] = raw_df["risk_profile_name"].map(
             self.risk_profile_mapping
-        )
+        ).astype("float64")
 
         # Handle any unmapped risk profiles
         unmapped = raw_df[raw_df["risk_profile_index"].isna()]
@@ -414,8 +705,11 @@ class DataLoader:
         """Parse and process date fields with error handling."""
         # Parse contract date with explicit format to avoid warning
         # The CSV uses M/D/YY format
+        if pd.api.types.is_datetime64_any_dtype(raw_df["contract_date"]):
+            # Already parsed by read_csv
+            return raw_df
         try:
-            raw_df["contract_date"] = pd.to_datetime(raw_df["contract_date"], format="%m/%d/%y", errors="coerce")
+            raw_df["contract_date"] = pd.to_datetime(raw_df["contract_date"], format=CUSTOMER_DATE_FORMAT, errors="coerce")
         except:
             # Fallback to automatic parsing if format doesn't match
             raw_df["contract_date"] = pd.to_datetime(raw_df["contract_date"], errors="coerce")
@@ -435,14 +729,21 @@ class DataLoader:
                 pd.to_numeric(raw_df["outstanding_balance"], errors="coerce")
             )
         
-        # Create full car model string
-        raw_df["current_car_model"] = raw_df.apply(
-            lambda row: f"{row.get('current_car_brand', '')} {row.get('current_car_model_name', '')} {row.get('current_car_year', '')}".strip(),
-            axis=1
-        )
+        # Create full car model string ("<brand> <model> <year>")
+        model_parts = [
+            raw_df[col].astype(str) if col in raw_df.columns else ""
+            for col in ("current_car_brand", "current_car_model_name", "current_car_year")
+        ]
+        raw_df["current_car_model"] = (
+            model_parts[0] + " " + model_parts[1] + " " + model_parts[2]
+        ).str.strip()
         
         return raw_df
 
+    def refresh_derived_fields(self, customers_df: pd.DataFrame) -> pd.DataFrame:
+        """Recompute the date-relative fields of (a slice of) an already transformed customer frame"""
+        return self._clean_data_types(customers_df)
+
     def _clean_data_types(self, customers_df):
         """Convert columns to proper data types with error handling."""
         # Calculate derived fields
@@ -516,6 +817,9 @@ class DataLoader:
             "risk_profile": raw_df["risk_profile_name"],  # Add 'risk_profile' for validator
             "risk_profile_index": raw_df["risk_profile_index"].astype(int),
         })
+
+        for col in CUSTOMER_CATEGORICAL_COLUMNS:
+            customers_df[col] = customers_df[col].astype("category")
         
         return customers_df
 
@@ -605,6 +909,7 @@ class DataLoader:
             - Validates positive car prices and monthly payments
             - Handles missing or malformed dates gracefully
             - Provides fallback values for optional fields
+            - Brand and risk profile columns are returned as categoricals
         """
         # Step 1: Map column names from Spanish to English
         raw_df = self._map_column_names(raw_df)
@@ -727,8 +1032,57 @@ class DataLoader:
         """Load only customer data (for API use)"""
         return self.load_customers_from_csv()
     
+    def cached_customers(self) -> Tuple[Optional[str], Optional[pd.DataFrame]]:
+        """Source hash and cached customer frame (shared, do not mutate), without touching the CSV"""
+        with self._customer_cache_lock:
+            for source_hash, customers_df in self._customer_cache.items():
+                return source_hash, customers_df
+        return None, None
+
+    def cached_customer_count(self) -> Optional[int]:
+        """Rows of the cached customer frame, without touching the CSV (None if not loaded yet)"""
+        _, customers_df = self.cached_customers()
+        return len(customers_df) if customers_df is not None else None
+    
     def load_filtered_inventory_from_redshift(self, year: int, price: float, kilometers: float):
-        """Load pre-filtered inventory from Redshift for trade-up candidates."""
+        """
+        Load pre-filtered inventory from Redshift for trade-up candidates.
+
+        Price and km are widened to FILTER_PRICE_BUCKET / FILTER_KM_BUCKET
+        boundaries so customers with similar cars share one coalesced, briefly
+        cached query; the rows are then filtered to the exact criteria. If the
+        widened query hit the SQL LIMIT, the exact query is run instead.
+        """
+        bucket_price = math.floor(price / FILTER_PRICE_BUCKET) * FILTER_PRICE_BUCKET
+        bucket_km = (
+            math.ceil(kilometers / FILTER_KM_BUCKET) * FILTER_KM_BUCKET
+            if math.isfinite(kilometers) else kilometers
+        )
+
+        inventory_df = self._query_coalescer.run(
+            ("filtered", year, bucket_price, bucket_km),
+            lambda: self._query_filtered_inventory(year, bucket_price, bucket_km)
+        )
+        if inventory_df.attrs.get("raw_rows", 0) >= FILTERED_INVENTORY_ROW_LIMIT and (
+                bucket_price != price or bucket_km != kilometers):
+            logger.info("📊 Bucketed filter hit the row limit, running the exact query")
+            inventory_df = self._query_coalescer.run(
+                ("filtered", year, price, kilometers),
+                lambda: self._query_filtered_inventory(year, price, kilometers)
+            )
+
+        if inventory_df.empty:
+            return inventory_df
+
+        exact = (
+            (inventory_df["year"] >= year)
+            & (inventory_df["car_price"] > price)
+            & (inventory_df["kilometers"] < kilometers)
+        )
+        return inventory_df[exact].reset_index(drop=True)
+
+    def _query_filtered_inventory(self, year, price, kilometers):
+        """Run filtered_inventory_query.sql with the given (already normalized) parameters."""
         logger.info(f"🔍 Loading filtered inventory: year>={year}, price>${price:,.0f}, km<{kilometers:,.0f}")
         
         try:
@@ -749,13 +1103,12 @@ class DataLoader:
                 
                 with conn.cursor() as cursor:
                     cursor.execute(query, (year, price, kilometers))
-                    df = cursor.fetch_dataframe()
+                    inventory_df = self.fetch_inventory_stream(cursor)
                 
-                if df.empty:
+                if inventory_df is None:
                     logger.info("📊 No inventory matches the filter criteria")
                     return pd.DataFrame()
                 
-                inventory_df = self.transform_inventory_data(df)
                 logger.info(f"✅ Loaded {len(inventory_df)} pre-filtered items from Redshift")
                 return inventory_df
                 
@@ -767,60 +1120,165 @@ class DataLoader:
                 reason=f"{type(e).__name__}: {str(e)}"
             )
     
-    def load_single_car_from_redshift(self, car_id: str):
-        """Load a single car from Redshift using WHERE clause - TRUE optimization."""
-        logger.info(f"🔍 Loading single car {car_id} from Redshift...")
-        
-        # Build query with WHERE clause
-        query = """
-        SELECT 
-            stock_id,
-            full_model,
-            region_name,
-            kilometers,
-            color,
-            regular_published_price_financing,
-            promotion_published_price_financing,
-            has_promotion_discount,
-            price_difference_abs,
-            hub_name,
-            region_growth,
-            year
-        FROM public.mx_inventory_with_data
-        WHERE is_available = true
-          AND financing_enabled = true
-          AND has_financing_price = true
-          AND stock_id = %s
-        LIMIT 1
+    def load_inventory_watermark(self):
+        """Return the newest inventory_date in the history table (delta refresh watermark)."""
+        pool = get_connection_pool()
+        with pool.get_connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(INVENTORY_WATERMARK_QUERY)
+                row = cursor.fetchone()
+        return row[0] if row else None
+
+    def load_inventory_delta_from_redshift(self, since):
         """
-        
+        Load the cars with history rows on or after a watermark date.
+
+        inventory_history is a daily snapshot table, so the watermark date is
+        re-read (rows rewritten later that day are picked up) and, once a new
+        date lands, most cars come back unchanged. The caller diffs the
+        upserts against its snapshot (InventorySnapshot.apply_delta) so only
+        cars whose fields changed count as changes.
+
+        Args:
+            since: Watermark from the previous refresh (an inventory_date)
+
+        Returns:
+            Tuple[pd.DataFrame, set, Any]: (upserts_df, deleted_ids, new_watermark)
+                - upserts_df: Transformed rows for the listed cars fetched
+                - deleted_ids: stock_ids that are no longer listed
+                - new_watermark: Newest inventory_date seen (``since`` if nothing changed)
+        """
+        logger.info(f"🔍 Loading inventory changes since {since}...")
+
+        try:
+            with open("data/inventory_delta_query.sql", "r") as file:
+                query = file.read()
+        except FileNotFoundError:
+            from app.utils.exceptions import DataLoadError
+            logger.error("❌ inventory_delta_query.sql not found")
+            raise DataLoadError(
+                source="inventory_delta_query.sql",
+                reason="Query file not found in data/ folder"
+            )
+
         try:
             pool = get_connection_pool()
-            with pool.get_connection(timeout=5) as conn:
+            with pool.get_connection() as conn:
                 with conn.cursor() as cursor:
-                    cursor.execute(query, (car_id,))
-                    result = cursor.fetchone()
-                    
-                    if not result:
-                        logger.warning(f"⚠️ Car {car_id} not found in Redshift")
-                        return None
-                    
+                    cursor.execute(query, (since,))
                     columns = [desc[0] for desc in cursor.description]
-                    df = pd.DataFrame([result], columns=columns)
-                
-                # Transform to match expected format
-                inventory_df = self.transform_inventory_data(df)
-                
-                if inventory_df.empty:
-                    return None
-                    
-                logger.info(f"✅ Successfully loaded car {car_id} from Redshift")
-                return inventory_df.iloc[0].to_dict()
-            
+                    rows = cursor.fetchall()
+
+            raw_df = pd.DataFrame.from_records(rows, columns=columns)
+            return self.split_inventory_delta(raw_df, since)
+
+        except Exception as e:
+            from app.utils.exceptions import DataLoadError
+            logger.error(f"❌ Failed to load inventory delta: {type(e).__name__}: {e}")
+            raise DataLoadError(
+                source="Redshift (delta)",
+                reason=f"{type(e).__name__}: {str(e)}"
+            )
+
+    def split_inventory_delta(self, raw_df, since=None):
+        """Split raw delta rows into transformed upserts, deleted ids and the new watermark."""
+        if raw_df.empty:
+            return pd.DataFrame(), set(), since
+
+        watermark = raw_df["inventory_date"].max()
+        listed = raw_df["is_listed"].fillna(False).astype(bool)
+
+        upserts_df = pd.DataFrame()
+        if listed.any():
+            upserts_df = self._transform_inventory_chunk(raw_df[listed].reset_index(drop=True))
+
+        # Listed rows dropped by the transform (no model, no price) are deletes too
+        upserted_ids = set(upserts_df["car_id"]) if not upserts_df.empty else set()
+        deleted_ids = set(raw_df["stock_id"]) - upserted_ids
+
+        logger.info(f"📊 Inventory delta: {len(upserted_ids)} upserts, {len(deleted_ids)} deletes")
+        return upserts_df, deleted_ids, watermark
+
+    def load_single_car_from_redshift(self, car_id: str):
+        """Load a single car from Redshift (None if missing or the lookup fails)."""
+        try:
+            return self.load_cars_from_redshift([car_id]).get(str(car_id))
         except Exception as e:
             logger.error(f"❌ Error loading car from Redshift: {e}")
             return None
 
+    def load_cars_from_redshift(self, car_ids, chunk_size=None):
+        """
+        Load specific cars from Redshift with ``WHERE stock_id IN (...)``.
+
+        Ids are deduplicated and queried in chunks of ``chunk_size`` (default
+        CAR_LOOKUP_CHUNK_SIZE); each chunk
+        is coalesced, so concurrent or repeated lookups of the same ids share
+        one query.
+
+        Returns:
+            Dict of str(car_id) -> transformed car record for the cars found
+
+        Raises:
+            DataLoadError: If a chunk query fails
+        """
+        chunk_size = chunk_size or CAR_LOOKUP_CHUNK_SIZE
+        unique_ids = sorted({str(car_id) for car_id in car_ids})
+        cars = {}
+        for start in range(0, len(unique_ids), chunk_size):
+            chunk = tuple(unique_ids[start:start + chunk_size])
+            cars.update(self._query_coalescer.run(
+                ("cars", chunk),
+                lambda chunk=chunk: self._query_cars(chunk)
+            ))
+        return cars
+
+    def invalidate_query_cache(self):
+        """Forget coalesced query results (after the inventory changed)."""
+        self._query_coalescer.invalidate()
+
+    def _query_cars(self, car_ids):
+        """Run one stock_id IN (...) lookup and return found cars keyed by id."""
+        logger.info(f"🔍 Loading {len(car_ids)} car(s) from Redshift...")
+
+        try:
+            with open("data/car_lookup_query.sql", "r") as file:
+                query = file.read()
+        except FileNotFoundError:
+            from app.utils.exceptions import DataLoadError
+            logger.error("❌ car_lookup_query.sql not found")
+            raise DataLoadError(
+                source="car_lookup_query.sql",
+                reason="Query file not found in data/ folder"
+            )
+        query = query.replace("{stock_ids}", ", ".join(["%s"] * len(car_ids)))
+
+        try:
+            pool = get_connection_pool()
+            with pool.get_connection(timeout=5) as conn:
+                with conn.cursor() as cursor:
+                    cursor.execute(query, tuple(car_ids))
+                    columns = [desc[0] for desc in cursor.description]
+                    rows = cursor.fetchall()
+        except Exception as e:
+            from app.utils.exceptions import DataLoadError
+            logger.error(f"❌ Failed to load cars from Redshift: {type(e).__name__}: {e}")
+            raise DataLoadError(
+                source="Redshift (cars)",
+                reason=f"{type(e).__name__}: {str(e)}"
+            )
+
+        if not rows:
+            return {}
+
+        # Chunk transform only: snapshot validation rejects an empty result
+        inventory_df = self._transform_inventory_chunk(
+            pd.DataFrame.from_records(rows, columns=columns)
+        )
+        inventory_df = inventory_df.drop_duplicates(subset="car_id")
+        logger.info(f"✅ Loaded {len(inventory_df)} of {len(car_ids)} car(s) from Redshift")
+        return {str(car["car_id"]): car for car in inventory_df.to_dict("records")}
+
 
 # Create global data loader instance
 data_loader = DataLoader()
@@ -9,8 +9,13 @@ import logging
 
 logger = logging.getLogger(__name__)
 
-def generate_mock_inventory(num_cars=100):
+def _random_state(seed=None):
+    """Seeded generator for reproducible data, or the global numpy one"""
+    return np.random if seed is None else np.random.RandomState(seed)
+
+def generate_mock_inventory(num_cars=100, seed=None):
     """Generate realistic mock inventory data matching the expected structure"""
+    rng = _random_state(seed)
     brands = ['CHEVROLET', 'NISSAN', 'MAZDA', 'VOLKSWAGEN', 'KIA', 'TOYOTA', 'HONDA']
     models = {
         'CHEVROLET': ['AVEO', 'SPARK', 'SONIC', 'CRUZE'],
@@ -25,11 +30,11 @@ def generate_mock_inventory(num_cars=100):
     
     data = []
     for i in range(num_cars):
-        brand = np.random.choice(brands)
-        model_name = np.random.choice(models[brand])
-        year = np.random.randint(2015, 2024)
-        price = np.random.randint(150000, 500000)
-        km = np.random.randint(10000, 150000)
+        brand = rng.choice(brands)
+        model_name = rng.choice(models[brand])
+        year = rng.randint(2015, 2024)
+        price = rng.randint(150000, 500000)
+        km = rng.randint(10000, 150000)
         
         # Build full model name like the real data
         full_model = f"{brand} {model_name} {year}"
@@ -39,31 +44,32 @@ def generate_mock_inventory(num_cars=100):
             'model': full_model,  # Full model string
             'car_price': price,
             'sales_price': price,  # Alias for backward compatibility
-            'region': np.random.choice(regions),
+            'region': rng.choice(regions),
             'kilometers': km,
-            'color': np.random.choice(['BLANCO', 'NEGRO', 'GRIS', 'ROJO', 'AZUL']),
-            'has_promotion': np.random.choice([True, False], p=[0.2, 0.8]),
-            'price_difference': np.random.randint(-5000, 5000),
-            'hub_name': np.random.choice(['Hub Norte', 'Hub Sur', 'Hub Centro']),
-            'region_growth': np.random.uniform(0.8, 1.2),
+            'color': rng.choice(['BLANCO', 'NEGRO', 'GRIS', 'ROJO', 'AZUL']),
+            'has_promotion': rng.choice([True, False], p=[0.2, 0.8]),
+            'price_difference': rng.randint(-5000, 5000),
+            'hub_name': rng.choice(['Hub Norte', 'Hub Sur', 'Hub Centro']),
+            'region_growth': rng.uniform(0.8, 1.2),
             'car_brand': brand,
             'make': brand,  # Alias for compatibility
             'brand': brand,  # Another alias
             'year': year,
             'model_short': model_name,
             # Additional fields for filtering
-            'transmission': np.random.choice(['MANUAL', 'AUTOMATICO']),
+            'transmission': rng.choice(['MANUAL', 'AUTOMATICO']),
             'fuel_type': 'GASOLINA',
-            'doors': np.random.choice([4, 5]),
-            'engine_size': np.random.choice(['1.4L', '1.6L', '2.0L', '2.5L']),
+            'doors': rng.choice([4, 5]),
+            'engine_size': rng.choice(['1.4L', '1.6L', '2.0L', '2.5L']),
             'status': 'DISPONIBLE'
         })
     
     logger.info(f"✅ Generated {num_cars} mock inventory items")
     return pd.DataFrame(data)
 
-def generate_mock_customers(num_customers=50):
+def generate_mock_customers(num_customers=50, seed=None):
     """Generate realistic mock customer data matching the expected structure"""
+    rng = _random_state(seed)
     risk_profiles = ['A1', 'A2', 'B1', 'B2', 'C1', 'C2', 'C3']
     first_names = ['Juan', 'Maria', 'Carlos', 'Ana', 'Luis', 'Laura', 'Miguel', 'Sofia']
     last_names = ['Garcia', 'Rodriguez', 'Martinez', 'Lopez', 'Gonzalez', 'Perez', 'Sanchez']
@@ -78,19 +84,19 @@ def generate_mock_customers(num_customers=50):
     
     data = []
     for i in range(num_customers):
-        payment = np.random.randint(3000, 15000)
-        balance = np.random.randint(50000, 400000)
+        payment = rng.randint(3000, 15000)
+        balance = rng.randint(50000, 400000)
         car_price = balance * 1.2
         equity = car_price - balance
-        first_name = np.random.choice(first_names)
-        last_name = np.random.choice(last_names)
-        risk_profile = np.random.choice(risk_profiles)
-        car_year = np.random.randint(2015, 2022)
-        car_brand = np.random.choice(brands)
-        car_model = np.random.choice(models)
+        first_name = rng.choice(first_names)
+        last_name = rng.choice(last_names)
+        risk_profile = rng.choice(risk_profiles)
+        car_year = rng.randint(2015, 2022)
+        car_brand = rng.choice(brands)
+        car_model = rng.choice(models)
         
         # Generate contract date 6-36 months ago
-        months_ago = np.random.randint(6, 36)
+        months_ago = rng.randint(6, 36)
         contract_date = datetime.now() - pd.DateOffset(months=months_ago)
         
         data.append({
@@ -112,21 +118,21 @@ def generate_mock_customers(num_customers=50):
             'outstanding_balance': balance,
             'current_car_price': car_price,
             'original_loan_amount': balance * 1.1,
-            'original_interest_rate': np.random.uniform(0.12, 0.25),
+            'original_interest_rate': rng.uniform(0.12, 0.25),
             
             # Contract details
             'contract_date': contract_date,
-            'remaining_months': np.random.randint(12, 48),
-            'has_kavak_total': np.random.choice([True, False], p=[0.3, 0.7]),
+            'remaining_months': rng.randint(12, 48),
+            'has_kavak_total': rng.choice([True, False], p=[0.3, 0.7]),
             
             # Car details
             'current_car_brand': car_brand,
             'current_car_model_name': car_model,
             'current_car_year': car_year,
-            'current_car_km': np.random.randint(20000, 100000),
+            'current_car_km': rng.randint(20000, 100000),
             'current_car_model': f'{car_brand} {car_model} {car_year}',
-            'aging': np.random.randint(0, 3),
-            'car_age_at_purchase': np.random.randint(0, 3),
+            'aging': rng.randint(0, 3),
+            'car_age_at_purchase': rng.randint(0, 3),
             
             # Risk profile
             'risk_profile_name': risk_profile,
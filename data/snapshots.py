@@ -0,0 +1,188 @@
+"""
+In-memory data snapshots for Trade-Up Engine
+- Inventory held as one DataFrame with a monotonically increasing version
+- Full replace or incremental upsert/delete (delta refresh)
+- Refresh watermark tracked alongside the data
+- Thread-safe; readers get the current frame without copying
+- Hash index by car_id for batched point lookups
+"""
+import time
+import threading
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+import pandas as pd
+
+from .loader import INVENTORY_CATEGORICAL_COLUMNS
+
+logger = logging.getLogger(__name__)
+
+
+class InventorySnapshot:
+    """
+    Current inventory keyed by car_id.
+
+    Every change (full replace or a delta that actually touched rows) bumps
+    ``version`` so derived data can be tied to the snapshot it was built from.
+    The frame returned by ``get_dataframe`` is shared: treat it as read-only.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._df: Optional[pd.DataFrame] = None
+        self._records: Optional[List[Dict]] = None
+        self._index: Optional[Dict[str, int]] = None
+        self.version = 0
+        self.watermark: Any = None
+        self.full_loaded_at: Optional[float] = None
+        self.refreshed_at: Optional[float] = None
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._df is not None
+
+    def replace(self, inventory_df: pd.DataFrame, watermark: Any = None):
+        """Swap in a fully reloaded inventory"""
+        with self._lock:
+            self._df = inventory_df.reset_index(drop=True)
+            self._records = None
+            self._index = None
+            self.watermark = watermark
+            self.version += 1
+            self.full_loaded_at = self.refreshed_at = time.time()
+            logger.info(f"📦 Inventory snapshot v{self.version}: {len(self._df)} cars (full load)")
+
+    def apply_delta(self, upserts_df: pd.DataFrame, deleted_ids: Iterable,
+                    watermark: Any = None) -> Set:
+        """
+        Apply changed cars on top of the current snapshot.
+
+        Upserts identical to the car's current row are ignored, so a delta
+        that re-fetches unchanged cars neither bumps the version nor reports
+        them as changed.
+
+        Args:
+            upserts_df: Transformed rows for new or possibly updated cars
+            deleted_ids: car_ids that are no longer listed
+            watermark: New refresh watermark (kept unchanged if None)
+
+        Returns:
+            Set of car_ids that were added, updated or removed
+        """
+        with self._lock:
+            if self._df is None:
+                raise RuntimeError("Cannot apply an inventory delta before a full load")
+
+            if not upserts_df.empty:
+                upserts_df = self._changed_rows(upserts_df)
+            upsert_ids = set(upserts_df["car_id"]) if not upserts_df.empty else set()
+            current_ids = self._df["car_id"]
+            removed_mask = current_ids.isin(set(deleted_ids) | upsert_ids)
+            removed_ids = set(current_ids[removed_mask]) - upsert_ids
+            changed = removed_ids | upsert_ids
+
+            if watermark is not None:
+                self.watermark = watermark
+            self.refreshed_at = time.time()
+
+            if not changed:
+                logger.info(f"📦 Inventory snapshot v{self.version}: delta had no changes")
+                return changed
+
+            kept = self._df[~removed_mask]
+            if upsert_ids:
+                merged = pd.concat([kept, upserts_df[self._df.columns]], ignore_index=True)
+                # Concatenating categoricals with different categories yields object
+                for column in INVENTORY_CATEGORICAL_COLUMNS:
+                    if column in merged.columns:
+                        merged[column] = merged[column].astype("category")
+            else:
+                merged = kept.reset_index(drop=True)
+
+            self._df = merged
+            self._records = None
+            self._index = None
+            self.version += 1
+            logger.info(
+                f"📦 Inventory snapshot v{self.version}: {len(upsert_ids)} upserted, "
+                f"{len(removed_ids)} removed, {len(merged)} cars"
+            )
+            return changed
+
+    def _changed_rows(self, upserts_df: pd.DataFrame) -> pd.DataFrame:
+        """Upserts for new cars or cars whose values differ from the current row"""
+        current = self._df[self._df["car_id"].isin(set(upserts_df["car_id"]))]
+        if current.empty:
+            return upserts_df
+        current = current.drop_duplicates("car_id", keep="last").set_index("car_id")
+        incoming = upserts_df.set_index("car_id")[current.columns]
+        known = incoming.index.isin(current.index)
+        new = incoming[known].astype(object)
+        old = current.reindex(new.index).astype(object)
+        same = ((old == new) | (old.isna() & new.isna())).all(axis=1)
+        unchanged_ids = set(same.index[same.to_numpy()])
+        return upserts_df[~upserts_df["car_id"].isin(unchanged_ids)]
+
+    def get_dataframe(self) -> Optional[pd.DataFrame]:
+        """Current inventory frame (shared, do not mutate)"""
+        with self._lock:
+            return self._df
+
+    def get_versioned_dataframe(self) -> Tuple[int, Optional[pd.DataFrame]]:
+        """Current version and frame, read together (shared, do not mutate)"""
+        with self._lock:
+            return self.version, self._df
+
+    def to_records(self) -> List[Dict]:
+        """Inventory as a list of dicts, built once per version"""
+        with self._lock:
+            if self._df is None:
+                return []
+            if self._records is None:
+                self._records = self._df.to_dict("records")
+            return self._records
+
+    def get_cars(self, car_ids: Iterable) -> Dict[str, Dict]:
+        """
+        Look up cars by id through a hash index built once per version.
+
+        Returns:
+            Dict of str(car_id) -> car record (a copy) for the ids present;
+            ids not in the snapshot are simply absent
+        """
+        with self._lock:
+            if self._df is None:
+                return {}
+            records = self.to_records()
+            if self._index is None:
+                self._index = {str(car_id): position
+                               for position, car_id in enumerate(self._df["car_id"])}
+            index = self._index
+
+        found = {}
+        for car_id in car_ids:
+            key = str(car_id)
+            position = index.get(key)
+            if position is not None:
+                found[key] = dict(records[position])
+        return found
+
+    def age_seconds(self) -> Optional[float]:
+        """Seconds since the last successful refresh (full or delta)"""
+        if self.refreshed_at is None:
+            return None
+        return time.time() - self.refreshed_at
+
+    def get_status(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "loaded": self.is_loaded,
+                "version": self.version,
+                "rows": len(self._df) if self._df is not None else 0,
+                "watermark": str(self.watermark) if self.watermark is not None else None,
+                "age_seconds": round(self.age_seconds(), 1) if self.refreshed_at else None,
+            }
+
+
+# Global snapshot instances
+inventory_snapshot = InventorySnapshot()
@@ -0,0 +1,178 @@
+"""
+In-memory inverted text index for the universal search box
+- Trigram postings for infix queries, token-prefix postings for 1-2 character queries
+- Ranked results (exact > field prefix > word prefix > infix, weighted by field)
+- Incremental upsert/remove so snapshot deltas don't force a rebuild
+"""
+import heapq
+import logging
+import re
+import threading
+import time
+import unicodedata
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+NGRAM = 3
+
+_NON_ALNUM = re.compile(r"[^0-9a-z@.]+")
+
+
+def normalize(value: Any) -> str:
+    """Lowercase, accent-free text with punctuation collapsed to single spaces"""
+    if value is None or value != value:  # None / NaN
+        return ""
+    text = unicodedata.normalize("NFKD", str(value))
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    return _NON_ALNUM.sub(" ", text.lower()).strip()
+
+
+def _ngrams(text: str) -> Set[str]:
+    return {text[i:i + NGRAM] for i in range(len(text) - NGRAM + 1)}
+
+
+def _short_prefixes(text: str) -> Set[str]:
+    prefixes = set()
+    for token in text.split():
+        prefixes.update(token[:length] for length in range(1, NGRAM) if len(token) >= length)
+    return prefixes
+
+
+class TextIndex:
+    """
+    Inverted index over a few text fields of keyed documents.
+
+    Queries of NGRAM characters or more match anywhere in a field (candidates
+    from the trigram postings, confirmed by a substring check); shorter
+    queries match the start of a word. ``version`` records which data
+    version the index reflects.
+    """
+
+    def __init__(self, fields: Dict[str, float]):
+        """
+        Args:
+            fields: Field name -> ranking weight
+        """
+        self.fields = fields
+        self.version: Optional[Hashable] = None
+        self._lock = threading.RLock()
+        self._docs: Dict[Hashable, Tuple[str, ...]] = {}
+        self._order: Dict[Hashable, int] = {}
+        self._postings: Dict[str, Set[Hashable]] = {}
+        self._next_order = 0
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def _terms(self, texts: Tuple[str, ...]) -> Set[str]:
+        terms: Set[str] = set()
+        for text in texts:
+            terms |= _ngrams(text)
+            terms |= _short_prefixes(text)
+        return terms
+
+    def _add(self, key: Hashable, texts: Tuple[str, ...]):
+        self._docs[key] = texts
+        if key not in self._order:
+            self._order[key] = self._next_order
+            self._next_order += 1
+        for term in self._terms(texts):
+            self._postings.setdefault(term, set()).add(key)
+
+    def _discard(self, key: Hashable):
+        texts = self._docs.pop(key, None)
+        if texts is None:
+            return
+        for term in self._terms(texts):
+            keys = self._postings.get(term)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._postings[term]
+
+    def _rows(self, keys: Iterable[Hashable], columns: Dict[str, Iterable[Any]]):
+        values = [columns.get(field, ()) for field in self.fields]
+        values = [list(column) if column is not None else [] for column in values]
+        for position, key in enumerate(keys):
+            yield key, tuple(normalize(column[position]) if position < len(column) else ""
+                             for column in values)
+
+    def rebuild(self, keys: Iterable[Hashable], columns: Dict[str, Iterable[Any]],
+                version: Optional[Hashable] = None):
+        """
+        Replace the whole index.
+
+        Args:
+            keys: Document keys
+            columns: Field name -> values aligned with keys (missing fields index as empty)
+            version: Data version the index now reflects
+        """
+        start = time.perf_counter()
+        with self._lock:
+            self._docs = {}
+            self._order = {}
+            self._postings = {}
+            self._next_order = 0
+            for key, texts in self._rows(keys, columns):
+                self._add(key, texts)
+            self.version = version
+        logger.info(f"🔎 Text index v{version}: {len(self._docs)} docs, {len(self._postings)} terms "
+                    f"in {(time.perf_counter() - start) * 1000:.0f}ms")
+
+    def update(self, keys: Iterable[Hashable], columns: Dict[str, Iterable[Any]],
+               removed: Iterable[Hashable] = (), version: Optional[Hashable] = None):
+        """Upsert the given documents and drop the removed keys"""
+        with self._lock:
+            for key in removed:
+                self._discard(key)
+                self._order.pop(key, None)
+            for key, texts in self._rows(keys, columns):
+                self._discard(key)
+                self._add(key, texts)
+            self.version = version
+
+    def _score(self, texts: Tuple[str, ...], query: str) -> float:
+        best = 0.0
+        for weight, text in zip(self.fields.values(), texts):
+            if not text:
+                continue
+            if text == query:
+                score = 4 * weight
+            elif text.startswith(query):
+                score = 3 * weight
+            elif (" " + query) in text:
+                score = 2 * weight
+            elif len(query) >= NGRAM and query in text:
+                score = weight
+            else:
+                continue
+            best = max(best, score)
+        return best
+
+    def search(self, query: str, limit: int = 20, offset: int = 0) -> Tuple[List[Hashable], int]:
+        """
+        Ranked keys matching query.
+
+        Returns:
+            (keys for the requested page, total number of matches)
+        """
+        query = normalize(query)
+        if not query:
+            return [], 0
+
+        with self._lock:
+            terms = _ngrams(query) if len(query) >= NGRAM else {query}
+            postings = sorted((self._postings.get(term, set()) for term in terms), key=len)
+            if not postings or not postings[0]:
+                return [], 0
+            candidates = set(postings[0]).intersection(*postings[1:])
+
+            scored = []
+            for key in candidates:
+                score = self._score(self._docs[key], query)
+                if score:
+                    scored.append((-score, self._order[key], key))
+
+        page = heapq.nsmallest(offset + limit, scored)[offset:]
+        return [key for _, _, key in page], len(scored)
@@ -1,5 +1,5 @@
 import logging
-from typing import Dict, List, Optional
+from typing import Dict, Iterator, List, Optional, Tuple
 import time
 import numpy_financial as npf
 import numpy as np
@@ -11,11 +11,11 @@ from app.constants import (
     REFRESH_TIER_MIN, REFRESH_TIER_MAX,
     UPGRADE_TIER_MIN, UPGRADE_TIER_MAX,
     MAX_UPGRADE_TIER_MIN, MAX_UPGRADE_TIER_MAX,
-    TERM_60_RATE_ADJUSTMENT, TERM_72_RATE_ADJUSTMENT,
     NPV_BASE_MARGIN_DEDUCTION,
     DEFAULT_SERVICE_FEE_PCT, DEFAULT_CXA_PCT, DEFAULT_CAC_BONUS,
     KAVAK_TOTAL_DEFAULT_AMOUNT,
-    VALID_LOAN_TERMS
+    VALID_LOAN_TERMS,
+    OFFER_STREAM_BATCH_SIZE
 )
 from config.config import (
     get_hardcoded_financial_parameters, 
@@ -23,10 +23,10 @@ from config.config import (
     IVA_RATE,
     GPS_INSTALLATION_FEE,
     GPS_MONTHLY_FEE,
-    DEFAULT_FEES,
-    INSURANCE_TABLE
+    DEFAULT_FEES
 )
 from .payment_utils import calculate_monthly_payment
+from .price_windows import offer_price_windows, resolve_insurance_amount, term_interest_rate, window_mask
 
 logger = logging.getLogger(__name__)
 
@@ -135,15 +135,77 @@ class BasicMatcher:
             - All prices include IVA (16% tax) where applicable
         """
         start_time = time.time()
+        fees = self.resolve_fees(custom_fees)
         
+        logger.info(f"🔍 Finding viable cars for {customer['customer_id']}")
+        logger.info(f"   Current payment: ${customer['current_monthly_payment']:,.0f}")
+        logger.info(f"   Equity: ${customer['vehicle_equity']:,.0f}")
+        logger.info(f"   Current car: ${customer['current_car_price']:,.0f}")
+        
+        cars_tested = len(self.eligible_cars(customer, inventory))
+        
+        offers = []
+        for batch, _, _ in self.iter_offer_batches(customer, inventory, custom_fees):
+            offers.extend(batch)
+        
+        organized = self.organize_offers(offers)
+        total = sum(len(tier) for tier in organized.values())
+        
+        logger.info(f"✅ Found {total} viable offers from {cars_tested} cars tested")
+        logger.info(f"   Refresh: {len(organized['Refresh'])}")
+        logger.info(f"   Upgrade: {len(organized['Upgrade'])}")
+        logger.info(f"   Max Upgrade: {len(organized['Max Upgrade'])}")
+        
+        return {
+            "offers": organized,
+            "total_offers": total,
+            "cars_tested": cars_tested,
+            "processing_time": round(time.time() - start_time, 2),
+            "fees_used": fees,
+            "message": f"Showing all viable offers with {'custom' if custom_fees else 'standard'} fees"
+        }
+    
+    @staticmethod
+    def resolve_fees(custom_fees: Optional[Dict]) -> Dict:
+        """Fee configuration in effect: the custom overrides or the defaults"""
         if custom_fees:
-            fees = custom_fees
-        else:
-            fees = {
-                'service_fee_pct': DEFAULT_SERVICE_FEE_PCT,
-                'cxa_pct': DEFAULT_CXA_PCT,
-                'cac_bonus': DEFAULT_CAC_BONUS
-            }
+            return custom_fees
+        return {
+            'service_fee_pct': DEFAULT_SERVICE_FEE_PCT,
+            'cxa_pct': DEFAULT_CXA_PCT,
+            'cac_bonus': DEFAULT_CAC_BONUS
+        }
+    
+    @staticmethod
+    def eligible_cars(customer: Dict, inventory: List[Dict]) -> List[Dict]:
+        """Cars worth evaluating: more expensive than the customer's current car"""
+        return [car for car in inventory if car['car_price'] > customer['current_car_price']]
+    
+    def iter_offer_batches(self, customer: Dict, inventory: List[Dict],
+                           custom_fees: Optional[Dict] = None,
+                           batch_size: int = OFFER_STREAM_BATCH_SIZE) -> Iterator[Tuple[List[Dict], int, int]]:
+        """
+        Evaluate every eligible car/term combination and yield viable offers as
+        they are computed, without waiting for the whole inventory.
+        
+        Only combinations whose car price falls inside the term's closed-form
+        price window (see engine.price_windows) are submitted; the others
+        cannot produce an offer in any tier.
+        
+        Offers are yielded in completion order (unsorted and untiered); use
+        organize_offers() on the accumulated offers for the final ordering.
+        Closing the generator early cancels the evaluations not yet started.
+        
+        Args:
+            customer: Customer data (see find_all_viable)
+            inventory: Candidate vehicles
+            custom_fees: Optional fee overrides (see find_all_viable)
+            batch_size: Completed evaluations per yielded batch
+            
+        Yields:
+            (offers, completed evaluations, total evaluations)
+        """
+        fees = self.resolve_fees(custom_fees)
         
         risk_profile = customer.get('risk_profile_name', 'A')
         risk_index = customer.get('risk_profile_index', 3)
@@ -157,59 +219,63 @@ class BasicMatcher:
         else:
             base_interest_rate = INTEREST_RATE_TABLE.get(risk_profile, 0.18)
         
-        logger.info(f"🔍 Finding viable cars for {customer['customer_id']}")
-        logger.info(f"   Current payment: ${customer['current_monthly_payment']:,.0f}")
-        logger.info(f"   Equity: ${customer['vehicle_equity']:,.0f}")
-        logger.info(f"   Current car: ${customer['current_car_price']:,.0f}")
-        
-        offers = []
-        cars_tested = 0
-        
-        eligible_cars = [car for car in inventory if car['car_price'] > customer['current_car_price']]
-        cars_tested = len(eligible_cars)
+        cars = self.eligible_cars(customer, inventory)
+        windows = offer_price_windows(customer, fees, base_interest_rate, VALID_LOAN_TERMS)
+        prices = np.array([car['car_price'] for car in cars], dtype=float)
+        in_window = window_mask(prices, windows, VALID_LOAN_TERMS)
+        logger.debug(f"Price windows keep {int(in_window.sum())}/{in_window.size} car/term evaluations")
         
         tasks = []
-        for car in eligible_cars:
-            for term in VALID_LOAN_TERMS:
-                task = self.executor.submit(
-                    self._generate_offer,
-                    customer=customer,
-                    car=car,
-                    term=term,
-                    base_interest_rate=base_interest_rate,
-                    risk_index=risk_index,
-                    fees_config=fees
-                )
-                tasks.append(task)
+        for position, term_index in zip(*np.nonzero(in_window)):
+            task = self.executor.submit(
+                self._generate_offer,
+                customer=customer,
+                car=cars[position],
+                term=VALID_LOAN_TERMS[term_index],
+                base_interest_rate=base_interest_rate,
+                risk_index=risk_index,
+                fees_config=fees
+            )
+            tasks.append(task)
         
         # MEMORY OPTIMIZATION: Process futures as they complete to free memory
         completed_count = 0
         total_tasks = len(tasks)
+        errors = 0
+        batch = []
         
-        for future in as_completed(tasks):
-            try:
-                offer = future.result()
-                if offer:
-                    offers.append(offer)
+        try:
+            for future in as_completed(tasks):
+                completed_count += 1
+                try:
+                    offer = future.result()
+                    if offer:
+                        batch.append(offer)
+                except Exception as e:
+                    # Only log first few errors to avoid spam
+                    errors += 1
+                    if errors <= 10:
+                        logger.warning(f"Error generating offer: {e}")
                 
                 # Free the future's resources immediately
                 del future
                 
-                # Log progress periodically for large batches
-                completed_count += 1
-                if completed_count % 100 == 0 and total_tasks > 100:
-                    logger.debug(f"Processed {completed_count}/{total_tasks} offers")
-                    
-            except Exception as e:
-                # Only log first few errors to avoid spam
-                if len(offers) < 10:
-                    logger.warning(f"Error generating offer: {e}")
-                completed_count += 1
-                continue
-        
-        # Clear the tasks list to free memory
-        tasks.clear()
-        
+                if completed_count % batch_size == 0 or completed_count == total_tasks:
+                    # Log progress periodically for large batches
+                    if total_tasks > 100:
+                        logger.debug(f"Processed {completed_count}/{total_tasks} offers")
+                    yield batch, completed_count, total_tasks
+                    batch = []
+        finally:
+            # Abandoned early (e.g. client disconnected): drop queued evaluations
+            for task in tasks:
+                task.cancel()
+            # Clear the tasks list to free memory
+            tasks.clear()
+    
+    @staticmethod
+    def organize_offers(offers: List[Dict]) -> Dict[str, List[Dict]]:
+        """Group offers into payment-change tiers, each sorted by NPV (highest first)"""
         organized = {
             "Refresh": [],
             "Upgrade": [],
@@ -231,21 +297,7 @@ class BasicMatcher:
                 sorted_indices = np.argsort(npvs)[::-1]
                 organized[tier] = [organized[tier][i] for i in sorted_indices]
         
-        total = sum(len(tier) for tier in organized.values())
-        
-        logger.info(f"✅ Found {total} viable offers from {cars_tested} cars tested")
-        logger.info(f"   Refresh: {len(organized['Refresh'])}")
-        logger.info(f"   Upgrade: {len(organized['Upgrade'])}")
-        logger.info(f"   Max Upgrade: {len(organized['Max Upgrade'])}")
-        
-        return {
-            "offers": organized,
-            "total_offers": total,
-            "cars_tested": cars_tested,
-            "processing_time": round(time.time() - start_time, 2),
-            "fees_used": fees,
-            "message": f"Showing all viable offers with {'custom' if custom_fees else 'standard'} fees"
-        }
+        return organized
     
     def _generate_offer(self, customer: Dict, car: Dict, term: int, 
                        base_interest_rate: float, risk_index: int, 
@@ -301,12 +353,7 @@ class BasicMatcher:
             - Risk profile or term not found in lookup tables
         """
         
-        if term == 60:
-            interest_rate = base_interest_rate + TERM_60_RATE_ADJUSTMENT
-        elif term == 72:
-            interest_rate = base_interest_rate + TERM_72_RATE_ADJUSTMENT
-        else:
-            interest_rate = base_interest_rate
+        interest_rate = term_interest_rate(base_interest_rate, term)
         
         interest_rate_with_iva = interest_rate * (1 + IVA_RATE)
         monthly_rate = interest_rate_with_iva / 12
@@ -321,10 +368,7 @@ class BasicMatcher:
         cxa_amount = car['car_price'] * fees_config['cxa_pct']
         cac_bonus = fees_config.get('cac_bonus', 0)
         kavak_total_amount = fees_config.get('kavak_total_amount', KAVAK_TOTAL_DEFAULT_AMOUNT)
-        if 'insurance_amount' in fees_config and fees_config['insurance_amount'] is not None:
-            insurance_amount = fees_config['insurance_amount']
-        else:
-            insurance_amount = INSURANCE_TABLE.get(customer.get('risk_profile_name', 'A'), 10999)
+        insurance_amount = resolve_insurance_amount(customer, fees_config)
         
         gps_install_fee = fees_config.get('gps_installation_fee', GPS_INSTALLATION_FEE)
         gps_monthly_fee = fees_config.get('gps_monthly_fee', GPS_MONTHLY_FEE)
@@ -0,0 +1,323 @@
+"""
+Customer x inventory offer matrix
+
+Evaluates every (customer, car, term) combination with the standard fees in
+blocked NumPy tiles sized to a memory budget, using the per customer price
+windows and linear payments of CustomerFeatures. Tiles are reduced as they
+are computed, so only the results are kept:
+
+- the top K offers (by NPV) of every customer in every tier
+- per customer offer counts and best offer (the campaign output row)
+- per car demand: customers with at least one offer, overall and per tier
+
+Results match find_all_viable without custom fees.
+"""
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from app.constants import (
+    NPV_BASE_MARGIN_DEDUCTION,
+    OFFER_MATRIX_MEMORY_BUDGET_MB, OFFER_MATRIX_TOP_K,
+    VALID_LOAN_TERMS
+)
+from .reverse_matcher import CustomerFeatures, TIERS, tier_codes
+
+logger = logging.getLogger(__name__)
+
+# Peak bytes per (customer, car, term) cell of a tile: the dense masks plus,
+# when every cell holds an offer, its indices, payment, delta and tier
+BYTES_PER_CELL = 64
+
+# Output column prefix per tier ("Max Upgrade" -> "max_upgrade")
+TIER_COLUMNS = [tier.lower().replace(" ", "_") for tier in TIERS]
+
+OFFER_COLUMNS = [
+    "customer_id", "tier", "rank", "car_id", "car_model", "car_price", "term",
+    "monthly_payment", "payment_delta", "interest_rate", "npv",
+]
+CUSTOMER_COLUMNS = [
+    "customer_id", *[f"{tier}_offers" for tier in TIER_COLUMNS], "total_offers",
+    "best_npv", "best_tier", "best_car_id",
+]
+CAR_COLUMNS = [
+    "car_id", "car_model", "car_price", "customers",
+    *[f"{tier}_customers" for tier in TIER_COLUMNS], "offers",
+]
+
+OFFERS_FILE = "offers.parquet"
+CUSTOMERS_FILE = "customers.parquet"
+CARS_FILE = "car_demand.parquet"
+SUMMARY_FILE = "summary.json"
+
+
+def _run_starts(sorted_keys: np.ndarray) -> np.ndarray:
+    """Mask of the first entry of every run of equal keys"""
+    starts = np.ones(len(sorted_keys), dtype=bool)
+    starts[1:] = sorted_keys[1:] != sorted_keys[:-1]
+    return starts
+
+
+def _group_ranks(sorted_groups: np.ndarray) -> np.ndarray:
+    """0-based position of every entry within its run of equal (sorted) group keys"""
+    starts = np.flatnonzero(_run_starts(sorted_groups))
+    return np.arange(len(sorted_groups)) - np.repeat(starts, np.diff(np.r_[starts, len(sorted_groups)]))
+
+
+def _top_k(groups: np.ndarray, rank_keys: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k smallest rank keys of every group, ordered by group then rank key"""
+    if not len(groups):
+        return np.arange(0)
+    # One integer sort; tile entries arrive nearly ordered, which the stable sort exploits
+    order = np.argsort(groups * (int(rank_keys.max()) + 1) + rank_keys, kind="stable")
+    return order[_group_ranks(groups[order]) < k]
+
+
+class OfferMatrix:
+    """
+    Running reduction of the customer x car x term offer matrix over one inventory.
+
+    Customers are added in batches (add_customers), e.g. one campaign chunk at
+    a time; per car demand accumulates across batches.
+    """
+
+    def __init__(self, inventory_df: pd.DataFrame,
+                 top_k: int = OFFER_MATRIX_TOP_K,
+                 memory_budget_mb: float = OFFER_MATRIX_MEMORY_BUDGET_MB):
+        if top_k <= 0:
+            raise ValueError("top_k must be positive")
+        if memory_budget_mb <= 0:
+            raise ValueError("memory_budget_mb must be positive")
+        self.top_k = top_k
+        self.cells_per_tile = max(len(VALID_LOAN_TERMS), int(memory_budget_mb * 1024 ** 2 // BYTES_PER_CELL))
+
+        # Cars ordered by price, so the cars inside a block of price windows are a slice
+        prices = inventory_df["car_price"] if "car_price" in inventory_df.columns else inventory_df["sales_price"]
+        prices = pd.to_numeric(prices, errors="coerce").to_numpy(dtype=float)
+        priced = np.flatnonzero(~np.isnan(prices))
+        order = priced[np.argsort(prices[priced], kind="stable")]
+        self.car_prices = prices[order]
+        self.car_ids = inventory_df["car_id"].to_numpy()[order]
+        models = inventory_df["model"] if "model" in inventory_df.columns else pd.Series("Unknown", index=inventory_df.index)
+        self.car_models = models.fillna("Unknown").to_numpy()[order]
+
+        self.car_offers = np.zeros(len(order), dtype=np.int64)
+        self.car_customers = np.zeros(len(order), dtype=np.int64)
+        self.car_tier_customers = np.zeros((len(order), len(TIERS)), dtype=np.int64)
+        self._offers: List[pd.DataFrame] = []
+        self._customers: List[pd.DataFrame] = []
+        self.cells_evaluated = 0
+        self.tiles = 0
+        self.processing_time = 0.0
+
+    def _tiles(self, features: CustomerFeatures):
+        """(customer slice, car slice) tiles covering every customer and the cars its windows can reach"""
+        terms = len(VALID_LOAN_TERMS)
+        cars_per_tile = max(1, min(len(self.car_prices), self.cells_per_tile // terms))
+        customers_per_tile = max(1, self.cells_per_tile // (cars_per_tile * terms))
+        for c0 in range(0, len(features), customers_per_tile):
+            customers = slice(c0, min(c0 + customers_per_tile, len(features)))
+            low = features.low[customers].min(initial=np.inf)
+            high = features.high[customers].max(initial=-np.inf)
+            start = int(np.searchsorted(self.car_prices, low, side="left"))
+            stop = int(np.searchsorted(self.car_prices, high, side="right"))
+            for k0 in range(start, stop, cars_per_tile):
+                yield customers, slice(k0, min(k0 + cars_per_tile, stop))
+
+    def add_customers(self, customers_df: pd.DataFrame) -> None:
+        """Evaluate a batch of customers against the whole inventory and fold in the results"""
+        start_time = time.time()
+        features = CustomerFeatures(customers_df)
+        fees = features.fees
+        margin_pct = fees["service_fee_pct"] + fees["cxa_pct"]
+        tier_count = len(TIERS)
+        terms = np.asarray(VALID_LOAN_TERMS)
+        car_count = len(self.car_prices)
+
+        offer_counts = np.zeros((len(features), tier_count), dtype=np.int64)
+        best_npv = np.full(len(features), -np.inf)
+        best_tier = np.full(len(features), -1)
+        best_car = np.full(len(features), -1)
+        candidates: Dict[str, List[np.ndarray]] = {name: [] for name in (
+            "customer", "car", "column", "tier", "payment", "delta", "npv")}
+
+        for customers, cars in self._tiles(features):
+            self.tiles += 1
+            prices = self.car_prices[cars]
+            self.cells_evaluated += (customers.stop - customers.start) * len(prices) * len(terms)
+
+            price_grid = prices[None, :, None]
+            inside = ((features.low[customers, None, :] <= price_grid)
+                      & (price_grid <= features.high[customers, None, :])
+                      & (price_grid > features.current_car_price[customers, None, None]))
+            ci, ki, ti = np.nonzero(inside)
+            del inside
+            if not len(ci):
+                continue
+            ci += customers.start
+            ki += cars.start
+
+            payment = features.payment_slope[ci, ti] * self.car_prices[ki] + features.payment_intercept[ci, ti]
+            delta = payment / features.current_payment[ci] - 1
+            codes = tier_codes(delta)
+            keep = codes >= 0
+            ci, ki, ti, codes, payment, delta = ci[keep], ki[keep], ti[keep], codes[keep], payment[keep], delta[keep]
+            npv = self.car_prices[ki] * margin_pct - NPV_BASE_MARGIN_DEDUCTION
+
+            # Exact reductions: every (customer, car) pair belongs to one tile. Entries
+            # are ordered by (customer, car, term), so repeated pairs are adjacent.
+            offer_counts += np.bincount(ci * tier_count + codes,
+                                        minlength=offer_counts.size).reshape(offer_counts.shape)
+            self.car_offers += np.bincount(ki, minlength=car_count)
+            pairs = ci.astype(np.int64) * car_count + ki
+            self.car_customers += np.bincount(ki[_run_starts(pairs)], minlength=car_count)
+            for code in range(tier_count):
+                in_tier = codes == code
+                self.car_tier_customers[:, code] += np.bincount(
+                    ki[in_tier][_run_starts(pairs[in_tier])], minlength=car_count)
+
+            # NPV grows with the car price and cars are sorted by price, so the best
+            # offers are on the highest car positions (ties: shortest term)
+            rank_keys = (car_count - 1 - ki.astype(np.int64)) * len(terms) + ti
+
+            top = _top_k(ci.astype(np.int64) * tier_count + codes, rank_keys, self.top_k)
+
+            # Best offer per customer (among its tier leaders), then against the running best
+            best = top[_top_k(ci[top], rank_keys[top], 1)]
+            best = best[npv[best] > best_npv[ci[best]]]
+            best_npv[ci[best]] = npv[best]
+            best_tier[ci[best]] = codes[best]
+            best_car[ci[best]] = ki[best]
+
+            for name, values in (("customer", ci), ("car", ki), ("column", ti), ("tier", codes),
+                                 ("payment", payment), ("delta", delta), ("npv", npv)):
+                candidates[name].append(values[top])
+
+        self._offers.append(self._offer_rows(features, candidates))
+        self._customers.append(self._customer_rows(features, offer_counts, best_npv, best_tier, best_car))
+        elapsed = time.time() - start_time
+        self.processing_time += elapsed
+        logger.info(f"🧮 Offer matrix: {len(features)} customers x {len(self.car_prices)} cars "
+                    f"in {elapsed:.2f}s ({int(offer_counts.sum())} offers)")
+
+    def _offer_rows(self, features: CustomerFeatures, candidates: Dict[str, List[np.ndarray]]) -> pd.DataFrame:
+        """Top K offer rows of the batch, from the per tile top K candidates"""
+        if not any(len(values) for values in candidates["customer"]):
+            return pd.DataFrame(columns=OFFER_COLUMNS)
+        merged = {name: np.concatenate(values) for name, values in candidates.items()}
+        terms = np.asarray(VALID_LOAN_TERMS)[merged["column"]]
+        groups = merged["customer"].astype(np.int64) * len(TIERS) + merged["tier"]
+        rank_keys = (len(self.car_prices) - 1 - merged["car"].astype(np.int64)) * len(VALID_LOAN_TERMS) + merged["column"]
+        top = _top_k(groups, rank_keys, self.top_k)
+        customer, car, column = merged["customer"][top], merged["car"][top], merged["column"][top]
+        return pd.DataFrame({
+            "customer_id": features.frame["customer_id"].astype(str).to_numpy()[customer],
+            "tier": np.asarray(TIERS, dtype=object)[merged["tier"][top]],
+            "rank": _group_ranks(groups[top]) + 1,
+            "car_id": self.car_ids[car].astype(str),
+            "car_model": self.car_models[car],
+            "car_price": self.car_prices[car],
+            "term": terms[top],
+            "monthly_payment": merged["payment"][top],
+            "payment_delta": merged["delta"][top],
+            "interest_rate": features.interest_rate[customer, column],
+            "npv": merged["npv"][top],
+        }, columns=OFFER_COLUMNS)
+
+    def _customer_rows(self, features: CustomerFeatures, offer_counts: np.ndarray,
+                       best_npv: np.ndarray, best_tier: np.ndarray, best_car: np.ndarray) -> pd.DataFrame:
+        has_offer = best_tier >= 0
+        rows = {"customer_id": features.frame["customer_id"].astype(str).to_numpy()}
+        for column, tier in enumerate(TIER_COLUMNS):
+            rows[f"{tier}_offers"] = offer_counts[:, column]
+        rows["total_offers"] = offer_counts.sum(axis=1)
+        rows["best_npv"] = np.where(has_offer, best_npv, np.nan)
+        rows["best_tier"] = np.where(has_offer, np.asarray(TIER_COLUMNS, dtype=object)[best_tier], None)
+        rows["best_car_id"] = np.where(has_offer, self.car_ids[best_car].astype(str), None)
+        return pd.DataFrame(rows, columns=CUSTOMER_COLUMNS)
+
+    # ------------------------------------------------------------------
+    # Results
+    # ------------------------------------------------------------------
+
+    def top_offers(self) -> pd.DataFrame:
+        """Top K offers of every customer in every tier, best first"""
+        frames = [frame for frame in self._offers if not frame.empty]
+        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=OFFER_COLUMNS)
+
+    def customer_summary(self) -> pd.DataFrame:
+        """Offer counts per tier and best offer of every customer added"""
+        frames = [frame for frame in self._customers if not frame.empty]
+        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=CUSTOMER_COLUMNS)
+
+    def car_demand(self) -> pd.DataFrame:
+        """Customers with at least one offer per car, overall and per tier, most demanded first"""
+        rows = {
+            "car_id": self.car_ids.astype(str),
+            "car_model": self.car_models,
+            "car_price": self.car_prices,
+            "customers": self.car_customers,
+        }
+        for column, tier in enumerate(TIER_COLUMNS):
+            rows[f"{tier}_customers"] = self.car_tier_customers[:, column]
+        rows["offers"] = self.car_offers
+        frame = pd.DataFrame(rows, columns=CAR_COLUMNS)
+        return frame.sort_values(["customers", "car_price"], ascending=[False, True], kind="stable",
+                                 ignore_index=True)
+
+    def summary(self) -> Dict:
+        customers = self.customer_summary()
+        return {
+            "customers": int(len(customers)),
+            "customers_with_offers": int((customers["total_offers"] > 0).sum()) if len(customers) else 0,
+            "cars": int(len(self.car_prices)),
+            "cars_with_demand": int((self.car_customers > 0).sum()),
+            "offers_per_tier": {tier: int(customers[f"{tier}_offers"].sum()) for tier in TIER_COLUMNS},
+            "total_offers": int(self.car_offers.sum()),
+            "top_k": self.top_k,
+            "tiles": self.tiles,
+            "cells_evaluated": int(self.cells_evaluated),
+            "processing_time": round(self.processing_time, 2),
+        }
+
+    def write(self, output_dir: str) -> Dict[str, str]:
+        """
+        Write the results as Parquet files (plus summary.json) into output_dir
+
+        Returns:
+            {table name: path}
+        """
+        output_dir = Path(output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        paths = {}
+        for name, file_name, frame in (("offers", OFFERS_FILE, self.top_offers()),
+                                       ("customers", CUSTOMERS_FILE, self.customer_summary()),
+                                       ("car_demand", CARS_FILE, self.car_demand())):
+            path = output_dir / file_name
+            tmp_path = f"{path}.tmp"
+            frame.to_parquet(tmp_path, index=False)
+            os.replace(tmp_path, path)
+            paths[name] = str(path)
+        with open(output_dir / SUMMARY_FILE, "w") as f:
+            json.dump(self.summary(), f, indent=2)
+        paths["summary"] = str(output_dir / SUMMARY_FILE)
+        logger.info(f"💾 Offer matrix written to {output_dir}")
+        return paths
+
+
+def compute_offer_matrix(customers_df: pd.DataFrame, inventory_df: pd.DataFrame,
+                         top_k: int = OFFER_MATRIX_TOP_K,
+                         memory_budget_mb: float = OFFER_MATRIX_MEMORY_BUDGET_MB,
+                         output_dir: Optional[str] = None) -> OfferMatrix:
+    """Offer matrix of a customer frame against an inventory frame, written to output_dir if given"""
+    matrix = OfferMatrix(inventory_df, top_k=top_k, memory_budget_mb=memory_budget_mb)
+    matrix.add_customers(customers_df)
+    if output_dir is not None:
+        matrix.write(output_dir)
+    return matrix
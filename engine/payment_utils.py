@@ -23,6 +23,7 @@ MIN_INTEREST_RATE = float(config.get_decimal("financial.min_interest_rate"))
 MAX_INTEREST_RATE = float(config.get_decimal("financial.max_interest_rate"))
 MIN_TERM_MONTHS = config.get_int("financial.min_term_months")
 MAX_TERM_MONTHS = config.get_int("financial.max_term_months")
+MAX_FEE_AMOUNT = float(config.get_decimal("fees.cac_bonus.max") * 20)
 
 class FinancialValidationError(ValueError):
     """Raised when financial inputs are invalid"""
@@ -351,6 +352,35 @@ def calculate_monthly_payment(
     return result
 
 
+@lru_cache(maxsize=256)
+def first_payment_factors(annual_rate_nominal: float, term_months: int,
+                          insurance_term: int = 12) -> Dict[str, float]:
+    """
+    Per-peso factors of calculate_monthly_payment, which is linear in the amounts:
+    
+        payment = financed * (loan_base + service_fee + kavak_total)
+                  + insurance * insurance_amount + gps_monthly + gps_install_fee
+    
+    Lets callers price many amount combinations with array arithmetic.
+    """
+    iva_rate = float(config.get_decimal("financial.iva_rate"))
+    monthly_rate = annual_rate_nominal / 12.0
+    monthly_rate_with_iva = annual_rate_nominal * (1 + iva_rate) / 12.0
+    
+    def factor(term: int) -> float:
+        principal = abs(npf.ppmt(monthly_rate_with_iva, 1, term, -1.0))
+        interest = abs(npf.ipmt(monthly_rate, 1, term, -1.0)) * (1 + iva_rate)
+        return float(principal + interest)
+    
+    gps_monthly_base = float(config.get_decimal("fees.gps.monthly"))
+    apply_iva = config.get_bool("fees.gps.apply_iva", True)
+    return {
+        "financed": factor(term_months),
+        "insurance": factor(insurance_term),
+        "gps_monthly": gps_monthly_base * (1 + iva_rate) if apply_iva else gps_monthly_base,
+    }
+
+
 @lru_cache(maxsize=256)
 def calculate_final_npv(loan_amount, interest_rate, term_months):
     """
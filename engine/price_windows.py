@@ -0,0 +1,221 @@
+"""
+Closed-form price windows for trade-up offers
+
+For a fixed customer, fee configuration and term every offer quantity is
+linear in the car price p:
+
+    base_loan = p * (1 + cxa_pct) - A            A = equity + cac_bonus - gps_install
+    payment   = F * (p * (1 + cxa_pct + service_fee_pct) - A + kavak_total)
+                + I * insurance + gps_monthly + gps_install
+
+(F, I: first month payment factors of the term). Inverting the payment band
+of the offer tiers, the down payment requirement and the loan validation
+bounds gives one price interval per term outside which no offer exists.
+"""
+import logging
+from typing import Dict, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.constants import (
+    REFRESH_TIER_MIN, MAX_UPGRADE_TIER_MAX,
+    TERM_60_RATE_ADJUSTMENT, TERM_72_RATE_ADJUSTMENT,
+    KAVAK_TOTAL_DEFAULT_AMOUNT,
+    VALID_LOAN_TERMS
+)
+from config.config import (
+    get_hardcoded_financial_parameters,
+    IVA_RATE,
+    GPS_INSTALLATION_FEE,
+    INSURANCE_TABLE
+)
+from .payment_utils import (
+    first_payment_factors,
+    MIN_LOAN_AMOUNT, MAX_LOAN_AMOUNT, MIN_INTEREST_RATE, MAX_INTEREST_RATE,
+    MIN_TERM_MONTHS, MAX_TERM_MONTHS, MAX_FEE_AMOUNT
+)
+
+logger = logging.getLogger(__name__)
+
+_, DOWN_PAYMENT_TABLE = get_hardcoded_financial_parameters()
+
+# Windows are widened by this relative margin so rounding never drops a boundary car
+WINDOW_TOLERANCE = 1e-9
+
+
+def resolve_insurance_amount(customer: Dict, fees_config: Dict) -> float:
+    """Insurance financed for a customer: the fee override or the risk profile amount"""
+    if fees_config.get('insurance_amount') is not None:
+        return fees_config['insurance_amount']
+    return INSURANCE_TABLE.get(customer.get('risk_profile_name', 'A'), 10999)
+
+
+def term_interest_rate(base_interest_rate: float, term: int) -> float:
+    """Annual nominal rate of a term (60 and 72 month surcharges)"""
+    if term == 60:
+        return base_interest_rate + TERM_60_RATE_ADJUSTMENT
+    if term == 72:
+        return base_interest_rate + TERM_72_RATE_ADJUSTMENT
+    return base_interest_rate
+
+
+def _term_tables(base_rates: np.ndarray, risk_indices: np.ndarray,
+                 terms: Sequence[int]) -> Dict[str, np.ndarray]:
+    """
+    Per (customer, term) arrays: interest rate, down payment percentage,
+    first payment factors and whether the term can be priced at all.
+    """
+    shape = (len(base_rates), len(terms))
+    tables = {name: np.full(shape, np.nan) for name in ('interest_rate', 'down_payment_pct',
+                                                        'financed', 'insurance', 'gps_monthly')}
+    tables['term_ok'] = np.zeros(shape, dtype=bool)
+    has_risk = pd.Index(DOWN_PAYMENT_TABLE.index).get_indexer(risk_indices) >= 0
+    for column, term in enumerate(terms):
+        # The term surcharge is additive
+        rates = base_rates + term_interest_rate(0.0, term)
+        tables['interest_rate'][:, column] = rates
+        if term in DOWN_PAYMENT_TABLE.columns:
+            tables['down_payment_pct'][:, column] = DOWN_PAYMENT_TABLE[term].reindex(risk_indices).to_numpy(dtype=float)
+        tables['term_ok'][:, column] = (
+            has_risk & (term in DOWN_PAYMENT_TABLE.columns)
+            & (rates >= MIN_INTEREST_RATE) & (rates <= MAX_INTEREST_RATE)
+            & (MIN_TERM_MONTHS <= term <= MAX_TERM_MONTHS)
+        )
+        # Few distinct rates (one per risk profile): factors are cached per (rate, term)
+        unique_rates, inverse = np.unique(rates, return_inverse=True)
+        for name in ('financed', 'insurance', 'gps_monthly'):
+            values = np.array([first_payment_factors(float(rate), term)[name] for rate in unique_rates])
+            tables[name][:, column] = values[inverse]
+    return tables
+
+
+def price_window_arrays(
+    equity: np.ndarray,
+    current_payment: np.ndarray,
+    insurance_amount: np.ndarray,
+    risk_indices: np.ndarray,
+    base_rates: np.ndarray,
+    fees_config: Dict,
+    terms: Sequence[int] = VALID_LOAN_TERMS,
+    delta_min: float = REFRESH_TIER_MIN,
+    delta_max: float = MAX_UPGRADE_TIER_MAX
+) -> Dict[str, np.ndarray]:
+    """
+    Price windows of many customers at once (see offer_price_windows).
+
+    Args:
+        equity, current_payment, insurance_amount, risk_indices, base_rates: One entry per customer
+        fees_config: Shared fee configuration
+
+    Returns:
+        Per (customer, term) arrays: "low" / "high" window bounds (low > high
+        when empty), "interest_rate", and the first month payment as a line
+        in the car price, payment = "payment_slope" * p + "payment_intercept".
+    """
+    equity = np.asarray(equity, dtype=float)
+    current_payment = np.nan_to_num(np.asarray(current_payment, dtype=float))
+    insurance_amount = np.asarray(insurance_amount, dtype=float)
+
+    service_fee_pct = fees_config['service_fee_pct']
+    cxa_pct = fees_config['cxa_pct']
+    kavak_total = fees_config.get('kavak_total_amount', KAVAK_TOTAL_DEFAULT_AMOUNT)
+    gps_install = fees_config.get('gps_installation_fee', GPS_INSTALLATION_FEE) * (1 + IVA_RATE)
+    fees_ok = (
+        (current_payment > 0) & (insurance_amount >= 0) & (insurance_amount <= MAX_FEE_AMOUNT)
+        & (0 <= kavak_total <= MAX_FEE_AMOUNT) & (0 <= gps_install <= MAX_FEE_AMOUNT)
+    )
+
+    tables = _term_tables(np.asarray(base_rates, dtype=float), np.asarray(risk_indices), terms)
+    available_equity = equity + fees_config.get('cac_bonus', 0) - gps_install
+    loan_multiple = 1 + cxa_pct
+    financed_multiple = 1 + cxa_pct + service_fee_pct
+
+    # Bounds shared by every term (loan validation)
+    low = np.maximum(available_equity, MIN_LOAN_AMOUNT + available_equity) / loan_multiple
+    high = np.minimum(
+        (MAX_LOAN_AMOUNT + available_equity) / loan_multiple,
+        (MAX_LOAN_AMOUNT * 1.5 + available_equity - kavak_total - insurance_amount) / financed_multiple
+    )
+    if service_fee_pct > 0:
+        high = np.minimum(high, MAX_FEE_AMOUNT / service_fee_pct)
+    low, high = low[:, None], high[:, None]
+    column_equity = available_equity[:, None]
+
+    # Down payment: available_equity - p * cxa_pct >= p * down_payment_pct (NaN never binds)
+    down_payment_share = cxa_pct + tables['down_payment_pct']
+    with np.errstate(divide='ignore', invalid='ignore'):
+        high = np.where(down_payment_share > 0, np.minimum(high, column_equity / down_payment_share), high)
+    valid = tables['term_ok'] & fees_ok[:, None] & ~((down_payment_share <= 0) & (column_equity < 0))
+
+    # Payment band, inverted through the (increasing) linear payment
+    fixed = (tables['financed'] * (kavak_total - column_equity)
+             + tables['insurance'] * insurance_amount[:, None] + tables['gps_monthly'] + gps_install)
+    slope = tables['financed'] * financed_multiple
+    low = np.maximum(low, (current_payment[:, None] * (1 + delta_min) - fixed) / slope)
+    high = np.minimum(high, (current_payment[:, None] * (1 + delta_max) - fixed) / slope)
+
+    margin = WINDOW_TOLERANCE * np.maximum(np.maximum(np.abs(low), np.abs(high)), 1.0)
+    valid &= low <= high
+    return {
+        "low": np.where(valid, low - margin, np.inf),
+        "high": np.where(valid, high + margin, -np.inf),
+        "interest_rate": tables['interest_rate'],
+        "payment_slope": slope,
+        "payment_intercept": fixed,
+    }
+
+
+def offer_price_windows(
+    customer: Dict,
+    fees_config: Dict,
+    base_interest_rate: float,
+    terms: Sequence[int] = VALID_LOAN_TERMS,
+    delta_min: float = REFRESH_TIER_MIN,
+    delta_max: float = MAX_UPGRADE_TIER_MAX
+) -> Dict[int, Tuple[float, float]]:
+    """
+    Car price interval per term where an offer can exist.
+
+    A car priced outside its term's window either fails the down payment
+    requirement, falls outside the loan validation bounds, or lands its
+    payment delta outside [delta_min, delta_max] (by default the union of
+    the Refresh / Upgrade / Max Upgrade tiers). Fees are resolved the way
+    BasicMatcher._generate_offer resolves them.
+
+    Args:
+        customer: vehicle_equity, current_monthly_payment, risk_profile_name, risk_profile_index
+        fees_config: service_fee_pct, cxa_pct and optional cac_bonus, kavak_total_amount,
+            insurance_amount, gps_installation_fee overrides
+        base_interest_rate: Annual rate before the term surcharge
+
+    Returns:
+        {term: (min price, max price)} for the terms with a non-empty window
+    """
+    windows = price_window_arrays(
+        equity=[customer['vehicle_equity']],
+        current_payment=[customer.get('current_monthly_payment') or 0],
+        insurance_amount=[resolve_insurance_amount(customer, fees_config)],
+        risk_indices=[customer.get('risk_profile_index', 3)],
+        base_rates=[base_interest_rate],
+        fees_config=fees_config,
+        terms=terms,
+        delta_min=delta_min,
+        delta_max=delta_max
+    )
+    return {
+        term: (float(windows['low'][0, column]), float(windows['high'][0, column]))
+        for column, term in enumerate(terms)
+        if windows['low'][0, column] <= windows['high'][0, column]
+    }
+
+
+def window_mask(prices: np.ndarray, windows: Dict[int, Tuple[float, float]],
+                terms: Sequence[int]) -> np.ndarray:
+    """Boolean (car x term) matrix: price inside that term's window"""
+    mask = np.zeros((len(prices), len(terms)), dtype=bool)
+    for column, term in enumerate(terms):
+        if term in windows:
+            low, high = windows[term]
+            mask[:, column] = (prices >= low) & (prices <= high)
+    return mask
@@ -0,0 +1,234 @@
+"""
+Reverse matching: which customers qualify for a given car
+
+Per customer features (equity, current payment, rates, down payments and the
+closed-form price window of every term) are precomputed into arrays once per
+version of the customer data. Matching a car against every customer is then
+one vectorized pass over a (customers x terms) grid.
+"""
+import logging
+import threading
+import time
+from typing import Dict, Hashable, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from app.constants import (
+    REFRESH_TIER_MIN, REFRESH_TIER_MAX,
+    UPGRADE_TIER_MIN, UPGRADE_TIER_MAX,
+    MAX_UPGRADE_TIER_MIN, MAX_UPGRADE_TIER_MAX,
+    VALID_LOAN_TERMS
+)
+from config.config import get_hardcoded_financial_parameters, INSURANCE_TABLE
+from .basic_matcher import BasicMatcher
+from .price_windows import price_window_arrays
+
+logger = logging.getLogger(__name__)
+
+INTEREST_RATE_TABLE, _ = get_hardcoded_financial_parameters()
+
+TIERS = ("Refresh", "Upgrade", "Max Upgrade")
+
+
+def _column(customers_df: pd.DataFrame, name: str, default) -> np.ndarray:
+    if name not in customers_df.columns:
+        return np.full(len(customers_df), default)
+    return customers_df[name].to_numpy()
+
+
+def tier_codes(payment_delta: np.ndarray) -> np.ndarray:
+    """Index in TIERS of each payment delta's tier (-1 outside every tier), as in organize_offers"""
+    return np.select(
+        [(payment_delta >= REFRESH_TIER_MIN) & (payment_delta <= REFRESH_TIER_MAX),
+         (payment_delta > UPGRADE_TIER_MIN) & (payment_delta <= UPGRADE_TIER_MAX),
+         (payment_delta > MAX_UPGRADE_TIER_MIN) & (payment_delta <= MAX_UPGRADE_TIER_MAX)],
+        [0, 1, 2], default=-1
+    )
+
+
+def normalize_tiers(tiers: Optional[Sequence[str]]) -> List[str]:
+    """Tier names from any casing / separator ("max_upgrade" -> "Max Upgrade"); all tiers if None"""
+    if not tiers:
+        return list(TIERS)
+    key = lambda tier: str(tier).lower().replace(" ", "_").replace("-", "_")
+    by_key = {key(tier): tier for tier in TIERS}
+    unknown = [tier for tier in tiers if key(tier) not in by_key]
+    if unknown:
+        raise ValueError(f"Unknown tiers {unknown}; expected {list(TIERS)}")
+    return [by_key[key(tier)] for tier in tiers]
+
+
+class CustomerFeatures:
+    """
+    Offer inputs of every customer, as arrays aligned with the customer frame.
+
+    Built for the standard fee structure (BasicMatcher.resolve_fees(None)),
+    which is what find_all_viable uses without custom fees.
+    """
+
+    def __init__(self, customers_df: pd.DataFrame, version: Optional[Hashable] = None):
+        start = time.perf_counter()
+        self.frame = customers_df
+        self.version = version
+        self.fees = BasicMatcher.resolve_fees(None)
+
+        risk_names = _column(customers_df, "risk_profile_name", "A")
+        self.current_payment = pd.to_numeric(
+            pd.Series(_column(customers_df, "current_monthly_payment", np.nan)), errors="coerce"
+        ).to_numpy(dtype=float)
+        self.current_car_price = pd.to_numeric(
+            pd.Series(_column(customers_df, "current_car_price", np.nan)), errors="coerce"
+        ).to_numpy(dtype=float)
+        self.base_rates = np.array([INTEREST_RATE_TABLE.get(name, 0.18) for name in risk_names], dtype=float)
+        # Stage 1 trade-up limits as in data.database._tradeup_criteria: a missing
+        # year (0) or km (0) does not restrict, an unparseable one (NaN) matches no car
+        self.current_car_year = pd.to_numeric(
+            pd.Series(_column(customers_df, "current_car_year", 0)), errors="coerce"
+        ).to_numpy(dtype=float)
+        current_km = pd.to_numeric(
+            pd.Series(_column(customers_df, "current_car_km", np.inf)), errors="coerce"
+        ).to_numpy(dtype=float)
+        self.current_car_km = np.where(current_km == 0, np.inf, current_km)
+
+        windows = price_window_arrays(
+            equity=pd.to_numeric(pd.Series(_column(customers_df, "vehicle_equity", np.nan)),
+                                 errors="coerce").fillna(0).to_numpy(dtype=float),
+            current_payment=self.current_payment,
+            insurance_amount=np.array([INSURANCE_TABLE.get(name, 10999) for name in risk_names], dtype=float),
+            risk_indices=_column(customers_df, "risk_profile_index", 3),
+            base_rates=self.base_rates,
+            fees_config=self.fees
+        )
+        self.low, self.high = windows["low"], windows["high"]
+        self.interest_rate = windows["interest_rate"]
+        # payment(p) = payment_slope * p + payment_intercept, per (customer, term)
+        self.payment_slope = windows["payment_slope"]
+        self.payment_intercept = windows["payment_intercept"]
+
+        logger.info(f"🔁 Reverse matching features for {len(customers_df)} customers built in "
+                    f"{(time.perf_counter() - start) * 1000:.0f}ms")
+
+    def __len__(self) -> int:
+        return len(self.frame)
+
+    def match(self, car_price: float, tiers: Optional[Sequence[str]] = None,
+              car_year=None, car_km=None) -> Dict[str, np.ndarray]:
+        """
+        Every (customer, term) offer for a car at car_price, in the requested tiers.
+
+        Customers only qualify for cars more expensive than their current
+        car, as in BasicMatcher.eligible_cars. When car_year / car_km are
+        given, the Stage 1 trade-up filter applies too (year >= current car
+        year, km < current car km); a car with an unknown year or km then
+        matches no one, as in filter_tradeup_inventory.
+
+        Returns:
+            Parallel arrays: customer position, term, tier (name and index in
+            TIERS), monthly payment, payment delta, interest rate
+        """
+        wanted = normalize_tiers(tiers)
+        eligible = car_price > self.current_car_price
+        if car_year is not None:
+            eligible &= pd.to_numeric(car_year, errors="coerce") >= self.current_car_year
+        if car_km is not None:
+            km = pd.to_numeric(car_km, errors="coerce")
+            eligible &= (np.inf if pd.isna(km) else km) < self.current_car_km
+        inside = (self.low <= car_price) & (car_price <= self.high) & eligible[:, None]
+        positions, columns = np.nonzero(inside)
+
+        payment = self.payment_slope[positions, columns] * car_price + self.payment_intercept[positions, columns]
+        delta = payment / self.current_payment[positions] - 1
+        codes = tier_codes(delta)
+        keep = np.isin(codes, [TIERS.index(tier) for tier in wanted])
+        return {
+            "positions": positions[keep],
+            "terms": np.asarray(VALID_LOAN_TERMS)[columns[keep]],
+            "tiers": np.asarray(TIERS, dtype=object)[codes[keep]],
+            "tier_codes": codes[keep],
+            "monthly_payment": payment[keep],
+            "payment_delta": delta[keep],
+            "interest_rate": self.interest_rate[positions[keep], columns[keep]],
+        }
+
+
+class ReverseMatcher:
+    """Customers qualifying for a car, over features cached per customer data version"""
+
+    def __init__(self):
+        self._features: Optional[CustomerFeatures] = None
+        self._lock = threading.Lock()
+
+    def features(self, customers_df: pd.DataFrame, version: Optional[Hashable] = None) -> CustomerFeatures:
+        """Features for this customer frame, rebuilt only when the frame or version changes"""
+        with self._lock:
+            current = self._features
+            if current is None or current.version != version or current.frame is not customers_df:
+                current = self._features = CustomerFeatures(customers_df, version)
+            return current
+
+    def customers_for_car(self, car: Dict, customers_df: pd.DataFrame,
+                          version: Optional[Hashable] = None,
+                          tiers: Optional[Sequence[str]] = None,
+                          limit: Optional[int] = None) -> Dict:
+        """
+        All customers with at least one standard-fee offer for car in the requested tiers.
+
+        Only customers the car passes the Stage 1 trade-up filter for are
+        matched (see CustomerFeatures.match). Customers are ordered by their lowest payment delta; each lists its
+        offers (term, tier, payment) ordered by term.
+        """
+        start_time = time.time()
+        car_price = float(car.get("car_price") or car.get("sales_price") or 0)
+        features = self.features(customers_df, version)
+        matches = features.match(car_price, tiers, car_year=car.get("year"), car_km=car.get("kilometers"))
+
+        positions, deltas = matches["positions"], matches["payment_delta"]
+        # Customers ranked by their lowest payment delta (first row per customer after the lexsort)
+        by_delta = np.lexsort((deltas, positions))
+        first = np.ones(len(by_delta), dtype=bool)
+        first[1:] = positions[by_delta][1:] != positions[by_delta][:-1]
+        best = by_delta[first]
+        ranked = positions[best][np.argsort(deltas[best], kind="stable")]
+
+        customer_tiers = np.unique(positions * len(TIERS) + matches["tier_codes"]) % len(TIERS)
+        tier_counts = {tier: int(np.count_nonzero(customer_tiers == TIERS.index(tier)))
+                       for tier in normalize_tiers(tiers)}
+
+        # Offer rows only for the returned page
+        page = ranked[:limit]
+        offers_by_customer: Dict[int, List[Dict]] = {int(position): [] for position in page}
+        for i in np.flatnonzero(np.isin(positions, page)):
+            offers_by_customer[int(positions[i])].append({
+                "term": int(matches["terms"][i]),
+                "tier": matches["tiers"][i],
+                "monthly_payment": float(matches["monthly_payment"][i]),
+                "payment_delta": float(deltas[i]),
+                "interest_rate": float(matches["interest_rate"][i]),
+            })
+
+        customers = []
+        for position in page:
+            row = features.frame.iloc[position]
+            customers.append({
+                "customer_id": str(row.get("customer_id")),
+                "full_name": row.get("full_name"),
+                "risk_profile_name": row.get("risk_profile_name"),
+                "current_monthly_payment": float(features.current_payment[position]),
+                "vehicle_equity": float(row.get("vehicle_equity", 0) or 0),
+                "offers": sorted(offers_by_customer[int(position)], key=lambda offer: offer["term"]),
+            })
+
+        return {
+            "car": {"car_id": car.get("car_id"), "model": car.get("model"), "car_price": car_price},
+            "tiers": normalize_tiers(tiers),
+            "total_customers": len(ranked),
+            "customers_evaluated": len(features),
+            "tier_counts": tier_counts,
+            "customers": customers,
+            "processing_time": round(time.time() - start_time, 4),
+        }
+
+
+# Singleton instance
+reverse_matcher = ReverseMatcher()
@@ -2,22 +2,42 @@
 Smart Search Engine - Intelligent offer optimization
 """
 import logging
-from typing import Dict, List, Optional, Tuple
+import time
+from typing import Dict, List, Optional, Tuple, Union
 from dataclasses import dataclass
+import numpy as np
 import pandas as pd
 import numpy_financial as npf
+from app.constants import SMART_SEARCH_BATCH_SIZE
 from config.config import (
     IVA_RATE, GPS_INSTALLATION_FEE, GPS_MONTHLY_FEE,
     INSURANCE_TABLE, DEFAULT_FEES, get_hardcoded_financial_parameters
 )
+from data.inventory_query import InventoryQuery, InventoryFilter
 from .basic_matcher import BasicMatcher
-from .payment_utils import calculate_monthly_payment
+from .payment_utils import (
+    calculate_monthly_payment, first_payment_factors,
+    MIN_LOAN_AMOUNT, MAX_LOAN_AMOUNT, MIN_INTEREST_RATE, MAX_INTEREST_RATE,
+    MIN_TERM_MONTHS, MAX_TERM_MONTHS, MAX_FEE_AMOUNT
+)
 
 logger = logging.getLogger(__name__)
 
 # Load financial tables
 INTEREST_RATE_TABLE, DOWN_PAYMENT_TABLE = get_hardcoded_financial_parameters()
 
+# Terms in search order, and their rate surcharge over the risk profile rate
+SEARCH_TERMS = (48, 60, 36, 72)
+TERM_RATE_ADJUSTMENTS = {60: 0.01, 72: 0.015}
+
+# Hard gates
+MAX_PAYMENT_DELTA = 1.0  # More than 100% payment increase fails
+MIN_NPV = 5000
+MAX_LTV = 0.9  # 90% max financing
+
+# Fixed cost per offer in the simplified NPV
+OFFER_FIXED_COST = 2000
+
 @dataclass
 class ConsiderationFilters:
     """Filters to create the consideration set"""
@@ -95,119 +115,101 @@ class SmartSearchEngine:
     
     def filter_consideration_set(
         self, 
-        inventory_df: pd.DataFrame, 
+        inventory: Union[pd.DataFrame, InventoryQuery], 
         filters: ConsiderationFilters,
         customer: Optional[Dict] = None
     ) -> pd.DataFrame:
-        """Filter inventory to consideration set based on customer preferences"""
-        filtered = inventory_df.copy()
-        initial_count = len(filtered)
-        
-        # Price range filter
-        if filters.price_min is not None:
-            filtered = filtered[filtered['sales_price'] >= filters.price_min]
-        if filters.price_max is not None:
-            filtered = filtered[filtered['sales_price'] <= filters.price_max]
-        
-        # Extract brand from model and filter
-        if filters.brands:
-            # Extract first word as brand (works for most cases)
-            filtered['brand'] = filtered['model'].str.split().str[0]
-            filtered = filtered[filtered['brand'].isin(filters.brands)]
-        
-        # Extract year from model and filter
-        if filters.year_min is not None or filters.year_max is not None:
-            # Extract 4-digit year from model string
-            filtered['year'] = filtered['model'].str.extract(r'(\d{4})')
-            filtered['year'] = pd.to_numeric(filtered['year'], errors='coerce')
-            
-            if filters.year_min is not None:
-                filtered = filtered[filtered['year'] >= filters.year_min]
-            if filters.year_max is not None:
-                filtered = filtered[filtered['year'] <= filters.year_max]
-        
-        # Kilometers filter
-        if filters.km_max is not None:
-            filtered = filtered[filtered['kilometers'] <= filters.km_max]
-        
-        # Promotion filter
-        if filters.has_promotion is not None:
-            filtered = filtered[filtered['has_promotion'] == filters.has_promotion]
-        
-        # Region filter
-        if filters.regions:
-            filtered = filtered[filtered['region'].isin(filters.regions)]
-        
-        # Color filter
-        if filters.colors:
-            filtered = filtered[filtered['color'].isin(filters.colors)]
-        
-        # Extract vehicle class from model (simplified)
-        if filters.vehicle_classes:
-            def classify_vehicle(model: str) -> str:
-                model_lower = model.lower()
-                if any(suv in model_lower for suv in ['x3', 'x5', 'q5', 'crv', 'rav4', 'tiguan']):
-                    return 'SUV'
-                elif any(sedan in model_lower for sedan in ['camry', 'accord', 'a4', 'serie 3', 'civic']):
-                    return 'Sedan'
-                elif any(truck in model_lower for truck in ['f150', 'silverado', 'ram']):
-                    return 'Truck'
-                elif any(hatch in model_lower for hatch in ['golf', 'mazda3', 'swift']):
-                    return 'Hatchback'
-                else:
-                    return 'Other'
-            
-            filtered['vehicle_class'] = filtered['model'].apply(classify_vehicle)
-            filtered = filtered[filtered['vehicle_class'].isin(filters.vehicle_classes)]
+        """
+        Filter inventory to consideration set based on customer preferences.
+        
+        Runs on the inventory query engine: pass the snapshot's shared
+        InventoryQuery, or a DataFrame (an engine is built for it). The result
+        carries the derived brand, year and vehicle_class columns.
+        """
+        engine = inventory if isinstance(inventory, InventoryQuery) else InventoryQuery(inventory)
+        initial_count = engine.size
+        
+        conditions = InventoryFilter(
+            price_min=filters.price_min,
+            price_max=filters.price_max,
+            brands=filters.brands,
+            year_min=filters.year_min,
+            year_max=filters.year_max,
+            km_max=filters.km_max,
+            has_promotion=filters.has_promotion,
+            regions=filters.regions,
+            colors=filters.colors,
+            vehicle_classes=filters.vehicle_classes
+        )
         
         # Smart filters based on customer history
         if customer:
-            # Only newer than current car filter
-            if filters.only_newer_than_current and customer.get('current_car_year'):
-                current_year = customer['current_car_year']
-                if 'year' not in filtered.columns:
-                    filtered['year'] = filtered['model'].str.extract(r'(\d{4})')
-                    filtered['year'] = pd.to_numeric(filtered['year'], errors='coerce')
-                filtered = filtered[filtered['year'] > current_year]
+            # Only newer than current car
+            current_year = customer.get('current_car_year')
+            if filters.only_newer_than_current and current_year:
+                current_year = pd.to_numeric(current_year, errors='coerce')
+                if pd.isna(current_year):
+                    return self._empty_consideration_set(engine, initial_count)
+                newer_than = int(current_year) + 1
+                conditions.year_min = max(conditions.year_min or newer_than, newer_than)
             
             # Max KM relative to current car
-            if filters.max_km_vs_current is not None and customer.get('current_car_km'):
-                max_km = customer['current_car_km'] * filters.max_km_vs_current
-                filtered = filtered[filtered['kilometers'] <= max_km]
+            current_km = customer.get('current_car_km')
+            if filters.max_km_vs_current is not None and current_km:
+                if pd.isna(current_km):
+                    return self._empty_consideration_set(engine, initial_count)
+                max_km = current_km * filters.max_km_vs_current
+                conditions.km_max = min(conditions.km_max if conditions.km_max is not None else max_km, max_km)
             
-            # Same brand preference
-            if filters.same_brand_preference and customer.get('current_car_brand'):
-                current_brand = customer['current_car_brand'].lower()
-                if 'brand' not in filtered.columns:
-                    filtered['brand'] = filtered['model'].str.split().str[0]
-                filtered = filtered[filtered['brand'].str.lower() == current_brand]
-            
-            # Exclude current brand
-            if filters.exclude_current_brand and customer.get('current_car_brand'):
-                current_brand = customer['current_car_brand'].lower()
-                if 'brand' not in filtered.columns:
-                    filtered['brand'] = filtered['model'].str.split().str[0]
-                filtered = filtered[filtered['brand'].str.lower() != current_brand]
+            current_brand = customer.get('current_car_brand')
+            if current_brand:
+                # Same brand preference
+                if filters.same_brand_preference:
+                    conditions.brands = [brand for brand in (conditions.brands or [current_brand])
+                                         if str(brand).upper() == str(current_brand).upper()]
+                    if not conditions.brands:
+                        # Requested brands exclude the current one
+                        return self._empty_consideration_set(engine, initial_count)
+                # Exclude current brand
+                if filters.exclude_current_brand:
+                    conditions.exclude_brands = [current_brand]
             
             # Price range relative to current car
-            if filters.price_range_relative and customer.get('current_car_price'):
-                max_price = customer['current_car_price'] * filters.price_range_relative
-                filtered = filtered[filtered['sales_price'] <= max_price]
+            current_price = customer.get('current_car_price')
+            if filters.price_range_relative and current_price:
+                if pd.isna(current_price):
+                    return self._empty_consideration_set(engine, initial_count)
+                max_price = current_price * filters.price_range_relative
+                conditions.price_max = min(
+                    conditions.price_max if conditions.price_max is not None else max_price, max_price
+                )
+        
+        filtered = engine.rows(engine.select(conditions), with_derived=True)
         
         final_count = len(filtered)
         logger.info(f"🎯 Consideration set: {final_count}/{initial_count} cars "
-                   f"({final_count/initial_count*100:.1f}% of inventory)")
+                   f"({final_count/initial_count*100 if initial_count else 0:.1f}% of inventory)")
         
         return filtered
     
+    @staticmethod
+    def _empty_consideration_set(engine: InventoryQuery, initial_count: int) -> pd.DataFrame:
+        """No car qualifies (unknown current car values or contradictory filters)"""
+        logger.info(f"🎯 Consideration set: 0/{initial_count} cars")
+        return engine.rows(np.array([], dtype=np.int64), with_derived=True)
+    
     def solve_minimum_subsidy(
         self,
         customer: Dict,
         car: Dict,
         config: SubsidyConfig
     ) -> OfferResult:
-        """Find minimum viable subsidy for a specific car using hierarchical search"""
-        import time
+        """
+        Find minimum viable subsidy for a specific car using hierarchical search.
+        
+        Scalar reference implementation; search_smart_offers prices cars in
+        batches with solve_minimum_subsidy_batch.
+        """
         start_time = time.time()
         
         iterations = 0
@@ -220,7 +222,7 @@ class SmartSearchEngine:
         base_interest_rate = INTEREST_RATE_TABLE.get(risk_profile, 0.18)
         
         # Try each term in order
-        for term in [48, 60, 36, 72]:
+        for term in SEARCH_TERMS:
             # Hierarchical search: Service Fee -> CAC -> CXA
             service_fee = config.service_fee_max
             while service_fee >= config.service_fee_min:
@@ -309,6 +311,319 @@ class SmartSearchEngine:
             computation_time=computation_time
         )
     
+    @staticmethod
+    def _subsidy_grid(config: SubsidyConfig) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Service fee, CAC and CXA values in search order (same float steps as the scalar loops)"""
+        service_fees, cac_bonuses, cxas = [], [], []
+        value = config.service_fee_max
+        while value >= config.service_fee_min:
+            service_fees.append(value)
+            value -= config.service_fee_step
+        value = config.cac_min
+        while value <= config.cac_max:
+            cac_bonuses.append(value)
+            value += config.cac_step
+        value = config.cxa_max
+        while value >= config.cxa_min:
+            cxas.append(value)
+            value -= config.cxa_step
+        return np.array(service_fees, dtype=float), np.array(cac_bonuses, dtype=float), np.array(cxas, dtype=float)
+    
+    @staticmethod
+    def _term_parameters(base_interest_rate: float, risk_index: int,
+                         terms: Tuple[int, ...]) -> Dict[str, np.ndarray]:
+        """
+        Per term arrays: interest rate, down payment percentage (NaN when
+        unconstrained), first payment factors, and whether the term can be
+        priced at all (down payment entry exists, rate and term in bounds).
+        """
+        columns = {name: [] for name in ('interest_rate', 'down_payment_pct', 'financed',
+                                         'insurance', 'gps_monthly', 'term_ok')}
+        for term in terms:
+            interest_rate = base_interest_rate + TERM_RATE_ADJUSTMENTS.get(term, 0)
+            has_down_payment = risk_index in DOWN_PAYMENT_TABLE.index and term in DOWN_PAYMENT_TABLE.columns
+            factors = first_payment_factors(interest_rate, term)
+            columns['interest_rate'].append(interest_rate)
+            columns['down_payment_pct'].append(
+                float(DOWN_PAYMENT_TABLE.loc[risk_index, term]) if has_down_payment else np.nan
+            )
+            columns['financed'].append(factors['financed'])
+            columns['insurance'].append(factors['insurance'])
+            columns['gps_monthly'].append(factors['gps_monthly'])
+            columns['term_ok'].append(
+                has_down_payment
+                and MIN_INTEREST_RATE <= interest_rate <= MAX_INTEREST_RATE
+                and MIN_TERM_MONTHS <= term <= MAX_TERM_MONTHS
+            )
+        return {name: np.array(values, dtype=bool if name == 'term_ok' else float)
+                for name, values in columns.items()}
+    
+    def solve_minimum_subsidy_batch(
+        self,
+        customer: Dict,
+        cars: List[Dict],
+        config: SubsidyConfig
+    ) -> List[OfferResult]:
+        """
+        solve_minimum_subsidy for many cars at once.
+        
+        The whole grid (cars x terms x service fee x CAC x CXA) is priced as
+        one array expression: the first month payment is linear in the loan
+        amounts, so each term only needs its per-peso payment factors. Per car
+        the first viable combination in search order wins; otherwise the
+        combination closest to the current payment is reported. Combinations
+        outside the loan validation bounds count as no offer.
+        """
+        if not cars:
+            return []
+        start_time = time.time()
+        
+        service_fees, cac_bonuses, cxas = self._subsidy_grid(config)
+        grid_size = len(SEARCH_TERMS) * len(service_fees) * len(cac_bonuses) * len(cxas)
+        
+        risk_profile = customer.get('risk_profile_name', 'A')
+        risk_index = customer.get('risk_profile_index', 3)
+        base_interest_rate = INTEREST_RATE_TABLE.get(risk_profile, 0.18)
+        kavak_total = config.kavak_total_amount if config.kavak_total_enabled else 0
+        insurance_amount = INSURANCE_TABLE.get(risk_profile, 10999)
+        gps_install_with_iva = GPS_INSTALLATION_FEE * (1 + IVA_RATE)
+        
+        fees_ok = all(0 <= fee <= MAX_FEE_AMOUNT for fee in (kavak_total, insurance_amount, gps_install_with_iva))
+        
+        # Axes: car, term, service fee, CAC, CXA
+        price = np.array([car['sales_price'] for car in cars], dtype=float).reshape(-1, 1, 1, 1, 1)
+        term_axis = (1, -1, 1, 1, 1)
+        terms = {name: values.reshape(term_axis)
+                 for name, values in self._term_parameters(base_interest_rate, risk_index, SEARCH_TERMS).items()}
+        service_fee = service_fees.reshape(1, 1, -1, 1, 1)
+        cac_bonus = cac_bonuses.reshape(1, 1, 1, -1, 1)
+        cxa = cxas.reshape(1, 1, 1, 1, -1)
+        
+        service_fee_amount = price * service_fee
+        cxa_amount = price * cxa
+        effective_equity = customer['vehicle_equity'] + cac_bonus - cxa_amount - gps_install_with_iva
+        base_loan = price - effective_equity
+        total_financed = base_loan + service_fee_amount + kavak_total + insurance_amount
+        
+        # A missing (NaN) down payment percentage never blocks, as in the scalar comparison
+        down_payment_required = price * terms['down_payment_pct']
+        valid = (
+            terms['term_ok']
+            & ~(effective_equity < down_payment_required)
+            & (base_loan > 0)
+            & (base_loan >= MIN_LOAN_AMOUNT) & (base_loan <= MAX_LOAN_AMOUNT)
+            & (service_fee_amount <= MAX_FEE_AMOUNT)
+            & (total_financed <= MAX_LOAN_AMOUNT * 1.5)
+        ) & fees_ok
+        
+        monthly_payment = (
+            terms['financed'] * (base_loan + service_fee_amount + kavak_total)
+            + terms['insurance'] * insurance_amount
+            + terms['gps_monthly']
+            + gps_install_with_iva
+        )
+        payment_delta = monthly_payment / customer['current_monthly_payment'] - 1
+        npv = service_fee_amount + cxa_amount - OFFER_FIXED_COST - cac_bonus
+        ltv = total_financed / price
+        viable = valid & (payment_delta <= MAX_PAYMENT_DELTA) & (npv >= MIN_NPV) & (ltv <= MAX_LTV)
+        
+        # Flatten each car's grid in search order (term -> service fee -> CAC -> CXA)
+        shape = (len(cars),) + viable.shape[1:]
+        flat = lambda values: np.broadcast_to(values, shape).reshape(len(cars), -1)
+        viable, valid = flat(viable), flat(valid)
+        payment_delta, monthly_payment = flat(payment_delta), flat(monthly_payment)
+        npv, total_financed = flat(npv), flat(total_financed)
+        
+        has_viable = viable.any(axis=1)
+        first_viable = viable.argmax(axis=1)
+        has_offer = valid.any(axis=1)
+        closest = np.where(valid, np.abs(payment_delta), np.inf).argmin(axis=1)
+        
+        per_car_time = (time.time() - start_time) / len(cars)
+        results = []
+        for row, car in enumerate(cars):
+            pick = first_viable[row] if has_viable[row] else closest[row]
+            term_index, sf_index, cac_index, cxa_index = np.unravel_index(pick, shape[1:])
+            common = dict(
+                car_id=str(car['car_id']),
+                car_model=car.get('model', 'Unknown'),
+                car_price=car['sales_price'],
+                computation_time=per_car_time
+            )
+            if has_viable[row]:
+                results.append(OfferResult(
+                    **common,
+                    viable=True,
+                    service_fee_pct=float(service_fees[sf_index]),
+                    cac_bonus=float(cac_bonuses[cac_index]),
+                    cxa_pct=float(cxas[cxa_index]),
+                    monthly_payment=float(monthly_payment[row, pick]),
+                    payment_delta=float(payment_delta[row, pick]),
+                    npv=float(npv[row, pick]),
+                    term=SEARCH_TERMS[term_index],
+                    iterations_tried=int(pick) + 1
+                ))
+            elif has_offer[row]:
+                gates = self._check_hard_gates({
+                    'payment_delta': float(payment_delta[row, pick]),
+                    'npv': float(npv[row, pick]),
+                    'loan_amount': float(total_financed[row, pick]),
+                    'new_car_price': car['sales_price']
+                }, customer)
+                results.append(OfferResult(
+                    **common,
+                    viable=False,
+                    failure_reason=gates['failure_reason'],
+                    service_fee_pct=config.service_fee_min,
+                    cac_bonus=config.cac_max,
+                    cxa_pct=config.cxa_min,
+                    monthly_payment=float(monthly_payment[row, pick]),
+                    payment_delta=float(payment_delta[row, pick]),
+                    npv=float(npv[row, pick]),
+                    term=SEARCH_TERMS[term_index],
+                    iterations_tried=grid_size
+                ))
+            else:
+                results.append(OfferResult(
+                    **common,
+                    viable=False,
+                    failure_reason="No offers could be calculated",
+                    iterations_tried=grid_size
+                ))
+        
+        return results
+    
+    def find_minimum_subsidy_offers(
+        self,
+        customer: Dict,
+        inventory: List[Dict],
+        params: Dict
+    ) -> Dict:
+        """
+        Smallest subsidy (CAC bonus) per car that brings the payment within
+        target_payment_delta of the customer's current payment.
+        
+        The first month payment is linear in the financed principal and the
+        subsidy reduces the principal peso for peso, so per car and term:
+        
+            payment(subsidy) = payment(0) - financed_factor * subsidy
+        
+        and the required subsidy is solved directly (then rounded up to
+        subsidy_step), together with the down payment and loan bound
+        constraints. Each car keeps the term needing the least subsidy.
+        
+        Args:
+            params: target_payment_delta, max_subsidy, subsidy_step,
+                service_fee_pct, cxa_pct, kavak_total_amount,
+                term_preference (one term, or None for all) and max_results
+        
+        Returns:
+            Dict with the offers ranked by subsidy, then payment delta
+        """
+        start_time = time.time()
+        target_delta = float(params.get('target_payment_delta', 0.05))
+        max_subsidy = float(params.get('max_subsidy', 50000))
+        subsidy_step = float(params.get('subsidy_step', 1000) or 0)
+        service_fee_pct = float(params.get('service_fee_pct', DEFAULT_FEES['service_fee_pct']))
+        cxa_pct = float(params.get('cxa_pct', DEFAULT_FEES['cxa_pct']))
+        kavak_total = float(params.get('kavak_total_amount', 25000) or 0)
+        max_results = int(params.get('max_results', 20))
+        terms = (int(params['term_preference']),) if params.get('term_preference') else SEARCH_TERMS
+        
+        cars = [car for car in inventory if (car.get('car_price') or car.get('sales_price') or 0) > 0]
+        response = {
+            "offers_found": 0,
+            "offers": [],
+            "search_params": params,
+            "statistics": {"candidates": len(inventory), "feasible": 0}
+        }
+        current_payment = customer.get('current_monthly_payment') or 0
+        if not cars or current_payment <= 0:
+            response["statistics"]["processing_time"] = time.time() - start_time
+            return response
+        
+        risk_profile = customer.get('risk_profile_name', 'A')
+        base_interest_rate = INTEREST_RATE_TABLE.get(risk_profile, 0.18)
+        term_params = self._term_parameters(base_interest_rate, customer.get('risk_profile_index', 3), terms)
+        insurance_amount = INSURANCE_TABLE.get(risk_profile, 10999)
+        gps_install_with_iva = GPS_INSTALLATION_FEE * (1 + IVA_RATE)
+        fees_ok = all(0 <= fee <= MAX_FEE_AMOUNT for fee in (kavak_total, insurance_amount, gps_install_with_iva))
+        
+        # Axes: car, term
+        price = np.array([car.get('car_price') or car.get('sales_price') for car in cars], dtype=float)[:, None]
+        financed_factor = term_params['financed'][None, :]
+        service_fee_amount = price * service_fee_pct
+        cxa_amount = price * cxa_pct
+        equity_before_subsidy = customer['vehicle_equity'] - cxa_amount - gps_install_with_iva
+        loan_before_subsidy = price - equity_before_subsidy
+        payment_before_subsidy = (
+            financed_factor * (loan_before_subsidy + service_fee_amount + kavak_total)
+            + term_params['insurance'][None, :] * insurance_amount
+            + term_params['gps_monthly'][None, :]
+            + gps_install_with_iva
+        )
+        target_payment = current_payment * (1 + target_delta)
+        
+        # Lower bounds on the subsidy from each constraint (NaN down payment never binds)
+        required = np.maximum((payment_before_subsidy - target_payment) / financed_factor, 0)
+        for bound in (
+            np.nan_to_num(price * term_params['down_payment_pct'][None, :] - equity_before_subsidy, nan=-np.inf),
+            loan_before_subsidy - MAX_LOAN_AMOUNT,
+            loan_before_subsidy + service_fee_amount + kavak_total + insurance_amount - MAX_LOAN_AMOUNT * 1.5,
+        ):
+            required = np.maximum(required, bound)
+        if subsidy_step > 0:
+            required = np.ceil(np.round(required / subsidy_step, 9)) * subsidy_step
+        base_loan = loan_before_subsidy - required
+        feasible = (
+            term_params['term_ok'][None, :]
+            & (required <= max_subsidy)
+            & (base_loan > 0) & (base_loan >= MIN_LOAN_AMOUNT)
+            & (service_fee_amount <= MAX_FEE_AMOUNT)
+        ) & fees_ok
+        
+        # Per car: the term needing the least subsidy (first in term order on ties)
+        best_term = np.where(feasible, required, np.inf).argmin(axis=1)
+        rows = np.flatnonzero(feasible.any(axis=1))
+        cols = best_term[rows]
+        subsidy = required[rows, cols]
+        monthly_payment = payment_before_subsidy[rows, cols] - financed_factor[0, cols] * subsidy
+        payment_delta = monthly_payment / current_payment - 1
+        npv = service_fee_amount[rows, 0] + cxa_amount[rows, 0] - OFFER_FIXED_COST - subsidy
+        
+        ranking = np.lexsort((-npv, payment_delta, subsidy))[:max_results]
+        offers = []
+        for i in ranking:
+            car = cars[rows[i]]
+            term_index = cols[i]
+            offers.append({
+                "car_id": str(car['car_id']),
+                "car_model": car.get('model', 'Unknown'),
+                "car_price": float(price[rows[i], 0]),
+                "term": terms[term_index],
+                "interest_rate": float(term_params['interest_rate'][term_index]),
+                "subsidy": float(subsidy[i]),
+                "monthly_payment": float(monthly_payment[i]),
+                "payment_delta": float(payment_delta[i]),
+                "npv": float(npv[i]),
+                "service_fee_pct": service_fee_pct,
+                "cxa_pct": cxa_pct,
+                "kavak_total_amount": kavak_total,
+                "loan_amount": float(base_loan[rows[i], term_index] + service_fee_amount[rows[i], 0]
+                                     + kavak_total + insurance_amount),
+            })
+        
+        response.update({
+            "offers_found": len(offers),
+            "offers": offers,
+            "statistics": {
+                "candidates": len(inventory),
+                "feasible": int(len(rows)),
+                "processing_time": time.time() - start_time
+            }
+        })
+        return response
+    
     def _calculate_single_offer(
         self, customer: Dict, car: Dict, term: int,
         base_interest_rate: float, risk_index: int,
@@ -318,12 +633,7 @@ class SmartSearchEngine:
         """Calculate a single offer with given parameters"""
         
         # Adjust interest rate by term
-        if term == 60:
-            interest_rate = base_interest_rate + 0.01
-        elif term == 72:
-            interest_rate = base_interest_rate + 0.015
-        else:
-            interest_rate = base_interest_rate
+        interest_rate = base_interest_rate + TERM_RATE_ADJUSTMENTS.get(term, 0)
         
         # Apply IVA to interest rate
         interest_rate_with_iva = interest_rate * (1 + IVA_RATE)
@@ -391,7 +701,7 @@ class SmartSearchEngine:
         
         # Calculate NPV (simplified)
         margin = service_fee_amount + cxa_amount
-        cost = 2000 + cac_bonus  # Include CAC in cost
+        cost = OFFER_FIXED_COST + cac_bonus  # Include CAC in cost
         npv = margin - cost
         
         return {
@@ -427,7 +737,7 @@ class SmartSearchEngine:
         
         # Gate 1: Payment Delta (must be within acceptable range)
         payment_delta = offer['payment_delta']
-        if payment_delta > 1.0:  # More than 100% increase
+        if payment_delta > MAX_PAYMENT_DELTA:
             gates['all_passed'] = False
             gates['failure_reason'] = f"Payment_Delta_Too_High ({payment_delta:.1%})"
             gates['gates']['payment_delta'] = False
@@ -435,8 +745,7 @@ class SmartSearchEngine:
             gates['gates']['payment_delta'] = True
         
         # Gate 2: Minimum NPV
-        min_npv = 5000  # Could be configurable
-        if offer['npv'] < min_npv:
+        if offer['npv'] < MIN_NPV:
             gates['all_passed'] = False
             if not gates['failure_reason']:
                 gates['failure_reason'] = f"NPV_Below_Minimum (${offer['npv']:,.0f})"
@@ -446,8 +755,7 @@ class SmartSearchEngine:
         
         # Gate 3: Loan-to-Value ratio (example additional gate)
         ltv = offer['loan_amount'] / offer['new_car_price']
-        max_ltv = 0.9  # 90% max financing
-        if ltv > max_ltv:
+        if ltv > MAX_LTV:
             gates['all_passed'] = False
             if not gates['failure_reason']:
                 gates['failure_reason'] = f"LTV_Too_High ({ltv:.1%})"
@@ -465,8 +773,12 @@ class SmartSearchEngine:
         config: SubsidyConfig,
         max_results: int = 10
     ) -> Dict:
-        """Main entry point for smart search"""
-        import time
+        """
+        Main entry point for smart search.
+        
+        Candidates are priced SMART_SEARCH_BATCH_SIZE cars at a time and the
+        search stops at the car that brings the viable count to max_results.
+        """
         start_time = time.time()
         
         # Step 1: Filter to consideration set
@@ -486,15 +798,16 @@ class SmartSearchEngine:
         results = []
         viable_count = 0
         
-        for _, car in candidate_cars.iterrows():
-            car_dict = car.to_dict()
-            result = self.solve_minimum_subsidy(customer, car_dict, config)
-            results.append(result)
-            
-            if result.viable:
-                viable_count += 1
-                
-            # Stop if we have enough viable offers
+        cars = candidate_cars.to_dict("records")
+        for batch_start in range(0, len(cars), SMART_SEARCH_BATCH_SIZE):
+            batch = cars[batch_start:batch_start + SMART_SEARCH_BATCH_SIZE]
+            for result in self.solve_minimum_subsidy_batch(customer, batch, config):
+                results.append(result)
+                if result.viable:
+                    viable_count += 1
+                # Stop if we have enough viable offers
+                if viable_count >= max_results:
+                    break
             if viable_count >= max_results:
                 break
         
@@ -8,6 +8,7 @@ Usage:
     python run_tests.py integration       # Run only integration tests
     python run_tests.py coverage          # Run with coverage report
     python run_tests.py specific.test     # Run specific test
+    python run_tests.py benchmark [args]  # Run the benchmark suite (scripts/run_benchmarks.py)
 """
 import sys
 import subprocess
@@ -38,7 +39,10 @@ def main():
     if len(sys.argv) > 1:
         command = sys.argv[1].lower()
         
-        if command == "unit":
+        if command == "benchmark":
+            # Not a pytest run: pass the remaining arguments to the benchmark runner
+            return run_command(f"{sys.executable} scripts/run_benchmarks.py {' '.join(sys.argv[2:])}")
+        elif command == "unit":
             # Run only unit tests
             pytest_args.append("tests/unit/")
         elif command == "integration":
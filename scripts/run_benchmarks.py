@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Benchmark the offer engine on reproducible synthetic workloads.
+
+Runs each benchmark x scale in a fresh process (throughput, p50/p95/p99
+latency, peak RSS), writes the results as JSON, and optionally compares them
+against a stored baseline: the exit code is 1 when any metric regressed by
+more than the threshold.
+
+Examples:
+    python scripts/run_benchmarks.py                          # all benchmarks, small scale
+    python scripts/run_benchmarks.py --scale small --scale medium --bench offer_generation
+    python scripts/run_benchmarks.py --save-baseline          # record benchmarks/baseline.json
+    python scripts/run_benchmarks.py --compare benchmarks/baseline.json --threshold 0.15
+"""
+import argparse
+import sys
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks import BENCHMARKS, SCALES, compare_results, load_results, run_suite, write_results  # noqa: E402
+from benchmarks.harness import DEFAULT_REGRESSION_THRESHOLD  # noqa: E402
+from benchmarks.workloads import DEFAULT_SEED  # noqa: E402
+
+RESULTS_DIR = Path("benchmarks/results")
+BASELINE_FILE = Path("benchmarks/baseline.json")
+
+
+def print_results(document):
+    print(f"{'benchmark':<18}{'scale':<8}{'ops':>6}{'throughput':>24}{'p50 ms':>12}{'p95 ms':>12}"
+          f"{'p99 ms':>12}{'peak MB':>9}")
+    for row in document["results"]:
+        print(f"{row['benchmark']:<18}{row['scale']:<8}{row['operations']:>6}"
+              f"{row['throughput']:>12.2f} {row['unit'] + '/s':<11}{row['p50_ms']:>12.2f}{row['p95_ms']:>12.2f}"
+              f"{row['p99_ms']:>12.2f}{row['peak_rss_mb'] or 0:>9.1f}")
+
+
+def print_comparison(comparison, threshold):
+    regressions = [row for row in comparison if row["regressed"]]
+    print(f"\n📊 Compared {len(comparison)} metrics against the baseline (threshold {threshold:.0%})")
+    for row in regressions:
+        print(f"  ❌ {row['benchmark']} [{row['scale']}] {row['metric']}: "
+              f"{row['baseline']} -> {row['current']} ({row['change']:+.1%})")
+    if not regressions:
+        print("  ✅ No regressions")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the offer engine benchmark suite")
+    parser.add_argument("--bench", action="append", choices=list(BENCHMARKS),
+                        help="Benchmark to run (repeatable, default: all)")
+    parser.add_argument("--scale", action="append", choices=list(SCALES),
+                        help="Workload scale (repeatable, default: small)")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED, help="Workload seed")
+    parser.add_argument("--output", help="Results file (default: benchmarks/results/<timestamp>.json)")
+    parser.add_argument("--compare", metavar="BASELINE", help="Compare against a stored results file")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_REGRESSION_THRESHOLD,
+                        help="Relative change counted as a regression")
+    parser.add_argument("--save-baseline", action="store_true", help=f"Also write the results to {BASELINE_FILE}")
+    parser.add_argument("--in-process", action="store_true",
+                        help="Run every case in this process (faster, peak RSS is cumulative)")
+    parser.add_argument("--audit-logging", action="store_true", help="Keep financial audit logging enabled")
+    args = parser.parse_args()
+
+    baseline = load_results(args.compare) if args.compare else None
+    document = run_suite(args.bench, args.scale or ["small"], seed=args.seed, isolate=not args.in_process,
+                         audit_logging=args.audit_logging)
+
+    output = args.output or RESULTS_DIR / f"benchmark-{datetime.now():%Y%m%d-%H%M%S}.json"
+    print_results(document)
+    print(f"\n💾 Results written to {write_results(document, output)}")
+    if args.save_baseline:
+        print(f"💾 Baseline written to {write_results(document, BASELINE_FILE)}")
+
+    if baseline is not None:
+        comparison = compare_results(document, baseline, args.threshold)
+        document["comparison"] = comparison
+        write_results(document, output)
+        if print_comparison(comparison, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
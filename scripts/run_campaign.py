@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Score every customer in a customer export for a campaign.
+
+Streams the export in chunks, shards the chunks across worker processes and
+writes one output part per chunk plus summary.json under the job folder.
+Interrupted jobs resume from their last checkpoint with --resume.
+
+Examples:
+    python scripts/run_campaign.py --input data/customers_data_tradeup.csv --processes 8
+    python scripts/run_campaign.py --resume 3f2c...  # continue an interrupted job
+    python scripts/run_campaign.py --status 3f2c...
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.constants import CAMPAIGN_CHUNK_SIZE, CAMPAIGN_OUTPUT_DIR, CAMPAIGN_PROCESSES  # noqa: E402
+from app.services.campaign_runner import OUTPUT_FORMATS, CampaignRunner  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a campaign scoring job over a customer export")
+    parser.add_argument("--input", default="data/customers_data_tradeup.csv", help="Customer CSV export")
+    parser.add_argument("--format", choices=OUTPUT_FORMATS, default="parquet", help="Output part format")
+    parser.add_argument("--processes", type=int, default=CAMPAIGN_PROCESSES,
+                        help="Worker processes (0 = run in this process)")
+    parser.add_argument("--chunk-size", type=int, default=CAMPAIGN_CHUNK_SIZE,
+                        help="Customers per chunk / checkpoint")
+    parser.add_argument("--output-dir", default=CAMPAIGN_OUTPUT_DIR, help="Root folder for job output")
+    parser.add_argument("--resume", metavar="JOB_ID", help="Resume an existing job")
+    parser.add_argument("--status", metavar="JOB_ID", help="Print a job's status and exit")
+    args = parser.parse_args()
+
+    runner = CampaignRunner(output_root=args.output_dir)
+
+    if args.status:
+        print(json.dumps(runner.get_job_status(args.status), indent=2))
+        return
+
+    job_id = args.resume or runner.create_job(args.input, output_format=args.format,
+                                              chunk_size=args.chunk_size)
+    print(f"🚀 Campaign job {job_id} ({'resuming' if args.resume else 'new'})")
+
+    summary = runner.run_job(job_id, processes=args.processes)
+
+    print(f"\n✅ Campaign complete: {Path(args.output_dir) / job_id}")
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Tests for the statistics materialized once per snapshot version
+"""
+import pandas as pd
+import pytest
+
+from data import database
+from data.aggregates import SnapshotAggregates, compute_customer_summary, compute_inventory_summary
+from data.snapshots import InventorySnapshot
+
+
+def build_inventory():
+    return pd.DataFrame({
+        "car_id": ["a", "b", "c", "d"],
+        "sales_price": [100000.0, 200000.0, 300000.0, None],
+        "car_price": [90000.0, 190000.0, 290000.0, 1.0],
+        "car_brand": ["KIA", "KIA", "MAZDA", "NISSAN"],
+        "make": ["KIA", "KIA", "MAZDA", "NISSAN"],
+        "year": [2020, 2021, 2021, 2019],
+        "kilometers": [10000, 20000, 30000, 40000],
+        "region": ["CDMX", "CDMX", "GDL", None],
+    })
+
+
+class TestInventorySummary:
+
+    def test_legacy_shapes(self):
+        summary = compute_inventory_summary(build_inventory())
+
+        assert summary["stats"] == {"total_cars": 4, "average_price": 200000.0,
+                                    "min_price": 100000.0, "max_price": 300000.0, "brands": 3}
+        assert summary["aggregates"] == {"makes": ["KIA", "MAZDA", "NISSAN"], "years": [2019, 2020, 2021],
+                                         "price_range": {"min": 100000.0, "max": 300000.0}, "total_cars": 4}
+
+    def test_distributions_and_facets(self):
+        summary = compute_inventory_summary(build_inventory())
+
+        price = summary["distributions"]["price"]
+        assert price["count"] == 3
+        assert price["percentiles"]["p50"] == 200000.0
+        assert sum(bucket["count"] for bucket in price["histogram"]) == 3
+        assert summary["facets"]["car_brand"][0] == {"value": "KIA", "count": 2}
+        assert summary["facets"]["region"] == [{"value": "CDMX", "count": 2}, {"value": "GDL", "count": 1}]
+
+    def test_empty(self):
+        summary = compute_inventory_summary(pd.DataFrame())
+
+        assert summary["stats"]["total_cars"] == 0
+        assert summary["aggregates"]["makes"] == []
+
+
+def test_customer_summary():
+    customers = pd.DataFrame({
+        "current_monthly_payment": [5000.0, 7000.0],
+        "vehicle_equity": [10000.0, -2000.0],
+        "outstanding_balance": [0.0, 150000.0],
+        "risk_profile_name": ["A1", "A1"],
+    })
+
+    summary = compute_customer_summary(customers)
+
+    assert summary["stats"] == {"avg_payment": 6000.0, "avg_equity": 4000.0,
+                                "avg_balance": 75000.0, "total_active": 1}
+    assert summary["facets"]["risk_profile_name"] == [{"value": "A1", "count": 2}]
+
+
+class TestMaterialization:
+
+    @pytest.fixture
+    def snapshot(self, monkeypatch):
+        snapshot = InventorySnapshot()
+        monkeypatch.setattr(database, "USE_MOCK_DATA", False)
+        monkeypatch.setattr(database, "inventory_snapshot", snapshot)
+        monkeypatch.setattr(database, "snapshot_aggregates", SnapshotAggregates())
+        monkeypatch.setattr(database.data_loader, "load_inventory_watermark", lambda: 1)
+        monkeypatch.setattr(database.data_loader, "load_inventory", build_inventory)
+        return snapshot
+
+    def test_refresh_materializes_and_reads_are_pure(self, snapshot, monkeypatch):
+        calls = []
+        monkeypatch.setattr(database, "compute_inventory_summary",
+                            lambda df: calls.append(len(df)) or compute_inventory_summary(df))
+
+        database.refresh_inventory()
+        assert calls == [4]
+
+        database.get_inventory_stats()
+        database.get_inventory_aggregates()
+        assert calls == [4]
+
+    def test_new_version_is_recomputed(self, snapshot):
+        database.refresh_inventory()
+        assert database.get_inventory_stats()["total_cars"] == 4
+
+        snapshot.apply_delta(pd.DataFrame(), ["a"], watermark=2)
+
+        assert database.get_inventory_stats()["total_cars"] == 3
+        assert database.get_inventory_aggregates()["years"] == [2019, 2021]
+
+    def test_customer_statistics_follow_source_hash(self, monkeypatch):
+        frames = {"h1": pd.DataFrame({"outstanding_balance": [1.0, 0.0]}),
+                  "h2": pd.DataFrame({"outstanding_balance": [1.0, 2.0, 3.0]})}
+        current = {"hash": "h1"}
+        monkeypatch.setattr(database, "USE_MOCK_DATA", False)
+        monkeypatch.setattr(database, "snapshot_aggregates", SnapshotAggregates())
+        monkeypatch.setattr(database.data_loader, "cached_customers",
+                            lambda: (current["hash"], frames[current["hash"]]))
+
+        assert database.get_customer_statistics()["total_active"] == 1
+        current["hash"] = "h2"
+        assert database.get_customer_statistics()["total_active"] == 3
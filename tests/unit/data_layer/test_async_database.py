@@ -0,0 +1,104 @@
+"""
+Tests for the async data-access facade (bounded executor, timeouts, breaker)
+"""
+import asyncio
+import threading
+import time
+
+import pytest
+
+from data.async_database import AsyncDatabase
+from data.circuit_breaker_factory import get_redshift_breaker
+from app.utils.exceptions import (
+    CircuitBreakerOpenError,
+    ConcurrentRequestLimitError,
+    RequestTimeoutError
+)
+
+
+@pytest.fixture
+def facade():
+    facade = AsyncDatabase(max_workers=2, max_queue=0, default_timeout=5)
+    yield facade
+    facade.shutdown(wait=True)
+
+
+def blocking_query(seconds, value="rows"):
+    time.sleep(seconds)
+    return value
+
+
+class TestAsyncDatabase:
+
+    @pytest.mark.asyncio
+    async def test_blocking_call_does_not_stall_the_loop(self, facade):
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        task = asyncio.ensure_future(ticker())
+        result = await facade.run(blocking_query, 0.2)
+        task.cancel()
+
+        assert result == "rows"
+        assert ticks >= 5
+        assert facade.get_stats()["completed"] == 1
+
+    @pytest.mark.asyncio
+    async def test_timeout_counts_against_breaker_until_worker_finishes(self, facade):
+        release = threading.Event()
+
+        with pytest.raises(RequestTimeoutError):
+            await facade.run(release.wait, 1, timeout=0.05, redshift=True)
+
+        stats = facade.get_stats()
+        assert stats["timeouts"] == 1
+        assert stats["in_flight"] == 1
+        assert get_redshift_breaker().get_status()["failure_count"] == 1
+
+        release.set()
+        await asyncio.sleep(0.05)
+        assert facade.get_stats()["in_flight"] == 0
+
+    @pytest.mark.asyncio
+    async def test_rejects_when_saturated(self, facade):
+        release = threading.Event()
+        running = [asyncio.ensure_future(facade.run(release.wait, 5)) for _ in range(2)]
+        await asyncio.sleep(0)
+
+        with pytest.raises(ConcurrentRequestLimitError):
+            await facade.run(blocking_query, 0)
+
+        release.set()
+        assert await asyncio.gather(*running) == [True, True]
+        assert facade.get_stats()["rejected"] == 1
+
+    @pytest.mark.asyncio
+    async def test_open_breaker_fails_fast(self, facade):
+        breaker = get_redshift_breaker()
+        for _ in range(breaker.failure_threshold):
+            breaker.record_failure()
+
+        with pytest.raises(CircuitBreakerOpenError):
+            await facade.run(blocking_query, 0, redshift=True)
+
+        stats = facade.get_stats()
+        assert stats["breaker_rejections"] == 1
+        assert stats["submitted"] == 0
+
+        # CSV / snapshot reads do not depend on Redshift
+        assert await facade.run(blocking_query, 0) == "rows"
+
+    @pytest.mark.asyncio
+    async def test_local_timeouts_leave_the_breaker_alone(self, facade):
+        release = threading.Event()
+
+        with pytest.raises(RequestTimeoutError):
+            await facade.run(release.wait, 1, timeout=0.05)
+        release.set()
+
+        assert get_redshift_breaker().get_status()["failure_count"] == 0
@@ -0,0 +1,147 @@
+"""
+Tests for batched car lookups (snapshot hash index + chunked IN queries)
+"""
+import re
+from contextlib import contextmanager
+
+import pytest
+
+from data import database, loader as loader_module
+from data.loader import DataLoader
+from data.snapshots import InventorySnapshot
+
+from .test_inventory_transform import build_raw_inventory
+
+
+def selected_columns(query):
+    """Output column names of the lookup's SELECT list (aliases or bare/qualified names)"""
+    select = query.split("SELECT DISTINCT", 1)[1].split("\nFROM", 1)[0]
+    names = []
+    for item in re.split(r",\s*\n", select.strip()):
+        alias = re.search(r"\bAS\s+(\w+)\s*$", item)
+        names.append(alias.group(1) if alias else item.strip().split(".")[-1])
+    return names
+
+
+class FakeCursor:
+    """Serves the raw inventory rows whose stock_id was passed, with only the columns the SQL selects"""
+
+    def __init__(self, raw_df, queries):
+        self.raw_df = raw_df
+        self.queries = queries
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, query, params):
+        assert query.count("%s") == len(params)
+        self.queries.append(params)
+        columns = selected_columns(query)
+        self.description = [(column, None) for column in columns]
+        rows = self.raw_df.loc[self.raw_df["stock_id"].isin(params), columns]
+        self._rows = [list(row) for row in rows.itertuples(index=False, name=None)]
+
+    def fetchall(self):
+        return self._rows
+
+
+class FakePool:
+    def __init__(self, raw_df):
+        self.raw_df = raw_df
+        self.queries = []
+
+    @contextmanager
+    def get_connection(self, timeout=None):
+        yield self
+
+    def cursor(self):
+        return FakeCursor(self.raw_df, self.queries)
+
+
+@pytest.fixture
+def raw_inventory():
+    return build_raw_inventory(num_rows=40)
+
+
+@pytest.fixture
+def pool(monkeypatch, raw_inventory):
+    pool = FakePool(raw_inventory)
+    monkeypatch.setattr(loader_module, "get_connection_pool", lambda: pool)
+    return pool
+
+
+@pytest.fixture
+def snapshot(monkeypatch, raw_inventory):
+    snapshot = InventorySnapshot()
+    loader = DataLoader()
+    snapshot.replace(loader.transform_inventory_data(raw_inventory.iloc[:30].reset_index(drop=True)))
+    monkeypatch.setattr(database, "USE_MOCK_DATA", False)
+    monkeypatch.setattr(database, "inventory_snapshot", snapshot)
+    monkeypatch.setattr(database, "data_loader", loader)
+    return snapshot
+
+
+class TestSnapshotIndex:
+
+    def test_lookup_returns_copies_and_skips_unknown(self, snapshot):
+        car_id = str(snapshot.get_dataframe()["car_id"].iloc[3])
+
+        cars = snapshot.get_cars([car_id, "nope"])
+
+        assert list(cars) == [car_id]
+        cars[car_id]["car_price"] = -1
+        assert snapshot.get_cars([car_id])[car_id]["car_price"] != -1
+
+    def test_index_follows_deltas(self, snapshot):
+        removed = str(snapshot.get_dataframe()["car_id"].iloc[0])
+        snapshot.get_cars([removed])
+
+        snapshot.apply_delta(snapshot.get_dataframe().iloc[:0], {removed})
+
+        assert snapshot.get_cars([removed]) == {}
+
+
+class TestGetCarsByIds:
+
+    def test_lookup_selects_the_inventory_query_columns(self):
+        with open("data/car_lookup_query.sql") as lookup, open("data/inventory_query.sql") as inventory:
+            assert selected_columns(lookup.read()) == selected_columns(inventory.read())
+
+    def test_snapshot_hits_do_not_query_redshift(self, snapshot, pool):
+        ids = list(snapshot.get_dataframe()["car_id"].astype(str).iloc[:5])
+
+        cars = database.get_cars_by_ids(ids)
+
+        assert set(cars) == set(ids)
+        assert pool.queries == []
+
+    def test_misses_are_fetched_in_chunks(self, snapshot, pool, raw_inventory, monkeypatch):
+        monkeypatch.setattr(loader_module, "CAR_LOOKUP_CHUNK_SIZE", 4)
+        snapshot_ids = list(snapshot.get_dataframe()["car_id"].astype(str).iloc[:2])
+        missing_ids = list(raw_inventory["stock_id"].astype(str).iloc[30:])
+
+        cars = database.get_cars_by_ids(snapshot_ids + missing_ids + ["unknown"])
+
+        assert set(cars) == set(snapshot_ids) | set(missing_ids)
+        assert [len(params) for params in pool.queries] == [4, 4, 3]
+
+    def test_get_car_by_id_uses_the_same_path(self, snapshot, pool, raw_inventory):
+        in_snapshot = str(raw_inventory["stock_id"].iloc[0])
+        not_loaded = str(raw_inventory["stock_id"].iloc[35])
+
+        assert database.get_car_by_id(in_snapshot)["car_id"] == in_snapshot
+        assert database.get_car_by_id(not_loaded)["car_id"] == not_loaded
+        assert database.get_car_by_id("unknown") is None
+        assert pool.queries == [(not_loaded,), ("unknown",)]
+
+    def test_redshift_failure_returns_snapshot_hits(self, snapshot, monkeypatch):
+        def broken_pool():
+            raise ConnectionError("redshift down")
+
+        monkeypatch.setattr(loader_module, "get_connection_pool", broken_pool)
+        car_id = str(snapshot.get_dataframe()["car_id"].iloc[0])
+
+        assert set(database.get_cars_by_ids([car_id, "elsewhere"])) == {car_id}
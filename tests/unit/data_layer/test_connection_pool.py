@@ -0,0 +1,136 @@
+"""
+Tests for connection pool health checks (idle validation, recycling, stats)
+"""
+import pytest
+
+from data import connection_pool
+from data.connection_pool import RedshiftConnectionPool
+from data.exceptions import PoolExhaustedError
+
+
+class FakeCursor:
+    def __init__(self, connection):
+        self.connection = connection
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, query, params=None):
+        if not self.connection.alive:
+            raise ConnectionError("server closed the connection")
+        self.connection.queries.append(query)
+
+
+class FakeConnection:
+    def __init__(self):
+        self.alive = True
+        self.closed = False
+        self.queries = []
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    for name in ("REDSHIFT_HOST", "REDSHIFT_DATABASE", "REDSHIFT_USER", "REDSHIFT_PASSWORD"):
+        monkeypatch.setenv(name, "test")
+    created = []
+
+    def connect(**kwargs):
+        conn = FakeConnection()
+        created.append(conn)
+        return conn
+
+    monkeypatch.setattr(connection_pool.redshift_connector, "connect", connect)
+    pool = RedshiftConnectionPool(
+        min_connections=1,
+        max_connections=2,
+        connection_timeout=1,
+        validation_idle_seconds=30,
+        max_connection_age=3600,
+        keepalive_interval=0,
+    )
+    pool.created = created
+    yield pool
+    pool.close_all()
+
+
+def age(pool, conn, idle=0, created=0):
+    state = pool._states[conn]
+    state.last_used -= idle
+    state.last_validated -= idle
+    state.created_at -= created
+
+
+class TestRedshiftConnectionPool:
+
+    def test_recently_used_connection_skips_validation(self, pool):
+        for _ in range(3):
+            with pool.get_connection() as conn:
+                conn.cursor().execute("SELECT * FROM inventory")
+
+        assert pool.created[0].queries == ["SELECT * FROM inventory"] * 3
+        assert pool.get_stats()["validations"] == 0
+
+    def test_idle_connection_is_validated_before_use(self, pool):
+        conn = pool.created[0]
+        age(pool, conn, idle=60)
+
+        with pool.get_connection() as acquired:
+            assert acquired is conn
+
+        assert conn.queries == ["SELECT 1"]
+        assert pool.get_stats()["validations"] == 1
+
+    def test_dead_idle_connection_is_replaced(self, pool):
+        dead = pool.created[0]
+        dead.alive = False
+        age(pool, dead, idle=60)
+
+        with pool.get_connection() as conn:
+            assert conn is not dead
+
+        stats = pool.get_stats()
+        assert dead.closed
+        assert stats["validation_failures"] == 1
+        assert stats["total_connections"] == 1
+
+    def test_failed_block_revalidates_on_return(self, pool):
+        with pytest.raises(RuntimeError):
+            with pool.get_connection() as conn:
+                conn.alive = False
+                raise RuntimeError("query failed")
+
+        assert conn.closed
+        assert pool.get_stats()["total_connections"] == 0
+
+    def test_maintenance_recycles_old_and_refills(self, pool):
+        old = pool.created[0]
+        age(pool, old, created=7200)
+
+        pool.run_maintenance()
+
+        stats = pool.get_stats()
+        assert old.closed
+        assert stats["recycled_connections"] == 1
+        assert stats["total_connections"] == 1
+        assert stats["available_connections"] == 1
+        assert len(pool.created) == 2
+
+    def test_exhaustion_and_wait_stats(self, pool):
+        with pool.get_connection(), pool.get_connection():
+            with pytest.raises(PoolExhaustedError):
+                with pool.get_connection(timeout=0.05):
+                    pass
+
+        stats = pool.get_stats()
+        assert stats["total_connections"] == 2
+        assert stats["available_connections"] == 2
+        assert stats["max_wait_ms"] >= 0
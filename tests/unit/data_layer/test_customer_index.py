@@ -0,0 +1,101 @@
+"""
+Tests for the customer list index (global sort, risk buckets, pagination)
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from data import database
+from data.customer_index import CustomerIndex
+
+
+def build_customers():
+    return pd.DataFrame({
+        "customer_id": [f"C{i}" for i in range(8)],
+        "full_name": ["Ana Ruiz", "Beto Ruiz", "Carla Diaz", "Dario Ruiz",
+                      "Eva Soto", "Fede Ruiz", "Gina Paz", "Hugo Ruiz"],
+        "email": [None] * 8,
+        "current_monthly_payment": [5000.0, 9000.0, 7000.0, np.nan, 12000.0, 3000.0, 8000.0, 10000.0],
+        "vehicle_equity": [1.0, 2.0, 3.0, 4.0, 5.0, 6.0, 7.0, 8.0],
+        "outstanding_balance": [0.0] * 8,
+        "risk_profile_name": ["A1", "A2", "B", "C1", "C3", "A", "E+F+ML", "A1"],
+        "risk_profile_index": [3, 4, 5, 6, 8, 2, 25, 3],
+    })
+
+
+@pytest.fixture
+def index():
+    return CustomerIndex(build_customers(), "v1", database.CUSTOMER_SEARCH_FIELDS)
+
+
+def ids(index, positions):
+    return index.frame["customer_id"].iloc[positions].tolist()
+
+
+class TestQuery:
+
+    def test_sort_is_global_across_pages(self, index):
+        first, total = index.query(sort_by="payment-high", limit=3)
+        second, _ = index.query(sort_by="payment-high", offset=3, limit=3)
+
+        assert total == 8
+        assert ids(index, first) == ["C4", "C7", "C1"]
+        assert ids(index, second) == ["C6", "C2", "C0"]
+
+    def test_missing_values_sort_last(self, index):
+        positions, _ = index.query(sort_by="payment-low")
+
+        assert ids(index, positions)[:2] == ["C5", "C0"]
+        assert ids(index, positions)[-1] == "C3"
+
+    def test_risk_buckets(self, index):
+        low, low_total = index.query(risk_filter="low")
+        _, medium_total = index.query(risk_filter="medium")
+        high, _ = index.query(risk_filter="high")
+
+        assert low_total == 5 and medium_total == 2
+        assert ids(index, low) == ["C0", "C1", "C2", "C5", "C7"]
+        assert ids(index, high) == ["C6"]
+
+    def test_risk_profile_filter(self, index):
+        positions, total = index.query(risk_filter="A1")
+
+        assert total == 2 and ids(index, positions) == ["C0", "C7"]
+
+    def test_search_filter_sort_paginate(self, index):
+        positions, total = index.query(search_term="ruiz", risk_filter="low",
+                                       sort_by="payment-high", offset=1, limit=2)
+
+        # Ruiz + low risk: C0 (5000), C1 (9000), C5 (3000), C7 (10000)
+        assert total == 4
+        assert ids(index, positions) == ["C1", "C0"]
+
+    def test_search_keeps_relevance_without_sort(self, index):
+        positions, _ = index.query(search_term="C7")
+
+        assert ids(index, positions)[0] == "C7"
+
+    def test_unknown_sort_keeps_frame_order(self, index):
+        positions, _ = index.query(sort_by="recent", limit=3)
+
+        assert ids(index, positions) == ["C0", "C1", "C2"]
+
+
+def test_database_builds_index_once_per_source_hash(monkeypatch):
+    frames = {"h1": build_customers()}
+    current = {"hash": "h1"}
+    monkeypatch.setattr(database, "USE_MOCK_DATA", False)
+    monkeypatch.setattr(database, "_customer_index", None)
+    monkeypatch.setattr(database.data_loader, "cached_customers", lambda: (current["hash"], frames[current["hash"]]))
+    monkeypatch.setattr(database.data_loader, "refresh_derived_fields", lambda df: df)
+
+    page, total = database.search_customers_with_filters(risk_filter="medium", sort_by="equity-high")
+    first_index = database.get_customer_index()
+
+    assert total == 2 and [row["customer_id"] for row in page] == ["C4", "C3"]
+    assert database.get_customer_index() is first_index
+    assert "risk_index" not in frames["h1"].columns
+
+    frames["h2"] = build_customers().head(2)
+    current["hash"] = "h2"
+    assert database.search_customers_with_filters()[1] == 2
@@ -0,0 +1,89 @@
+"""
+Tests for the typed customer CSV ingest and its file-hash cache
+"""
+import pytest
+import pandas as pd
+
+from data.loader import DataLoader, CUSTOMER_CATEGORICAL_COLUMNS
+
+CSV_HEADER = (
+    "CONTRATO,STOCK ID,NOMBRE,APELLIDO,MAIL,MONTO DE LA MENSUALIDAD,SALDO INSOLUTO,"
+    "FECHA DE CONTRATO,MARCA,MODELO,ANO AUTO,AGING,KILOMETRAJE,PRECIO AUTO,TASA,"
+    "MONTO A FINANCIAR,TIENE KT,PLAZO REMANENTE,risk_profile,EXTRA\n"
+)
+CSV_ROWS = [
+    "C001,20541,SERGIO,CASTILLO,s@example.com,5331.71,10102.54,6/29/20,HYUNDAI,Tucson,2016,4,71423,254999,0.1599,181911.37,0,6,A1,x\n",
+    "C002,19573,BERTHA,ROMERO,b@example.com,8576.6,24251.08,7/17/20,Mercedes Benz,CLASE GLA,2019,1,10914,484999,0.1599,298859.36,1,7,ZZ,y\n",
+    "C003,13993,MARIA,RODRIGUEZ,m@example.com,0,25569.52,8/6/20,TOYOTA,Prius,2015,5,90000,200000,0.1599,150000,0,8,B,z\n",
+]
+
+
+@pytest.fixture
+def customer_csv(tmp_path):
+    path = tmp_path / "customers.csv"
+    path.write_text("\ufeff" + CSV_HEADER + "".join(CSV_ROWS), encoding="utf-8")
+    return path
+
+
+@pytest.fixture
+def loader(tmp_path, monkeypatch):
+    # load_customers_from_csv prefers data/customers_data_tradeup.csv relative to cwd
+    monkeypatch.chdir(tmp_path)
+    return DataLoader()
+
+
+class TestLoadCustomersFromCsv:
+    """Typed read + vectorized transform of the customer export"""
+
+    def test_transform_output(self, loader, customer_csv):
+        df = loader.load_customers_from_csv(str(customer_csv))
+
+        # Zero monthly payment is filtered out
+        assert df["customer_id"].tolist() == ["C001", "C002"]
+        assert df["current_car_model"].tolist() == ["HYUNDAI Tucson 2016", "Mercedes Benz CLASE GLA 2019"]
+        assert df["contract_date"].iloc[0] == pd.Timestamp("2020-06-29")
+        assert df["vehicle_equity"].iloc[0] == pytest.approx(254999 - 10102.54)
+        # Unmapped risk profiles fall back to the highest risk index
+        assert df["risk_profile_index"].tolist() == [3, 25]
+        assert df["has_kavak_total"].tolist() == [False, True]
+        assert "EXTRA" not in df.columns
+
+    def test_low_cardinality_columns_are_categorical(self, loader, customer_csv):
+        df = loader.load_customers_from_csv(str(customer_csv))
+
+        for col in CUSTOMER_CATEGORICAL_COLUMNS:
+            assert isinstance(df[col].dtype, pd.CategoricalDtype), col
+
+    def test_unchanged_file_is_served_from_cache(self, loader, customer_csv, monkeypatch):
+        first = loader.load_customers_from_csv(str(customer_csv))
+
+        def fail_read(*args, **kwargs):
+            raise AssertionError("CSV re-read despite unchanged file")
+
+        monkeypatch.setattr(loader, "_read_customer_csv", fail_read)
+        second = loader.load_customers_from_csv(str(customer_csv))
+        pd.testing.assert_frame_equal(first, second)
+
+        # Callers get their own copy
+        second.loc[second.index[0], "current_car_model"] = "changed"
+        third = loader.load_customers_from_csv(str(customer_csv))
+        assert third["current_car_model"].iloc[0] == "HYUNDAI Tucson 2016"
+
+    def test_changed_file_is_reloaded(self, loader, customer_csv):
+        loader.load_customers_from_csv(str(customer_csv))
+
+        customer_csv.write_text(
+            "\ufeff" + CSV_HEADER + CSV_ROWS[0].replace("C001", "C009"), encoding="utf-8"
+        )
+        df = loader.load_customers_from_csv(str(customer_csv))
+
+        assert df["customer_id"].tolist() == ["C009"]
+
+    def test_malformed_numbers_fall_back_to_coercion(self, loader, tmp_path):
+        path = tmp_path / "bad.csv"
+        path.write_text(
+            CSV_HEADER + CSV_ROWS[0] + CSV_ROWS[1].replace("8576.6", "N/D"), encoding="utf-8"
+        )
+        df = loader.load_customers_from_csv(str(path))
+
+        assert df["customer_id"].tolist() == ["C001"]
@@ -0,0 +1,166 @@
+"""
+Tests for the incremental inventory refresh (snapshot deltas + targeted invalidation)
+"""
+import pytest
+import pandas as pd
+
+from data import database
+from data.cache_manager import CacheManager
+from data.loader import DataLoader
+from data.snapshots import InventorySnapshot
+
+from .test_inventory_transform import build_raw_inventory
+
+
+@pytest.fixture
+def loader():
+    return DataLoader()
+
+
+@pytest.fixture
+def snapshot(loader):
+    snapshot = InventorySnapshot()
+    snapshot.replace(loader.transform_inventory_data(build_raw_inventory(num_rows=50)), watermark=1)
+    return snapshot
+
+
+def build_delta(raw, listed, dates):
+    delta = raw.copy()
+    delta["is_listed"] = listed
+    delta["inventory_date"] = dates
+    return delta
+
+
+class TestInventorySnapshot:
+
+    def test_apply_delta_upserts_and_deletes(self, loader, snapshot):
+        df = snapshot.get_dataframe()
+        updated = loader._transform_inventory_chunk(build_raw_inventory(num_rows=2))
+        updated["car_price"] = 1.0
+        removed_id = df["car_id"].iloc[10]
+
+        changed = snapshot.apply_delta(updated, {removed_id, "not-in-snapshot"}, watermark=2)
+
+        new_df = snapshot.get_dataframe()
+        assert changed == set(updated["car_id"]) | {removed_id}
+        assert snapshot.version == 2
+        assert snapshot.watermark == 2
+        assert len(new_df) == len(df) - 1
+        assert removed_id not in set(new_df["car_id"])
+        assert new_df.loc[new_df["car_id"].isin(updated["car_id"]), "car_price"].eq(1.0).all()
+        assert isinstance(new_df["car_brand"].dtype, pd.CategoricalDtype)
+
+    def test_unchanged_upserts_are_ignored(self, loader, snapshot):
+        records = snapshot.to_records()
+        refetched = loader._transform_inventory_chunk(build_raw_inventory(num_rows=3))
+        refetched.loc[1, "kilometers"] = 1
+
+        changed = snapshot.apply_delta(refetched, set(), watermark=2)
+
+        assert changed == {refetched.loc[1, "car_id"]}
+        assert snapshot.version == 2
+        assert len(snapshot.get_dataframe()) == len(records)
+        assert snapshot.apply_delta(refetched, set(), watermark=3) == set()
+        assert snapshot.version == 2
+
+    def test_empty_delta_keeps_version(self, snapshot):
+        records = snapshot.to_records()
+
+        changed = snapshot.apply_delta(pd.DataFrame(), set(), watermark=5)
+
+        assert changed == set()
+        assert snapshot.version == 1
+        assert snapshot.watermark == 5
+        assert snapshot.to_records() is records
+
+
+class TestSplitInventoryDelta:
+
+    def test_unlisted_and_untransformable_rows_become_deletes(self, loader):
+        raw = build_raw_inventory(num_rows=4)
+        raw.loc[2, "model"] = None
+        delta = build_delta(raw, [True, False, True, True], [3, 7, 4, 5])
+
+        upserts, deleted, watermark = loader.split_inventory_delta(delta, since=1)
+
+        assert list(upserts["car_id"]) == [raw.loc[0, "stock_id"], raw.loc[3, "stock_id"]]
+        assert deleted == {raw.loc[1, "stock_id"], raw.loc[2, "stock_id"]}
+        assert watermark == 7
+
+    def test_no_rows_keeps_watermark(self, loader):
+        upserts, deleted, watermark = loader.split_inventory_delta(pd.DataFrame(), since=9)
+
+        assert upserts.empty and deleted == set() and watermark == 9
+
+
+class TestInvalidateCars:
+
+    def test_only_changed_car_entries_are_dropped(self):
+        cache = CacheManager()
+        for key in ["car_A", "car_B", "car_AB", "offers_c1_basic", "inventory_all"]:
+            cache.get(key, lambda: {"x": 1})
+
+        cache.invalidate_cars({"A", "Z"})
+
+        remaining = {entry["key"] for entry in cache.get_status()["entries"]}
+        assert remaining == {"car_B", "car_AB", "offers_c1_basic", "inventory_all"}
+
+
+class TestRefreshInventory:
+
+    @pytest.fixture
+    def patched(self, monkeypatch, loader):
+        snapshot = InventorySnapshot()
+        calls = []
+        full_df = loader.transform_inventory_data(build_raw_inventory(num_rows=20))
+        delta_raw = build_delta(build_raw_inventory(num_rows=1), [True], [11])
+        delta_raw["kilometers"] += 1
+
+        def load_inventory():
+            calls.append("full")
+            return full_df
+
+        def load_delta(since):
+            calls.append(("delta", since))
+            return loader.split_inventory_delta(delta_raw, since)
+
+        monkeypatch.setattr(database, "USE_MOCK_DATA", False)
+        monkeypatch.setattr(database, "inventory_snapshot", snapshot)
+        monkeypatch.setattr(database.data_loader, "load_inventory_watermark", lambda: 10)
+        monkeypatch.setattr(database.data_loader, "load_inventory", load_inventory)
+        monkeypatch.setattr(database.data_loader, "load_inventory_delta_from_redshift", load_delta)
+        return snapshot, calls
+
+    def test_second_refresh_is_incremental(self, patched):
+        snapshot, calls = patched
+
+        first = database.refresh_inventory()
+        second = database.refresh_inventory()
+
+        assert first["mode"] == "full"
+        assert second == {"mode": "incremental", "version": 2, "changed": 1}
+        assert calls == ["full", ("delta", 10)]
+        assert snapshot.watermark == 11
+
+    def test_refetched_unchanged_cars_keep_cache(self, patched, monkeypatch, loader):
+        snapshot, calls = patched
+        unchanged_raw = build_delta(build_raw_inventory(num_rows=5), [True] * 5, [10] * 5)
+        monkeypatch.setattr(database.data_loader, "load_inventory_delta_from_redshift",
+                            lambda since: loader.split_inventory_delta(unchanged_raw, since))
+        invalidated = []
+        monkeypatch.setattr(database.cache_manager, "invalidate_cars", invalidated.append)
+
+        database.refresh_inventory()
+        result = database.refresh_inventory()
+
+        assert result == {"mode": "incremental", "version": 1, "changed": 0}
+        assert invalidated == [set()]
+
+    def test_force_full(self, patched):
+        snapshot, calls = patched
+
+        database.refresh_inventory()
+        result = database.refresh_inventory(force_full=True)
+
+        assert result["mode"] == "full"
+        assert calls == ["full", "full"]
@@ -0,0 +1,109 @@
+"""
+Tests for the faceted inventory query engine
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from data import database
+from data.inventory_query import InventoryFilter, InventoryQuery, classify_vehicles
+from data.snapshots import InventorySnapshot
+
+
+def build_inventory():
+    return pd.DataFrame({
+        "car_id": [1, 2, 3, 4, 5, 6],
+        "model": ["NISSAN VERSA 2020", "HONDA CIVIC 2021", "TOYOTA RAV4 2019",
+                  "FORD F150 2022", "VW GOLF 2018", "KIA RIO 2021"],
+        "car_brand": pd.Categorical(["NISSAN", "HONDA", "TOYOTA", "FORD", "VW", "KIA"]),
+        "year": [2020, 2021, 2019, 2022, 2018, 2021],
+        "sales_price": [250000.0, 320000.0, 450000.0, 600000.0, 210000.0, np.nan],
+        "kilometers": [30000, 15000, 60000, 10000, 90000, 20000],
+        "region": ["CDMX", "CDMX", "GDL", "MTY", None, "CDMX"],
+        "color": ["ROJO", "BLANCO", "BLANCO", "NEGRO", "ROJO", "BLANCO"],
+        "has_promotion": [True, False, False, True, False, True],
+    })
+
+
+@pytest.fixture
+def engine():
+    return InventoryQuery(build_inventory(), version=1)
+
+
+def car_ids(engine, positions):
+    return engine.frame["car_id"].iloc[positions].tolist()
+
+
+def test_classify_vehicles():
+    models = pd.Series(["HONDA CIVIC 2021", "TOYOTA RAV4", "FORD F150", "VW GOLF", "KIA RIO", None])
+
+    assert classify_vehicles(models).tolist() == ["Sedan", "SUV", "Truck", "Hatchback", "Other", "Other"]
+
+
+class TestSelect:
+
+    def test_categorical_bitmaps(self, engine):
+        conditions = InventoryFilter(brands=["nissan", "Honda", "TESLA"], colors=["ROJO", "BLANCO"])
+
+        assert car_ids(engine, engine.select(conditions)) == [1, 2]
+
+    def test_ranges(self, engine):
+        conditions = InventoryFilter(price_min=250000, price_max=450000, km_max=30000)
+
+        # Missing prices never match a price range
+        assert car_ids(engine, engine.select(conditions)) == [1, 2]
+
+    def test_year_class_promotion_and_exclusions(self, engine):
+        assert car_ids(engine, engine.select(InventoryFilter(year_min=2021))) == [2, 4, 6]
+        assert car_ids(engine, engine.select(InventoryFilter(vehicle_classes=["Truck", "SUV"]))) == [3, 4]
+        assert car_ids(engine, engine.select(InventoryFilter(has_promotion=True, exclude_brands=["kia"]))) == [1, 4]
+
+    def test_empty_lists_do_not_filter(self, engine):
+        assert len(engine.select(InventoryFilter(brands=[], regions=[]))) == 6
+
+    def test_order_and_pagination(self, engine):
+        order = engine.positions_of([6, 99, 2, 1])
+
+        assert car_ids(engine, order) == [6, 2, 1]
+        positions = engine.select(InventoryFilter(regions=["CDMX"]), order=order, offset=1, limit=1)
+        assert car_ids(engine, positions) == [2]
+
+    def test_derived_columns(self, engine):
+        rows = engine.rows(engine.select(InventoryFilter(brands=["ford"])), with_derived=True)
+
+        assert rows[["brand", "year", "vehicle_class"]].values.tolist() == [["FORD", 2022, "Truck"]]
+        assert "vehicle_class" not in engine.frame.columns
+
+    def test_brand_and_year_from_model_when_columns_missing(self):
+        engine = InventoryQuery(build_inventory().drop(columns=["car_brand", "year"]))
+
+        conditions = InventoryFilter(brands=["TOYOTA", "VW"], year_max=2019)
+        assert car_ids(engine, engine.select(conditions)) == [3, 5]
+
+
+def test_facet_counts(engine):
+    mask = engine.mask(InventoryFilter(year_min=2020))
+
+    facets = engine.facet_counts(mask)
+
+    assert facets["region"] == [{"value": "CDMX", "count": 3}, {"value": "MTY", "count": 1}]
+    assert facets["year"][0] == {"value": 2021, "count": 2}
+    assert facets["has_promotion"] == [{"value": True, "count": 3}, {"value": False, "count": 1}]
+    assert sum(item["count"] for item in engine.facet_counts()["brand"]) == 6
+
+
+def test_search_inventory_runs_on_snapshot_engine(monkeypatch):
+    snapshot = InventorySnapshot()
+    snapshot.replace(build_inventory())
+    monkeypatch.setattr(database, "USE_MOCK_DATA", False)
+    monkeypatch.setattr(database, "inventory_snapshot", snapshot)
+
+    results = database.search_inventory(make_filter="honda", price_max=400000)
+    first_engine = database.get_inventory_query()
+
+    assert [car["car_id"] for car in results] == [2]
+    assert database.get_inventory_query() is first_engine
+    assert database.get_inventory_facets(InventoryFilter(regions=["CDMX"]))["total"] == 3
+
+    snapshot.apply_delta(pd.DataFrame(), [2], watermark=None)
+    assert database.search_inventory(make_filter="honda") == []
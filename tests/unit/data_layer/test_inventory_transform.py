@@ -0,0 +1,168 @@
+"""
+Golden-output tests for the vectorized inventory transform
+"""
+import pytest
+import numpy as np
+import pandas as pd
+
+from data.loader import DataLoader, INVENTORY_CATEGORICAL_COLUMNS
+
+
+def legacy_transform_inventory_data(raw_df):
+    """Row-wise transform as it existed before vectorization (reference output)"""
+    raw_df = raw_df.copy()
+
+    def clean_model_name(row):
+        brand = row['car_brand']
+        model = row['model']
+        year = row['year']
+        version = row.get('version', '')
+
+        if pd.notna(model) and brand.lower() in model.lower():
+            model = model.replace(brand, '').strip()
+
+        parts = [brand, model, str(year)]
+
+        if pd.notna(version) and version.strip():
+            version_clean = version.strip()
+            for suffix in ['CVT', 'MT', 'AT', '| 2.0L', '| 1.6L', '| 1.8L', ', Sedán', ', SUV', ', Hatchback']:
+                version_clean = version_clean.replace(suffix, '')
+            version_clean = version_clean.strip(' ,|')
+
+            if version_clean and len(version_clean) < 20:
+                parts.append(version_clean)
+
+        return ' '.join(parts)
+
+    raw_df["full_model"] = raw_df.apply(clean_model_name, axis=1)
+    raw_df["final_price"] = raw_df.apply(
+        lambda row: (
+            row["promotion_published_price_financing"]
+            if (
+                pd.notna(row["promotion_published_price_financing"])
+                and row["promotion_published_price_financing"]
+                < row["regular_published_price_financing"]
+            )
+            else row["regular_published_price_financing"]
+        ),
+        axis=1,
+    )
+
+    inventory_df = pd.DataFrame(
+        {
+            "car_id": raw_df["stock_id"],
+            "model": raw_df["full_model"],
+            "sales_price": raw_df["final_price"],
+            "region": raw_df["region_name"],
+            "kilometers": raw_df["kilometers"],
+            "color": raw_df["color"],
+            "has_promotion": raw_df["has_promotion_discount"],
+            "price_difference": raw_df["price_difference_abs"],
+            "hub_name": raw_df["hub_name"],
+            "region_growth": raw_df["region_growth"],
+            "car_brand": raw_df["car_brand"],
+            "make": raw_df["car_brand"],
+            "year": raw_df["year"],
+        }
+    )
+    inventory_df = inventory_df.dropna(subset=["car_id", "model", "sales_price"])
+    inventory_df["sales_price"] = pd.to_numeric(inventory_df["sales_price"], errors="coerce")
+    inventory_df = inventory_df[inventory_df["sales_price"] > 0]
+    inventory_df = inventory_df.rename(columns={"sales_price": "car_price"})
+    inventory_df["sales_price"] = inventory_df["car_price"]
+    inventory_df["brand"] = inventory_df["car_brand"]
+    inventory_df["model_short"] = inventory_df["model"]
+    return inventory_df
+
+
+def build_raw_inventory(num_rows=500, seed=7):
+    """Deterministic raw Redshift-shaped inventory covering the cleaning edge cases"""
+    rng = np.random.default_rng(seed)
+    brands = ['Nissan', 'Volkswagen', 'MAZDA', 'Toyota', 'KIA']
+    models = {
+        'Nissan': ['Versa', 'Nissan Sentra', 'NISSAN March'],
+        'Volkswagen': ['Jetta', 'Volkswagen Vento', 'Golf'],
+        'MAZDA': ['MAZDA 3', 'CX-5', 'Mazda 2'],
+        'Toyota': ['Corolla', 'Toyota RAV4', 'Yaris'],
+        'KIA': ['Rio', 'Forte', 'KIA Sportage'],
+    }
+    versions = [
+        None, '', '   ', 'Sense CVT', 'Advance MT | 1.6L', 'GLI AT, Sedán',
+        'Limited Edition Premium Package Plus', 'EX, SUV', 'LX | 2.0L, Hatchback', ' Base ',
+    ]
+    rows = []
+    for i in range(num_rows):
+        brand = brands[rng.integers(len(brands))]
+        regular = float(rng.integers(150_000, 600_000))
+        promo_kind = rng.integers(3)
+        if promo_kind == 0:
+            promo = np.nan
+        elif promo_kind == 1:
+            promo = regular - float(rng.integers(1, 20_000))
+        else:
+            promo = regular + float(rng.integers(1, 20_000))
+        rows.append({
+            'stock_id': f'{100000 + i}',
+            'kilometers': int(rng.integers(1_000, 150_000)),
+            'regular_published_price_financing': regular,
+            'promotion_published_price_financing': promo,
+            'region_name': ['CDMX', 'Guadalajara', 'Monterrey'][rng.integers(3)],
+            'car_brand': brand,
+            'model': models[brand][rng.integers(3)],
+            'year': int(rng.integers(2015, 2025)),
+            'version': versions[rng.integers(len(versions))],
+            'color': ['Blanco', 'Negro', 'Gris'][rng.integers(3)],
+            'region_growth': float(rng.uniform(0.8, 1.2)),
+            'hub_name': ['Hub Norte', 'Hub Sur'][rng.integers(2)],
+            'has_promotion_discount': bool(promo_kind == 1),
+            'price_difference_abs': abs(regular - promo) if promo_kind else np.nan,
+        })
+    return pd.DataFrame(rows)
+
+
+class TestTransformInventoryData:
+    """Vectorized transform must match the legacy row-wise output"""
+
+    @pytest.fixture
+    def loader(self):
+        return DataLoader()
+
+    def test_matches_legacy_transform_row_for_row(self, loader):
+        raw_df = build_raw_inventory()
+        # Records the transform must filter out
+        raw_df.loc[3, 'stock_id'] = None
+        raw_df.loc[5, 'regular_published_price_financing'] = 0.0
+        raw_df.loc[5, 'promotion_published_price_financing'] = np.nan
+
+        expected = legacy_transform_inventory_data(raw_df)
+        expected["regular_price"] = raw_df.loc[expected.index, "regular_published_price_financing"]
+        result = loader.transform_inventory_data(raw_df.copy())
+
+        comparable = result.astype({col: object for col in INVENTORY_CATEGORICAL_COLUMNS})
+        pd.testing.assert_frame_equal(comparable, expected)
+
+    def test_low_cardinality_columns_are_categorical(self, loader):
+        result = loader.transform_inventory_data(build_raw_inventory(50))
+
+        for column in INVENTORY_CATEGORICAL_COLUMNS:
+            assert isinstance(result[column].dtype, pd.CategoricalDtype)
+
+    def test_promotional_price_only_when_lower(self, loader):
+        raw_df = build_raw_inventory(3)
+        raw_df['regular_published_price_financing'] = [300000.0, 300000.0, 300000.0]
+        raw_df['promotion_published_price_financing'] = [250000.0, 350000.0, np.nan]
+        raw_df['stock_id'] = ['A', 'B', 'C']
+
+        result = loader.transform_inventory_data(raw_df)
+
+        assert result['car_price'].tolist() == [250000.0, 300000.0, 300000.0]
+        assert result['regular_price'].tolist() == [300000.0, 300000.0, 300000.0]
+
+    def test_rows_without_model_are_dropped(self, loader):
+        raw_df = build_raw_inventory(4)
+        raw_df.loc[1, 'model'] = None
+
+        result = loader.transform_inventory_data(raw_df)
+
+        assert raw_df.loc[1, 'stock_id'] not in result['car_id'].tolist()
+        assert len(result) == 3
@@ -0,0 +1,152 @@
+"""
+Tests for Redshift query coalescing (in-flight dedup, short TTL cache, bucketing)
+"""
+import threading
+import time
+
+import pytest
+
+from data.loader import DataLoader, QueryCoalescer, FILTERED_INVENTORY_ROW_LIMIT
+
+from .test_inventory_transform import build_raw_inventory
+
+
+class TestQueryCoalescer:
+
+    def test_concurrent_identical_queries_run_once(self):
+        coalescer = QueryCoalescer(ttl_seconds=0)
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+
+        def fetch():
+            calls.append(1)
+            started.set()
+            release.wait(2)
+            return {"rows": 3}
+
+        results = []
+        leader = threading.Thread(target=lambda: results.append(coalescer.run("q", fetch)))
+        leader.start()
+        started.wait(2)
+        waiters = [threading.Thread(target=lambda: results.append(coalescer.run("q", fetch)))
+                   for _ in range(4)]
+        for thread in waiters:
+            thread.start()
+        while coalescer.get_stats()["coalesced"] < 4:
+            time.sleep(0.001)
+        release.set()
+        for thread in [leader] + waiters:
+            thread.join(2)
+
+        assert len(calls) == 1
+        assert results == [{"rows": 3}] * 5
+        assert len({id(result) for result in results}) == 5
+        assert coalescer.get_stats()["in_flight"] == 0
+
+    def test_error_is_shared_with_waiters_and_not_cached(self):
+        coalescer = QueryCoalescer(ttl_seconds=30)
+        started = threading.Event()
+        release = threading.Event()
+
+        def failing():
+            started.set()
+            release.wait(2)
+            raise ConnectionError("redshift down")
+
+        errors = []
+
+        def call():
+            try:
+                coalescer.run("q", failing)
+            except ConnectionError as e:
+                errors.append(e)
+
+        leader = threading.Thread(target=call)
+        leader.start()
+        started.wait(2)
+        waiter = threading.Thread(target=call)
+        waiter.start()
+        while coalescer.get_stats()["coalesced"] < 1:
+            time.sleep(0.001)
+        release.set()
+        leader.join(2)
+        waiter.join(2)
+
+        assert len(errors) == 2
+        assert coalescer.run("q", lambda: "ok") == "ok"
+
+    def test_ttl_cache_and_invalidate(self):
+        coalescer = QueryCoalescer(ttl_seconds=30)
+        calls = []
+
+        def fetch():
+            calls.append(1)
+            return len(calls)
+
+        assert coalescer.run("q", fetch) == 1
+        assert coalescer.run("q", fetch) == 1
+        coalescer.invalidate()
+        assert coalescer.run("q", fetch) == 2
+        assert coalescer.get_stats()["hits"] == 1
+
+    def test_uncacheable_results_are_refetched(self):
+        coalescer = QueryCoalescer(ttl_seconds=30)
+        calls = []
+
+        def fetch():
+            calls.append(1)
+            return None
+
+        coalescer.run("car", fetch, cacheable=lambda car: car is not None)
+        coalescer.run("car", fetch, cacheable=lambda car: car is not None)
+
+        assert len(calls) == 2
+
+
+class TestFilteredInventoryBucketing:
+
+    @pytest.fixture
+    def loader(self, monkeypatch):
+        loader = DataLoader()
+        inventory_df = loader.transform_inventory_data(build_raw_inventory(num_rows=300))
+        inventory_df.attrs["raw_rows"] = len(inventory_df)
+        queries = []
+
+        def query(year, price, kilometers):
+            queries.append((year, price, kilometers))
+            return inventory_df[
+                (inventory_df["year"] >= year)
+                & (inventory_df["car_price"] > price)
+                & (inventory_df["kilometers"] < kilometers)
+            ].copy()
+
+        monkeypatch.setattr(loader, "_query_filtered_inventory", query)
+        loader.queries = queries
+        loader.inventory_df = inventory_df
+        return loader
+
+    def test_nearby_filters_share_one_query_and_stay_exact(self, loader):
+        first = loader.load_filtered_inventory_from_redshift(2018, 201_000, 41_000)
+        second = loader.load_filtered_inventory_from_redshift(2018, 212_500, 48_000)
+
+        assert loader.queries == [(2018, 200_000, 50_000)]
+        for result, (price, km) in [(first, (201_000, 41_000)), (second, (212_500, 48_000))]:
+            expected = loader.inventory_df[
+                (loader.inventory_df["year"] >= 2018)
+                & (loader.inventory_df["car_price"] > price)
+                & (loader.inventory_df["kilometers"] < km)
+            ]
+            assert set(result["car_id"]) == set(expected["car_id"])
+
+    def test_unbounded_km_is_not_bucketed(self, loader):
+        loader.load_filtered_inventory_from_redshift(2018, 100_000, float("inf"))
+
+        assert loader.queries == [(2018, 100_000, float("inf"))]
+
+    def test_truncated_bucket_falls_back_to_exact_query(self, loader):
+        loader.inventory_df.attrs["raw_rows"] = FILTERED_INVENTORY_ROW_LIMIT
+
+        loader.load_filtered_inventory_from_redshift(2018, 201_000, 41_000)
+
+        assert loader.queries == [(2018, 200_000, 50_000), (2018, 201_000, 41_000)]
@@ -0,0 +1,79 @@
+"""
+Tests for the chunked Redshift inventory fetch and its columnar buffer
+"""
+import pytest
+import numpy as np
+import pandas as pd
+
+from data.columnar_buffer import ColumnarBuffer
+from data.loader import DataLoader
+
+from .test_inventory_transform import build_raw_inventory
+
+
+class FakeCursor:
+    """DB-API cursor stand-in serving pre-executed rows through fetchmany()"""
+
+    def __init__(self, df, report_rowcount=True):
+        self.description = [(column, None) for column in df.columns]
+        self.rowcount = len(df) if report_rowcount else -1
+        self._rows = [list(row) for row in df.itertuples(index=False, name=None)]
+        self.batch_sizes = []
+
+    def fetchmany(self, size):
+        batch, self._rows = self._rows[:size], self._rows[size:]
+        self.batch_sizes.append(len(batch))
+        return batch
+
+
+class TestColumnarBuffer:
+
+    def test_grows_past_capacity_hint(self):
+        buffer = ColumnarBuffer(capacity=2)
+        buffer.append(pd.DataFrame({"a": [1, 2], "b": ["x", "y"]}))
+        buffer.append(pd.DataFrame({"a": [3, 4, 5], "b": ["z", "w", "v"]}))
+
+        assert len(buffer) == 5
+        assert buffer.capacity >= 5
+        pd.testing.assert_frame_equal(
+            buffer.to_frame(), pd.DataFrame({"a": [1, 2, 3, 4, 5], "b": ["x", "y", "z", "w", "v"]})
+        )
+
+    def test_int_column_widens_to_float(self):
+        buffer = ColumnarBuffer(capacity=4)
+        buffer.append(pd.DataFrame({"km": [10, 20]}))
+        buffer.append(pd.DataFrame({"km": [np.nan, 40.5]}))
+
+        values = buffer.to_frame()["km"]
+        assert values.dtype == np.float64
+        assert values.tolist()[:2] == [10.0, 20.0]
+        assert np.isnan(values.iloc[2])
+
+    def test_rejects_mismatched_columns(self):
+        buffer = ColumnarBuffer()
+        buffer.append(pd.DataFrame({"a": [1]}))
+        with pytest.raises(ValueError):
+            buffer.append(pd.DataFrame({"b": [1]}))
+
+
+class TestFetchInventoryStream:
+
+    @pytest.fixture
+    def loader(self):
+        return DataLoader()
+
+    @pytest.mark.parametrize("report_rowcount", [True, False])
+    def test_matches_single_shot_transform(self, loader, report_rowcount):
+        raw = build_raw_inventory(num_rows=1000)
+        cursor = FakeCursor(raw, report_rowcount=report_rowcount)
+
+        streamed = loader.fetch_inventory_stream(cursor, chunk_size=128)
+        expected = loader.transform_inventory_data(raw).reset_index(drop=True)
+
+        pd.testing.assert_frame_equal(streamed, expected)
+        assert max(cursor.batch_sizes) <= 128
+
+    def test_empty_result_returns_none(self, loader):
+        cursor = FakeCursor(build_raw_inventory(num_rows=10).iloc[0:0])
+
+        assert loader.fetch_inventory_stream(cursor) is None
@@ -0,0 +1,132 @@
+"""
+Tests for the universal search text index and its snapshot integration
+"""
+import pandas as pd
+import pytest
+
+from data import database
+from data.snapshots import InventorySnapshot
+from data.text_index import TextIndex, normalize
+
+
+@pytest.fixture
+def index():
+    index = TextIndex({"customer_id": 3.0, "full_name": 2.0, "email": 1.0})
+    index.rebuild(
+        ["c1", "c2", "c3", "c4"],
+        {
+            "customer_id": ["TMCJ33A32GJ053451", "TMCJ33A32GJ099999", "ABC123", "XYZ"],
+            "full_name": ["José García", "Juan Pérez", "María Juárez", "Pedro Mar"],
+            "email": ["jose@mail.com", "juan.perez@mail.com", None, "mario@mail.com"],
+        },
+        version=1,
+    )
+    return index
+
+
+def test_normalize():
+    assert normalize("  José  GARCÍA-López ") == "jose garcia lopez"
+    assert normalize(None) == "" and normalize(float("nan")) == ""
+
+
+class TestSearch:
+
+    def test_prefix_and_infix(self, index):
+        assert index.search("tmcj33")[0] == ["c1", "c2"]
+        assert index.search("053451") == (["c1"], 1)
+        assert index.search("garcia") == (["c1"], 1)
+        assert index.search("PEREZ")[0] == ["c2"]
+
+    def test_short_query_matches_word_starts(self, index):
+        keys, total = index.search("ma")
+
+        assert total == 2
+        # Field prefix of a name beats a word-prefix of a name
+        assert keys == ["c3", "c4"]
+
+    def test_ranking_prefers_exact_id_then_name_prefix(self, index):
+        index.update(["c5"], {"customer_id": ["MAR"], "full_name": ["Ana"], "email": [None]}, version=2)
+
+        keys, _ = index.search("mar")
+
+        assert keys[0] == "c5"
+        assert keys[1] == "c3"
+        assert set(keys) == {"c3", "c4", "c5"}
+
+    def test_pagination(self, index):
+        first, total = index.search("mail", limit=2)
+        second, _ = index.search("mail", limit=2, offset=2)
+
+        assert total == 3
+        assert len(first) == 2 and len(second) == 1
+        assert not set(first) & set(second)
+
+    def test_incremental_update(self, index):
+        index.update(["c1"], {"customer_id": ["NEW1"], "full_name": ["Luis Soto"], "email": [None]},
+                     removed=["c2"], version=2)
+
+        assert index.search("garcia") == ([], 0)
+        assert index.search("soto") == (["c1"], 1)
+        assert index.search("juan") == ([], 0)
+        assert index.version == 2 and len(index) == 3
+
+    def test_no_match(self, index):
+        assert index.search("zzz") == ([], 0)
+        assert index.search("  ") == ([], 0)
+
+
+class TestInventorySearch:
+
+    @pytest.fixture
+    def snapshot(self, monkeypatch):
+        snapshot = InventorySnapshot()
+        snapshot.replace(pd.DataFrame({
+            "car_id": [101, 102, 103],
+            "model": ["Versa Sense", "Rio LX", "Mazda3 Sedan"],
+            "make": ["NISSAN", "KIA", "MAZDA"],
+            "year": [2020, 2021, 2019],
+            "sales_price": [250000.0, 280000.0, 300000.0],
+        }))
+        monkeypatch.setattr(database, "USE_MOCK_DATA", False)
+        monkeypatch.setattr(database, "inventory_snapshot", snapshot)
+        monkeypatch.setattr(database, "inventory_text_index", TextIndex(database.INVENTORY_SEARCH_FIELDS))
+        return snapshot
+
+    def test_ranked_search_with_filters(self, snapshot):
+        assert [car["car_id"] for car in database.search_inventory("mazda")] == [103]
+        assert [car["car_id"] for car in database.search_inventory("10")] == [101, 102, 103]
+        assert [car["car_id"] for car in database.search_inventory("10", year_min=2020, limit=1, offset=1)] == [102]
+
+    def test_delta_updates_index_incrementally(self, snapshot, monkeypatch):
+        database.search_inventory("rio")
+        rebuilds = []
+        monkeypatch.setattr(database.inventory_text_index, "rebuild", lambda *args: rebuilds.append(args))
+        previous = snapshot.version
+        snapshot.apply_delta(
+            pd.DataFrame({"car_id": [104], "model": ["Aveo"], "make": ["CHEVROLET"],
+                          "year": [2022], "sales_price": [200000.0]}),
+            [102], watermark=None
+        )
+
+        database._sync_inventory_search_index(previous, {"104", "102"})
+
+        assert rebuilds == []
+        assert database.search_inventory("rio") == []
+        assert database.search_inventory("chevrolet")[0]["car_id"] == 104
+
+
+def test_customer_search_uses_cached_frame(monkeypatch):
+    customers = pd.DataFrame({
+        "customer_id": ["A1", "B2"], "full_name": ["Ana Ruiz", "Beto Ruiz"], "email": ["a@x.com", "b@x.com"],
+    })
+    monkeypatch.setattr(database, "USE_MOCK_DATA", False)
+    monkeypatch.setattr(database, "_customer_index", None)
+    monkeypatch.setattr(database.data_loader, "cached_customers", lambda: ("h1", customers))
+    monkeypatch.setattr(database.data_loader, "refresh_derived_fields", lambda df: df)
+    monkeypatch.setattr(database.data_loader, "load_customers_data",
+                        lambda: pytest.fail("search must not reload customers"))
+
+    results, total = database.search_customers("ruiz", limit=1, offset=1)
+
+    assert total == 2
+    assert [row["customer_id"] for row in results] == ["B2"]
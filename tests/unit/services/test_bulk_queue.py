@@ -0,0 +1,217 @@
+"""
+Tests for parallel bulk offer processing in BulkRequestQueue
+"""
+import asyncio
+import threading
+from datetime import datetime
+
+import pandas as pd
+import pytest
+import pytest_asyncio
+
+from app.services.bulk_queue import BulkRequest, BulkRequestQueue
+from data import database
+from data.async_database import async_database
+
+
+def make_request(customer_ids):
+    return BulkRequest(
+        request_id="req-1",
+        customer_ids=customer_ids,
+        max_offers_per_customer=None,
+        timestamp=datetime.now()
+    )
+
+
+@pytest.fixture
+def loads(monkeypatch):
+    """Replace the data loads with in-memory fakes and count the calls"""
+    calls = {"customers": 0, "inventory": 0}
+    customers = {f"C{i}": {"customer_id": f"C{i}"} for i in range(6)}
+
+    async def get_customers_by_ids(customer_ids):
+        calls["customers"] += 1
+        return {cid: customers[cid] for cid in customer_ids if cid in customers}
+
+    async def get_inventory_dataframe():
+        calls["inventory"] += 1
+        return pd.DataFrame({"car_id": ["X"]})
+
+    monkeypatch.setattr(async_database, "get_customers_by_ids", get_customers_by_ids)
+    monkeypatch.setattr(async_database, "get_inventory_dataframe", get_inventory_dataframe)
+    return calls
+
+
+class TestBulkProcessing:
+
+    @pytest.mark.asyncio
+    async def test_loads_once_and_fans_out(self, loads, monkeypatch):
+        queue = BulkRequestQueue(max_workers=3)
+        running = 0
+        peak = 0
+        lock = threading.Lock()
+        barrier = threading.Barrier(3, timeout=2)
+
+        def process(customer, inventory_df):
+            nonlocal running, peak
+            with lock:
+                running += 1
+                peak = max(peak, running)
+            barrier.wait()
+            with lock:
+                running -= 1
+            return {"customer_id": customer["customer_id"], "offers_count": 1, "best_npv": 10}
+
+        monkeypatch.setattr(queue, "_process_customer", process)
+        request = make_request(["C0", "C1", "C2", "missing", "C3", "C4", "C5"])
+
+        result = await queue._generate_offers_safely(request)
+        await queue.stop()
+
+        assert loads == {"customers": 1, "inventory": 1}
+        assert peak == 3
+        assert result["processed"] == 7
+        assert result["successful"] == 6
+        assert result["errors"] == [{"customer_id": "missing", "error": "Customer not found"}]
+
+    @pytest.mark.asyncio
+    async def test_status_reports_progress_while_processing(self, loads, monkeypatch):
+        queue = BulkRequestQueue(max_workers=2)
+        release = threading.Event()
+
+        def process(customer, inventory_df):
+            if customer["customer_id"] == "C1":
+                release.wait(2)
+                raise RuntimeError("matcher failed")
+            return {"customer_id": customer["customer_id"], "offers_count": 0, "best_npv": 0}
+
+        monkeypatch.setattr(queue, "_process_customer", process)
+        request = make_request(["C0", "C1"])
+        queue._requests[request.request_id] = request
+
+        task = asyncio.ensure_future(queue._generate_offers_safely(request))
+        for _ in range(200):
+            await asyncio.sleep(0.01)
+            status = queue.get_request_status(request.request_id)
+            if status["progress"]["processed"] == 1:
+                break
+
+        assert status["progress"] == {"processed": 1, "successful": 1, "failed": 0, "percent": 50.0}
+        assert status["result"]["results"][0]["customer_id"] == "C0"
+
+        release.set()
+        result = await task
+        await queue.stop()
+        assert result["failed"] == 1
+        assert result["errors"][0] == {"customer_id": "C1", "error": "matcher failed"}
+
+
+class TestFilterTradeupInventory:
+
+    def test_matches_stage1_criteria_in_query_order(self, monkeypatch):
+        monkeypatch.setattr(database, "FILTERED_INVENTORY_ROW_LIMIT", 2)
+        inventory_df = pd.DataFrame({
+            "car_id": ["old", "cheap", "worn", "a", "b", "c"],
+            "year": [2015, 2021, 2021, 2020, 2022, 2022],
+            "car_price": [400_000, 150_000, 400_000, 300_000, 250_000, 350_000],
+            "kilometers": [10_000, 10_000, 90_000, 20_000, 30_000, 40_000],
+        })
+        customer = {"current_car_year": 2018, "current_car_price": 200_000, "current_car_km": 60_000}
+
+        cars = database.filter_tradeup_inventory(inventory_df, customer)
+
+        assert [car["car_id"] for car in cars] == ["c", "b"]
+
+        # Like the query, ties on year are ordered by the regular (pre-promotion) price
+        inventory_df["regular_price"] = [400_000, 150_000, 400_000, 300_000, 420_000, 360_000]
+        cars = database.filter_tradeup_inventory(inventory_df, customer)
+
+        assert [car["car_id"] for car in cars] == ["b", "c"]
+
+    def test_unusable_customer_details(self):
+        inventory_df = pd.DataFrame({"car_id": ["a"], "year": [2020], "car_price": [1.0], "kilometers": [1]})
+
+        assert database.filter_tradeup_inventory(inventory_df, {"current_car_year": "n/a"}) == []
+
+
+class TestScheduling:
+
+    @pytest_asyncio.fixture
+    async def queue(self, monkeypatch):
+        queue = BulkRequestQueue(max_concurrent_requests=1, max_interactive_requests=1)
+        started = []
+        gates = {}
+
+        async def generate(request):
+            started.append(request.request_id)
+            gate = gates.setdefault(request.request_id, asyncio.Event())
+            await gate.wait()
+            return {"processed": 0, "successful": 0, "failed": 0, "results": [], "errors": []}
+
+        monkeypatch.setattr(queue, "_generate_offers_safely", generate)
+        queue.started = started
+        queue.gates = gates
+        await queue.start()
+        yield queue
+        for gate in gates.values():
+            gate.set()
+        await queue.stop()
+
+    @staticmethod
+    async def settle():
+        for _ in range(20):
+            await asyncio.sleep(0)
+
+    @staticmethod
+    async def finish(queue, request_id):
+        queue.gates.setdefault(request_id, asyncio.Event()).set()
+        await TestScheduling.settle()
+
+    @pytest.mark.asyncio
+    async def test_interactive_lane_has_its_own_capacity(self, queue):
+        big = await queue.submit_request(["C0"] * 20)
+        waiting = await queue.submit_request(["C0"] * 20)
+        small = await queue.submit_request(["C1"], priority="interactive")
+        await self.settle()
+
+        assert queue.started == [small, big]
+        assert queue.get_request_status(waiting)["queued_ahead"] == 0
+        assert queue.get_queue_stats()["bulk"] == {
+            "queued": 1, "active": 1, "capacity": 1, "workers": queue.max_workers, "tenants_waiting": 1
+        }
+
+    @pytest.mark.asyncio
+    async def test_oversized_interactive_request_is_queued_as_bulk(self, queue):
+        request_id = await queue.submit_request(["C0"] * 11, priority="interactive")
+
+        assert queue.get_request_status(request_id)["priority"] == "bulk"
+
+    @pytest.mark.asyncio
+    async def test_round_robin_across_tenants(self, queue):
+        a1 = await queue.submit_request(["C0"], tenant="a")
+        a2 = await queue.submit_request(["C0"], tenant="a")
+        a3 = await queue.submit_request(["C0"], tenant="a")
+        b1 = await queue.submit_request(["C0"], tenant="b")
+        await self.settle()
+
+        for request_id in (a1, b1, a2):
+            await self.finish(queue, request_id)
+
+        assert queue.started == [a1, b1, a2, a3]
+
+    @pytest.mark.asyncio
+    async def test_cancel_queued_and_running(self, queue):
+        running = await queue.submit_request(["C0"])
+        queued = await queue.submit_request(["C0"])
+        await self.settle()
+
+        assert queue.cancel_request(queued) is True
+        assert queue.cancel_request(running) is True
+        await self.settle()
+
+        assert queue.started == [running]
+        assert queue.get_request_status(queued)["status"] == "cancelled"
+        assert queue.get_request_status(running)["status"] == "cancelled"
+        assert queue.get_queue_stats()["bulk"]["active"] == 0
+        assert queue.cancel_request(running) is False
+        assert queue.cancel_request("unknown") is None
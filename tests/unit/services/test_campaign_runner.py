@@ -0,0 +1,213 @@
+"""
+Tests for the campaign job runner (chunked scoring, checkpoints, resume, output)
+"""
+import json
+
+import pandas as pd
+import pytest
+
+from app.services.campaign_runner import CampaignRunner, build_summary
+
+SOURCE_CSV = "data/customers_data_tradeup.csv"
+
+scored_customers = []
+
+
+def fake_scorer(customer, inventory_df):
+    """Deterministic stand-in for the matcher (picklable for worker processes)"""
+    scored_customers.append(customer["customer_id"])
+    if customer["current_car_price"] > 450_000:
+        raise ValueError("no financing")
+    refresh = int(customer["current_car_year"]) % 3
+    return {
+        "customer_id": customer["customer_id"],
+        "cars_considered": len(inventory_df),
+        "refresh_offers": refresh,
+        "upgrade_offers": 1,
+        "max_upgrade_offers": 0,
+        "total_offers": refresh + 1,
+        "best_npv": float(customer["current_monthly_payment"]),
+        "best_tier": "upgrade",
+        "best_car_id": "X",
+        "error": None,
+    }
+
+
+@pytest.fixture
+def input_csv(tmp_path):
+    path = tmp_path / "customers.csv"
+    with open(SOURCE_CSV, encoding="utf-8-sig") as source:
+        lines = [next(source) for _ in range(46)]
+    path.write_text("".join(lines), encoding="utf-8")
+    return str(path)
+
+
+@pytest.fixture
+def runner(tmp_path):
+    scored_customers.clear()
+    return CampaignRunner(output_root=str(tmp_path / "campaigns"))
+
+
+@pytest.fixture
+def inventory_df():
+    return pd.DataFrame({"car_id": ["X", "Y"], "year": [2022, 2023],
+                         "car_price": [400_000.0, 500_000.0], "kilometers": [1_000, 2_000]})
+
+
+def read_output(runner, job_id, fmt):
+    parts = sorted((runner.output_root / job_id).glob(f"part-*.{fmt}"))
+    reader = pd.read_parquet if fmt == "parquet" else pd.read_csv
+    return pd.concat([reader(part) for part in parts], ignore_index=True)
+
+
+class TestCampaignRunner:
+
+    def test_scores_every_customer_in_chunks(self, runner, input_csv, inventory_df):
+        job_id = runner.create_job(input_csv, output_format="csv", chunk_size=10)
+
+        summary = runner.run_job(job_id, processes=0, scorer=fake_scorer, inventory_df=inventory_df)
+
+        output = read_output(runner, job_id, "csv")
+        status = runner.get_job_status(job_id)
+        assert len(output) == summary["customers"] == len(scored_customers)
+        assert status["status"] == "completed"
+        assert status["total_chunks"] == 5
+        assert status["progress"]["customers_processed"] == summary["customers"]
+        assert summary["failed"] == output["error"].notna().sum() > 0
+        assert summary["offers_per_tier"]["upgrade"] == summary["customers"] - summary["failed"]
+        assert summary["best_npv_max"] == output["best_npv"].max()
+
+    def test_resume_only_redoes_missing_chunks(self, runner, input_csv, inventory_df):
+        job_id = runner.create_job(input_csv, output_format="parquet", chunk_size=10)
+        runner.run_job(job_id, processes=0, scorer=fake_scorer, inventory_df=inventory_df)
+        first = read_output(runner, job_id, "parquet")
+        part = runner.output_root / job_id / "part-00001.parquet"
+        lost = len(pd.read_parquet(part))
+        part.unlink()
+        scored_customers.clear()
+
+        summary = runner.run_job(job_id, processes=0, scorer=fake_scorer)
+
+        assert len(scored_customers) == lost
+        assert summary["customers"] == len(first)
+        pd.testing.assert_frame_equal(read_output(runner, job_id, "parquet"), first)
+
+    def test_worker_processes_match_in_process_output(self, runner, input_csv, inventory_df):
+        serial = runner.create_job(input_csv, output_format="parquet", chunk_size=10)
+        runner.run_job(serial, processes=0, scorer=fake_scorer, inventory_df=inventory_df)
+        parallel = runner.create_job(input_csv, output_format="parquet", chunk_size=10)
+
+        summary = runner.run_job(parallel, processes=2, scorer=fake_scorer, inventory_df=inventory_df)
+
+        pd.testing.assert_frame_equal(read_output(runner, parallel, "parquet"),
+                                      read_output(runner, serial, "parquet"))
+        with open(runner.output_root / parallel / "summary.json") as f:
+            assert json.load(f)["customers"] == summary["customers"]
+
+    def test_changed_input_refuses_resume(self, runner, input_csv, inventory_df):
+        job_id = runner.create_job(input_csv, chunk_size=10)
+        with open(input_csv, "a") as f:
+            f.write("\n")
+
+        with pytest.raises(ValueError):
+            runner.run_job(job_id, processes=0, scorer=fake_scorer, inventory_df=inventory_df)
+
+    def test_offer_matrix_streams_the_export(self, runner, input_csv, inventory_df):
+        matrix_id = runner.create_offer_matrix(input_csv, top_k=2, chunk_size=10)
+        assert runner.get_offer_matrix_status(matrix_id)["status"] == "created"
+
+        runner.run_offer_matrix(matrix_id, inventory_df=inventory_df)
+
+        result = runner.get_offer_matrix_status(matrix_id)
+        customers = pd.read_parquet(result["files"]["customers"])
+        demand = pd.read_parquet(result["files"]["car_demand"])
+        assert result["status"] == "completed"
+        assert len(customers) == result["summary"]["customers"] == 45
+        assert sorted(demand["car_id"]) == ["X", "Y"]
+        assert result["summary"]["total_offers"] == customers["total_offers"].sum() == demand["offers"].sum()
+        assert [matrix["matrix_id"] for matrix in runner.list_offer_matrices()] == [matrix_id]
+        assert not runner.list_jobs()
+
+    def test_offer_matrix_builds_in_the_background(self, runner, input_csv, inventory_df, monkeypatch):
+        from data import database
+        monkeypatch.setattr(database, "get_inventory_dataframe", lambda: inventory_df)
+        matrix_id = runner.create_offer_matrix(input_csv, top_k=2, chunk_size=10)
+
+        assert runner.start_offer_matrix(matrix_id)["matrix_id"] == matrix_id
+        thread = runner._running.get(matrix_id)
+        if thread is not None:
+            thread.join(timeout=30)
+
+        assert runner.get_offer_matrix_status(matrix_id)["summary"]["customers"] == 45
+
+    def test_failed_offer_matrix_is_recorded(self, runner, input_csv):
+        matrix_id = runner.create_offer_matrix(input_csv)
+
+        with pytest.raises(RuntimeError):
+            runner.run_offer_matrix(matrix_id, inventory_df=pd.DataFrame())
+
+        status = runner.get_offer_matrix_status(matrix_id)
+        assert status["status"] == "failed"
+        assert "No inventory" in status["error"]
+        assert "summary" not in status
+
+    def test_unknown_job(self, runner):
+        with pytest.raises(ValueError):
+            runner.get_job_status("../../etc")
+        with pytest.raises(ValueError):
+            runner.get_offer_matrix_status("0" * 32)
+
+
+def test_build_summary_merges_chunk_stats():
+    stats = [
+        {"customers": 3, "failed": 1, "with_offers": 2, "offers": {"refresh": 1, "upgrade": 2, "max_upgrade": 0},
+         "best_npv_max": 10.0, "best_npv_sum": 15.0, "best_npv_count": 2},
+        {"customers": 2, "failed": 0, "with_offers": 0, "offers": {"refresh": 0, "upgrade": 0, "max_upgrade": 0},
+         "best_npv_max": None, "best_npv_sum": 0.0, "best_npv_count": 0},
+    ]
+
+    summary = build_summary(stats)
+
+    assert summary["customers"] == 5
+    assert summary["total_offers"] == 3
+    assert summary["best_npv_max"] == 10.0
+    assert summary["best_npv_mean"] == 7.5
+
+
+@pytest.mark.parametrize("processes", [-1, 65])
+def test_resume_rejects_out_of_range_processes(processes, monkeypatch):
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+
+    from app.api import campaigns
+
+    started = []
+    monkeypatch.setattr(campaigns.campaign_runner, "start_job", lambda *args, **kwargs: started.append(args))
+    app = FastAPI()
+    app.include_router(campaigns.router)
+
+    response = TestClient(app).post(f"/api/campaigns/job-1/resume?processes={processes}")
+
+    assert response.status_code == 422
+    assert started == []
+
+
+def test_offer_matrix_endpoint_returns_before_the_build(monkeypatch):
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+
+    from app.api import campaigns
+
+    created, started = [], []
+    monkeypatch.setattr(campaigns.campaign_runner, "create_offer_matrix",
+                        lambda input_path, **kwargs: created.append(input_path) or "m" * 32)
+    monkeypatch.setattr(campaigns.campaign_runner, "start_offer_matrix",
+                        lambda matrix_id: started.append(matrix_id) or {"matrix_id": matrix_id, "status": "running"})
+    app = FastAPI()
+    app.include_router(campaigns.router)
+
+    response = TestClient(app).post("/api/campaigns/offer-matrix", json={"input_file": "customers_data_tradeup.csv"})
+
+    assert response.status_code == 200
+    assert response.json() == {"matrix_id": "m" * 32, "status": "running"}
+    assert created == ["data/customers_data_tradeup.csv"] and started == ["m" * 32]
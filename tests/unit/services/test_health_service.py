@@ -0,0 +1,132 @@
+"""
+Tests for tiered health checks (liveness, readiness, cached deep check)
+"""
+import pandas as pd
+import pytest
+
+from app.services import health_service as health_module
+from app.services.health_service import HealthService
+from data import database
+from data.snapshots import InventorySnapshot
+
+
+class FakeBreaker:
+    def __init__(self, state="closed"):
+        self.state = state
+
+    def get_status(self):
+        return {"state": self.state, "failure_count": 3 if self.state != "closed" else 0}
+
+
+class FakePool:
+    def __init__(self, **overrides):
+        self.stats = {"total_connections": 2, "available_connections": 1, "max_connections": 10,
+                      "in_backoff": False, **overrides}
+
+    def get_stats(self):
+        return self.stats
+
+
+@pytest.fixture
+def env(monkeypatch):
+    """Loaded customers and inventory, closed breaker, no pool yet"""
+    snapshot = InventorySnapshot()
+    snapshot.replace(pd.DataFrame({"car_id": ["a", "b"]}))
+    state = {"breaker": FakeBreaker(), "pool": None, "customers": 40, "snapshot": snapshot}
+
+    monkeypatch.setattr(database, "USE_MOCK_DATA", False)
+    monkeypatch.setattr(database, "inventory_snapshot", snapshot)
+    monkeypatch.setattr(database.data_loader, "cached_customer_count", lambda: state["customers"])
+    monkeypatch.setattr(health_module, "get_redshift_breaker", lambda: state["breaker"])
+    monkeypatch.setattr(health_module, "peek_connection_pool", lambda: state["pool"])
+    return state
+
+
+class TestReadiness:
+
+    def test_ready_when_data_loaded(self, env):
+        readiness = HealthService().readiness()
+
+        assert readiness["ready"] is True
+        assert readiness["status"] == "healthy"
+        assert readiness["checks"]["customers"] == {"loaded": True, "count": 40}
+        assert readiness["checks"]["inventory"]["rows"] == 2
+        assert readiness["checks"]["connection_pool"] == "not initialized"
+
+    def test_not_ready_before_data_is_loaded(self, env, monkeypatch):
+        env["customers"] = None
+        monkeypatch.setattr(database, "inventory_snapshot", InventorySnapshot())
+
+        readiness = HealthService().readiness()
+
+        assert readiness["ready"] is False
+        assert readiness["issues"] == ["Customer data not loaded", "Inventory snapshot not loaded"]
+
+    def test_stale_snapshot_only_degrades_while_redshift_is_healthy(self, env):
+        env["snapshot"].refreshed_at -= 7200
+        service = HealthService(max_snapshot_age_seconds=3600)
+
+        assert service.readiness()["status"] == "degraded"
+
+        env["pool"] = FakePool(in_backoff=True)
+        readiness = service.readiness()
+        assert readiness["ready"] is False
+        assert "Inventory snapshot is 2.0h old and Redshift is failing" in readiness["issues"]
+
+    def test_open_breaker_and_exhausted_pool_degrade(self, env):
+        env["breaker"] = FakeBreaker("open")
+        env["pool"] = FakePool(total_connections=10, available_connections=0)
+
+        readiness = HealthService().readiness()
+
+        assert readiness["ready"] is True
+        assert readiness["status"] == "degraded"
+        assert len(readiness["issues"]) == 2
+
+    def test_readiness_never_loads_data(self, env, monkeypatch):
+        def fail(*args, **kwargs):
+            raise AssertionError("readiness must not load data")
+
+        monkeypatch.setattr(database.data_loader, "load_customers_data", fail)
+        monkeypatch.setattr(database, "refresh_inventory", fail)
+
+        assert HealthService().readiness()["ready"] is True
+
+
+class TestDeepCheck:
+
+    @pytest.fixture
+    def connection_tests(self, monkeypatch):
+        calls = []
+
+        def test_database_connection():
+            calls.append(1)
+            return {"customers": {"connected": True, "count": 40},
+                    "inventory": {"connected": False, "count": 0, "error": "timeout"}}
+
+        monkeypatch.setattr(database, "test_database_connection", test_database_connection)
+        return calls
+
+    def test_result_is_cached_for_ttl(self, connection_tests):
+        service = HealthService(deep_check_ttl_seconds=60)
+
+        first = service.deep_check()
+        second = service.deep_check()
+
+        assert len(connection_tests) == 1
+        assert first["status"] == "degraded"
+        assert (first["cached"], second["cached"]) == (False, True)
+        assert service.last_deep_check()["dependencies"]["inventory"]["error"] == "timeout"
+
+    def test_force_and_expiry_rerun(self, connection_tests):
+        service = HealthService(deep_check_ttl_seconds=0)
+
+        service.deep_check()
+        service.deep_check()
+        HealthService(deep_check_ttl_seconds=60).deep_check(force=True)
+
+        assert len(connection_tests) == 3
+
+
+def test_liveness_is_constant():
+    assert HealthService().liveness()["status"] == "alive"
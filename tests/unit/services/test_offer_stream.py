@@ -0,0 +1,113 @@
+"""
+Tests for streaming offer generation (OfferService.stream_offers_for_customer)
+"""
+import pytest
+
+from app.services import offer_service as offer_service_module
+from app.services.offer_service import OfferService
+from app.utils.validation import UnifiedValidator
+from data.async_database import async_database
+from engine.basic_matcher import BasicMatcher
+
+CUSTOMER = {"customer_id": "C1", "current_car_price": 200_000}
+
+
+def make_offer(car_id, term, delta, npv):
+    return {"car_id": car_id, "term": term, "payment_delta": delta, "npv": npv}
+
+
+class FakeMatcher:
+    """Yields fixed batches; records whether the generator was closed"""
+
+    eligible_cars = staticmethod(BasicMatcher.eligible_cars)
+    organize_offers = staticmethod(BasicMatcher.organize_offers)
+    resolve_fees = staticmethod(BasicMatcher.resolve_fees)
+
+    def __init__(self, batches, fail_after=None):
+        self.batches = batches
+        self.fail_after = fail_after
+        self.closed = False
+
+    def iter_offer_batches(self, customer, inventory, custom_fees=None):
+        try:
+            for i, batch in enumerate(self.batches):
+                if i == self.fail_after:
+                    raise RuntimeError("matcher crashed")
+                yield batch, i + 1, len(self.batches)
+        finally:
+            self.closed = True
+
+
+@pytest.fixture
+def stream(monkeypatch):
+    inventory = [{"car_id": car_id, "car_price": 300_000} for car_id in ("A", "B", "C")]
+    inventory.append({"car_id": "cheap", "car_price": 100_000})
+
+    async def get_customer_by_id(customer_id):
+        return CUSTOMER if customer_id == "C1" else None
+
+    async def get_tradeup_inventory_for_customer(customer):
+        return inventory
+
+    monkeypatch.setattr(async_database, "get_customer_by_id", get_customer_by_id)
+    monkeypatch.setattr(async_database, "get_tradeup_inventory_for_customer", get_tradeup_inventory_for_customer)
+    monkeypatch.setattr(UnifiedValidator, "validate_offer", staticmethod(lambda offer: offer), raising=False)
+
+    def use(matcher):
+        monkeypatch.setattr(offer_service_module, "basic_matcher", matcher)
+        return matcher
+    return use
+
+
+async def collect(customer_id="C1"):
+    events = await OfferService.stream_offers_for_customer(customer_id)
+    return [event async for event in events]
+
+
+class TestStreamOffers:
+
+    @pytest.mark.asyncio
+    async def test_batches_then_summary_with_final_order(self, stream):
+        matcher = stream(FakeMatcher([
+            [make_offer("A", 48, 0.01, 100), make_offer("B", 48, 0.10, 50)],
+            [],
+            [make_offer("C", 36, 0.02, 300), make_offer("A", 72, 0.5, 10)],
+        ]))
+
+        events = await collect()
+
+        assert [event["event"] for event in events] == ["start", "offers", "offers", "summary"]
+        assert events[0]["cars_to_test"] == 3
+        assert events[1]["offers"]["refresh"] == [make_offer("A", 48, 0.01, 100)]
+        assert events[2]["progress"] == {"completed": 3, "total": 3}
+        summary = events[-1]
+        assert summary["tier_counts"] == {"refresh": 2, "upgrade": 1, "max_upgrade": 1}
+        assert summary["order"]["refresh"] == ["C:36", "A:48"]
+        assert summary["total_offers"] == 4
+        assert matcher.closed
+
+    @pytest.mark.asyncio
+    async def test_failure_emits_error_event(self, stream):
+        stream(FakeMatcher([[make_offer("A", 48, 0.01, 100)], []], fail_after=1))
+
+        events = await collect()
+
+        assert [event["event"] for event in events] == ["start", "offers", "error"]
+        assert events[-1]["detail"] == "matcher crashed"
+
+    @pytest.mark.asyncio
+    async def test_consumer_stopping_early_closes_matcher(self, stream):
+        matcher = stream(FakeMatcher([[make_offer("A", 48, 0.01, 100)]] * 5))
+
+        events = await OfferService.stream_offers_for_customer("C1")
+        async for event in events:
+            if event["event"] == "offers":
+                break
+        await events.aclose()
+
+        assert matcher.closed
+
+    @pytest.mark.asyncio
+    async def test_unknown_customer_raises_before_streaming(self, stream):
+        with pytest.raises(ValueError):
+            await OfferService.stream_offers_for_customer("nobody")
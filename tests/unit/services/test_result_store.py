@@ -0,0 +1,164 @@
+"""
+Tests for bounded bulk result retention (memory budget, disk spill, eviction)
+"""
+import asyncio
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.services.bulk_queue import BulkRequest, BulkRequestQueue
+from app.services.result_store import BulkResultStore
+
+
+def make_result(customers, padding=0):
+    return {
+        "processed": customers,
+        "successful": customers,
+        "failed": 0,
+        "results": [{"customer_id": f"C{i}", "offers_count": 1, "note": "x" * padding}
+                    for i in range(customers)],
+        "errors": [],
+    }
+
+
+@pytest.fixture
+def store(tmp_path):
+    return BulkResultStore(memory_budget_bytes=4000, inline_max_bytes=2000,
+                           spill_dir=str(tmp_path / "spill"), max_age_seconds=60,
+                           max_disk_bytes=10_000_000)
+
+
+class TestBulkResultStore:
+
+    def test_small_results_stay_in_memory(self, store):
+        store.put("a", make_result(3))
+
+        assert store.get("a") == make_result(3)
+        assert store.get_stats()["memory_results"] == 1
+        assert not store.spill_dir.exists()
+
+    def test_large_result_spills_immediately(self, store):
+        store.put("big", make_result(10, padding=300))
+
+        stats = store.get_stats()
+        assert stats["memory_results"] == 0
+        assert stats["disk_results"] == 1
+        assert store.get("big") == make_result(10, padding=300)
+
+    def test_least_recently_used_spills_over_budget(self, store):
+        for request_id in ("a", "b", "c"):
+            store.put(request_id, make_result(4, padding=200))
+        store.get("a")
+        store.put("d", make_result(4, padding=200))
+
+        assert list(store._memory) == ["c", "a", "d"]
+        assert store.get_stats()["memory_bytes"] <= store.memory_budget_bytes
+        assert store.get("b") == make_result(4, padding=200)
+
+    def test_evicts_by_age(self, store):
+        store.put("memory", make_result(1))
+        store.put("disk", make_result(10, padding=300))
+
+        assert store.evict() == 0
+        assert store.evict(now=time.time() + 120) == 2
+        assert "memory" not in store and "disk" not in store
+        assert list(store.spill_dir.iterdir()) == []
+
+    def test_evicts_oldest_files_over_disk_budget(self, store):
+        for request_id in ("a", "b", "c"):
+            store.put(request_id, make_result(10, padding=300))
+        store.max_disk_bytes = store.get_stats()["disk_bytes"] - 1
+
+        assert store.evict() == 1
+        assert "a" not in store
+        assert store.get("c") is not None
+
+    def test_rejects_unsafe_ids(self, store):
+        with pytest.raises(ValueError):
+            store.put("../escape", make_result(10, padding=300))
+
+
+class TestQueueRetention:
+
+    def add_finished(self, queue, request_id, result, age_hours=0):
+        request = BulkRequest(
+            request_id=request_id,
+            customer_ids=[r["customer_id"] for r in result["results"]],
+            max_offers_per_customer=None,
+            timestamp=datetime.now() - timedelta(hours=age_hours),
+            status="completed"
+        )
+        queue._requests[request_id] = request
+        queue._results.put(request_id, result)
+        request.result_stored = True
+
+    def test_status_reads_spilled_result_with_pagination(self, store):
+        queue = BulkRequestQueue(result_store=store)
+        self.add_finished(queue, "req-1", make_result(10, padding=300))
+
+        status = queue.get_request_status("req-1", offset=4, limit=3)
+
+        assert [r["customer_id"] for r in status["result"]["results"]] == ["C4", "C5", "C6"]
+        assert status["pagination"] == {"offset": 4, "limit": 3, "total_results": 10}
+        assert status["progress"]["processed"] == 10
+        assert status["result_expired"] is False
+
+    def test_evicted_result_is_reported_as_expired(self, store):
+        queue = BulkRequestQueue(result_store=store)
+        self.add_finished(queue, "req-1", make_result(2))
+        store.delete("req-1")
+
+        status = queue.get_request_status("req-1")
+
+        assert status["result"] is None
+        assert status["result_expired"] is True
+
+    def test_cleanup_drops_old_requests_and_results(self, store):
+        queue = BulkRequestQueue(result_store=store)
+        self.add_finished(queue, "old", make_result(10, padding=300), age_hours=48)
+        self.add_finished(queue, "new", make_result(2))
+
+        queue.cleanup_old_requests(max_age_hours=24)
+
+        assert queue.get_request_status("old") is None
+        assert "old" not in store
+        assert "new" in store
+
+    @pytest.mark.asyncio
+    async def test_result_is_stored_off_the_event_loop(self, store, monkeypatch):
+        queue = BulkRequestQueue(result_store=store)
+        request = BulkRequest(request_id="req-1", customer_ids=["C0", "C1"], max_offers_per_customer=None,
+                              timestamp=datetime.now(), status="processing")
+        queue._requests["req-1"] = request
+        queue._active[request.lane] += 1
+        release = threading.Event()
+        put = store.put
+        put_threads = []
+
+        async def generate(request):
+            return make_result(2)
+
+        def slow_put(request_id, result):
+            put_threads.append(threading.current_thread())
+            release.wait(2)
+            put(request_id, result)
+
+        monkeypatch.setattr(queue, "_generate_offers_safely", generate)
+        monkeypatch.setattr(store, "put", slow_put)
+
+        task = asyncio.ensure_future(queue._process_single_request(request))
+        for _ in range(200):
+            await asyncio.sleep(0.01)
+            if put_threads:
+                break
+
+        # The loop keeps serving status from memory while the store write is pending
+        assert put_threads and put_threads[0] is not threading.main_thread()
+        assert queue.get_request_status("req-1")["result"]["processed"] == 2
+        release.set()
+        await task
+
+        assert request.result is None and request.result_stored
+        assert queue.get_request_status("req-1")["result"] == make_result(2)
@@ -0,0 +1,81 @@
+"""
+Unit tests for the benchmark harness and synthetic workloads
+"""
+import pandas as pd
+import pytest
+
+from benchmarks.harness import (
+    compare_results, load_results, measure, results_document, summarize, write_results
+)
+from benchmarks.suite import run_suite
+from benchmarks.workloads import Scale, build_workload, get_scale
+
+SCALE = Scale("tiny", cars=30, customers=20, samples=5)
+
+
+def result_row(benchmark="offer_generation", **metrics):
+    row = {"benchmark": benchmark, "scale": "small", "p50_ms": 10.0, "p95_ms": 20.0, "p99_ms": 30.0,
+           "throughput": 100.0, "peak_rss_mb": 200.0}
+    row.update(metrics)
+    return row
+
+
+def test_workloads_are_reproducible():
+    first, second = build_workload(SCALE, seed=3), build_workload(SCALE, seed=3)
+
+    columns = ["customer_id", "vehicle_equity", "current_monthly_payment", "current_car_price", "risk_profile_name"]
+    pd.testing.assert_frame_equal(first.customers_df[columns], second.customers_df[columns])
+    pd.testing.assert_frame_equal(first.inventory_df, second.inventory_df)
+    assert not build_workload(SCALE, seed=4).inventory_df.equals(first.inventory_df)
+    assert len(first.sample_customers(SCALE.samples)) == SCALE.samples
+    assert len(first.inventory()) == SCALE.cars
+
+
+def test_summarize_percentiles_and_throughput():
+    result = summarize("amortization", "small", [i / 1000 for i in range(1, 101)], unit="tables",
+                       units_per_operation=2)
+
+    assert result.operations == 100
+    assert result.p50_ms == pytest.approx(50.5)
+    assert result.p95_ms == pytest.approx(95.05)
+    assert result.p99_ms == pytest.approx(99.01)
+    assert result.throughput == pytest.approx(200 / 5.05, rel=1e-3)
+
+
+def test_measure_times_every_input_after_warmup():
+    calls = []
+
+    result = measure("noop", "small", calls.append, [1, 2, 3], unit="calls", warmup=2)
+
+    assert calls == [1, 2, 1, 2, 3]
+    assert result.operations == 3
+
+
+def test_compare_flags_regressions_in_the_worse_direction():
+    baseline = results_document([result_row(), result_row("smart_search")], seed=1)
+    current = results_document([
+        result_row(p95_ms=30.0, throughput=150.0),
+        result_row("smart_search", throughput=70.0, peak_rss_mb=210.0),
+        result_row("amortization"),
+    ], seed=1)
+
+    regressed = {(row["benchmark"], row["metric"]) for row in compare_results(current, baseline, 0.2)
+                 if row["regressed"]}
+
+    assert regressed == {("offer_generation", "p95_ms"), ("smart_search", "throughput")}
+
+
+def test_results_round_trip(tmp_path):
+    document = results_document([result_row()], seed=7)
+    path = write_results(document, str(tmp_path / "results" / "run.json"))
+
+    assert load_results(str(path)) == document
+    with pytest.raises(ValueError):
+        load_results(str(tmp_path / "missing.json"))
+
+
+def test_unknown_names():
+    with pytest.raises(ValueError):
+        get_scale("huge")
+    with pytest.raises(ValueError):
+        run_suite(["compile_everything"])
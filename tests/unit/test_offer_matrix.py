@@ -0,0 +1,103 @@
+"""
+Unit tests for the customer x inventory offer matrix
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from engine import payment_utils
+from engine.basic_matcher import BasicMatcher
+from engine.offer_matrix import OfferMatrix, compute_offer_matrix
+
+
+@pytest.fixture
+def matcher(monkeypatch):
+    get_bool = payment_utils.config.get_bool
+    monkeypatch.setattr(payment_utils.config, "get_bool",
+                        lambda key, *args: False if key == "features.enable_audit_logging" else get_bool(key, *args))
+    matcher = BasicMatcher()
+    yield matcher
+    matcher.cleanup()
+
+
+@pytest.fixture
+def customers():
+    rng = np.random.default_rng(11)
+    size = 25
+    return pd.DataFrame({
+        "customer_id": [f"C{i}" for i in range(size)],
+        "risk_profile_name": rng.choice(["A", "A1", "B", "C1", "Z"], size),
+        "risk_profile_index": rng.choice([2, 3, 5, 6, 99], size),
+        "vehicle_equity": rng.uniform(20000, 300000, size),
+        "current_monthly_payment": rng.uniform(3000, 15000, size),
+        "current_car_price": rng.uniform(100000, 400000, size),
+    })
+
+
+@pytest.fixture
+def inventory():
+    prices = np.random.default_rng(5).uniform(150000, 700000, 40).round(-3)
+    return pd.DataFrame({"car_id": range(len(prices)), "model": "CAR", "car_price": prices})
+
+
+def expected_offers(matcher, customers, inventory):
+    cars = inventory.to_dict("records")
+    return {customer["customer_id"]: matcher.find_all_viable(customer, cars)["offers"]
+            for customer in customers.to_dict("records")}
+
+
+def test_matches_forward_matcher_across_tiles(matcher, customers, inventory):
+    # A tiny budget splits the matrix into many customer and car tiles
+    matrix = compute_offer_matrix(customers, inventory, top_k=3, memory_budget_mb=0.01)
+    expected = expected_offers(matcher, customers, inventory)
+
+    assert matrix.tiles > 1
+    offers = matrix.top_offers()
+    for customer_id, tiers in expected.items():
+        for tier, tier_offers in tiers.items():
+            rows = offers[(offers["customer_id"] == customer_id) & (offers["tier"] == tier)]
+            assert rows["rank"].tolist() == list(range(1, len(rows) + 1))
+            assert rows["npv"].tolist() == pytest.approx([offer["npv"] for offer in tier_offers[:3]])
+            for row in rows.to_dict("records"):
+                match = [offer for offer in tier_offers
+                         if str(offer["car_id"]) == row["car_id"] and offer["term"] == row["term"]]
+                assert len(match) == 1
+                assert row["monthly_payment"] == pytest.approx(match[0]["monthly_payment"])
+
+    summary = matrix.customer_summary().set_index("customer_id")
+    for customer_id, tiers in expected.items():
+        assert summary.loc[customer_id, "refresh_offers"] == len(tiers["Refresh"])
+        assert summary.loc[customer_id, "max_upgrade_offers"] == len(tiers["Max Upgrade"])
+        npvs = [offer["npv"] for tier_offers in tiers.values() for offer in tier_offers]
+        if npvs:
+            assert summary.loc[customer_id, "best_npv"] == pytest.approx(max(npvs))
+        else:
+            assert pd.isna(summary.loc[customer_id, "best_npv"])
+
+    demand = matrix.car_demand().set_index("car_id")
+    for car_id in demand.index:
+        for tier, column in (("Refresh", "refresh_customers"), ("Upgrade", "upgrade_customers")):
+            customers_with_offer = sum(any(str(offer["car_id"]) == car_id for offer in tiers[tier])
+                                       for tiers in expected.values())
+            assert demand.loc[car_id, column] == customers_with_offer
+
+
+def test_batches_and_budgets_agree(customers, inventory, tmp_path):
+    whole = compute_offer_matrix(customers, inventory, memory_budget_mb=64)
+    batched = OfferMatrix(inventory, memory_budget_mb=0.005)
+    batched.add_customers(customers.iloc[:10])
+    batched.add_customers(customers.iloc[10:])
+
+    pd.testing.assert_frame_equal(whole.car_demand(), batched.car_demand())
+    pd.testing.assert_frame_equal(whole.top_offers(), batched.top_offers())
+
+    paths = batched.write(str(tmp_path / "matrix"))
+    pd.testing.assert_frame_equal(pd.read_parquet(paths["car_demand"]), batched.car_demand())
+    assert len(pd.read_parquet(paths["customers"])) == len(customers)
+
+
+def test_invalid_settings(inventory):
+    with pytest.raises(ValueError):
+        OfferMatrix(inventory, top_k=0)
+    with pytest.raises(ValueError):
+        OfferMatrix(inventory, memory_budget_mb=0)
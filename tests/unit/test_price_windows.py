@@ -0,0 +1,127 @@
+"""
+Unit tests for the closed-form offer price windows and reverse matching
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.constants import MAX_UPGRADE_TIER_MAX, REFRESH_TIER_MIN, VALID_LOAN_TERMS
+from data.database import filter_tradeup_inventory
+from engine import payment_utils
+from engine.basic_matcher import BasicMatcher
+from engine.price_windows import offer_price_windows, window_mask
+from engine.reverse_matcher import ReverseMatcher, normalize_tiers
+
+CUSTOMER = {
+    "customer_id": "C1",
+    "risk_profile_name": "A1",
+    "risk_profile_index": 3,
+    "vehicle_equity": 120000.0,
+    "current_monthly_payment": 9000.0,
+    "current_car_price": 150000.0,
+}
+FEES = {"service_fee_pct": 0.04, "cxa_pct": 0.04, "cac_bonus": 0}
+BASE_RATE = 0.2
+
+
+@pytest.fixture
+def matcher(monkeypatch):
+    get_bool = payment_utils.config.get_bool
+    monkeypatch.setattr(payment_utils.config, "get_bool",
+                        lambda key, *args: False if key == "features.enable_audit_logging" else get_bool(key, *args))
+    matcher = BasicMatcher()
+    yield matcher
+    matcher.cleanup()
+
+
+def in_tiers(offer):
+    return offer is not None and REFRESH_TIER_MIN <= offer["payment_delta"] <= MAX_UPGRADE_TIER_MAX
+
+
+@pytest.mark.parametrize("customer", [CUSTOMER, {**CUSTOMER, "vehicle_equity": 30000.0},
+                                      {**CUSTOMER, "risk_profile_index": 99}])
+def test_windows_match_offer_generation(matcher, customer):
+    windows = offer_price_windows(customer, FEES, BASE_RATE)
+    prices = np.arange(50000.0, 1500000.0, 2500.0)
+
+    mask = window_mask(prices, windows, VALID_LOAN_TERMS)
+
+    for column, term in enumerate(VALID_LOAN_TERMS):
+        for price, inside in zip(prices, mask[:, column]):
+            car = {"car_id": "X", "car_price": float(price)}
+            offer = matcher._generate_offer(customer, car, term, BASE_RATE,
+                                            customer["risk_profile_index"], FEES)
+            assert in_tiers(offer) == inside, (term, price)
+
+
+def test_no_windows_without_current_payment():
+    assert offer_price_windows({**CUSTOMER, "current_monthly_payment": 0}, FEES, BASE_RATE) == {}
+
+
+def test_matcher_only_evaluates_cars_inside_windows(matcher, monkeypatch):
+    inventory = [{"car_id": i, "model": "CAR", "car_price": price}
+                 for i, price in enumerate(np.arange(160000.0, 1000000.0, 20000.0))]
+    evaluated = []
+    generate = matcher._generate_offer
+    monkeypatch.setattr(matcher, "_generate_offer",
+                        lambda **kwargs: evaluated.append(kwargs["term"]) or generate(**kwargs))
+
+    offers = [offer for batch, _, _ in matcher.iter_offer_batches(CUSTOMER, inventory) for offer in batch]
+
+    assert 0 < len(evaluated) < len(inventory) * len(VALID_LOAN_TERMS)
+    assert all(in_tiers(offer) for offer in offers)
+    assert len(offers) == len(evaluated)
+
+
+class TestReverseMatching:
+
+    @pytest.fixture
+    def customers(self):
+        rng = np.random.default_rng(7)
+        size = 60
+        return pd.DataFrame({
+            "customer_id": [f"C{i}" for i in range(size)],
+            "risk_profile_name": rng.choice(["A", "A1", "B", "C1", "Z"], size),
+            "risk_profile_index": rng.choice([2, 3, 5, 6, 99], size),
+            "vehicle_equity": rng.uniform(20000, 300000, size),
+            "current_monthly_payment": rng.uniform(3000, 15000, size),
+            "current_car_price": rng.uniform(100000, 400000, size),
+            "current_car_year": rng.choice([2016, 2018, 2020, 0, np.nan], size),
+            "current_car_km": rng.choice([20000.0, 60000.0, 120000.0, 0.0, np.nan], size),
+        })
+
+    @pytest.mark.parametrize("car_price", [180000.0, 320000.0, 550000.0])
+    def test_matches_forward_matcher(self, matcher, customers, car_price):
+        car = {"car_id": "X1", "model": "CAR", "car_price": car_price, "year": 2018, "kilometers": 50000.0}
+
+        result = ReverseMatcher().customers_for_car(car, customers, version="v1")
+
+        expected = {}
+        for customer in customers.to_dict("records"):
+            # Stage 1 trade-up filter, then Stage 2 matching, as in the forward flow
+            tradeups = filter_tradeup_inventory(pd.DataFrame([car]), customer)
+            offers = matcher.find_all_viable(customer, tradeups)["offers"]
+            found = sorted((offer["term"], tier) for tier, tier_offers in offers.items() for offer in tier_offers)
+            if found:
+                expected[customer["customer_id"]] = found
+        actual = {row["customer_id"]: sorted((offer["term"], offer["tier"]) for offer in row["offers"])
+                  for row in result["customers"]}
+        assert actual == expected
+        assert result["total_customers"] == len(expected)
+
+    def test_tier_filter_limit_and_cached_features(self, customers):
+        reverse = ReverseMatcher()
+        car = {"car_id": "X1", "car_price": 320000.0}
+
+        everything = reverse.customers_for_car(car, customers, version="v1")
+        refresh = reverse.customers_for_car(car, customers, version="v1", tiers=["refresh"], limit=2)
+
+        assert reverse.features(customers, "v1") is reverse.features(customers, "v1")
+        assert refresh["tiers"] == ["Refresh"]
+        assert refresh["total_customers"] == everything["tier_counts"]["Refresh"]
+        assert len(refresh["customers"]) == min(2, refresh["total_customers"])
+        assert all(offer["tier"] == "Refresh" for row in refresh["customers"] for offer in row["offers"])
+
+    def test_unknown_tier(self):
+        with pytest.raises(ValueError):
+            normalize_tiers(["premium"])
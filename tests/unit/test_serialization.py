@@ -0,0 +1,110 @@
+"""
+Tests for the fast JSON response path (encoding and payload shaping)
+"""
+import json
+from datetime import datetime
+from decimal import Decimal
+
+import numpy as np
+import pytest
+
+from app.utils import serialization
+from app.utils.serialization import (
+    FastJSONResponse, dumps, shape_amortization, shape_offer, shape_offer_response
+)
+
+OFFER = {
+    "customer_id": "C1",
+    "car_id": "X1",
+    "term": 48,
+    "monthly_payment": 8123.456789,
+    "new_monthly_payment": 8123.456789,
+    "payment_delta": 0.031234567,
+    "interest_rate": 0.2199999,
+    "npv": 12345.6789,
+    "gps_monthly_fee": 406.0,
+    "gps_monthly_fee_base": 350.0,
+    "gps_monthly_fee_iva": 56.0,
+}
+
+
+@pytest.fixture(params=["orjson", "stdlib"])
+def encoder(request, monkeypatch):
+    if request.param == "stdlib":
+        monkeypatch.setattr(serialization, "orjson", None)
+    elif serialization.orjson is None:
+        pytest.skip("orjson not installed")
+    return request.param
+
+
+class TestDumps:
+
+    def test_encodes_numpy_decimal_and_dates(self, encoder):
+        content = {
+            "npv": np.float64(1.5),
+            "count": np.int64(3),
+            "amount": Decimal("2.25"),
+            "at": datetime(2024, 1, 2, 3, 4, 5),
+            "offers": [OFFER],
+        }
+
+        decoded = json.loads(dumps(content))
+
+        assert decoded["npv"] == 1.5
+        assert decoded["count"] == 3
+        assert decoded["amount"] == 2.25
+        assert decoded["at"] == "2024-01-02T03:04:05"
+        assert decoded["offers"] == [OFFER]
+
+    def test_non_finite_floats_encode_as_null(self, encoder):
+        content = {"a": float("nan"), "b": [float("inf"), 1.5], "c": np.float64("-inf"), "d": (float("nan"),)}
+
+        assert dumps(content) == b'{"a":null,"b":[null,1.5],"c":null,"d":[null]}'
+
+    def test_response_body(self, encoder):
+        response = FastJSONResponse({"a": 1})
+
+        assert response.body == b'{"a":1}'
+        assert response.media_type == "application/json"
+
+
+class TestShaping:
+
+    def test_offer_rounding_keeps_ratio_precision(self):
+        shaped = shape_offer(OFFER, round_digits=2)
+
+        assert shaped["monthly_payment"] == 8123.46
+        assert shaped["npv"] == 12345.68
+        assert shaped["payment_delta"] == 0.031235
+        assert shaped["interest_rate"] == 0.22
+        assert shaped["term"] == 48
+
+    def test_compact_offer_drops_redundant_fields(self):
+        shaped = shape_offer(OFFER, compact=True)
+
+        assert set(OFFER) - set(shaped) == {
+            "customer_id", "new_monthly_payment", "gps_monthly_fee_base", "gps_monthly_fee_iva"
+        }
+        assert OFFER["new_monthly_payment"]  # original untouched
+
+    def test_offer_response_is_smaller(self):
+        result = {"offers": {"refresh": [OFFER] * 50, "upgrade": []}, "total_offers": 50}
+
+        shaped = shape_offer_response(result, round_digits=2, compact=True)
+
+        assert len(dumps(shaped)) < 0.7 * len(dumps(result))
+        assert shape_offer_response(result) is result
+
+    def test_compact_amortization(self):
+        row = {"cuota": 1, "saldo_insoluto": 1000.123, "exigible": 50.5, "interes": 9.87654,
+               "beginning_balance": 1000.123, "payment": 50.5, "principal": 40.1,
+               "interest": 10.2, "ending_balance": 960.0, "balance": 960.0}
+        data = {"schedule": [row], "table": [row], "payment_total": 50.5555}
+
+        shaped = shape_amortization(data, round_digits=2, compact=True)
+
+        assert "schedule" not in shaped
+        assert shaped["table"] == [{"cuota": 1, "saldo_insoluto": 1000.12, "exigible": 50.5,
+                                    "interes": 9.88, "interest": 10.2}]
+        assert shaped["payment_total"] == 50.56
+        assert shape_amortization(data, round_digits=2)["schedule"] == shape_amortization(data, round_digits=2)["table"]
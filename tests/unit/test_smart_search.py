@@ -0,0 +1,152 @@
+"""
+Unit tests for the batched smart search subsidy solver
+"""
+import pandas as pd
+import pytest
+
+from config.config import GPS_INSTALLATION_FEE, INSURANCE_TABLE, IVA_RATE
+from engine import payment_utils
+from engine.smart_search import ConsiderationFilters, SmartSearchEngine, SubsidyConfig
+
+CUSTOMER = {
+    "customer_id": "C1",
+    "risk_profile_name": "A1",
+    "risk_profile_index": 3,
+    "vehicle_equity": 90000.0,
+    "current_monthly_payment": 8000.0,
+}
+
+# Coarse grid keeps the scalar reference fast
+CONFIG = SubsidyConfig(cac_step=2500, service_fee_step=0.01, cxa_step=0.01)
+
+
+@pytest.fixture
+def engine(monkeypatch):
+    get_bool = payment_utils.config.get_bool
+    monkeypatch.setattr(payment_utils.config, "get_bool",
+                        lambda key, *args: False if key == "features.enable_audit_logging" else get_bool(key, *args))
+    return SmartSearchEngine()
+
+
+def build_cars(prices):
+    return [{"car_id": i, "model": f"CAR {i}", "sales_price": price} for i, price in enumerate(prices)]
+
+
+def test_batch_matches_scalar_search(engine):
+    cars = build_cars([180000.0, 260000.0, 340000.0, 450000.0, 600000.0])
+
+    batch = engine.solve_minimum_subsidy_batch(CUSTOMER, cars, CONFIG)
+
+    for car, result in zip(cars, batch):
+        expected = engine.solve_minimum_subsidy(CUSTOMER, car, CONFIG)
+        for field in ("viable", "failure_reason", "service_fee_pct", "cac_bonus", "cxa_pct",
+                      "term", "iterations_tried"):
+            assert getattr(result, field) == getattr(expected, field)
+        assert result.monthly_payment == pytest.approx(expected.monthly_payment)
+        assert result.npv == pytest.approx(expected.npv)
+
+
+def test_out_of_range_loans_are_not_offers(engine):
+    customer = {**CUSTOMER, "vehicle_equity": 4000000.0}
+    car, = build_cars([12000000.0])
+
+    result, = engine.solve_minimum_subsidy_batch(customer, [car], CONFIG)
+
+    # The scalar search raises on the first fee outside the validation bounds
+    with pytest.raises(payment_utils.FinancialValidationError):
+        engine.solve_minimum_subsidy(customer, car, CONFIG)
+    assert not result.viable
+    assert result.failure_reason == "No offers could be calculated"
+
+
+def test_search_stops_at_max_results(engine, monkeypatch):
+    monkeypatch.setattr("engine.smart_search.SMART_SEARCH_BATCH_SIZE", 2)
+    inventory = pd.DataFrame(build_cars([260000.0] * 7))
+
+    result = engine.search_smart_offers(CUSTOMER, inventory, ConsiderationFilters(), CONFIG, max_results=3)
+
+    assert result["statistics"]["total_candidates"] == 7
+    assert result["statistics"]["total_analyzed"] == 3
+    assert len(result["viable_offers"]) == 3
+
+
+class TestMinimumSubsidyOffers:
+
+    PARAMS = {"target_payment_delta": 0.05, "max_subsidy": 50000, "subsidy_step": 1000,
+              "service_fee_pct": 0.04, "cxa_pct": 0.04, "kavak_total_amount": 25000}
+
+    @staticmethod
+    def payment(car_price, term, interest_rate, subsidy, params=PARAMS):
+        gps_install = GPS_INSTALLATION_FEE * (1 + IVA_RATE)
+        equity = CUSTOMER["vehicle_equity"] + subsidy - car_price * params["cxa_pct"] - gps_install
+        return payment_utils.calculate_monthly_payment(
+            loan_base=car_price - equity,
+            service_fee_amount=car_price * params["service_fee_pct"],
+            kavak_total_amount=params["kavak_total_amount"],
+            insurance_amount=INSURANCE_TABLE[CUSTOMER["risk_profile_name"]],
+            annual_rate_nominal=interest_rate,
+            term_months=term,
+            gps_install_fee=gps_install,
+        )["payment_total"]
+
+    def test_subsidy_is_the_smallest_step_meeting_the_target(self, engine):
+        inventory = [{"car_id": i, "model": f"CAR {i}", "car_price": price}
+                     for i, price in enumerate([230000.0, 260000.0, 290000.0])]
+        target = CUSTOMER["current_monthly_payment"] * 1.05
+
+        result = engine.find_minimum_subsidy_offers(CUSTOMER, inventory, self.PARAMS)
+
+        assert result["offers_found"] == 3
+        assert [offer["subsidy"] for offer in result["offers"]] == sorted(
+            offer["subsidy"] for offer in result["offers"])
+        for offer in result["offers"]:
+            args = (offer["car_price"], offer["term"], offer["interest_rate"])
+            assert offer["monthly_payment"] == pytest.approx(self.payment(*args, offer["subsidy"]))
+            assert offer["monthly_payment"] <= target
+            if offer["subsidy"] > 0:
+                assert self.payment(*args, offer["subsidy"] - 1000) > target
+
+    def test_term_preference_and_max_subsidy(self, engine):
+        inventory = [{"car_id": 1, "model": "CAR", "car_price": 290000.0},
+                     {"car_id": 2, "model": "CAR", "car_price": 2000000.0}]
+
+        result = engine.find_minimum_subsidy_offers(
+            CUSTOMER, inventory, {**self.PARAMS, "term_preference": 72})
+
+        assert [offer["car_id"] for offer in result["offers"]] == ["1"]
+        assert result["offers"][0]["term"] == 72
+        assert result["statistics"] == {"candidates": 2, "feasible": 1,
+                                        "processing_time": result["statistics"]["processing_time"]}
+
+
+class TestConsiderationSet:
+
+    @pytest.fixture
+    def inventory(self):
+        return pd.DataFrame({
+            "car_id": ["a", "b", "c"],
+            "model": ["Nissan Versa 2019", "Mazda 3 2021", "Nissan Sentra 2023"],
+            "year": [2019, 2021, 2023],
+            "kilometers": [40000, 30000, 10000],
+            "sales_price": [250000.0, 320000.0, 410000.0],
+        })
+
+    def test_customer_history_filters(self, engine, inventory):
+        filters = ConsiderationFilters(only_newer_than_current=True, same_brand_preference=True)
+        customer = {"current_car_year": 2019, "current_car_brand": "nissan"}
+
+        result = engine.filter_consideration_set(inventory, filters, customer)
+
+        assert result["car_id"].tolist() == ["c"]
+
+    @pytest.mark.parametrize("customer, filters", [
+        ({"current_car_year": float("nan")}, ConsiderationFilters(only_newer_than_current=True)),
+        ({"current_car_km": float("nan")}, ConsiderationFilters(max_km_vs_current=1.0)),
+        ({"current_car_brand": "Nissan"}, ConsiderationFilters(brands=["Mazda"], same_brand_preference=True)),
+    ])
+    def test_unknown_current_car_or_contradictory_filters_match_nothing(self, engine, inventory,
+                                                                         customer, filters):
+        result = engine.filter_consideration_set(inventory, filters, customer)
+
+        assert result.empty
+        assert {"brand", "year", "vehicle_class"} <= set(result.columns)